@@ -1,6 +1,7 @@
 # features/add/tabs/manual/logic.py
 import re
 from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 @dataclass
 class ManualCalc:
@@ -72,7 +73,7 @@ class ManualCalc:
     # —— 運算子 / 等號 / 取得結果 ——————————————
     def op_press(self, op: str):
         # op in '+-*/'
-        cur = self._to_float(self.buffer)
+        cur = self._to_decimal(self.buffer)
         if self.op is None:
             self.left = cur
         else:
@@ -88,7 +89,7 @@ class ManualCalc:
         if self.op is None or self.left is None:
             self.equals_mode = False
             return self.buffer
-        cur = self._to_float(self.buffer)
+        cur = self._to_decimal(self.buffer)
         res = self._calc(self.left, cur, self.op)
         self.left, self.op, self.await_rhs = None, None, False
         self.buffer = self._fmt_amount(res)
@@ -96,11 +97,12 @@ class ManualCalc:
         return self.buffer
 
     # —— 工具 ————————————————————————————————
-    def _to_float(self, s: str) -> float:
-        try: return float(s)
-        except: return 0.0
+    def _to_decimal(self, s: str) -> Decimal:
+        # 全程 Decimal，避免 0.1 + 0.2 這類二進位誤差
+        try: return Decimal(s)
+        except (InvalidOperation, TypeError, ValueError): return Decimal(0)
 
-    def _calc(self, a: float, b: float, op: str) -> float:
+    def _calc(self, a: Decimal, b: Decimal, op: str) -> Decimal:
         if op == "+": return a + b
         if op == "-": return a - b
         if op == "*": return a * b
@@ -171,10 +173,10 @@ class ManualCalc:
                 neg = False
             self.buffer = ("-" if neg else "") + int_part
 
-    def _fmt_amount(self, v: float) -> str:
-        # 顯示階段按幣種位數四捨五入
-        s = f"{v:.{self.decimals}f}"
+    def _fmt_amount(self, v: Decimal) -> str:
+        # 顯示階段按幣種位數四捨五入（half-up，與 core.money.to_minor 一致）
+        q = v.quantize(Decimal(1).scaleb(-self.decimals), rounding=ROUND_HALF_UP)
         # 去掉 -0.00 -> 0.00
-        if float(s) == 0.0:
-            s = f"{0:.{self.decimals}f}"
-        return s
+        if q == 0:
+            q = abs(q)
+        return f"{q:f}"
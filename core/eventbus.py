@@ -19,3 +19,8 @@ class EventBus:
 # Topics
 EV_TX_CREATED = "tx_created"
 EV_RATES_UPDATED = "rates_updated"
+EV_IMPORT_PROGRESS = "import_progress"
+EV_SYNC_APPLIED = "sync_applied"
+EV_OCR_PROGRESS = "ocr_progress"
+EV_INVOICE_WINNERS = "invoice_winners"
+EV_RULES_APPLIED = "rules_applied"
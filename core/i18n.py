@@ -23,20 +23,54 @@ _STRINGS: Dict[str, Dict[str, str]] = {
         "ADD_TAB_MANUAL": "Manual",
         "ADD_TAB_COMMON": "Common",
         "ADD_TAB_QUICK": "Quick",
-        "SELECT_IMAGE": "Select Image (stub)",
-        "SCAN_OCR": "Scan (OCR - later)",
+        "SELECT_IMAGE": "Select images",
+        "SCAN_OCR": "Scan folder",
+        "OCR_HINT": "Pick receipt images or a folder to scan",
+        "OCR_UNAVAILABLE": "No OCR engine installed",
+        "OCR_PROGRESS": "Scanned {done} / {total}",
+        "ADD_ALL": "Add all",
+        "RECEIPTS_ADDED": "{count} receipt(s) added",
+        "IMPORT_EINVOICE": "Import e-invoices",
+        "EINVOICE_IMPORTED": "{count} e-invoice(s) imported, {duplicates} already imported",
+        "ITEM_PRICE": "Look up item price",
+        "PRICE_TREND": "{name}  {last}  (low {low} / high {high}, {count}×)",
+        "CHECK_LOTTERY": "Check lottery",
+        "LOTTERY_RESULT": "{period}: {winners} of {checked} invoice(s) won, {total} in total",
+        "LOTTERY_NO_PERIOD": "No winning numbers found in the file",
+        "RULES": "Auto-categorize rules",
+        "RULE_KEYWORDS": "Keywords (separate with |)",
+        "RULE_MIN_AMOUNT": "Min amount",
+        "RULE_MAX_AMOUNT": "Max amount",
+        "RULE_CATEGORY": "Pick a category",
+        "RULE_FIELD_ANY": "Merchant or note",
+        "RULE_FIELD_MERCHANT": "Merchant",
+        "RULE_FIELD_NOTE": "Note",
+        "RULES_REAPPLY": "Apply to history",
+        "RULES_APPLIED": "{updated} of {scanned} transaction(s) categorized",
+        "PRIZE_SPECIAL": "Special prize",
+        "PRIZE_GRAND": "Grand prize",
+        "PRIZE_FIRST": "1st prize",
+        "PRIZE_SECOND": "2nd prize",
+        "PRIZE_THIRD": "3rd prize",
+        "PRIZE_FOURTH": "4th prize",
+        "PRIZE_FIFTH": "5th prize",
+        "PRIZE_SIXTH": "6th prize",
         "RECENT": "Recent",
         "FREQUENT": "Frequent",
         "SELECTED_CATEGORY": "Selected: {name}",
         "ADD": "Add",
         "DUPLICATE": "Duplicate",
         "NO_DATA": "No data",
+        "LOADING": "Loading...",
 
         "CATEGORY_SELECT":"Category Select",
         "SEARCH_CATEGORY":"Search category...",
         "RECENTLY_USED":"Recently Used",
+        "SUGGESTED":"Suggested",
         "ALL_CATEGORIES":"All Categories",
         "NO_MATCHES":"No matches",
+        "SEARCH_TX": "Search merchant, note, receipt...",
+        "SEARCH_TRUNCATED": "Search term too short; results may be incomplete",
         
         "EXPENSE": "Expense",
         "INCOME": "Income",
@@ -44,6 +78,11 @@ _STRINGS: Dict[str, Dict[str, str]] = {
         "CATEGORY": "Category",
         "ACCOUNTS": "Accounts",
         "NEXT": "NEXT",
+        "BOOK_TOTALS": "Expense {expense} / Income {income} ({currency})",
+        "NO_RATE": "No exchange rate: {codes}",
+        "ADD_TAG": "Add tag",
+        "PHOTOS": "{count} photo(s)",
+        "TAG_TOTALS": "{count} tagged",
     },
     "zh-TW": {
         "TAB_HOME": "首頁",
@@ -63,20 +102,54 @@ _STRINGS: Dict[str, Dict[str, str]] = {
         "ADD_TAB_MANUAL": "手動輸入",
         "ADD_TAB_COMMON": "常用",
         "ADD_TAB_QUICK": "快速",
-        "SELECT_IMAGE": "選擇圖片（暫代）",
-        "SCAN_OCR": "掃描（OCR 稍後）",
+        "SELECT_IMAGE": "選擇圖片",
+        "SCAN_OCR": "掃描資料夾",
+        "OCR_HINT": "選擇收據圖片或資料夾來掃描",
+        "OCR_UNAVAILABLE": "未安裝 OCR 引擎",
+        "OCR_PROGRESS": "已掃描 {done} / {total}",
+        "ADD_ALL": "全部新增",
+        "RECEIPTS_ADDED": "已新增 {count} 張收據",
+        "IMPORT_EINVOICE": "匯入載具發票",
+        "EINVOICE_IMPORTED": "已匯入 {count} 張發票，{duplicates} 張先前已匯入",
+        "ITEM_PRICE": "查品項價格",
+        "PRICE_TREND": "{name}  {last}（最低 {low} / 最高 {high}，{count} 次）",
+        "CHECK_LOTTERY": "對獎",
+        "LOTTERY_RESULT": "{period}：{checked} 張發票中 {winners} 張中獎，共 {total}",
+        "LOTTERY_NO_PERIOD": "檔案中沒有中獎號碼",
+        "RULES": "自動分類規則",
+        "RULE_KEYWORDS": "關鍵字（以 | 分隔）",
+        "RULE_MIN_AMOUNT": "最低金額",
+        "RULE_MAX_AMOUNT": "最高金額",
+        "RULE_CATEGORY": "選擇類別",
+        "RULE_FIELD_ANY": "商店或備註",
+        "RULE_FIELD_MERCHANT": "商店",
+        "RULE_FIELD_NOTE": "備註",
+        "RULES_REAPPLY": "套用到歷史",
+        "RULES_APPLIED": "{scanned} 筆交易中已分類 {updated} 筆",
+        "PRIZE_SPECIAL": "特別獎",
+        "PRIZE_GRAND": "特獎",
+        "PRIZE_FIRST": "頭獎",
+        "PRIZE_SECOND": "二獎",
+        "PRIZE_THIRD": "三獎",
+        "PRIZE_FOURTH": "四獎",
+        "PRIZE_FIFTH": "五獎",
+        "PRIZE_SIXTH": "六獎",
         "RECENT": "最近使用",
         "FREQUENT": "常用",
         "SELECTED_CATEGORY": "已選：{name}",
         "ADD": "加入",
         "DUPLICATE": "複製",
         "NO_DATA": "沒有資料",
+        "LOADING": "載入中…",
 
         "CATEGORY_SELECT":"選擇類別",
         "SEARCH_CATEGORY":"搜尋類別...",
         "RECENTLY_USED":"最近使用",
+        "SUGGESTED":"建議",
         "ALL_CATEGORIES":"全部類別",
         "NO_MATCHES":"沒有符合的結果",
+        "SEARCH_TX": "搜尋商店、備註、收據…",
+        "SEARCH_TRUNCATED": "搜尋字太短，結果可能不完整",
 
         "EXPENSE": "支出",
         "INCOME": "收入",
@@ -84,6 +157,11 @@ _STRINGS: Dict[str, Dict[str, str]] = {
         "CATEGORY": "類別",
         "ACCOUNTS": "帳戶",
         "NEXT": "下一步",
+        "BOOK_TOTALS": "支出 {expense} / 收入 {income}（{currency}）",
+        "NO_RATE": "缺匯率：{codes}",
+        "ADD_TAG": "新增標籤",
+        "PHOTOS": "{count} 張照片",
+        "TAG_TOTALS": "{count} 筆符合標籤",
     },
     "ja": {
         "TAB_HOME": "ホーム",
@@ -103,20 +181,54 @@ _STRINGS: Dict[str, Dict[str, str]] = {
         "ADD_TAB_MANUAL": "手動",
         "ADD_TAB_COMMON": "よく使う",
         "ADD_TAB_QUICK": "クイック",
-        "SELECT_IMAGE": "画像を選択（仮）",
-        "SCAN_OCR": "スキャン（OCR 後で）",
+        "SELECT_IMAGE": "画像を選択",
+        "SCAN_OCR": "フォルダをスキャン",
+        "OCR_HINT": "レシート画像かフォルダを選んでスキャン",
+        "OCR_UNAVAILABLE": "OCR エンジンが未インストールです",
+        "OCR_PROGRESS": "スキャン済み {done} / {total}",
+        "ADD_ALL": "すべて追加",
+        "RECEIPTS_ADDED": "{count} 件のレシートを追加",
+        "IMPORT_EINVOICE": "電子発票を取り込む",
+        "EINVOICE_IMPORTED": "{count} 件の発票を取り込みました（取り込み済み {duplicates} 件）",
+        "ITEM_PRICE": "商品の価格を調べる",
+        "PRICE_TREND": "{name}  {last}（最安 {low} / 最高 {high}、{count} 回）",
+        "CHECK_LOTTERY": "当選番号を照合",
+        "LOTTERY_RESULT": "{period}：{checked} 件中 {winners} 件が当選、合計 {total}",
+        "LOTTERY_NO_PERIOD": "ファイルに当選番号がありません",
+        "RULES": "自動分類ルール",
+        "RULE_KEYWORDS": "キーワード（| で区切る）",
+        "RULE_MIN_AMOUNT": "最小金額",
+        "RULE_MAX_AMOUNT": "最大金額",
+        "RULE_CATEGORY": "カテゴリを選択",
+        "RULE_FIELD_ANY": "店名またはメモ",
+        "RULE_FIELD_MERCHANT": "店名",
+        "RULE_FIELD_NOTE": "メモ",
+        "RULES_REAPPLY": "履歴に適用",
+        "RULES_APPLIED": "{scanned} 件中 {updated} 件を分類しました",
+        "PRIZE_SPECIAL": "特別賞",
+        "PRIZE_GRAND": "特賞",
+        "PRIZE_FIRST": "1等",
+        "PRIZE_SECOND": "2等",
+        "PRIZE_THIRD": "3等",
+        "PRIZE_FOURTH": "4等",
+        "PRIZE_FIFTH": "5等",
+        "PRIZE_SIXTH": "6等",
         "RECENT": "最近",
         "FREQUENT": "頻繁",
         "SELECTED_CATEGORY": "選択: {name}",
         "ADD": "追加",
         "DUPLICATE": "複製",
         "NO_DATA": "データなし",
+        "LOADING": "読み込み中…",
 
         "CATEGORY_SELECT":"カテゴリ選択",
         "SEARCH_CATEGORY":"カテゴリを検索…",
         "RECENTLY_USED":"最近使った",
+        "SUGGESTED":"おすすめ",
         "ALL_CATEGORIES":"一覧",
         "NO_MATCHES":"該当がありません",
+        "SEARCH_TX": "店名・メモ・レシートを検索…",
+        "SEARCH_TRUNCATED": "検索語が短すぎるため、結果が一部のみの可能性があります",
 
         "EXPENSE": "支出",
         "INCOME": "収入",
@@ -124,6 +236,11 @@ _STRINGS: Dict[str, Dict[str, str]] = {
         "CATEGORY": "カテゴリ",
         "ACCOUNTS": "口座",
         "NEXT": "次へ",
+        "BOOK_TOTALS": "支出 {expense} / 収入 {income}（{currency}）",
+        "NO_RATE": "為替レートなし：{codes}",
+        "ADD_TAG": "タグを追加",
+        "PHOTOS": "写真 {count} 枚",
+        "TAG_TOTALS": "タグ該当 {count} 件",
     },
 }
 
@@ -0,0 +1,97 @@
+# core/money.py
+"""
+金額：資料庫一律存「最小單位整數」（minor units），依 core.currency 的小數位縮放。
+  TWD 120    → 120      （decimals = 0）
+  USD 12.34  → 1234     （decimals = 2）
+計算用 Decimal，四捨五入一律 ROUND_HALF_UP。
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Union
+
+from .currency import DECIMALS_BY_CODE, currency_symbol
+
+Number = Union[Decimal, int, float, str]
+
+# 未登錄的幣別保守用 2 位，避免把小數無聲捨掉
+DEFAULT_DECIMALS = 2
+
+_ONE = Decimal(1)
+
+
+def decimals_of(currency: str) -> int:
+    return int(DECIMALS_BY_CODE.get(currency, DEFAULT_DECIMALS))
+
+
+def to_decimal(value: Number) -> Decimal:
+    """任意輸入 → Decimal；float 走 repr，無法解析或不是有限值（NaN / Infinity）時為 0。"""
+    if isinstance(value, Decimal):
+        return value
+    try:
+        if isinstance(value, float):
+            d = Decimal(repr(value))  # Decimal(0.1) 會帶出二進位誤差
+        else:
+            d = Decimal(str(value).strip() or "0")
+    except InvalidOperation:
+        return Decimal(0)
+    return d if d.is_finite() else Decimal(0)
+
+
+def to_minor(amount: Number, currency: str) -> int:
+    """主單位金額 → 最小單位整數。"""
+    d = to_decimal(amount).scaleb(decimals_of(currency))
+    return int(d.quantize(_ONE, rounding=ROUND_HALF_UP))
+
+
+def from_minor(minor: int, currency: str) -> Decimal:
+    """最小單位整數 → 主單位 Decimal（位數固定為該幣別的小數位）。"""
+    return Decimal(int(minor)).scaleb(-decimals_of(currency))
+
+
+def format_minor(minor: int, currency: str, symbol: bool = False) -> str:
+    s = f"{from_minor(minor, currency):,f}"
+    return f"{currency_symbol(currency)}{s}" if symbol else s
+
+
+@dataclass(frozen=True)
+class Money:
+    minor: int
+    currency: str
+
+    @classmethod
+    def of(cls, amount: Number, currency: str) -> "Money":
+        return cls(to_minor(amount, currency), currency)
+
+    @property
+    def amount(self) -> Decimal:
+        return from_minor(self.minor, self.currency)
+
+    def _same(self, other: "Money") -> None:
+        if not isinstance(other, Money):
+            raise TypeError(f"expected Money, got {type(other).__name__}")
+        if other.currency != self.currency:
+            raise ValueError(f"currency mismatch: {self.currency} vs {other.currency}")
+
+    def __add__(self, other: "Money") -> "Money":
+        self._same(other)
+        return Money(self.minor + other.minor, self.currency)
+
+    def __sub__(self, other: "Money") -> "Money":
+        self._same(other)
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self) -> "Money":
+        return Money(-self.minor, self.currency)
+
+    def __abs__(self) -> "Money":
+        return Money(abs(self.minor), self.currency)
+
+    def __bool__(self) -> bool:
+        return self.minor != 0
+
+    def format(self, symbol: bool = False) -> str:
+        return format_minor(self.minor, self.currency, symbol)
+
+    def __str__(self) -> str:
+        return f"{self.format()} {self.currency}"
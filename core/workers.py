@@ -0,0 +1,21 @@
+# core/workers.py
+"""CPU 密集批次工作（CSV 正規化、收據 OCR）共用的 process pool 設定。"""
+from __future__ import annotations
+import os
+from concurrent.futures import Executor, Future
+
+
+def default_workers() -> int:
+    # 留一顆核心給 UI 與 DB writer
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+class InProcessExecutor(Executor):
+    """workers=0 時用：直接在目前行程執行（小檔案 / 不能開子行程的平台）。"""
+    def submit(self, fn, *args, **kwargs) -> Future:
+        fut: Future = Future()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+        return fut
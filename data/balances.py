@@ -0,0 +1,122 @@
+# data/balances.py
+"""
+AccountBalance 重建 / 驗證。
+
+    python -m data.balances --verify     # 只比對，不修改
+    python -m data.balances --rebuild    # 以 [Transaction] 全量重算
+"""
+from __future__ import annotations
+import argparse
+import sqlite3
+from typing import Any, Dict, List
+
+# 與 BalanceDao 舊版三個 SUM 子查詢同語意：income/adjust 加、expense 減、transfer 不計
+# 金額為最小單位整數（core.money），SUM 精確，不需要 ROUND / EPSILON
+_DELTA_SQL = """
+SELECT account_id, currency,
+       SUM(CASE type WHEN 'expense' THEN -amount ELSE amount END) AS delta
+FROM [Transaction]
+WHERE type IN ('income','expense','adjust')
+GROUP BY account_id, currency
+"""
+
+# 帳戶餘額快取：只存交易造成的變動量（balance_init 另計），由 [Transaction] 觸發器維護。
+# 依幣別分開累計：不同幣別的最小單位不能直接相加
+BALANCE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS AccountBalance (
+    account_id INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    delta INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_id, currency),
+    FOREIGN KEY(account_id) REFERENCES Account(id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_balance_ins AFTER INSERT ON [Transaction]
+WHEN NEW.type IN ('income','expense','adjust')
+BEGIN
+    INSERT INTO AccountBalance(account_id, currency, delta)
+    VALUES (NEW.account_id, NEW.currency, CASE NEW.type WHEN 'expense' THEN -NEW.amount ELSE NEW.amount END)
+    ON CONFLICT(account_id, currency) DO UPDATE SET delta = delta + excluded.delta;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_balance_del AFTER DELETE ON [Transaction]
+WHEN OLD.type IN ('income','expense','adjust')
+BEGIN
+    UPDATE AccountBalance
+    SET delta = delta - CASE OLD.type WHEN 'expense' THEN -OLD.amount ELSE OLD.amount END
+    WHERE account_id = OLD.account_id AND currency = OLD.currency;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_balance_upd AFTER UPDATE OF account_id, type, amount, currency ON [Transaction]
+BEGIN
+    UPDATE AccountBalance
+    SET delta = delta - CASE OLD.type WHEN 'expense' THEN -OLD.amount
+                                      WHEN 'transfer' THEN 0 ELSE OLD.amount END
+    WHERE account_id = OLD.account_id AND currency = OLD.currency;
+    INSERT INTO AccountBalance(account_id, currency, delta)
+    VALUES (NEW.account_id, NEW.currency, CASE NEW.type WHEN 'expense' THEN -NEW.amount
+                                                        WHEN 'transfer' THEN 0 ELSE NEW.amount END)
+    ON CONFLICT(account_id, currency) DO UPDATE SET delta = delta + excluded.delta;
+END;
+"""
+
+# migration 回填用：以 [Transaction].id 區間 [?, ?) 分批累加
+BACKFILL_SQL = f"""
+INSERT INTO AccountBalance(account_id, currency, delta)
+{_DELTA_SQL.replace("WHERE type IN", "WHERE id >= ? AND id < ? AND type IN")}
+ON CONFLICT(account_id, currency) DO UPDATE SET delta = delta + excluded.delta
+"""
+
+
+def rebuild_balances(conn: sqlite3.Connection) -> int:
+    """清空並重算 AccountBalance；回傳寫入的 (帳戶, 幣別) 列數。"""
+    with conn:
+        conn.execute("DELETE FROM AccountBalance")
+        cur = conn.execute(f"INSERT INTO AccountBalance(account_id, currency, delta) {_DELTA_SQL}")
+        return cur.rowcount
+
+
+def verify_balances(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """回傳快取與實際不一致的 (帳戶, 幣別)（空 list 表示一致）。"""
+    cur = conn.execute(
+        f"""
+        WITH actual AS ({_DELTA_SQL}),
+        keys AS (
+            SELECT account_id, currency FROM actual
+            UNION SELECT account_id, currency FROM AccountBalance
+        )
+        SELECT k.account_id, k.currency,
+               IFNULL(b.delta, 0) AS cached,
+               IFNULL(x.delta, 0) AS actual
+        FROM keys k
+        LEFT JOIN AccountBalance b ON b.account_id = k.account_id AND b.currency = k.currency
+        LEFT JOIN actual x ON x.account_id = k.account_id AND x.currency = k.currency
+        WHERE IFNULL(b.delta, 0) <> IFNULL(x.delta, 0)
+        """
+    )
+    return [dict(r) for r in cur.fetchall()]
+
+
+def main() -> None:
+    from .db import get_conn
+
+    ap = argparse.ArgumentParser(prog="python -m data.balances")
+    ap.add_argument("--rebuild", action="store_true", help="rebuild AccountBalance from [Transaction]")
+    ap.add_argument("--verify", action="store_true", help="report accounts whose cached balance drifted")
+    args = ap.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.rebuild:
+            print(f"rebuilt {rebuild_balances(conn)} account balance(s)")
+        bad = verify_balances(conn)
+        for r in bad:
+            print(f"account {r['account_id']} {r['currency']}: cached={r['cached']} actual={r['actual']}")
+        print("OK" if not bad else f"{len(bad)} mismatch(es)")
+        raise SystemExit(1 if bad else 0)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# data/blobs.py
+"""
+附件檔的內容定址儲存：DATA_DIR/blobs/<sha256 前 2 碼>/<sha256><副檔名>。
+
+Attachment.file_path 存的是 key（"<sha256>.jpg"），不是裝置上的絕對路徑：
+  - 同一張收據加幾次都只有一份檔案（依內容雜湊去重，副檔名不同也算同一份）
+  - key 與裝置無關，同步過去的附件列在另一台裝置上指向同一個 key
+舊資料的 file_path 仍是一般路徑，resolve() 原樣回傳。
+
+寫入時邊複製邊算雜湊（只讀一次），先寫到同目錄的暫存檔再 os.replace，中途當掉不會留下半個 blob。
+縮圖放在 blobs/thumbs/，由 data.thumbs 產生。
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Set
+
+from core.settings import DATA_DIR
+
+BLOB_DIR = DATA_DIR / "blobs"
+
+_CHUNK = 1 << 20
+_KEY_RE = re.compile(r"^[0-9a-f]{64}(\.[0-9a-z]{1,8})?$")
+
+
+def is_blob_key(ref: str) -> bool:
+    return bool(_KEY_RE.match(ref))
+
+
+def _ext(name: str) -> str:
+    ext = Path(name).suffix.lower()
+    return ext if re.fullmatch(r"\.[0-9a-z]{1,8}", ext) else ""
+
+
+class BlobStore:
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self.root = Path(root) if root is not None else BLOB_DIR
+
+    # ───── 寫入 ─────
+    def put_file(self, src: Path | str) -> str:
+        """把 src 收進 store，回傳 key；內容已存在時不再複製。"""
+        with open(src, "rb") as f:
+            return self.put_stream(f, _ext(str(src)))
+
+    def put_bytes(self, data: bytes, ext: str = "") -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self._find(digest)
+        if existing is not None:
+            return existing
+        return self._commit(digest, ext, lambda out: out.write(data))
+
+    def put_stream(self, f: BinaryIO, ext: str = "") -> str:
+        h = hashlib.sha256()
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: f.read(_CHUNK), b""):
+                    h.update(chunk)
+                    out.write(chunk)
+            digest = h.hexdigest()
+            existing = self._find(digest)
+            if existing is not None:
+                return existing
+            dest = self._dir(digest) / f"{digest}{ext}"
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, dest)
+            tmp = None
+            return dest.name
+        finally:
+            if tmp is not None:
+                os.unlink(tmp)
+
+    def _commit(self, digest: str, ext: str, write) -> str:
+        dest = self._dir(digest) / f"{digest}{ext}"
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                write(out)
+            os.replace(tmp, dest)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return dest.name
+
+    # ───── 查詢 ─────
+    def _dir(self, digest: str) -> Path:
+        return self.root / digest[:2]
+
+    def _find(self, digest: str) -> Optional[str]:
+        d = self._dir(digest)
+        if not d.is_dir():
+            return None
+        return next((p.name for p in d.glob(f"{digest}*")), None)
+
+    def path(self, key: str) -> Path:
+        return self._dir(key) / key
+
+    def resolve(self, ref: str) -> Path:
+        """Attachment.file_path → 實際檔案路徑（blob key 或舊資料的一般路徑）。"""
+        return self.path(ref) if is_blob_key(ref) else Path(ref)
+
+    def thumb_path(self, ref: str, size: int) -> Path:
+        # blob 以內容雜湊命名；舊路徑以路徑字串的雜湊命名
+        digest = ref[:64] if is_blob_key(ref) else hashlib.sha256(ref.encode("utf-8")).hexdigest()
+        return self.root / "thumbs" / digest[:2] / f"{digest}-{size}.jpg"
+
+    # ───── 清理 ─────
+    def sweep(self, keep: Iterable[str]) -> int:
+        """刪掉 keep 以外的 blob 與其縮圖（例如交易刪除後沒人引用的收據）；回傳刪除的 blob 數。"""
+        digests = {k[:64] for k in keep if is_blob_key(k)}
+        removed = 0
+        if not self.root.is_dir():
+            return 0
+        for p in self.root.glob("??/*"):
+            if is_blob_key(p.name) and p.name[:64] not in digests:
+                p.unlink()
+                removed += 1
+        for p in self.root.glob("thumbs/??/*.jpg"):
+            if p.name[:64] not in digests:
+                p.unlink()
+        return removed
+
+
+def referenced_in(conn: sqlite3.Connection) -> Set[str]:
+    """目前 Attachment 引用的 blob key。"""
+    return {r[0] for r in conn.execute("SELECT DISTINCT file_path FROM Attachment") if is_blob_key(r[0])}
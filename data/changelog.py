@@ -0,0 +1,120 @@
+# data/changelog.py
+"""
+ChangeLog：同步用的變更紀錄，由 [Transaction] 觸發器維護。
+
+每個 [Transaction].uid 只留最新一筆（INSERT OR REPLACE 會換新的 seq），
+所以大小跟著交易筆數走，不會隨編輯次數無限成長。
+  seq        AUTOINCREMENT，不重用；對各 peer 的推送進度（high-water mark）以此為準
+  op         'U' 新增 / 修改，'D' 刪除（同時是 tombstone：刪除為終局，之後的修改不會讓它復活）
+  device_id  'U'：本機寫入 = 本機裝置（待推送）；套用遠端 change 後由 domain.sync 改成 '@<peer>'，
+             合併結果含有對方沒有的本機欄位時維持本機裝置
+             'D'：tombstone 的版本裝置（本機刪除 = 本機）
+  at         HLC（見 data.hlc）；'U' = 列的 hlc，'D' = 刪除當下前進的時鐘
+
+uid 是跨裝置的交易識別碼（本機 id 各裝置不同），新增時由 NEW_UID_SQL 產生。
+
+版本以欄位為單位（逐欄 last-writer-wins）：
+  [Transaction].hlc / device_id  整列最新一次寫入的 (HLC, 裝置)
+  [Transaction].clocks           NULL = 所有欄位都是 (hlc, device_id)；
+                                 否則為 JSON {"*": [hlc, 裝置], 欄位: [hlc, 裝置], ...}，
+                                 未列出的欄位取 "*"。欄位名稱同 data.merkle.CONTENT_FIELDS
+標籤 / 附件也各算一個欄位（tags / attachments）：TOUCH_SCHEMA_SQL 讓它們的增刪
+前進時鐘並蓋上所屬交易的對應欄位時鐘，交易因而重新進 ChangeLog 並標記月份需重算雜湊。
+"""
+from __future__ import annotations
+
+from .hlc import CURRENT_SQL, TICK_SQL
+
+DEVICE_KEY = "device_id"
+LOCAL_DEVICE_SQL = f"(SELECT value FROM Settings WHERE key = '{DEVICE_KEY}')"
+
+# 48-bit 毫秒時間戳 + 80-bit 隨機，共 32 個 hex（類似 UUIDv7）；寫在 INSERT 的 VALUES 裡。
+# 時間在前讓新 uid 大致遞增，idx_tx_uid / ChangeLog.uid 的插入落在 B-tree 尾端，批次寫入不會隨機翻頁
+NEW_UID_SQL = (
+    "printf('%012x', CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))"
+    " || lower(hex(randomblob(10)))"
+)
+
+# 本機改寫 [Transaction] 欄位時一定會前進 hlc；內容欄位也列入，漏帶 hlc 的寫入仍會被記下
+_SYNCED_COLS = (
+    "book_id, account_id, type, amount, currency, category_id, "
+    "member_id, merchant, note, date, hlc, device_id"
+)
+
+CHANGELOG_SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT NOT NULL UNIQUE,
+    op TEXT NOT NULL CHECK(op IN ('U','D')),
+    device_id TEXT NOT NULL,
+    at INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_changelog_device_seq ON ChangeLog(device_id, seq);
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_changelog_ins AFTER INSERT ON [Transaction]
+BEGIN
+    INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+    VALUES (NEW.uid, 'U', NEW.device_id, NEW.hlc);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_changelog_upd AFTER UPDATE OF {_SYNCED_COLS} ON [Transaction]
+BEGIN
+    INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+    VALUES (NEW.uid, 'U', NEW.device_id, NEW.hlc);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_changelog_del AFTER DELETE ON [Transaction]
+BEGIN
+    {TICK_SQL};
+    INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+    VALUES (OLD.uid, 'D', IFNULL({LOCAL_DEVICE_SQL}, OLD.device_id), {CURRENT_SQL});
+END;
+"""
+
+
+def clocks_set_sql(fields: str) -> str:
+    """
+    UPDATE 用的運算式：把 fields（SQL 字串，例如 "'$.note', json_array(?, ?)"）寫進 clocks。
+    clocks 為 NULL 時先以目前的 (hlc, device_id) 當 "*"（SET 內讀到的是改寫前的值）。
+    """
+    return f"json_set(IFNULL(clocks, json_object('*', json_array(hlc, device_id))), {fields})"
+
+
+def _touch(table: str, event: str, ref: str, field: str) -> str:
+    local = f"IFNULL({LOCAL_DEVICE_SQL}, device_id)"
+    return f"""
+CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_touch_{event[:3].lower()} AFTER {event} ON {table}
+BEGIN
+    {TICK_SQL};
+    UPDATE [Transaction]
+    SET clocks = {clocks_set_sql(f"'$.{field}', json_array({CURRENT_SQL}, {local})")},
+        hlc = {CURRENT_SQL}, device_id = {local},
+        updated_at = strftime('%Y-%m-%dT%H:%M:%S', 'now')
+    WHERE id = {ref}.tx_id;
+END;
+"""
+
+
+TOUCH_TRIGGERS = (
+    ("TransactionTag", "INSERT", "NEW", "tags"),
+    ("TransactionTag", "DELETE", "OLD", "tags"),
+    ("Attachment", "INSERT", "NEW", "attachments"),
+    ("Attachment", "DELETE", "OLD", "attachments"),
+    ("Attachment", "UPDATE OF file_path, ocr_text", "NEW", "attachments"),
+)
+
+TOUCH_SCHEMA_SQL = "".join(_touch(*t) for t in TOUCH_TRIGGERS)
+
+# migration 重建用
+TRIGGER_NAMES = ["trg_tx_changelog_ins", "trg_tx_changelog_upd", "trg_tx_changelog_del"] + [
+    f"trg_{table.lower()}_touch_{event[:3].lower()}" for table, event, _r, _f in TOUCH_TRIGGERS
+]
+
+# migration / 批次寫入用：以 [Transaction].id 區間 [?, ?) 補上 'U' 紀錄（id 順序 = seq 順序）
+BACKFILL_SQL = """
+INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+SELECT uid, 'U', device_id, hlc FROM [Transaction]
+WHERE id >= ? AND id < ?
+ORDER BY id
+"""
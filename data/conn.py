@@ -0,0 +1,119 @@
+# data/conn.py
+from __future__ import annotations
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from core.settings import DB_PATH, DATA_DIR
+
+# 唯讀連線池大小（同一執行緒內巢狀讀取用；超出時臨時開一條，用完即關）
+READER_POOL_SIZE = 2
+
+
+class ThreadAffinityError(RuntimeError):
+    """在非擁有者執行緒上使用 ConnectionManager。"""
+
+
+class ConnectionManager:
+    """
+    長駐連線管理：
+    - 一條 writer 連線，所有寫入共用（保留 SQLite page cache）
+    - 少量唯讀 WAL reader 連線（mode=ro + query_only）
+    - 綁定建立它的執行緒，其他執行緒呼叫會拋 ThreadAffinityError
+    """
+
+    def __init__(self, path: Path | str = DB_PATH, readers: int = READER_POOL_SIZE) -> None:
+        self.path = Path(path)
+        self.pool_size = max(1, int(readers))
+        self.owner = threading.get_ident()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._idle: List[sqlite3.Connection] = []
+        self._readers: List[sqlite3.Connection] = []
+        self._closed = False
+
+    # ───── 公開 API ─────
+    def writer(self) -> sqlite3.Connection:
+        self._check()
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA synchronous=NORMAL")  # WAL 下足夠安全，commit 少一次 fsync
+            self._writer = conn
+        return self._writer
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        self._check()
+        if self._idle:
+            conn, pooled = self._idle.pop(), True
+        elif len(self._readers) < self.pool_size:
+            conn, pooled = self._open_reader(), True
+            self._readers.append(conn)
+        else:
+            conn, pooled = self._open_reader(), False
+        try:
+            yield conn
+        finally:
+            if pooled and not self._closed:
+                self._idle.append(conn)
+            else:
+                conn.close()
+
+    def close(self) -> None:
+        self._check()
+        self._closed = True
+        for conn in self._readers:
+            conn.close()
+        self._readers.clear()
+        self._idle.clear()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    # ───── 內部 ─────
+    def _check(self) -> None:
+        if self._closed:
+            raise sqlite3.ProgrammingError("ConnectionManager is closed")
+        if threading.get_ident() != self.owner:
+            raise ThreadAffinityError(
+                f"ConnectionManager owned by thread {self.owner}, "
+                f"used from {threading.get_ident()}"
+            )
+
+    def _open_reader(self) -> sqlite3.Connection:
+        # reader 以 mode=ro 開啟；WAL 的 -shm 需要 writer 先建立
+        self.writer()
+        conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+
+_manager: Optional[ConnectionManager] = None
+_lock = threading.Lock()
+
+
+def get_manager() -> ConnectionManager:
+    """全域共用的連線管理器；第一次呼叫的執行緒即為擁有者。"""
+    global _manager
+    with _lock:
+        if _manager is None or _manager.closed:
+            DATA_DIR.mkdir(parents=True, exist_ok=True)
+            _manager = ConnectionManager(DB_PATH)
+        return _manager
+
+
+def close_manager() -> None:
+    global _manager
+    with _lock:
+        if _manager is not None and not _manager.closed:
+            _manager.close()
+        _manager = None
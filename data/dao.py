@@ -1,15 +1,62 @@
 # data/dao.py
 from __future__ import annotations
-from typing import List, Optional, Dict, Any
-from .db import get_conn
+import sqlite3
+import uuid
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from core.utils import now_iso
+from .changelog import DEVICE_KEY, LOCAL_DEVICE_SQL, NEW_UID_SQL, clocks_set_sql
+from .conn import ConnectionManager, get_manager
+from .derived import bulk_insert_scope
+from .hlc import tick
+from .items import item_key
+from .rollups import rollup_table
+from .query import Cursor, TxQuery
+from .search import build_match
 
-class TxDao:
+class _Dao:
+    """DAO 共用基底：連線一律向 ConnectionManager 借，不再每次重開。"""
+    def __init__(self, manager: Optional[ConnectionManager] = None) -> None:
+        self._manager = manager
+
+    @property
+    def cm(self) -> ConnectionManager:
+        return self._manager or get_manager()
+
+# insert_many 每個 chunk 一個 transaction（一次 WAL commit）
+BULK_CHUNK_SIZE = 5000
+
+_TX_COLUMNS = (
+    "book_id", "account_id", "tx_type", "amount", "currency",
+    "category_id", "member_id", "merchant", "note",
+    "date", "updated_at", "device_id",
+)
+
+_INSERT_TX_SQL = f"""
+    INSERT INTO [Transaction](
+        book_id, account_id, type, amount, currency,
+        category_id, member_id, merchant, note,
+        date, updated_at, device_id, hlc, uid
+    )
+    VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,{NEW_UID_SQL})
+"""
+
+# update() 可改的欄位（uid / id 不可改）
+TX_EDITABLE = (
+    "book_id", "account_id", "type", "amount", "currency",
+    "category_id", "member_id", "merchant", "note", "date",
+)
+
+# 欄位 → clocks 裡的名稱（同 data.merkle.CONTENT_FIELDS）
+_CLOCK_NAMES = {"category_id": "category"}
+
+class TxDao(_Dao):
     def insert_tx(
         self,
         book_id: int,
         account_id: int,
         tx_type: str,
-        amount: float,
+        amount: int,
         currency: str,
         category_id: Optional[int],
         member_id: Optional[int],
@@ -18,69 +65,676 @@ class TxDao:
         date: str,
         updated_at: str,
         device_id: str,
+        tags: Optional[Iterable[str]] = None,
+        attachments: Optional[Iterable[str]] = None,
     ) -> int:
-        conn = get_conn()
+        """
+        amount 為最小單位整數（core.money.to_minor）；tags 為標籤名稱，
+        attachments 為附件的 blob key（data.blobs），都與交易同一個 transaction 寫入。
+        """
+        conn = self.cm.writer()
         with conn:
             cur = conn.execute(
-                """
-                INSERT INTO [Transaction](
-                    book_id, account_id, type, amount, currency,
-                    category_id, member_id, merchant, note,
-                    date, updated_at, device_id
-                )
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
-                """,
+                _INSERT_TX_SQL,
                 (
                     book_id, account_id, tx_type, amount, currency,
                     category_id, member_id, merchant, note,
-                    date, updated_at, device_id,
+                    date, updated_at, device_id, tick(conn),
                 ),
             )
+            if tags:
+                TagDao.set_in(conn, cur.lastrowid, tags)
+            if attachments:
+                AttachmentDao.add_in(conn, cur.lastrowid, attachments)
             return cur.lastrowid
 
-    def latest(self, limit: int = 20) -> List[Dict[str, Any]]:
-        conn = get_conn()
-        cur = conn.execute(
-            """
-            SELECT t.id, t.type, t.amount, t.currency, t.date,
-                   t.category_id, IFNULL(c.name,'') AS category
-            FROM [Transaction] t
-            LEFT JOIN Category c ON c.id = t.category_id
-            ORDER BY t.date DESC, t.id DESC
-            LIMIT ?
+    def insert_many(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        on_chunk: Optional[Callable[[int], None]] = None,
+        checkpoint: Optional[Callable[[sqlite3.Connection, int], None]] = None,
+    ) -> Tuple[int, Optional[int], Optional[int]]:
+        """
+        串流批次寫入；rows 的 key 與 insert_tx 參數相同。
+        每 chunk_size 筆一次 executemany + 一次 commit，不會把整個 iterable 讀進記憶體。
+        衍生表改在每個 chunk 結尾以 id 區間批次更新（見 data.derived），不逐列觸發。
+        同一個 chunk 的列共用一個 HLC（各自是新列，不需要彼此排序）。
+        checkpoint(conn, 累計筆數) 在 chunk 的 transaction 內呼叫，可用來原子地記錄進度。
+        回傳 (筆數, 第一筆 id, 最後一筆 id)；on_chunk 在 commit 後收到目前累計筆數。
+        """
+        conn = self.cm.writer()
+        it = iter(rows)
+        total = 0
+        first_id: Optional[int] = None
+        last_id: Optional[int] = None
+        while True:
+            values = [tuple(r[k] for k in _TX_COLUMNS) for r in islice(it, chunk_size)]
+            if not values:
+                break
+            with conn:
+                # DROP TRIGGER 不會自動開 transaction，要自己 BEGIN
+                conn.execute("BEGIN")
+                hlc = tick(conn)
+                chunk = [v + (hlc,) for v in values]
+                with bulk_insert_scope(conn) as ids:
+                    conn.executemany(_INSERT_TX_SQL, chunk)
+                    # 單一 writer：AUTOINCREMENT 在 chunk 內是連號
+                    last_id = conn.execute(
+                        "SELECT seq FROM sqlite_sequence WHERE name='Transaction'"
+                    ).fetchone()[0]
+                    ids.lo, ids.hi = last_id - len(chunk) + 1, last_id + 1
+                if checkpoint is not None:
+                    checkpoint(conn, total + len(chunk))
+            if first_id is None:
+                first_id = last_id - len(chunk) + 1
+            total += len(chunk)
+            if on_chunk is not None:
+                on_chunk(total)
+        return total, first_id, last_id
+
+    def update(self, tx_id: int, fields: Dict[str, Any]) -> bool:
+        """
+        修改部分欄位，只有這些欄位的時鐘前進到新的 HLC（本機裝置）；
+        其他裝置同時改了別的欄位時，同步後兩邊的修改都會留下。回傳是否有該筆。
+        """
+        bad = set(fields) - set(TX_EDITABLE)
+        if bad:
+            raise ValueError(f"not editable: {sorted(bad)}")
+        if not fields:
+            raise ValueError("no fields to update")
+        conn = self.cm.writer()
+        with conn:
+            hlc = tick(conn)
+            clocks = ", ".join(
+                f"'$.{_CLOCK_NAMES.get(k, k)}', json_array({hlc}, {LOCAL_DEVICE_SQL})" for k in fields
+            )
+            sets = [f"{k} = ?" for k in fields] + [
+                f"clocks = {clocks_set_sql(clocks)}",
+                f"hlc = {hlc}",
+                f"device_id = {LOCAL_DEVICE_SQL}",
+                "updated_at = ?",
+            ]
+            cur = conn.execute(
+                f"UPDATE [Transaction] SET {', '.join(sets)} WHERE id = ?",
+                [*fields.values(), now_iso(), tx_id],
+            )
+            return cur.rowcount > 0
+
+    def set_categories(self, pairs: Iterable[Tuple[int, int]]) -> int:
+        """
+        批次改類別 [(tx_id, category_id)]：一個 transaction、共用一個 HLC，
+        時鐘與 update() 相同只前進 category（規則重套用等大量修改用）。回傳更新筆數。
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return 0
+        now = now_iso()
+        conn = self.cm.writer()
+        with conn:
+            hlc = tick(conn)
+            clocks = clocks_set_sql(f"'$.category', json_array({hlc}, {LOCAL_DEVICE_SQL})")
+            cur = conn.executemany(
+                f"""
+                UPDATE [Transaction] SET category_id = ?, clocks = {clocks}, hlc = {hlc},
+                    device_id = {LOCAL_DEVICE_SQL}, updated_at = ?
+                WHERE id = ? AND category_id IS NOT ?
+                """,
+                [(cat, now, tx_id, cat) for tx_id, cat in pairs],
+            )
+            return cur.rowcount
+
+    def delete(self, tx_id: int) -> bool:
+        conn = self.cm.writer()
+        with conn:
+            return self.delete_in(conn, tx_id)
+
+    @staticmethod
+    def delete_in(conn: sqlite3.Connection, tx_id: int) -> bool:
+        """在呼叫端的 transaction 內刪除一筆（連同標籤 / 附件 / 發票）；ChangeLog 由觸發器記成 'D'。"""
+        conn.execute("DELETE FROM TransactionTag WHERE tx_id = ?", (tx_id,))
+        conn.execute("DELETE FROM Attachment WHERE tx_id = ?", (tx_id,))
+        conn.execute("DELETE FROM InvoiceItem WHERE tx_id = ?", (tx_id,))
+        conn.execute("DELETE FROM Invoice WHERE tx_id = ?", (tx_id,))
+        return conn.execute("DELETE FROM [Transaction] WHERE id = ?", (tx_id,)).rowcount > 0
+
+    def latest(self, limit: int = 20, book_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        q = TxQuery().limit(limit)
+        if book_id is not None:
+            q.book(book_id)
+        with self.cm.reader() as conn:
+            rows, _ = q.fetch(conn)
+            return rows
+
+    def by_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """依傳入順序取回交易（例如檢索結果的排名順序）。"""
+        if not ids:
+            return []
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                f"""
+                SELECT t.id, t.type, t.amount, t.currency, t.date, t.merchant, t.note,
+                       t.category_id, IFNULL(c.name,'') AS category
+                FROM [Transaction] t
+                LEFT JOIN Category c ON c.id = t.category_id
+                WHERE t.id IN ({','.join('?' * len(ids))})
+                """,
+                ids,
+            )
+            by_id = {r["id"]: dict(r) for r in cur.fetchall()}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def page(self, query: TxQuery) -> Tuple[List[Dict[str, Any]], Optional[Cursor]]:
+        """任意 TxQuery 的一頁結果與下一頁 cursor。"""
+        with self.cm.reader() as conn:
+            return query.fetch(conn)
+
+    def top_categories(self, limit: int = 8) -> List[Dict[str, Any]]:
+        # 次數從 RollupMonth 加總，不掃 [Transaction]
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                """
+                SELECT c.id AS category_id, c.name AS category, SUM(r.cnt) AS cnt
+                FROM RollupMonth r
+                JOIN Category c ON c.id = r.category_id
+                GROUP BY r.category_id
+                ORDER BY cnt DESC
+                LIMIT ?
+                """,
+                (limit,),
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+class BalanceDao(_Dao):
+    def balances(self) -> List[Dict[str, Any]]:
+        """
+        每個帳戶的帳本幣別餘額一列（含 balance_init），其他幣別有變動時各多一列。
+        balance 為該列 currency 的最小單位整數。
+        """
+        # AccountBalance 由 [Transaction] 觸發器維護 → O(帳戶數)
+        sql = """
+        SELECT a.id, a.name, k.currency,
+               a.balance_init + IFNULL(b.delta, 0) AS balance
+        FROM Account a
+        JOIN AccountBook k ON k.id = a.book_id
+        LEFT JOIN AccountBalance b ON b.account_id = a.id AND b.currency = k.currency
+        UNION ALL
+        SELECT a.id, a.name, b.currency, b.delta AS balance
+        FROM AccountBalance b
+        JOIN Account a ON a.id = b.account_id
+        JOIN AccountBook k ON k.id = a.book_id
+        WHERE b.currency <> k.currency
+        ORDER BY 1, 3
+        """
+        with self.cm.reader() as conn:
+            cur = conn.execute(sql)
+            return [dict(r) for r in cur.fetchall()]
+
+class RollupDao(_Dao):
+    def totals(
+        self,
+        grain: str = "month",
+        book_id: int = 1,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        tx_type: str = "expense",
+        by_category: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        從日/週/月彙總表讀合計，不掃 [Transaction]。
+        start / end 用該 grain 的 period 格式（見 data/rollups.py），皆含端點。
+        total 為最小單位整數，依 currency 分列。
+        """
+        table = rollup_table(grain)
+        cat_cols = "r.category_id, IFNULL(c.name,'') AS category," if by_category else ""
+        cat_group = ", r.category_id" if by_category else ""
+        sql = f"""
+        SELECT r.period, r.currency, {cat_cols}
+               SUM(r.total) AS total, SUM(r.cnt) AS cnt
+        FROM {table} r
+        LEFT JOIN Category c ON c.id = r.category_id
+        WHERE r.book_id = ? AND r.type = ?
+          AND r.period >= ? AND r.period <= ?
+        GROUP BY r.period, r.currency{cat_group}
+        ORDER BY r.period DESC, total DESC
+        """
+        args = (book_id, tx_type, start or "", end or "\uffff")
+        with self.cm.reader() as conn:
+            cur = conn.execute(sql, args)
+            return [dict(r) for r in cur.fetchall()]
+
+# 檢索結果的 keyset cursor：(bm25 rank, 交易 id)
+SearchCursor = Tuple[float, int]
+
+
+class SearchDao(_Dao):
+    def search_ids(
+        self,
+        text: str,
+        limit: int = 50,
+        offset: int = 0,
+        book_id: Optional[int] = None,
+    ) -> List[int]:
+        """merchant / note / OCR 全文檢索；依 bm25 排名（同分依 id）回傳交易 id，排名涵蓋全部命中。"""
+        with self.cm.reader() as conn:
+            match, _truncated = build_match(conn, text)
+            if match is None:
+                return []
+            return [r[0] for r in self._ranked_in(conn, match, book_id, None, limit, offset)]
+
+    def search_page(
+        self,
+        text: str,
+        limit: int = 50,
+        after: Optional[SearchCursor] = None,
+        book_id: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        全文檢索的一頁：{"ids", "cursor", "truncated"}。cursor 傳回 after 取下一頁（keyset，不用 OFFSET），
+        沒有下一頁時為 None；truncated 表示短詞展開超過上限（見 data.search.build_match），結果可能不完整。
+        """
+        with self.cm.reader() as conn:
+            match, truncated = build_match(conn, text)
+            rows = self._ranked_in(conn, match, book_id, after, limit) if match is not None else []
+        cursor = (rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+        return {"ids": [r[0] for r in rows], "cursor": cursor, "truncated": truncated}
+
+    @staticmethod
+    def _ranked_in(
+        conn: sqlite3.Connection,
+        match: str,
+        book_id: Optional[int],
+        after: Optional[SearchCursor],
+        limit: int,
+        offset: int = 0,
+    ) -> List[sqlite3.Row]:
+        where = ["TxSearch MATCH ?"]
+        args: List[Any] = [match]
+        if book_id is not None:
+            where.append("rowid IN (SELECT id FROM [Transaction] WHERE book_id = ?)")
+            args.append(book_id)
+        if after is not None:
+            where.append("(rank, rowid) > (?, ?)")
+            args.extend(after)
+        return conn.execute(
+            f"""
+            SELECT rowid, rank FROM TxSearch
+            WHERE {" AND ".join(where)}
+            ORDER BY rank, rowid LIMIT ? OFFSET ?
             """,
-            (limit,),
+            args + [limit, offset],
+        ).fetchall()
+
+class CategoryDao(_Dao):
+    def all(self) -> List[Dict[str, Any]]:
+        with self.cm.reader() as conn:
+            cur = conn.execute("SELECT id, parent_id, name, icon FROM Category ORDER BY id")
+            return [dict(r) for r in cur.fetchall()]
+
+    def create(self, name: str, parent_id: Optional[int] = None) -> int:
+        conn = self.cm.writer()
+        with conn:
+            cur = conn.execute("INSERT INTO Category(parent_id, name) VALUES(?,?)", (parent_id, name))
+            return cur.lastrowid
+
+    @staticmethod
+    def names_in(conn: sqlite3.Connection) -> Dict[int, Tuple[str, str]]:
+        """Category.id → (類別, 子類別)；第一層類別的子類別為空字串。跨裝置以名稱辨識類別時用。"""
+        rows = conn.execute("SELECT id, parent_id, name FROM Category").fetchall()
+        names = {r[0]: r[2] for r in rows}
+        return {
+            r[0]: (names.get(r[1], ""), r[2]) if r[1] is not None else (r[2], "")
+            for r in rows
+        }
+
+def _tag_name(name: str) -> str:
+    # "#trip-2026" 與 "trip-2026" 是同一個標籤
+    return name.strip().lstrip("#").strip()
+
+class TagDao(_Dao):
+    def all(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """所有標籤與使用次數，常用的在前（次數由 idx_txtag_tag 算，不掃交易表）。"""
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                f"""
+                SELECT g.id, g.name,
+                       (SELECT COUNT(*) FROM TransactionTag tt WHERE tt.tag_id = g.id) AS count
+                FROM Tag g
+                ORDER BY count DESC, g.name
+                {"LIMIT ?" if limit is not None else ""}
+                """,
+                (limit,) if limit is not None else (),
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    def ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """名稱 → Tag.id；不存在的名稱不在結果裡。"""
+        wanted = [_tag_name(n) for n in names]
+        if not wanted:
+            return {}
+        with self.cm.reader() as conn:
+            cur = conn.execute(f"SELECT name, id FROM Tag WHERE name IN ({','.join('?' * len(wanted))})", wanted)
+            return {r[0]: r[1] for r in cur.fetchall()}
+
+    def of(self, tx_id: int) -> List[str]:
+        with self.cm.reader() as conn:
+            return self.of_in(conn, tx_id)
+
+    def set_tags(self, tx_id: int, names: Iterable[str]) -> None:
+        conn = self.cm.writer()
+        with conn:
+            self.set_in(conn, tx_id, names)
+
+    @staticmethod
+    def of_in(conn: sqlite3.Connection, tx_id: int) -> List[str]:
+        cur = conn.execute(
+            "SELECT g.name FROM TransactionTag tt JOIN Tag g ON g.id = tt.tag_id WHERE tt.tx_id = ? ORDER BY g.name",
+            (tx_id,),
         )
-        return [dict(r) for r in cur.fetchall()]
+        return [r[0] for r in cur.fetchall()]
 
-    def top_categories(self, limit: int = 8) -> List[Dict[str, Any]]:
-        conn = get_conn()
+    @staticmethod
+    def set_in(conn: sqlite3.Connection, tx_id: int, names: Iterable[str]) -> None:
+        """
+        在呼叫端的 transaction 內把交易的標籤設成 names（缺的 Tag 即時建立）。
+        只增刪有差異的關聯；touch 觸發器會前進該交易的 tags 時鐘（見 data.changelog）。
+        """
+        want = {n for n in map(_tag_name, names) if n}
+        have = set(TagDao.of_in(conn, tx_id))
+        for name in sorted(have - want):
+            conn.execute(
+                "DELETE FROM TransactionTag WHERE tx_id = ? AND tag_id = (SELECT id FROM Tag WHERE name = ?)",
+                (tx_id, name),
+            )
+        for name in sorted(want - have):
+            conn.execute("INSERT OR IGNORE INTO Tag(name) VALUES(?)", (name,))
+            conn.execute(
+                "INSERT INTO TransactionTag(tx_id, tag_id) SELECT ?, id FROM Tag WHERE name = ?", (tx_id, name)
+            )
+
+class AttachmentDao(_Dao):
+    def of(self, tx_id: int) -> List[Dict[str, Any]]:
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                "SELECT id, file_path, ocr_text FROM Attachment WHERE tx_id = ? ORDER BY id", (tx_id,)
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    def first_of(self, tx_ids: List[int]) -> Dict[int, str]:
+        """各交易的第一個附件（列表縮圖用）；沒有附件的交易不在結果裡。"""
+        if not tx_ids:
+            return {}
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                f"""
+                SELECT tx_id, file_path FROM Attachment
+                WHERE id IN (SELECT min(id) FROM Attachment
+                             WHERE tx_id IN ({','.join('?' * len(tx_ids))}) GROUP BY tx_id)
+                """,
+                tx_ids,
+            )
+            return {r[0]: r[1] for r in cur.fetchall()}
+
+    def attached(self, refs: List[str]) -> set:
+        """refs 中已是某筆交易附件的（同一張收據不要記兩次）。"""
+        if not refs:
+            return set()
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                f"SELECT DISTINCT file_path FROM Attachment WHERE file_path IN ({','.join('?' * len(refs))})", refs
+            )
+            return {r[0] for r in cur.fetchall()}
+
+    def add(self, tx_id: int, refs: Iterable[str]) -> None:
+        conn = self.cm.writer()
+        with conn:
+            self.add_in(conn, tx_id, refs)
+
+    @staticmethod
+    def add_in(conn: sqlite3.Connection, tx_id: int, refs: Iterable[str]) -> None:
+        """
+        同一筆交易重複加同一個檔案（同一個 key）只留一列。
+        這張圖已辨識過（OcrResult 有快取）時直接帶入 ocr_text。
+        """
+        have = {r[0] for r in conn.execute("SELECT file_path FROM Attachment WHERE tx_id = ?", (tx_id,))}
+        for ref in refs:
+            if ref not in have:
+                conn.execute(
+                    """
+                    INSERT INTO Attachment(tx_id, file_path, ocr_text)
+                    VALUES(?, ?, (SELECT text FROM OcrResult WHERE hash = substr(?, 1, 64)
+                                  ORDER BY created_at DESC LIMIT 1))
+                    """,
+                    (tx_id, ref, ref),
+                )
+                have.add(ref)
+
+    @staticmethod
+    def set_ocr_in(conn: sqlite3.Connection, ref: str, text: str) -> int:
+        """所有引用 ref 的附件補上 OCR 文字（檢索索引由觸發器更新）；回傳更新列數。"""
+        return conn.execute(
+            "UPDATE Attachment SET ocr_text = ? WHERE file_path = ? AND IFNULL(ocr_text, '') <> ?",
+            (text or None, ref, text or ""),
+        ).rowcount
+
+# CategoryRule 可寫的欄位（見 m0016）
+RULE_FIELDS = (
+    "category_id", "field", "keywords", "min_amount", "max_amount",
+    "currency", "account_id", "tx_type", "priority", "enabled",
+)
+
+class RuleDao(_Dao):
+    """自動分類規則（CategoryRule）的增刪改；規則引擎見 domain.rules。"""
+    def all(self, enabled_only: bool = False) -> List[Dict[str, Any]]:
+        with self.cm.reader() as conn:
+            return self.all_in(conn, enabled_only)
+
+    @staticmethod
+    def all_in(conn: sqlite3.Connection, enabled_only: bool = False) -> List[Dict[str, Any]]:
         cur = conn.execute(
+            f"""
+            SELECT r.*, c.name AS category FROM CategoryRule r LEFT JOIN Category c ON c.id = r.category_id
+            {"WHERE r.enabled" if enabled_only else ""}
+            ORDER BY r.priority DESC, r.id
             """
-            SELECT c.id AS category_id, c.name AS category, COUNT(*) AS cnt
-            FROM [Transaction] t
-            JOIN Category c ON c.id = t.category_id
-            WHERE t.category_id IS NOT NULL
-            GROUP BY t.category_id
-            ORDER BY cnt DESC
-            LIMIT ?
-            """,
-            (limit,),
         )
         return [dict(r) for r in cur.fetchall()]
 
-class BalanceDao:
-    def balances(self) -> List[Dict[str, Any]]:
-        sql = """
-        SELECT a.id, a.name,
-               a.balance_init
-             + IFNULL((SELECT SUM(amount) FROM [Transaction] WHERE account_id=a.id AND type='income'),0)
-             - IFNULL((SELECT SUM(amount) FROM [Transaction] WHERE account_id=a.id AND type='expense'),0)
-             + IFNULL((SELECT SUM(amount) FROM [Transaction] WHERE account_id=a.id AND type='adjust'),0)
-               AS balance
-        FROM Account a
-        ORDER BY a.id
+    @staticmethod
+    def version_in(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM Settings WHERE key = 'category_rules:version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def add(self, category_id: int, keywords: Iterable[str] | str = "", **fields: Any) -> int:
+        fields = dict(fields, category_id=category_id, keywords=self._keywords(keywords))
+        bad = set(fields) - set(RULE_FIELDS)
+        if bad:
+            raise ValueError(f"unknown rule fields: {sorted(bad)}")
+        conn = self.cm.writer()
+        with conn:
+            return conn.execute(
+                f"INSERT INTO CategoryRule({', '.join(fields)}, updated_at) VALUES({','.join('?' * len(fields))}, ?)",
+                [*fields.values(), now_iso()],
+            ).lastrowid
+
+    def update(self, rule_id: int, fields: Dict[str, Any]) -> bool:
+        bad = set(fields) - set(RULE_FIELDS)
+        if bad or not fields:
+            raise ValueError(f"unknown rule fields: {sorted(bad)}" if bad else "no fields to update")
+        if "keywords" in fields:
+            fields = dict(fields, keywords=self._keywords(fields["keywords"]))
+        conn = self.cm.writer()
+        with conn:
+            return conn.execute(
+                f"UPDATE CategoryRule SET {', '.join(f'{k} = ?' for k in fields)}, updated_at = ? WHERE id = ?",
+                [*fields.values(), now_iso(), rule_id],
+            ).rowcount > 0
+
+    def delete(self, rule_id: int) -> bool:
+        conn = self.cm.writer()
+        with conn:
+            return conn.execute("DELETE FROM CategoryRule WHERE id = ?", (rule_id,)).rowcount > 0
+
+    @staticmethod
+    def _keywords(keywords: Iterable[str] | str) -> str:
+        # "星巴克|路易莎" 或 ["星巴克", "路易莎"]；去掉空白與重複
+        words = keywords.split("|") if isinstance(keywords, str) else keywords
+        return "|".join(dict.fromkeys(w.strip() for w in words if w and w.strip()))
+
+class InvoiceDao(_Dao):
+    """電子發票表頭（m0013）；依期別的查詢走 idx_invoice_period。"""
+    def periods(self) -> List[str]:
+        """有發票的期別，新的在前。"""
+        with self.cm.reader() as conn:
+            return [r[0] for r in conn.execute("SELECT DISTINCT period FROM Invoice ORDER BY period DESC")]
+
+    def numbers(self, period: str) -> List[Tuple[int, str, int]]:
+        """該期所有發票的 (Invoice.id, 發票號碼, tx_id)，只讀索引。"""
+        with self.cm.reader() as conn:
+            cur = conn.execute("SELECT id, invoice_no, tx_id FROM Invoice WHERE period = ?", (period,))
+            return [tuple(r) for r in cur.fetchall()]
+
+    def by_ids(self, ids: List[int]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                f"""
+                SELECT i.id, i.tx_id, i.invoice_no, i.period, i.date, i.amount, t.merchant
+                FROM Invoice i LEFT JOIN [Transaction] t ON t.id = i.tx_id
+                WHERE i.id IN ({','.join('?' * len(ids))})
+                """,
+                ids,
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    def add(self, tx_id: int, invoice_no: str, period: str, date: str, amount: int,
+            seller_name: Optional[str] = None) -> bool:
+        conn = self.cm.writer()
+        with conn:
+            return self.add_in(conn, tx_id, invoice_no, period, date, amount, seller_name)
+
+    @staticmethod
+    def add_in(conn: sqlite3.Connection, tx_id: int, invoice_no: str, period: str, date: str, amount: int,
+               seller_name: Optional[str] = None) -> bool:
+        """同一期同一號碼已存在時不寫；回傳是否新增。"""
+        return conn.execute(
+            """
+            INSERT OR IGNORE INTO Invoice(tx_id, invoice_no, period, date, seller_name, amount)
+            VALUES (?,?,?,?,?,?)
+            """,
+            (tx_id, invoice_no, period, date, seller_name, amount),
+        ).rowcount > 0
+
+class ItemDao(_Dao):
+    """發票品項字典與價格歷史（見 data.items）；價格查詢只走 idx_invoiceitem_item。"""
+    def find(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """品名搜尋：完全相同 → 開頭相同 → 包含，各自依購買次數排序。"""
+        key = item_key(text)
+        if not key:
+            return []
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                """
+                SELECT i.id, i.name,
+                       (SELECT COUNT(*) FROM InvoiceItem ii WHERE ii.item_id = i.id) AS count
+                FROM Item i
+                WHERE i.key LIKE '%' || ? || '%' ESCAPE '\\'
+                ORDER BY i.key <> ?, substr(i.key, 1, length(?)) <> ?, count DESC, i.key
+                LIMIT ?
+                """,
+                (key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_"), key, key, key, limit),
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    def by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        with self.cm.reader() as conn:
+            row = conn.execute("SELECT id, name FROM Item WHERE key = ?", (item_key(name),)).fetchone()
+            return dict(row) if row else None
+
+    def history(
+        self,
+        item_id: int,
+        merchant: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
         """
-        conn = get_conn()
-        cur = conn.execute(sql)
-        return [dict(r) for r in cur.fetchall()]
+        單價的時間序列 [{"date", "merchant", "price", "qty"}]，日期由舊到新。
+        指定 merchant 時是索引上的一段連續區間；limit 取最近的幾筆。
+        """
+        where, args = ["item_id = ?"], [item_id]
+        if merchant is not None:
+            where.append("merchant = ?")
+            args.append(merchant)
+        if since is not None:
+            where.append("date >= ?")
+            args.append(since)
+        sql = f"""
+            SELECT date, merchant, unit_price AS price, qty FROM InvoiceItem
+            WHERE {" AND ".join(where)}
+            ORDER BY date DESC{", id DESC" if merchant is None else ""}
+            {"LIMIT ?" if limit is not None else ""}
+        """
+        if limit is not None:
+            args.append(limit)
+        with self.cm.reader() as conn:
+            rows = [dict(r) for r in conn.execute(sql, args).fetchall()]
+        rows.reverse()
+        return rows
+
+    def merchants(self, item_id: int) -> List[Dict[str, Any]]:
+        """買過這個品項的店：[{"merchant", "count", "last_date", "last_price", "min_price"}]，最近買的在前。"""
+        with self.cm.reader() as conn:
+            # MAX(date) 搭配的裸欄位 unit_price 取自同一列（SQLite 的行為）
+            cur = conn.execute(
+                """
+                SELECT merchant, COUNT(*) AS count, MAX(date) AS last_date, unit_price AS last_price,
+                       (SELECT MIN(x.unit_price) FROM InvoiceItem x
+                        WHERE x.item_id = ii.item_id AND x.merchant IS ii.merchant) AS min_price
+                FROM InvoiceItem ii WHERE item_id = ?
+                GROUP BY merchant ORDER BY last_date DESC
+                """,
+                (item_id,),
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    def of_tx(self, tx_id: int) -> List[Dict[str, Any]]:
+        """一筆交易（發票）的品項：[{"item_id", "name", "qty", "price", "amount", "merchant"}]。"""
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                """
+                SELECT item_id, name, qty, unit_price AS price, amount, merchant FROM InvoiceItem
+                WHERE tx_id = ? ORDER BY seq
+                """,
+                (tx_id,),
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+class SettingsDao(_Dao):
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self.cm.reader() as conn:
+            row = conn.execute("SELECT value FROM Settings WHERE key=?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set(self, key: str, value: Optional[str]) -> None:
+        conn = self.cm.writer()
+        with conn:
+            self.put(conn, key, value)
+
+    @staticmethod
+    def put(conn: sqlite3.Connection, key: str, value: Optional[str]) -> None:
+        """在呼叫端的 transaction 內寫入（例如與資料一起原子地記錄進度）。"""
+        conn.execute("INSERT OR REPLACE INTO Settings(key, value) VALUES(?,?)", (key, value))
+
+    def device_id(self) -> str:
+        """本機裝置 id（m0007 產生；舊 DB 尚未 migrate 時這裡補上）。"""
+        value = self.get(DEVICE_KEY)
+        if value is None:
+            conn = self.cm.writer()
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO Settings(key, value) VALUES(?,?)", (DEVICE_KEY, uuid.uuid4().hex)
+                )
+                value = conn.execute("SELECT value FROM Settings WHERE key=?", (DEVICE_KEY,)).fetchone()[0]
+        return value
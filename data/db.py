@@ -1,12 +1,14 @@
 # data/db.py
 from __future__ import annotations
 import sqlite3
-from core.settings import DB_PATH, DATA_DIR
+from pathlib import Path
+from core.settings import DB_PATH
 
-# 取得連線（確保資料夾存在、啟用 Row dict）
-def get_conn() -> sqlite3.Connection:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+# 取得一次性連線（確保資料夾存在、啟用 Row dict）
+# 只給 init_db / seed 這類啟動時的工作用；一般 DAO 請走 data.conn.ConnectionManager
+def get_conn(path: Path = DB_PATH) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -109,10 +111,20 @@ CREATE INDEX IF NOT EXISTS idx_tx_book_date ON [Transaction](book_id, date);
 CREATE INDEX IF NOT EXISTS idx_tx_account_date ON [Transaction](account_id, date);
 CREATE INDEX IF NOT EXISTS idx_tx_category_date ON [Transaction](category_id, date);
 CREATE INDEX IF NOT EXISTS idx_rate_date_currency ON Rate(date, base_currency, target_currency);
+
 """
 
-def init_db() -> None:
-    conn = get_conn()
-    with conn:
-        conn.executescript(SCHEMA_SQL)
-    conn.close()
+def init_db(path: Path = DB_PATH) -> None:
+    """
+    開 DB 並套用尚未執行的 migration；已是最新版本時只讀一次 user_version。
+    之後檢查時區是否變過，變了就校正日 / 週 / 月彙總表（見 data.rollups.sync_zone）。
+    """
+    from .migrations import migrate
+    from .rollups import sync_zone
+
+    conn = get_conn(path)
+    try:
+        migrate(conn)
+        sync_zone(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,59 @@
+# data/derived.py
+"""
+[Transaction] 的衍生表（AccountBalance、日/週/月彙總、TxSearch、ChangeLog、MerkleLeaf）在大量寫入時的批次維護。
+
+平常由 AFTER INSERT 觸發器逐列更新；匯入幾十萬筆時逐列觸發太慢。
+bulk_insert_scope() 在同一個 transaction 裡暫時拿掉這些 INSERT 觸發器，
+寫完後用各模組的 id 區間回填 SQL 一次補上，再原樣建回觸發器後才 commit——
+DDL 在 SQLite 也是 transactional，其他連線永遠看不到「沒有觸發器」的狀態。
+"""
+from __future__ import annotations
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from .balances import BACKFILL_SQL as _BALANCE_BACKFILL
+from .changelog import BACKFILL_SQL as _CHANGELOG_BACKFILL
+from .merkle import BACKFILL_SQL as _MERKLE_BACKFILL
+from .rollups import GRAINS, backfill_sql as _rollup_backfill
+from .search import BACKFILL_SQL as _SEARCH_BACKFILL
+
+# INSERT 觸發器 → 等價的 id 區間 [?, ?) 批次 SQL
+BULK_EQUIVALENTS: List[Tuple[str, List[str]]] = [
+    ("trg_tx_balance_ins", [_BALANCE_BACKFILL]),
+    ("trg_tx_rollup_ins", [_rollup_backfill(g) for g in GRAINS]),
+    ("trg_tx_search_ins", [_SEARCH_BACKFILL]),
+    ("trg_tx_changelog_ins", [_CHANGELOG_BACKFILL]),
+    ("trg_tx_merkle_ins", [_MERKLE_BACKFILL]),
+]
+
+
+class IdRange:
+    """bulk_insert_scope 內寫入的 id 區間；呼叫端寫完後填入。"""
+    def __init__(self) -> None:
+        self.lo = 0
+        self.hi = 0  # 不含
+
+
+@contextmanager
+def bulk_insert_scope(conn: sqlite3.Connection) -> Iterator[IdRange]:
+    """
+    必須在已開始的 transaction 內使用（conn.in_transaction 為 True）。
+    離開時對 [lo, hi) 執行批次 SQL 並還原觸發器；例外時不做事，交給外層 rollback。
+    """
+    if not conn.in_transaction:
+        raise sqlite3.ProgrammingError("bulk_insert_scope requires an open transaction")
+    saved: List[Tuple[str, List[str]]] = []
+    for name, sqls in BULK_EQUIVALENTS:
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name=?", (name,)).fetchone()
+        if row is None:
+            continue  # 尚未 migrate 到該版本
+        conn.execute(f"DROP TRIGGER {name}")
+        saved.append((row[0], sqls))
+    ids = IdRange()
+    yield ids
+    for ddl, sqls in saved:
+        if ids.hi > ids.lo:
+            for sql in sqls:
+                conn.execute(sql, (ids.lo, ids.hi))
+        conn.execute(ddl)
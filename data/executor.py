@@ -0,0 +1,153 @@
+# data/executor.py
+"""
+DB 工作執行緒：所有 DAO 呼叫排進單一背景執行緒，UI 執行緒不再等 SQLite。
+
+    ex = get_executor()
+    ex.call(TxDao().latest, 100, key="home", on_result=self._fill)   # 結果經 Clock 回到 UI 執行緒
+    fut = ex.submit(BalanceDao().balances)                            # concurrent.futures.Future
+    rows = await ex.arun(TxDao().latest, 20)                          # asyncio（非 UI 呼叫端）
+
+- 背景執行緒即 ConnectionManager 的擁有者（第一次 get_manager() 在該執行緒發生）；
+  因此 App 內不要在 UI 執行緒直接呼叫 DAO。
+- key 相同的新請求會取代舊的：尚未開始的直接取消，已在跑的結果不再回呼。
+- 回呼在 UI 執行緒執行；未安裝 Kivy（工具腳本 / 測試）時直接在背景執行緒呼叫。
+"""
+from __future__ import annotations
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from .conn import close_manager, get_manager
+
+Dispatch = Callable[[Callable[[], None]], None]
+
+_STOP = object()
+
+
+def clock_dispatch(fn: Callable[[], None]) -> None:
+    try:
+        from kivy.clock import Clock
+    except ImportError:
+        fn()
+        return
+    Clock.schedule_once(lambda _dt: fn())
+
+
+class DbExecutor:
+    def __init__(self, dispatch: Dispatch = clock_dispatch, name: str = "db-worker") -> None:
+        self._dispatch = dispatch
+        self._q: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Future] = {}   # key → 目前有效的請求（key 數量固定，不清理）
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # ───── 公開 API ─────
+    def submit(self, fn: Callable[..., Any], *args: Any, key: Optional[str] = None, **kwargs: Any) -> Future:
+        """排入背景執行緒；回傳 Future。key 相同的舊請求會被取代。"""
+        fut: Future = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("DbExecutor is shut down")
+            if key is not None:
+                old = self._latest.get(key)
+                if old is not None:
+                    old.cancel()
+                self._latest[key] = fut
+            self._q.put((fut, fn, args, kwargs))
+        return fut
+
+    def call(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        key: Optional[str] = None,
+        on_result: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        **kwargs: Any,
+    ) -> Future:
+        """submit() 後把結果經 dispatch（預設 Clock.schedule_once）送回 UI 執行緒。"""
+        fut = self.submit(fn, *args, key=key, **kwargs)
+
+        def deliver() -> None:
+            # 在 UI 執行緒上再檢查一次：排程期間可能又被新請求取代
+            if fut.cancelled() or (key is not None and not self.is_current(key, fut)):
+                return
+            err = fut.exception()
+            if err is None:
+                if on_result is not None:
+                    on_result(fut.result())
+            elif on_error is not None:
+                on_error(err)
+
+        def done(_f: Future) -> None:
+            if not fut.cancelled():
+                self._dispatch(deliver)
+
+        fut.add_done_callback(done)
+        return fut
+
+    async def arun(self, fn: Callable[..., Any], *args: Any, key: Optional[str] = None, **kwargs: Any) -> Any:
+        """asyncio 版 submit；在呼叫端的 event loop 上等待結果。"""
+        return await asyncio.wrap_future(self.submit(fn, *args, key=key, **kwargs))
+
+    def cancel(self, key: str) -> bool:
+        """取消 key 目前的請求；已在執行的仍會跑完，但結果不再回呼。"""
+        with self._lock:
+            fut = self._latest.pop(key, None)
+        return fut.cancel() if fut is not None else False
+
+    def is_current(self, key: str, fut: Future) -> bool:
+        with self._lock:
+            return self._latest.get(key) is fut
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """處理完已排入的請求後，在背景執行緒上關閉連線並結束。"""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._q.put(_STOP)
+        self._thread.join(timeout)
+
+    # ───── 背景執行緒 ─────
+    def _run(self) -> None:
+        get_manager()  # 讓本執行緒成為 ConnectionManager 的擁有者
+        while True:
+            item = self._q.get()
+            if item is _STOP:
+                break
+            fut, fn, args, kwargs = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:  # 例外交給 Future 的持有者
+                fut.set_exception(e)
+            else:
+                fut.set_result(result)
+        close_manager()
+
+
+_executor: Optional[DbExecutor] = None
+_lock = threading.Lock()
+
+
+def get_executor() -> DbExecutor:
+    """全域共用的 DB 執行緒；第一次呼叫時啟動。"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = DbExecutor()
+        return _executor
+
+
+def shutdown_executor(timeout: Optional[float] = 5.0) -> None:
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex is not None:
+        ex.shutdown(timeout)
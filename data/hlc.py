@@ -0,0 +1,50 @@
+# data/hlc.py
+"""
+Hybrid logical clock（HLC）：同步用的版本戳記，取代秒級的 updated_at。
+
+值是一個整數：UTC 毫秒左移 16 位，低 16 位是同一毫秒內的計數（ms << 16 | counter），
+可以直接比大小；同值時再以 device_id 打破平手。
+時鐘狀態存在 Settings[hlc]，跟資料在同一個 transaction 前進，重開 app 也不會倒退：
+  tick     本機寫入：max(實體時鐘, 上次 + 1)
+  observe  收到遠端版本：時鐘至少推到該值，之後本機的修改一定排在它後面
+裝置時鐘慢了（時差、校時倒退）只會讓計數前進，順序仍然成立。
+
+觸發器內直接用 TICK_SQL / CURRENT_SQL；Python 端用 tick() / observe()。
+"""
+from __future__ import annotations
+import sqlite3
+from datetime import datetime, timezone
+
+HLC_KEY = "hlc"
+COUNTER_BITS = 16
+
+# 實體時鐘（毫秒）→ HLC，計數為 0
+PHYSICAL_SQL = f"(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER) << {COUNTER_BITS})"
+
+TICK_SQL = (
+    f"UPDATE Settings SET value = max({PHYSICAL_SQL}, CAST(value AS INTEGER) + 1) WHERE key = '{HLC_KEY}'"
+)
+CURRENT_SQL = f"(SELECT CAST(value AS INTEGER) FROM Settings WHERE key = '{HLC_KEY}')"
+
+
+def from_iso_sql(expr: str) -> str:
+    """ISO 時間欄位 → HLC 的 SQL 運算式（migration 換算舊的 updated_at 用）。"""
+    return f"(CAST((julianday({expr}) - 2440587.5) * 86400000 AS INTEGER) << {COUNTER_BITS})"
+
+
+def tick(conn: sqlite3.Connection) -> int:
+    """在呼叫端的 transaction 內前進時鐘並回傳新值。"""
+    conn.execute(TICK_SQL)
+    return int(conn.execute(f"SELECT {CURRENT_SQL}").fetchone()[0])
+
+
+def observe(conn: sqlite3.Connection, hlc: int) -> None:
+    conn.execute(
+        f"UPDATE Settings SET value = max(CAST(value AS INTEGER), ?) WHERE key = '{HLC_KEY}'", (int(hlc),)
+    )
+
+
+def to_iso(hlc: int) -> str:
+    """HLC → 不含微秒的 UTC ISO 字串（與 core.utils.now_iso 同格式）。"""
+    ms = int(hlc) >> COUNTER_BITS
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).replace(microsecond=0, tzinfo=None).isoformat()
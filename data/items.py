@@ -0,0 +1,44 @@
+# data/items.py
+"""
+發票品項字典：同一個品項在不同發票上的寫法（全形 / 半形、大小寫、多餘空白）收成同一個 Item。
+
+item_key() 是正規化後的比對鍵，Item.key 唯一；InvoiceItem.item_id 指向它。
+價格歷史由 idx_invoiceitem_item(item_id, merchant, date, unit_price, qty) 直接回答（只讀索引），
+查詢 API 見 data.dao.ItemDao。
+"""
+from __future__ import annotations
+import re
+import sqlite3
+import unicodedata
+from typing import Dict, Iterable, Optional
+
+_SPACES = re.compile(r"\s+")
+
+# IN (...) 一次帶的參數數
+_IN_BATCH = 500
+
+
+def item_key(name: Optional[str]) -> str:
+    """NFKC（全形→半形）、大小寫不分、空白收成一個："ＯＩＳＨＩ  鮮奶" → "oishi 鮮奶"。"""
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", name or "")).strip().casefold()
+
+
+def intern_in(conn: sqlite3.Connection, names: Iterable[str]) -> Dict[str, int]:
+    """
+    在呼叫端的 transaction 內把品名對到 Item.id（缺的即時建立，顯示名稱取第一次看到的寫法）。
+    回傳 {原始品名: Item.id}；正規化後為空字串的品名不在結果裡。
+    """
+    keys: Dict[str, str] = {}
+    for name in names:
+        if name not in keys:
+            keys[name] = item_key(name)
+    wanted = sorted({k for k in keys.values() if k})
+    ids: Dict[str, int] = {}
+    for i in range(0, len(wanted), _IN_BATCH):
+        batch = wanted[i:i + _IN_BATCH]
+        cur = conn.execute(f"SELECT key, id FROM Item WHERE key IN ({','.join('?' * len(batch))})", batch)
+        ids.update((r[0], r[1]) for r in cur.fetchall())
+    for name, key in keys.items():
+        if key and key not in ids:
+            ids[key] = conn.execute("INSERT INTO Item(key, name) VALUES(?, ?)", (key, name.strip())).lastrowid
+    return {name: ids[key] for name, key in keys.items() if key}
@@ -0,0 +1,349 @@
+# data/merkle.py
+"""
+每個 (帳本, 月份) 的內容雜湊，組成 Merkle tree，用來比對兩個副本是否一致。
+
+- 葉：MerkleLeaf(book_id, month)。[Transaction] 觸發器只把受影響的月份標成 dirty，
+  refresh_leaves() 再重算 dirty 的月份（寫入時不算 SHA，保持觸發器便宜）。
+  標籤 / 附件的增刪會 touch 所屬交易（見 data.changelog），同樣會讓該月變 dirty。
+- 月份以 UTC 切（date 的前 7 碼），各裝置時區不同也會得到同一棵樹。
+- 列雜湊只看內容（CONTENT_FIELDS + uid），類別用名稱、附件用檔名，與本機 id / 路徑無關；
+  版本欄位（updated_at / hlc / clocks / device_id）不算在內：內容相同即一致。
+- 樹的形狀固定：1970-01 起 2^DEPTH 個月份槽，兩邊的節點一一對應；
+  從根往下只展開不同的節點，DEPTH + 1 次往返就能找出不同的月份。
+
+    python -m data.merkle                   # 重算 dirty 月份並印出各帳本的根雜湊
+    python -m data.merkle --verify          # 全部重算，找出與已存雜湊不符的月份
+    python -m data.merkle --compare B.db    # 與另一個副本比對，列出不同的月份
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+# 1970-01 起 2048 個月（到 2140 年）；超出範圍的月份夾到兩端
+DEPTH = 11
+SLOTS = 1 << DEPTH
+_EPOCH_YEAR = 1970
+
+# 列內容（與 domain.sync 傳輸的 row 欄位相同）
+CONTENT_FIELDS = (
+    "book_id", "account_id", "type", "amount", "currency", "category",
+    "member_id", "merchant", "note", "date", "tags", "attachments",
+)
+
+_MARK = """
+    INSERT INTO MerkleLeaf(book_id, month, dirty) VALUES ({r}.book_id, substr({r}.date, 1, 7), 1)
+    ON CONFLICT(book_id, month) DO UPDATE SET dirty = 1;"""
+
+MERKLE_SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS MerkleLeaf (
+    book_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    digest TEXT,
+    rows INTEGER NOT NULL DEFAULT 0,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (book_id, month)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_merkle_dirty ON MerkleLeaf(dirty) WHERE dirty = 1;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_merkle_ins AFTER INSERT ON [Transaction]
+BEGIN{_MARK.format(r="NEW")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_merkle_del AFTER DELETE ON [Transaction]
+BEGIN{_MARK.format(r="OLD")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_merkle_upd
+AFTER UPDATE OF book_id, account_id, type, amount, currency, category_id,
+                member_id, merchant, note, date, updated_at ON [Transaction]
+BEGIN{_MARK.format(r="OLD")}{_MARK.format(r="NEW")}
+END;
+"""
+
+# migration / 批次寫入用：[Transaction].id 區間 [?, ?) 涉及的月份標成 dirty
+BACKFILL_SQL = """
+INSERT INTO MerkleLeaf(book_id, month, dirty)
+SELECT DISTINCT book_id, substr(date, 1, 7), 1 FROM [Transaction]
+WHERE id >= ? AND id < ?
+ON CONFLICT(book_id, month) DO UPDATE SET dirty = 1
+"""
+
+# 參數為 (book_id, *month_range(month))
+MONTH_SQL = """
+SELECT id, uid, book_id, account_id, type, amount, currency, category_id,
+       member_id, merchant, note, date, updated_at, device_id
+FROM [Transaction]
+WHERE book_id = ? AND date >= ? AND date < ?
+"""
+
+Content = Dict[str, Any]
+
+
+# ───── 列內容與雜湊 ─────
+def month_slot(month: str) -> int:
+    """'YYYY-MM' → 葉的位置；無法解析的月份歸到 0。"""
+    try:
+        y, m = int(month[:4]), int(month[5:7])
+    except ValueError:
+        return 0
+    return min(max((y - _EPOCH_YEAR) * 12 + m - 1, 0), SLOTS - 1)
+
+
+def slot_month(slot: int) -> str:
+    y, m = divmod(slot, 12)
+    return f"{_EPOCH_YEAR + y:04d}-{m + 1:02d}"
+
+
+def month_range(month: str) -> Tuple[str, str]:
+    # date 以 month 開頭 ⇔ month <= date < month + '~'（ISO 日期只含數字與 - : T）
+    return month, month + "~"
+
+
+def add_children(conn: sqlite3.Connection, rows: Dict[int, Content]) -> None:
+    """替 {tx id: 內容} 補上 tags（名稱，排序）與 attachments（[檔名, OCR]，排序）。"""
+    for row in rows.values():
+        row["tags"], row["attachments"] = [], []
+    ids = list(rows)
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        for tx_id, name in conn.execute(
+            f"SELECT tt.tx_id, g.name FROM TransactionTag tt JOIN Tag g ON g.id = tt.tag_id "
+            f"WHERE tt.tx_id IN ({marks})", chunk,
+        ):
+            rows[tx_id]["tags"].append(name)
+        for tx_id, path, ocr in conn.execute(
+            f"SELECT tx_id, file_path, IFNULL(ocr_text, '') FROM Attachment WHERE tx_id IN ({marks})", chunk,
+        ):
+            rows[tx_id]["attachments"].append([os.path.basename(path), ocr])
+    for row in rows.values():
+        row["tags"].sort()
+        row["attachments"].sort()
+
+
+def content_rows(
+    conn: sqlite3.Connection,
+    rows: Iterable[sqlite3.Row],
+    categories: Dict[int, Tuple[str, str]],
+) -> Dict[int, Tuple[str, Content]]:
+    """[Transaction] 列（需有 id / uid 與各欄）→ {id: (uid, 內容)}。"""
+    out: Dict[int, Content] = {}
+    uids: Dict[int, str] = {}
+    for r in rows:
+        cat = categories.get(r["category_id"]) if r["category_id"] is not None else None
+        uids[r["id"]] = r["uid"]
+        out[r["id"]] = {
+            "book_id": r["book_id"], "account_id": r["account_id"], "type": r["type"],
+            "amount": r["amount"], "currency": r["currency"],
+            "category": list(cat) if cat else None, "member_id": r["member_id"],
+            "merchant": r["merchant"], "note": r["note"], "date": r["date"],
+        }
+    add_children(conn, out)
+    return {i: (uids[i], row) for i, row in out.items()}
+
+
+def row_digest(uid: str, row: Content) -> bytes:
+    canon = json.dumps([uid] + [row.get(f) for f in CONTENT_FIELDS], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canon.encode("utf-8")).digest()
+
+
+def leaf_digest(rows: Iterable[Tuple[str, Content]]) -> Tuple[Optional[str], int]:
+    """一個月份所有列（uid 排序）的雜湊；沒有列時為 None。"""
+    h = hashlib.sha256()
+    n = 0
+    for uid, row in sorted(rows, key=lambda x: x[0]):
+        h.update(row_digest(uid, row))
+        n += 1
+    return (h.hexdigest() if n else None), n
+
+
+def month_content(
+    conn: sqlite3.Connection,
+    book_id: int,
+    month: str,
+    categories: Dict[int, Tuple[str, str]],
+) -> List[Tuple[str, Content]]:
+    rows = conn.execute(MONTH_SQL, (book_id, *month_range(month))).fetchall()
+    return list(content_rows(conn, rows, categories).values())
+
+
+# ───── 葉的維護 ─────
+def refresh_leaves(conn: sqlite3.Connection) -> int:
+    """重算所有 dirty 月份（每個月份一個 transaction）；回傳重算的月份數。"""
+    from .dao import CategoryDao
+
+    dirty = conn.execute("SELECT book_id, month FROM MerkleLeaf WHERE dirty = 1").fetchall()
+    if not dirty:
+        return 0
+    cats = CategoryDao.names_in(conn)
+    for book_id, month in dirty:
+        digest, n = leaf_digest(month_content(conn, book_id, month, cats))
+        with conn:
+            if digest is None:
+                conn.execute("DELETE FROM MerkleLeaf WHERE book_id = ? AND month = ?", (book_id, month))
+            else:
+                conn.execute(
+                    "UPDATE MerkleLeaf SET digest = ?, rows = ?, dirty = 0 WHERE book_id = ? AND month = ?",
+                    (digest, n, book_id, month),
+                )
+    return len(dirty)
+
+
+def mark_all_dirty(conn: sqlite3.Connection) -> None:
+    with conn:
+        conn.execute("DELETE FROM MerkleLeaf")
+        conn.execute(BACKFILL_SQL.replace("WHERE id >= ? AND id < ?", "WHERE 1"))
+
+
+# ───── 樹 ─────
+class MerkleTree:
+    """
+    稀疏的固定形狀二元樹；levels[0] 為葉，levels[DEPTH] 只有根（index 0）。
+    空子樹的雜湊為 None，不存。
+    """
+    def __init__(self, leaves: Dict[int, str]) -> None:
+        level: Dict[int, bytes] = {i: bytes.fromhex(d) for i, d in leaves.items()}
+        self.levels: List[Dict[int, bytes]] = [level]
+        for _ in range(DEPTH):
+            parent: Dict[int, bytes] = {}
+            for i in {k >> 1 for k in level}:
+                left, right = level.get(2 * i), level.get(2 * i + 1)
+                parent[i] = hashlib.sha256((left or b"\0" * 32) + (right or b"\0" * 32)).digest()
+            level = parent
+            self.levels.append(level)
+
+    @property
+    def root(self) -> Optional[str]:
+        node = self.levels[DEPTH].get(0)
+        return node.hex() if node is not None else None
+
+    def node_hashes(self, level: int, indexes: Sequence[int]) -> List[Optional[str]]:
+        nodes = self.levels[level]
+        return [nodes[i].hex() if i in nodes else None for i in indexes]
+
+
+def _combine(digests: List[str]) -> str:
+    # 範圍外的月份被夾到同一個槽時，依字典序合併
+    return hashlib.sha256("".join(sorted(digests)).encode()).hexdigest()
+
+
+def tree_of(months: Iterable[Tuple[str, str]]) -> MerkleTree:
+    """(月份, 葉雜湊) → MerkleTree。"""
+    slots: Dict[int, List[str]] = {}
+    for month, digest in months:
+        slots.setdefault(month_slot(month), []).append(digest)
+    return MerkleTree({s: (d[0] if len(d) == 1 else _combine(d)) for s, d in slots.items()})
+
+
+def load_tree(conn: sqlite3.Connection, book_id: int) -> MerkleTree:
+    """呼叫前應先 refresh_leaves()；dirty 的月份不計入。"""
+    return tree_of(conn.execute(
+        "SELECT month, digest FROM MerkleLeaf WHERE book_id = ? AND dirty = 0", (book_id,)
+    ).fetchall())
+
+
+class Replica(Protocol):
+    def node_hashes(self, book_id: int, level: int, indexes: Sequence[int]) -> List[Optional[str]]: ...
+
+
+class LocalReplica:
+    """同一台機器上的另一個副本（例如備份檔）。"""
+    def __init__(self, trees: Dict[int, MerkleTree]) -> None:
+        self.trees = trees
+
+    def node_hashes(self, book_id: int, level: int, indexes: Sequence[int]) -> List[Optional[str]]:
+        tree = self.trees.get(book_id) or MerkleTree({})
+        return tree.node_hashes(level, indexes)
+
+
+def diff_months(local: MerkleTree, remote: Replica, book_id: int) -> Tuple[List[str], int]:
+    """由根往下逐層比對，每層一次往返；回傳 (不同的月份, 往返次數)。"""
+    frontier = [0]
+    trips = 0
+    for level in range(DEPTH, -1, -1):
+        theirs = remote.node_hashes(book_id, level, frontier)
+        trips += 1
+        mine = local.node_hashes(level, frontier)
+        diff = [i for i, a, b in zip(frontier, mine, theirs) if a != b]
+        if not diff:
+            return [], trips
+        if level == 0:
+            return [slot_month(i) for i in diff], trips
+        frontier = [c for i in diff for c in (2 * i, 2 * i + 1)]
+    return [], trips
+
+
+# ───── 驗證 ─────
+def verify_merkle(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """全部月份從頭重算並與已存（非 dirty）的雜湊比對；回傳不一致的 (帳本, 月份)。"""
+    from .dao import CategoryDao
+
+    cats = CategoryDao.names_in(conn)
+    stored = {
+        (b, m): (d, dirty) for b, m, d, dirty in conn.execute("SELECT book_id, month, digest, dirty FROM MerkleLeaf")
+    }
+    actual = conn.execute("SELECT DISTINCT book_id, substr(date, 1, 7) FROM [Transaction]").fetchall()
+    bad: List[Tuple[int, str]] = []
+    for book_id, month in actual:
+        digest, _n = leaf_digest(month_content(conn, book_id, month, cats))
+        have = stored.pop((book_id, month), None)
+        if have is None or (not have[1] and have[0] != digest):
+            bad.append((book_id, month))
+    # 沒有交易卻還留著（且非 dirty）的葉
+    bad.extend(k for k, (d, dirty) in stored.items() if not dirty)
+    return sorted(bad)
+
+
+def book_ids(conn: sqlite3.Connection) -> List[int]:
+    return [r[0] for r in conn.execute("SELECT DISTINCT book_id FROM MerkleLeaf ORDER BY 1")]
+
+
+def main() -> None:
+    from .db import get_conn
+
+    ap = argparse.ArgumentParser(prog="python -m data.merkle")
+    ap.add_argument("--verify", action="store_true", help="recompute every month and report stale digests")
+    ap.add_argument("--rebuild", action="store_true", help="mark every month dirty and recompute")
+    ap.add_argument("--compare", metavar="DB", help="find months that differ from another replica")
+    args = ap.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.rebuild:
+            mark_all_dirty(conn)
+        n = refresh_leaves(conn)
+        print(f"refreshed {n} month(s)")
+        ok = True
+        if args.verify:
+            bad = verify_merkle(conn)
+            for book_id, month in bad:
+                print(f"book {book_id} {month}: stale digest")
+            ok = not bad
+        if args.compare:
+            other = sqlite3.connect(args.compare)
+            other.row_factory = sqlite3.Row
+            try:
+                refresh_leaves(other)
+                books = sorted(set(book_ids(conn)) | set(book_ids(other)))
+                remote = LocalReplica({b: load_tree(other, b) for b in books})
+                for b in books:
+                    months, trips = diff_months(load_tree(conn, b), remote, b)
+                    print(f"book {b}: {len(months)} differing month(s) in {trips} round trip(s) {months}")
+                    ok = ok and not months
+            finally:
+                other.close()
+        for b in book_ids(conn):
+            print(f"book {b} root {load_tree(conn, b).root}")
+        print("OK" if ok else "MISMATCH")
+        raise SystemExit(0 if ok else 1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# data/migrations/__init__.py
+"""
+版本化 schema migration。
+
+每個步驟是一個 mNNNN_<name>.py 模組，提供 VERSION 與 up(conn)；up 必須可重跑（idempotent）。
+套用完的步驟寫進 Migration 表，並同步 PRAGMA user_version。
+啟動時只讀 user_version，已是 LATEST 就直接返回，不再 executescript 整份 schema。
+
+大量資料改寫請用 base.backfill()，見該處說明。
+"""
+from __future__ import annotations
+import sqlite3
+from typing import List
+
+from core.utils import now_iso
+
+from .base import BACKFILL_BUDGET_MS, backfill, has_table  # noqa: F401  (re-export)
+from . import (
+    m0001_base,
+    m0002_account_balance,
+    m0003_rollups,
+    m0004_query_indexes,
+    m0005_search,
+    m0006_minor_units,
+    m0007_sync,
+    m0008_merkle,
+    m0009_hlc,
+    m0010_rate_unique,
+    m0011_tag_index,
+    m0012_ocr_cache,
+    m0013_einvoice,
+    m0014_item_prices,
+    m0015_invoice_period,
+    m0016_category_rules,
+    m0017_category_model,
+    m0018_amount_index,
+    m0019_amount_sign,
+)
+
+STEPS = [
+    m0001_base,
+    m0002_account_balance,
+    m0003_rollups,
+    m0004_query_indexes,
+    m0005_search,
+    m0006_minor_units,
+    m0007_sync,
+    m0008_merkle,
+    m0009_hlc,
+    m0010_rate_unique,
+    m0011_tag_index,
+    m0012_ocr_cache,
+    m0013_einvoice,
+    m0014_item_prices,
+    m0015_invoice_period,
+    m0016_category_rules,
+    m0017_category_model,
+    m0018_amount_index,
+    m0019_amount_sign,
+]
+LATEST = STEPS[-1].VERSION
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def _label(step) -> str:
+    # m0003_rollups → "0003_rollups"
+    return step.__name__.rsplit(".", 1)[-1][1:]
+
+
+def migrate(conn: sqlite3.Connection, target: int = LATEST) -> List[int]:
+    """套用所有尚未執行、版本不超過 target 的步驟；回傳這次套用的版本號。"""
+    current = current_version(conn)
+    if current >= target:
+        return []
+    applied: List[int] = []
+    for step in STEPS:
+        if step.VERSION <= current or step.VERSION > target:
+            continue
+        step.up(conn)
+        with conn:
+            conn.execute(
+                "INSERT INTO Migration(version, applied_at) VALUES(?,?)",
+                (_label(step), now_iso()),
+            )
+            conn.execute(f"PRAGMA user_version = {int(step.VERSION)}")
+        applied.append(step.VERSION)
+    return applied
@@ -0,0 +1,52 @@
+# data/migrations/base.py
+"""
+migration 步驟共用工具。
+
+backfill()：依 rowid 區間分批改寫，每批一個 transaction，批量依耗時自動調整，
+單次鎖住 writer 不超過 budget_ms 左右，長時間回填也不會卡住 UI 的寫入。
+"""
+from __future__ import annotations
+import sqlite3
+import time
+
+# backfill 每批目標耗時（毫秒）
+BACKFILL_BUDGET_MS = 200.0
+
+
+def has_table(conn: sqlite3.Connection, name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,))
+    return cur.fetchone() is not None
+
+
+def has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(r[1] == column for r in conn.execute(f"PRAGMA table_info({table})").fetchall())
+
+
+def backfill(
+    conn: sqlite3.Connection,
+    sql: str,
+    table: str = "[Transaction]",
+    batch: int = 5000,
+    budget_ms: float = BACKFILL_BUDGET_MS,
+) -> int:
+    """
+    以 table 的 rowid 區間 [lo, hi) 分批執行 sql（參數依序為 lo, hi）。
+    只處理開始時已存在的 rowid；之後新寫入的列應由觸發器負責。
+    回傳累計 rowcount。
+    """
+    lo, top = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if lo is None:
+        return 0
+    total = 0
+    while lo <= top:
+        hi = min(lo + batch, top + 1)
+        t0 = time.perf_counter()
+        with conn:
+            total += max(0, conn.execute(sql, (lo, hi)).rowcount)
+        elapsed = (time.perf_counter() - t0) * 1000
+        if elapsed > budget_ms and batch > 1:
+            batch = max(1, batch // 2)
+        elif elapsed < budget_ms / 4:
+            batch *= 2
+        lo = hi
+    return total
@@ -0,0 +1,12 @@
+# data/migrations/m0001_base.py
+"""基本資料表與 idx_tx_* / idx_rate_* 索引（原 init_db 每次執行的 SCHEMA_SQL）。"""
+from __future__ import annotations
+import sqlite3
+
+from ..db import SCHEMA_SQL
+
+VERSION = 1
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA_SQL)
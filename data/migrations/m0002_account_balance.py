@@ -0,0 +1,65 @@
+# data/migrations/m0002_account_balance.py
+"""
+AccountBalance 餘額快取與觸發器；既有帳本分批回填。
+
+v2 時金額還是 REAL、不分幣別：這裡保留當時的版本（data.balances 為現行版，v6 起改為依幣別的整數）。
+"""
+from __future__ import annotations
+import sqlite3
+
+from .base import backfill, has_table
+
+VERSION = 2
+
+_BALANCE_V2_SQL = """
+CREATE TABLE IF NOT EXISTS AccountBalance (
+    account_id INTEGER PRIMARY KEY,
+    delta REAL NOT NULL DEFAULT 0,
+    FOREIGN KEY(account_id) REFERENCES Account(id)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_balance_ins AFTER INSERT ON [Transaction]
+WHEN NEW.type IN ('income','expense','adjust')
+BEGIN
+    INSERT INTO AccountBalance(account_id, delta)
+    VALUES (NEW.account_id, CASE NEW.type WHEN 'expense' THEN -NEW.amount ELSE NEW.amount END)
+    ON CONFLICT(account_id) DO UPDATE SET delta = delta + excluded.delta;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_balance_del AFTER DELETE ON [Transaction]
+WHEN OLD.type IN ('income','expense','adjust')
+BEGIN
+    UPDATE AccountBalance
+    SET delta = delta - CASE OLD.type WHEN 'expense' THEN -OLD.amount ELSE OLD.amount END
+    WHERE account_id = OLD.account_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_balance_upd AFTER UPDATE OF account_id, type, amount ON [Transaction]
+BEGIN
+    UPDATE AccountBalance
+    SET delta = delta - CASE OLD.type WHEN 'expense' THEN -OLD.amount
+                                      WHEN 'transfer' THEN 0 ELSE OLD.amount END
+    WHERE account_id = OLD.account_id;
+    INSERT INTO AccountBalance(account_id, delta)
+    VALUES (NEW.account_id, CASE NEW.type WHEN 'expense' THEN -NEW.amount
+                                          WHEN 'transfer' THEN 0 ELSE NEW.amount END)
+    ON CONFLICT(account_id) DO UPDATE SET delta = delta + excluded.delta;
+END;
+"""
+
+_BACKFILL_V2_SQL = """
+INSERT INTO AccountBalance(account_id, delta)
+SELECT account_id,
+       SUM(CASE type WHEN 'expense' THEN -amount ELSE amount END) AS delta
+FROM [Transaction]
+WHERE id >= ? AND id < ? AND type IN ('income','expense','adjust')
+GROUP BY account_id
+ON CONFLICT(account_id) DO UPDATE SET delta = delta + excluded.delta
+"""
+
+
+def up(conn: sqlite3.Connection) -> None:
+    existed = has_table(conn, "AccountBalance")
+    conn.executescript(_BALANCE_V2_SQL)
+    if not existed:
+        backfill(conn, _BACKFILL_V2_SQL)
@@ -0,0 +1,96 @@
+# data/migrations/m0003_rollups.py
+"""
+日 / 週 / 月彙總表與觸發器；既有帳本分批回填。
+
+這裡保留 v3 當時的版本（total 為 REAL，period 以本地時區切）；
+data.rollups 為現行版，v6 起 total 改為最小單位整數，表與觸發器由之後的步驟重建。
+"""
+from __future__ import annotations
+import sqlite3
+
+from .base import backfill, has_table
+
+VERSION = 3
+
+_GRAINS_V3 = {
+    "RollupDay": "date({d}, 'localtime')",
+    "RollupWeek": "date({d}, 'localtime', 'weekday 0', '-6 days')",
+    "RollupMonth": "strftime('%Y-%m', {d}, 'localtime')",
+}
+
+_KEY_COLS = "book_id, period, account_id, category_id, currency, type"
+
+
+def _period(table: str, col: str) -> str:
+    return f"IFNULL({_GRAINS_V3[table].format(d=col)}, '')"
+
+
+def _add_row(table: str, r: str) -> str:
+    return f"""
+    INSERT INTO {table}({_KEY_COLS}, total, cnt)
+    VALUES ({r}.book_id, {_period(table, r + '.date')}, {r}.account_id,
+            IFNULL({r}.category_id, 0), {r}.currency, {r}.type, {r}.amount, 1)
+    ON CONFLICT({_KEY_COLS}) DO UPDATE SET total = total + excluded.total, cnt = cnt + 1;"""
+
+
+def _sub_row(table: str, r: str) -> str:
+    where = (
+        f"book_id = {r}.book_id AND period = {_period(table, r + '.date')} "
+        f"AND account_id = {r}.account_id AND category_id = IFNULL({r}.category_id, 0) "
+        f"AND currency = {r}.currency AND type = {r}.type"
+    )
+    return f"""
+    UPDATE {table} SET total = total - {r}.amount, cnt = cnt - 1 WHERE {where};
+    DELETE FROM {table} WHERE {where} AND cnt <= 0;"""
+
+
+def _schema_sql() -> str:
+    tables = "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    book_id INTEGER NOT NULL,
+    period TEXT NOT NULL,
+    account_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    type TEXT NOT NULL,
+    total REAL NOT NULL DEFAULT 0,
+    cnt INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY ({_KEY_COLS})
+) WITHOUT ROWID;
+""" for table in _GRAINS_V3)
+    ins = "".join(_add_row(t, "NEW") for t in _GRAINS_V3)
+    dele = "".join(_sub_row(t, "OLD") for t in _GRAINS_V3)
+    return tables + f"""
+CREATE TRIGGER IF NOT EXISTS trg_tx_rollup_ins AFTER INSERT ON [Transaction]
+BEGIN{ins}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_rollup_del AFTER DELETE ON [Transaction]
+BEGIN{dele}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_rollup_upd
+AFTER UPDATE OF book_id, account_id, category_id, currency, type, amount, date ON [Transaction]
+BEGIN{dele}{ins}
+END;
+"""
+
+
+def _backfill_sql(table: str) -> str:
+    return f"""
+    INSERT INTO {table}({_KEY_COLS}, total, cnt)
+    SELECT book_id, {_period(table, 'date')} AS period, account_id,
+           IFNULL(category_id, 0), currency, type, SUM(amount), COUNT(*)
+    FROM [Transaction]
+    WHERE id >= ? AND id < ?
+    GROUP BY 1, 2, 3, 4, 5, 6
+    ON CONFLICT({_KEY_COLS}) DO UPDATE SET total = total + excluded.total, cnt = cnt + excluded.cnt
+    """
+
+
+def up(conn: sqlite3.Connection) -> None:
+    existed = has_table(conn, "RollupDay")
+    conn.executescript(_schema_sql())
+    if not existed:
+        for table in _GRAINS_V3:
+            backfill(conn, _backfill_sql(table))
@@ -0,0 +1,15 @@
+# data/migrations/m0004_query_indexes.py
+"""TxQuery 需要的索引：不帶 book/account/category 時的日期序，以及類別子樹查找。"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 4
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_tx_date ON [Transaction](date);
+        CREATE INDEX IF NOT EXISTS idx_category_parent ON Category(parent_id);
+        """
+    )
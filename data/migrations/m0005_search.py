@@ -0,0 +1,16 @@
+# data/migrations/m0005_search.py
+"""TxSearch 全文檢索表與觸發器；既有帳本分批回填。"""
+from __future__ import annotations
+import sqlite3
+
+from ..search import SEARCH_SCHEMA_SQL, BACKFILL_SQL
+from .base import backfill, has_table
+
+VERSION = 5
+
+
+def up(conn: sqlite3.Connection) -> None:
+    existed = has_table(conn, "TxSearch")
+    conn.executescript(SEARCH_SCHEMA_SQL)
+    if not existed:
+        backfill(conn, BACKFILL_SQL)
@@ -0,0 +1,165 @@
+# data/migrations/m0006_minor_units.py
+"""
+金額改存最小單位整數（core.money）：[Transaction].amount、Account.balance_init 由 REAL → INTEGER。
+
+SQLite 不能改欄位型別，照官方做法建新表 → 分批複製 → 刪舊表 → 改名，
+之後重建索引與觸發器，並以整數重算 AccountBalance 與日 / 週 / 月彙總表。
+換算：ROUND(ROUND(x * 10^decimals, 6))，先收掉 1.005*100 = 100.4999… 這類浮點殘差再四捨五入。
+舊版手動記帳把支出存成負數（sign * amount）；支出 / 收入一律取 ABS，正負只由 type 決定。
+已是 INTEGER 的欄位不會再換算，可重跑。
+"""
+from __future__ import annotations
+import sqlite3
+
+from core.currency import DECIMALS_BY_CODE
+from core.money import DEFAULT_DECIMALS
+from ..balances import BALANCE_SCHEMA_SQL, BACKFILL_SQL as BALANCE_BACKFILL_SQL
+from ..rollups import GRAINS, ROLLUP_SCHEMA_SQL, backfill_sql, rollup_table
+from ..search import SEARCH_SCHEMA_SQL
+from .base import backfill
+
+VERSION = 6
+
+_TX_DDL = """
+CREATE TABLE IF NOT EXISTS Transaction_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    type TEXT NOT NULL CHECK(type IN ('expense','income','transfer','adjust')),
+    amount INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    category_id INTEGER,
+    member_id INTEGER,
+    merchant TEXT,
+    note TEXT,
+    date TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    FOREIGN KEY(book_id) REFERENCES AccountBook(id),
+    FOREIGN KEY(account_id) REFERENCES Account(id),
+    FOREIGN KEY(category_id) REFERENCES Category(id),
+    FOREIGN KEY(member_id) REFERENCES Member(id)
+)
+"""
+
+_ACCOUNT_DDL = """
+CREATE TABLE IF NOT EXISTS Account_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    book_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    balance_init INTEGER DEFAULT 0,
+    FOREIGN KEY(book_id) REFERENCES AccountBook(id)
+)
+"""
+
+_TX_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_tx_book_date ON [Transaction](book_id, date);
+CREATE INDEX IF NOT EXISTS idx_tx_account_date ON [Transaction](account_id, date);
+CREATE INDEX IF NOT EXISTS idx_tx_category_date ON [Transaction](category_id, date);
+CREATE INDEX IF NOT EXISTS idx_tx_date ON [Transaction](date);
+"""
+
+_TX_COLS = "id, book_id, account_id, type, amount, currency, category_id, member_id, merchant, note, date, updated_at, device_id"
+
+
+def _scale(col: str) -> str:
+    """幣別欄位 → 10^decimals 的 CASE 運算式（未登錄幣別用 DEFAULT_DECIMALS）。"""
+    whens = " ".join(f"WHEN '{code}' THEN {10 ** int(d)}" for code, d in DECIMALS_BY_CODE.items())
+    return f"(CASE {col} {whens} ELSE {10 ** DEFAULT_DECIMALS} END)"
+
+
+def _to_minor(value: str, currency: str) -> str:
+    return f"CAST(ROUND(ROUND({value} * {_scale(currency)}, 6)) AS INTEGER)"
+
+
+def _column_type(conn: sqlite3.Connection, table: str, column: str) -> str:
+    for r in conn.execute(f"PRAGMA table_info({table})").fetchall():
+        if r[1] == column:
+            return str(r[2]).upper()
+    return ""
+
+
+def _swap(conn: sqlite3.Connection, old: str, new: str, table_name: str) -> None:
+    """
+    刪舊表、新表改名；保留 AUTOINCREMENT 序號（刪過的 id 不會被重用）。
+    呼叫端須已在 BEGIN 之內：sqlite3 模組不會替 DDL 自動開 transaction。
+    """
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name=?", (table_name,)).fetchone()
+    conn.execute(f"DROP TABLE {old}")
+    conn.execute(f"ALTER TABLE {new} RENAME TO {old}")
+    if seq is not None:
+        cur = conn.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name=?", (seq[0], table_name)
+        )
+        if cur.rowcount == 0:
+            conn.execute("INSERT INTO sqlite_sequence(name, seq) VALUES(?,?)", (table_name, seq[0]))
+
+
+def _rebuild_transaction(conn: sqlite3.Connection) -> None:
+    with conn:
+        # 上次中斷留下的半成品直接丟掉重來
+        conn.execute("DROP TABLE IF EXISTS Transaction_new")
+        conn.execute(_TX_DDL)
+    amount = "(CASE WHEN type IN ('expense','income') THEN ABS(amount) ELSE amount END)"
+    cols = _TX_COLS.replace("amount", _to_minor(amount, "currency"))
+    backfill(
+        conn,
+        f"""
+        INSERT INTO Transaction_new({_TX_COLS})
+        SELECT {cols} FROM [Transaction]
+        WHERE id >= ? AND id < ?
+        """,
+    )
+    with conn:
+        conn.execute("BEGIN")
+        # 舊表的索引與觸發器隨 DROP 一起消失，稍後重建
+        _swap(conn, "[Transaction]", "Transaction_new", "Transaction")
+
+
+def _rebuild_account(conn: sqlite3.Connection) -> None:
+    # 期初餘額以帳本幣別換算；帳戶數很少，一個 transaction 完成
+    book_currency = "(SELECT b.currency FROM AccountBook b WHERE b.id = a.book_id)"
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute("DROP TABLE IF EXISTS Account_new")
+        conn.execute(_ACCOUNT_DDL)
+        conn.execute(
+            f"""
+            INSERT INTO Account_new(id, book_id, name, type, balance_init)
+            SELECT a.id, a.book_id, a.name, a.type,
+                   {_to_minor("IFNULL(a.balance_init, 0)", book_currency)}
+            FROM Account a
+            """
+        )
+        _swap(conn, "Account", "Account_new", "Account")
+
+
+def _rebuild_derived(conn: sqlite3.Connection) -> None:
+    """AccountBalance / 彙總表改為 INTEGER 後依新金額重算；觸發器一併重建。"""
+    with conn:
+        conn.execute("BEGIN")
+        for trg in ("balance_ins", "balance_del", "balance_upd",
+                    "rollup_ins", "rollup_del", "rollup_upd"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_tx_{trg}")
+        conn.execute("DROP TABLE IF EXISTS AccountBalance")
+        for grain in GRAINS:
+            conn.execute(f"DROP TABLE IF EXISTS {rollup_table(grain)}")
+    conn.executescript(_TX_INDEXES + BALANCE_SCHEMA_SQL + ROLLUP_SCHEMA_SQL + SEARCH_SCHEMA_SQL)
+    backfill(conn, BALANCE_BACKFILL_SQL)
+    for grain in GRAINS:
+        backfill(conn, backfill_sql(grain))
+
+
+def up(conn: sqlite3.Connection) -> None:
+    fk = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    # 換表期間關閉外鍵檢查，否則 DROP 舊表會被 TransactionTag / Attachment 擋下
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        if _column_type(conn, "[Transaction]", "amount") != "INTEGER":
+            _rebuild_transaction(conn)
+        if _column_type(conn, "Account", "balance_init") != "INTEGER":
+            _rebuild_account(conn)
+        _rebuild_derived(conn)
+    finally:
+        conn.execute(f"PRAGMA foreign_keys={'ON' if fk else 'OFF'}")
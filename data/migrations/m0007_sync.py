@@ -0,0 +1,85 @@
+# data/migrations/m0007_sync.py
+"""
+同步準備：本機裝置 id、[Transaction].uid 與 ChangeLog。
+
+既有的列都是本機寫的（device_id 原本寫死為 dev_local / import），
+補 uid 時一併改成本機裝置 id，並全部記進 ChangeLog，第一次同步會整批推上去。
+
+ChangeLog 的結構 / 觸發器在 v9 改成 HLC（見 m0009_hlc），這裡保留 v7 當時的版本。
+"""
+from __future__ import annotations
+import sqlite3
+import uuid
+
+from ..changelog import DEVICE_KEY, LOCAL_DEVICE_SQL, NEW_UID_SQL
+from .base import backfill, has_column, has_table
+
+VERSION = 7
+
+_SYNCED_COLS_V7 = (
+    "book_id, account_id, type, amount, currency, category_id, "
+    "member_id, merchant, note, date, updated_at, device_id"
+)
+
+_CHANGELOG_V7_SQL = f"""
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT NOT NULL UNIQUE,
+    op TEXT NOT NULL CHECK(op IN ('U','D')),
+    device_id TEXT NOT NULL,
+    at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_changelog_device_seq ON ChangeLog(device_id, seq);
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_changelog_ins AFTER INSERT ON [Transaction]
+BEGIN
+    INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+    VALUES (NEW.uid, 'U', NEW.device_id, NEW.updated_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_changelog_upd AFTER UPDATE OF {_SYNCED_COLS_V7} ON [Transaction]
+BEGIN
+    INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+    VALUES (NEW.uid, 'U', NEW.device_id, NEW.updated_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_changelog_del AFTER DELETE ON [Transaction]
+BEGIN
+    INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+    VALUES (OLD.uid, 'D',
+            IFNULL({LOCAL_DEVICE_SQL}, OLD.device_id),
+            strftime('%Y-%m-%dT%H:%M:%S', 'now'));
+END;
+"""
+
+_BACKFILL_V7_SQL = """
+INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at)
+SELECT uid, 'U', device_id, updated_at FROM [Transaction]
+WHERE id >= ? AND id < ?
+ORDER BY id
+"""
+
+
+def up(conn: sqlite3.Connection) -> None:
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO Settings(key, value) VALUES(?,?)", (DEVICE_KEY, uuid.uuid4().hex)
+        )
+        if not has_column(conn, "[Transaction]", "uid"):
+            conn.execute("ALTER TABLE [Transaction] ADD COLUMN uid TEXT")
+    device = conn.execute("SELECT value FROM Settings WHERE key=?", (DEVICE_KEY,)).fetchone()[0]
+    # 觸發器建立之前改寫，不會產生多餘的 ChangeLog
+    backfill(
+        conn,
+        f"""
+        UPDATE [Transaction] SET uid = {NEW_UID_SQL}, device_id = '{device}'
+        WHERE id >= ? AND id < ? AND uid IS NULL
+        """,
+    )
+    existed = has_table(conn, "ChangeLog")
+    conn.executescript(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_tx_uid ON [Transaction](uid);" + _CHANGELOG_V7_SQL
+    )
+    if not existed:
+        backfill(conn, _BACKFILL_V7_SQL)
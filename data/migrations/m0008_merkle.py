@@ -0,0 +1,51 @@
+# data/migrations/m0008_merkle.py
+"""
+MerkleLeaf 與 dirty 月份觸發器；標籤 / 附件增刪會 touch 所屬交易。
+
+既有月份全部標成 dirty，雜湊在第一次比對 / 驗證時才算（不拖慢啟動）。
+
+touch 觸發器在 v9 改成 HLC / 逐欄時鐘（見 m0009_hlc，用到 v9 才加的 hlc / clocks），
+這裡保留 v8 當時的版本：以 updated_at / device_id 當版本。
+"""
+from __future__ import annotations
+import sqlite3
+
+from ..changelog import LOCAL_DEVICE_SQL
+from ..merkle import BACKFILL_SQL, MERKLE_SCHEMA_SQL
+from .base import backfill, has_table
+
+VERSION = 8
+
+
+def _touch_v8(table: str, event: str, ref: str) -> str:
+    return f"""
+CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_touch_{event[:3].lower()} AFTER {event} ON {table}
+BEGIN
+    UPDATE [Transaction]
+    -- 版本至少前進一秒：同一秒內新增又加標籤時，(updated_at, device_id) 才比得出新舊
+    SET updated_at = strftime('%Y-%m-%dT%H:%M:%S', max(julianday('now'), julianday(updated_at, '+1 second'))),
+        device_id = IFNULL({LOCAL_DEVICE_SQL}, device_id)
+    WHERE id = {ref}.tx_id;
+END;
+"""
+
+
+_TOUCH_V8_SQL = (
+    _touch_v8("TransactionTag", "INSERT", "NEW")
+    + _touch_v8("TransactionTag", "DELETE", "OLD")
+    + _touch_v8("Attachment", "INSERT", "NEW")
+    + _touch_v8("Attachment", "DELETE", "OLD")
+    + _touch_v8("Attachment", "UPDATE OF file_path, ocr_text", "NEW")
+)
+
+
+def up(conn: sqlite3.Connection) -> None:
+    existed = has_table(conn, "MerkleLeaf")
+    conn.executescript(
+        # 觸發器 / 月份雜湊都以 tx_id 找附件
+        "CREATE INDEX IF NOT EXISTS idx_attachment_tx ON Attachment(tx_id);"
+        + _TOUCH_V8_SQL
+        + MERKLE_SCHEMA_SQL
+    )
+    if not existed:
+        backfill(conn, BACKFILL_SQL)
@@ -0,0 +1,79 @@
+# data/migrations/m0009_hlc.py
+"""
+同步版本改用 hybrid logical clock（data.hlc）與逐欄時鐘。
+
+- [Transaction] 加 hlc（由舊的 updated_at 換算，計數為 0）與 clocks（NULL = 全欄同一版本）。
+- ChangeLog.at 由 TEXT 改 INTEGER：建新表 → 複製（ISO 時間換算成 HLC）→ 改名；
+  sqlite_sequence 沿用舊值，各 peer 的 high-water mark 不受影響。
+- ChangeLog / 標籤、附件 touch 觸發器換成 HLC 版。
+- Settings[hlc] 從 max(現在, 既有最大版本) 起跳。
+已是 INTEGER 的 ChangeLog 不會再重建，可重跑。
+"""
+from __future__ import annotations
+import sqlite3
+
+from ..changelog import CHANGELOG_SCHEMA_SQL, TOUCH_SCHEMA_SQL, TRIGGER_NAMES
+from ..hlc import HLC_KEY, PHYSICAL_SQL, from_iso_sql
+from .base import backfill, has_column
+
+VERSION = 9
+
+_CHANGELOG_NEW_DDL = """
+CREATE TABLE ChangeLog_new (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT NOT NULL UNIQUE,
+    op TEXT NOT NULL CHECK(op IN ('U','D')),
+    device_id TEXT NOT NULL,
+    at INTEGER NOT NULL
+)
+"""
+
+
+def _changelog_at_type(conn: sqlite3.Connection) -> str:
+    return next((r[2] for r in conn.execute("PRAGMA table_info(ChangeLog)") if r[1] == "at"), "")
+
+
+def up(conn: sqlite3.Connection) -> None:
+    with conn:
+        if not has_column(conn, "[Transaction]", "hlc"):
+            conn.execute("ALTER TABLE [Transaction] ADD COLUMN hlc INTEGER NOT NULL DEFAULT 0")
+        if not has_column(conn, "[Transaction]", "clocks"):
+            conn.execute("ALTER TABLE [Transaction] ADD COLUMN clocks TEXT")
+    # 舊觸發器的 UPDATE OF 不含 hlc，回填不會產生 ChangeLog
+    backfill(
+        conn,
+        f"UPDATE [Transaction] SET hlc = {from_iso_sql('updated_at')} WHERE id >= ? AND id < ? AND hlc = 0",
+    )
+
+    with conn:
+        conn.execute("BEGIN")
+        for name in TRIGGER_NAMES:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        if _changelog_at_type(conn).upper() != "INTEGER":
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'").fetchone()
+            conn.execute("DROP TABLE IF EXISTS ChangeLog_new")
+            conn.execute(_CHANGELOG_NEW_DDL)
+            conn.execute(
+                f"""
+                INSERT INTO ChangeLog_new(seq, uid, op, device_id, at)
+                SELECT seq, uid, op, device_id, {from_iso_sql('at')} FROM ChangeLog ORDER BY seq
+                """
+            )
+            conn.execute("DROP TABLE ChangeLog")
+            conn.execute("ALTER TABLE ChangeLog_new RENAME TO ChangeLog")
+            if seq is not None:
+                # 最新的紀錄可能已被 INSERT OR REPLACE 換掉；seq 不能倒退重用
+                cur = conn.execute(
+                    "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'ChangeLog'", (seq[0],)
+                )
+                if cur.rowcount == 0:
+                    conn.execute("INSERT INTO sqlite_sequence(name, seq) VALUES('ChangeLog', ?)", (seq[0],))
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO Settings(key, value)
+            SELECT '{HLC_KEY}', max({PHYSICAL_SQL},
+                                    IFNULL((SELECT max(hlc) FROM [Transaction]), 0),
+                                    IFNULL((SELECT max(at) FROM ChangeLog), 0))
+            """
+        )
+    conn.executescript(CHANGELOG_SCHEMA_SQL + TOUCH_SCHEMA_SQL)
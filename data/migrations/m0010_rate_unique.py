@@ -0,0 +1,28 @@
+# data/migrations/m0010_rate_unique.py
+"""
+Rate 以 (base_currency, target_currency, date) 唯一：重複載入改成 upsert，不再累積重複列。
+
+- 既有重複列只留 id 最大（最後寫入）的一筆，與 data.rates 的同日取最後一筆一致。
+- idx_rate_date_currency（date 在前）換成唯一的 idx_rate_pair_date（幣別對在前），
+  as-of 查詢「某幣別對、日期 <= d 的最後一筆」可以直接走索引。
+"""
+from __future__ import annotations
+import sqlite3
+
+from ..rates import RATE_INDEX_SQL
+
+VERSION = 10
+
+
+def up(conn: sqlite3.Connection) -> None:
+    with conn:
+        conn.execute("BEGIN")
+        conn.execute(
+            """
+            DELETE FROM Rate WHERE id NOT IN (
+                SELECT max(id) FROM Rate GROUP BY base_currency, target_currency, date
+            )
+            """
+        )
+        conn.execute("DROP INDEX IF EXISTS idx_rate_date_currency")
+        conn.execute(RATE_INDEX_SQL)
@@ -0,0 +1,13 @@
+# data/migrations/m0011_tag_index.py
+"""
+TransactionTag 以 tag_id 開頭的索引：「某標籤的所有交易」不再掃整張關聯表。
+(tag_id, tx_id) 即為完整的列，data.tagindex 載入各標籤的 bitmap 時只讀索引。
+"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 11
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript("CREATE INDEX IF NOT EXISTS idx_txtag_tag ON TransactionTag(tag_id, tx_id);")
@@ -0,0 +1,24 @@
+# data/migrations/m0012_ocr_cache.py
+"""
+OcrResult：OCR 辨識結果快取，以 (圖片 sha256, 後端) 為鍵。
+同一張收據（內容相同）不論從哪個路徑加進來都只辨識一次；換了 OCR 引擎則各自保存。
+欄位（總額、日期…）不存，每次從 text 批次解析，解析規則改進後舊結果也跟著受惠。
+"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 12
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS OcrResult (
+            hash TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            text TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (hash, backend)
+        ) WITHOUT ROWID;
+        """
+    )
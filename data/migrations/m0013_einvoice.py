@@ -0,0 +1,49 @@
+# data/migrations/m0013_einvoice.py
+"""
+電子發票（載具歸戶）：Invoice 為發票表頭、InvoiceItem 為品項明細，皆連到對應的 [Transaction]。
+
+- 發票號碼每期（兩個月）重新配號，唯一鍵是 (invoice_no, period)；period 為該期單數月 "YYYY-MM"。
+  匯入時以此索引去重，重複匯入同一份檔案不會多出交易。
+- 只存在本機，不參與同步（同步的是交易本身）。
+"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 13
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS Invoice (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tx_id INTEGER NOT NULL,
+    invoice_no TEXT NOT NULL,
+    period TEXT NOT NULL,
+    date TEXT NOT NULL,
+    seller_id TEXT,
+    seller_name TEXT,
+    carrier TEXT,
+    amount INTEGER NOT NULL,
+    FOREIGN KEY(tx_id) REFERENCES [Transaction](id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_invoice_no_period ON Invoice(invoice_no, period);
+CREATE INDEX IF NOT EXISTS idx_invoice_tx ON Invoice(tx_id);
+CREATE INDEX IF NOT EXISTS idx_invoice_seller ON Invoice(seller_id);
+
+CREATE TABLE IF NOT EXISTS InvoiceItem (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    invoice_id INTEGER NOT NULL,
+    tx_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    qty REAL,
+    unit_price INTEGER,
+    amount INTEGER NOT NULL,
+    FOREIGN KEY(invoice_id) REFERENCES Invoice(id),
+    FOREIGN KEY(tx_id) REFERENCES [Transaction](id)
+);
+CREATE INDEX IF NOT EXISTS idx_invoiceitem_tx ON InvoiceItem(tx_id);
+CREATE INDEX IF NOT EXISTS idx_invoiceitem_invoice ON InvoiceItem(invoice_id);
+"""
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA_SQL)
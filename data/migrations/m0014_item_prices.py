@@ -0,0 +1,49 @@
+# data/migrations/m0014_item_prices.py
+"""
+品項價格歷史：Item 為正規化後的品名字典（data.items），InvoiceItem 補上 item_id 與
+發票的 merchant / date，並建 (item_id, merchant, date, unit_price, qty) 覆蓋索引——
+「這個品項在這家店的價格變化」只讀索引的一段區間，不掃發票。
+
+既有品項分批回填；沒有單價的品項以 小計 / 數量 補上（數量不明當 1）。
+"""
+from __future__ import annotations
+import sqlite3
+
+from ..items import intern_in, item_key
+from .base import backfill, has_column
+
+VERSION = 14
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS Item (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL
+);
+"""
+
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_invoiceitem_item ON InvoiceItem(item_id, merchant, date, unit_price, qty);
+"""
+
+_BACKFILL_SQL = """
+UPDATE InvoiceItem SET
+    item_id = (SELECT id FROM Item WHERE key = item_key(InvoiceItem.name)),
+    merchant = (SELECT t.merchant FROM [Transaction] t WHERE t.id = InvoiceItem.tx_id),
+    date = (SELECT i.date FROM Invoice i WHERE i.id = InvoiceItem.invoice_id),
+    unit_price = COALESCE(unit_price, CAST(ROUND(amount * 1.0 / COALESCE(NULLIF(qty, 0), 1)) AS INTEGER))
+WHERE id >= ? AND id < ? AND item_id IS NULL
+"""
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA_SQL)
+    with conn:
+        for column, decl in (("item_id", "INTEGER REFERENCES Item(id)"), ("merchant", "TEXT"), ("date", "TEXT")):
+            if not has_column(conn, "InvoiceItem", column):
+                conn.execute(f"ALTER TABLE InvoiceItem ADD COLUMN {column} {decl}")
+    with conn:
+        intern_in(conn, [r[0] for r in conn.execute("SELECT DISTINCT name FROM InvoiceItem WHERE item_id IS NULL")])
+    conn.create_function("item_key", 1, item_key, deterministic=True)
+    backfill(conn, _BACKFILL_SQL, table="InvoiceItem")
+    conn.executescript(INDEX_SQL)
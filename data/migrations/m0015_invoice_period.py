@@ -0,0 +1,13 @@
+# data/migrations/m0015_invoice_period.py
+"""
+Invoice 以期別開頭的覆蓋索引：對獎時「這一期的所有發票號碼」只讀索引的一段區間。
+(invoice_no, period) 唯一索引以號碼開頭，依期別查會掃整張表。
+"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 15
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript("CREATE INDEX IF NOT EXISTS idx_invoice_period ON Invoice(period, invoice_no, tx_id);")
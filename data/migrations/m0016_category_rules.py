@@ -0,0 +1,48 @@
+# data/migrations/m0016_category_rules.py
+"""
+自動分類規則（domain.rules）：CategoryRule 一列一條規則，條件全部成立才套用。
+
+- keywords：以 | 分隔，任一個出現在 field 指定的文字（merchant / note / any）即成立；空 = 不看文字
+- min_amount / max_amount：最小單位金額（含上下界），currency 有值時只對該幣別的交易
+- account_id / tx_type：限定帳戶 / 收支類型
+- priority 大的先比，相同時 id 小的先
+規則有增刪改時觸發器把 Settings 的 category_rules:version 加一，規則引擎的快取比對它決定是否重建。
+"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 16
+
+VERSION_KEY = "category_rules:version"
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS CategoryRule (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category_id INTEGER NOT NULL,
+    field TEXT NOT NULL DEFAULT 'any' CHECK(field IN ('merchant','note','any')),
+    keywords TEXT NOT NULL DEFAULT '',
+    min_amount INTEGER,
+    max_amount INTEGER,
+    currency TEXT,
+    account_id INTEGER,
+    tx_type TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT NOT NULL,
+    FOREIGN KEY(category_id) REFERENCES Category(id),
+    FOREIGN KEY(account_id) REFERENCES Account(id)
+);
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_rule_{op.lower()} AFTER {op} ON CategoryRule
+BEGIN
+    INSERT INTO Settings(key, value) VALUES('{VERSION_KEY}', '1')
+    ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1;
+END;
+"""
+    for op in ("INSERT", "UPDATE", "DELETE")
+)
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA_SQL)
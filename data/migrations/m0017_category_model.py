@@ -0,0 +1,24 @@
+# data/migrations/m0017_category_model.py
+"""
+類別建議模型（domain.suggest）的計數表：CategoryStat 一列為「特徵值 × 類別」出現的次數，
+feature = '' 的列為各類別的總筆數。已學到哪一筆交易記在 Settings 的 category_model:last_id。
+
+表本身不回填：第一次載入模型時由 domain.suggest 從 last_id = 0 補學歷史交易。
+"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 17
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS CategoryStat (
+    feature TEXT NOT NULL,
+    category_id INTEGER NOT NULL,
+    cnt INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY(feature, category_id)
+) WITHOUT ROWID;
+"""
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript(SCHEMA_SQL)
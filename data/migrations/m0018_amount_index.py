@@ -0,0 +1,10 @@
+# data/migrations/m0018_amount_index.py
+"""TxQuery 只帶金額區間時的驅動索引（其餘條件都沒有時不必從日期序走完整本帳）。"""
+from __future__ import annotations
+import sqlite3
+
+VERSION = 18
+
+
+def up(conn: sqlite3.Connection) -> None:
+    conn.executescript("CREATE INDEX IF NOT EXISTS idx_tx_amount ON [Transaction](amount);")
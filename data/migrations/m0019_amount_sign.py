@@ -0,0 +1,22 @@
+# data/migrations/m0019_amount_sign.py
+"""
+支出 / 收入的金額改回正數：舊版 m0006 照搬了手動記帳存的負數支出，
+AccountBalance 與彙總表因而把這些支出算成收入。由 [Transaction] 觸發器連帶修正。
+m0006 之後已取 ABS，新的資料庫這一步不會改到任何列。
+"""
+from __future__ import annotations
+import sqlite3
+
+from .base import backfill
+
+VERSION = 19
+
+
+def up(conn: sqlite3.Connection) -> None:
+    backfill(
+        conn,
+        """
+        UPDATE [Transaction] SET amount = -amount
+        WHERE id >= ? AND id < ? AND type IN ('expense','income') AND amount < 0
+        """,
+    )
@@ -0,0 +1,230 @@
+# data/query.py
+"""
+TxQuery：可組合的 [Transaction] 查詢。
+
+    rows, cursor = TxQuery().book(1).dates("2025-03-01", "2025-04-01").limit(50).fetch(conn)
+    rows, cursor = TxQuery().book(1).after(cursor).limit(50).fetch(conn)   # 下一頁
+
+產生 SQL 時會依條件挑一個 idx_tx_* 作為驅動索引（INDEXED BY）；有標籤條件（且沒有帳戶 / 類別）時
+改由 TransactionTag 的 idx_txtag_tag 找出 tx_id 再以主鍵回查 [Transaction]。
+排序固定為 (date, id)，分頁用 keyset cursor，不用 OFFSET。
+"""
+from __future__ import annotations
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Cursor = Tuple[str, int]
+
+_COLUMNS = """
+    t.id, t.book_id, t.account_id, t.type, t.amount, t.currency, t.date,
+    t.category_id, IFNULL(c.name,'') AS category, t.member_id, t.merchant, t.note
+"""
+
+# 驅動索引（依選擇性由高到低挑第一個有條件的）；都沒有時退回 idx_tx_date
+_IDX_ACCOUNT = "idx_tx_account_date"
+_IDX_CATEGORY = "idx_tx_category_date"
+_IDX_BOOK = "idx_tx_book_date"
+_IDX_DATE = "idx_tx_date"
+_IDX_AMOUNT = "idx_tx_amount"
+# 不是 [Transaction] 的索引：由標籤驅動
+_BY_TAGS = "tags"
+
+
+def _in(col: str, values: Sequence[Any]) -> Tuple[str, List[Any]]:
+    if len(values) == 1:
+        return f"{col} = ?", [values[0]]
+    return f"{col} IN ({','.join('?' * len(values))})", list(values)
+
+
+class TxQuery:
+    def __init__(self) -> None:
+        self._book: List[int] = []
+        self._accounts: List[int] = []
+        self._category: Optional[int] = None
+        self._subtree = True
+        self._tags: List[int] = []
+        self._tags_all = False
+        self._members: List[int] = []
+        self._types: List[str] = []
+        self._currencies: List[str] = []
+        self._amount: Tuple[Optional[int], Optional[int]] = (None, None)
+        self._dates: Tuple[Optional[str], Optional[str]] = (None, None)
+        self._cursor: Optional[Cursor] = None
+        self._desc = True
+        self._limit = 50
+
+    # ───── 條件（皆回傳 self 以便串接） ─────
+    def book(self, book_id: int) -> "TxQuery":
+        self._book = [book_id]
+        return self
+
+    def account(self, *account_ids: int) -> "TxQuery":
+        self._accounts = list(account_ids)
+        return self
+
+    def category(self, category_id: int, subtree: bool = True) -> "TxQuery":
+        """subtree=True 時包含所有子類別（Category.parent_id 遞迴）。"""
+        self._category, self._subtree = category_id, subtree
+        return self
+
+    def tag(self, *tag_ids: int, match_all: bool = False) -> "TxQuery":
+        self._tags, self._tags_all = list(tag_ids), match_all
+        return self
+
+    def member(self, *member_ids: int) -> "TxQuery":
+        self._members = list(member_ids)
+        return self
+
+    def type(self, *tx_types: str) -> "TxQuery":
+        self._types = list(tx_types)
+        return self
+
+    def currency(self, *codes: str) -> "TxQuery":
+        self._currencies = list(codes)
+        return self
+
+    def amount(self, lo: Optional[int] = None, hi: Optional[int] = None) -> "TxQuery":
+        """金額區間（最小單位整數，見 core.money），含端點。"""
+        self._amount = (lo, hi)
+        return self
+
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> "TxQuery":
+        """日期區間 [start, end)，ISO 字串比較。"""
+        self._dates = (start, end)
+        return self
+
+    def after(self, cursor: Optional[Cursor]) -> "TxQuery":
+        """從上一頁回傳的 cursor 之後繼續。"""
+        self._cursor = tuple(cursor) if cursor else None
+        return self
+
+    def ascending(self) -> "TxQuery":
+        self._desc = False
+        return self
+
+    def limit(self, n: int) -> "TxQuery":
+        self._limit = max(1, int(n))
+        return self
+
+    # ───── 編譯 ─────
+    def _driving_index(self) -> str:
+        if self._accounts:
+            return _IDX_ACCOUNT
+        if self._category is not None:
+            return _IDX_CATEGORY
+        if self._tags:
+            return _BY_TAGS
+        if self._book:
+            return _IDX_BOOK
+        # 有日期區間 / cursor 時日期序本身就是範圍；只有金額區間時才由金額驅動
+        if self._dates == (None, None) and self._cursor is None and self._amount != (None, None):
+            return _IDX_AMOUNT
+        return _IDX_DATE
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        where: List[str] = []
+        args: List[Any] = []
+
+        def add(clause: str, values: Sequence[Any] = ()) -> None:
+            where.append(clause)
+            args.extend(values)
+
+        index = self._driving_index()
+
+        if self._book:
+            add(*_in("t.book_id", self._book))
+        if self._accounts:
+            add(*_in("t.account_id", self._accounts))
+        if self._category is not None:
+            if self._subtree:
+                add(
+                    """t.category_id IN (
+                        WITH RECURSIVE sub(id) AS (
+                            SELECT ? UNION ALL
+                            SELECT c2.id FROM Category c2 JOIN sub ON c2.parent_id = sub.id
+                        ) SELECT id FROM sub)""",
+                    [self._category],
+                )
+            else:
+                add("t.category_id = ?", [self._category])
+        if self._members:
+            add(*_in("t.member_id", self._members))
+        if self._types:
+            add(*_in("t.type", self._types))
+        if self._currencies:
+            add(*_in("t.currency", self._currencies))
+
+        lo, hi = self._amount
+        if lo is not None:
+            add("t.amount >= ?", [lo])
+        if hi is not None:
+            add("t.amount <= ?", [hi])
+
+        start, end = self._dates
+        if start is not None:
+            add("t.date >= ?", [start])
+        if end is not None:
+            add("t.date < ?", [end])
+
+        source = f"[Transaction] AS t INDEXED BY {index}"
+        source_args: List[Any] = []
+        if index == _BY_TAGS:
+            # 先從 idx_txtag_tag 取出符合的 tx_id（match_all 時每個 tx 要湊滿全部標籤），CROSS JOIN 固定由它驅動
+            tag_clause, source_args = _in("tag_id", self._tags)
+            having = ""
+            if self._tags_all and len(self._tags) > 1:
+                having = "HAVING COUNT(*) = ?"
+                source_args = source_args + [len(self._tags)]
+            source = f"""(SELECT tx_id FROM TransactionTag INDEXED BY idx_txtag_tag
+                WHERE {tag_clause} GROUP BY tx_id {having}) AS tg
+            CROSS JOIN [Transaction] AS t ON t.id = tg.tx_id"""
+        elif self._tags:
+            tag_clause, tag_args = _in("tt.tag_id", self._tags)
+            if self._tags_all and len(self._tags) > 1:
+                add(f"(SELECT COUNT(*) FROM TransactionTag tt WHERE tt.tx_id = t.id AND {tag_clause}) = ?",
+                    tag_args + [len(self._tags)])
+            else:
+                add(f"EXISTS (SELECT 1 FROM TransactionTag tt WHERE tt.tx_id = t.id AND {tag_clause})", tag_args)
+
+        if self._cursor is not None:
+            c_date, c_id = self._cursor
+            # 第一項是索引可用的範圍條件，第二項再精確切開同一天
+            if self._desc:
+                add("t.date <= ? AND (t.date < ? OR t.id < ?)", [c_date, c_date, c_id])
+            else:
+                add("t.date >= ? AND (t.date > ? OR t.id > ?)", [c_date, c_date, c_id])
+
+        order = "DESC" if self._desc else "ASC"
+        sql = f"""
+        SELECT {_COLUMNS}
+        FROM {source}
+        LEFT JOIN Category c ON c.id = t.category_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY t.date {order}, t.id {order}
+        LIMIT ?
+        """
+        args.append(self._limit)
+        return sql, source_args + args
+
+    def fetch(self, conn: sqlite3.Connection) -> Tuple[List[Dict[str, Any]], Optional[Cursor]]:
+        """回傳 (rows, next_cursor)；沒有下一頁時 cursor 為 None。"""
+        sql, args = self.to_sql()
+        rows = [dict(r) for r in conn.execute(sql, args).fetchall()]
+        cursor = (rows[-1]["date"], rows[-1]["id"]) if len(rows) == self._limit else None
+        return rows, cursor
+
+
+# ───── EXPLAIN QUERY PLAN 檢查 ─────
+# SQLite 對有條件限縮的索引存取印 SEARCH；SCAN（不論是否 USING INDEX）都是從頭走到尾
+_FULL_SCAN = re.compile(r"^SCAN (t|Transaction)\b")
+
+
+def explain(conn: sqlite3.Connection, query: TxQuery) -> List[str]:
+    sql, args = query.to_sql()
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, args).fetchall()]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """回傳 plan 中對 [Transaction] 沒有限縮條件的掃描列（SCAN t、SCAN t USING INDEX ... 都算）。"""
+    return [line for line in plan if _FULL_SCAN.match(line)]
@@ -0,0 +1,271 @@
+# data/rates.py
+"""
+匯率：Rate 表整包載進記憶體，查詢 / 換算不再逐筆下 SQL。
+
+RateIndex：(base, target) → 依日期排序的 (dates, rates)
+  - Rate 一列「1 base = rate target」同時登錄正反兩個方向（反向為 1 / rate）
+  - as-of：取日期 <= 交易日（UTC 日期前 10 碼）的最後一筆，bisect 查找；
+    交易早於最早的匯率時查不到（不拿未來的匯率充數），由呼叫端列為缺匯率
+  - 三角換算 src → via → dst：via 通常給帳本幣別；省略時試所有與 src、dst 都有匯率的幣別
+    （例如匯率都以 USD 報價時，JPY → TWD 經 USD）。
+    直接與三角都有時取 as-of 日期較新的（直接匯率可能很久沒更新），同日以直接匯率為準
+  - 同一天多筆時以 id 較大（較晚寫入）的為準
+convert_rows() 對整批結果換算：同一 (幣別, 日期) 的係數只算一次並留在索引裡，
+之後的換算只剩一次 dict 查找與乘法（tools.bench_rates：10 萬筆約百毫秒，逐筆 SQL as-of 慢一個數量級以上）。
+
+快取以 DB 檔為單位（get_rates），收到 EV_RATES_UPDATED 時 invalidate_rates() 丟掉，
+下次查詢在 DB 執行緒上重建。金額為最小單位整數（core.money），換算後四捨五入（half-up）。
+
+寫入（domain.importers.RateImporter 用）：Rate 以 (base, target, date) 唯一（m0010），
+upsert_in() 批次寫入、fill_gaps_in() 以前一筆匯率補齊假日等缺漏的日期。
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.money import decimals_of
+from .conn import ConnectionManager, get_manager
+
+_RATES_SQL = """
+SELECT date, base_currency, target_currency, rate
+FROM Rate
+WHERE rate > 0
+ORDER BY date, id
+"""
+
+DEFAULT_CURRENCY = "TWD"
+
+RATE_INDEX_SQL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_rate_pair_date ON Rate(base_currency, target_currency, date)"
+)
+
+# 值沒變的列不寫（不佔 WAL、changes() 也不算）
+_UPSERT_SQL = """
+INSERT INTO Rate(date, base_currency, target_currency, rate) VALUES (?,?,?,?)
+ON CONFLICT(base_currency, target_currency, date) DO UPDATE SET rate = excluded.rate
+WHERE rate <> excluded.rate
+"""
+
+# (lo, hi] 之間缺的日期以前一筆匯率補上；參數：lo, hi, base, target
+_FILL_GAPS_SQL = """
+WITH RECURSIVE days(d) AS (
+    SELECT date(:lo, '+1 day') WHERE :lo < :hi
+    UNION ALL
+    SELECT date(d, '+1 day') FROM days WHERE d < :hi
+)
+INSERT INTO Rate(date, base_currency, target_currency, rate)
+SELECT d, :base, :target, (
+    SELECT r.rate FROM Rate r
+    WHERE r.base_currency = :base AND r.target_currency = :target AND r.date < d
+    ORDER BY r.date DESC LIMIT 1
+)
+FROM days
+WHERE NOT EXISTS (
+    SELECT 1 FROM Rate r WHERE r.base_currency = :base AND r.target_currency = :target AND r.date = d
+)
+"""
+
+# as-of 結果：(匯率日期, 匯率)
+AsOf = Tuple[str, float]
+
+
+class RateIndex:
+    def __init__(self, rows: Iterable[Sequence[Any]]) -> None:
+        """rows：(date, base, target, rate)，需依 (date, id) 排序。"""
+        series: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for date, base, target, rate in rows:
+            if base == target:
+                continue
+            day = str(date)[:10]
+            # dict 保留插入順序且後寫覆蓋前寫：同一天只留最後一筆
+            series.setdefault((base, target), {})[day] = float(rate)
+            series.setdefault((target, base), {})[day] = 1.0 / float(rate)
+        self._dates: Dict[Tuple[str, str], List[str]] = {}
+        self._rates: Dict[Tuple[str, str], List[float]] = {}
+        self._targets: Dict[str, List[str]] = {}
+        # (dst, via) → {(src, 日期): 最小單位換算係數}；索引建好後不再變，係數可以一直留著
+        self._factors: Dict[Tuple[str, Optional[str]], Dict[Tuple[str, str], Optional[float]]] = {}
+        for pair, by_day in series.items():
+            days = sorted(by_day)
+            self._dates[pair] = days
+            self._rates[pair] = [by_day[d] for d in days]
+            self._targets.setdefault(pair[0], []).append(pair[1])
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "RateIndex":
+        return cls(conn.execute(_RATES_SQL))
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        return sorted(self._dates)
+
+    # ───── 查詢 ─────
+    def _direct(self, src: str, dst: str, day: str) -> Optional[AsOf]:
+        dates = self._dates.get((src, dst))
+        if not dates:
+            return None
+        i = bisect_right(dates, day)
+        if i == 0:
+            return None  # 早於這組匯率的第一筆
+        return dates[i - 1], self._rates[(src, dst)][i - 1]
+
+    def as_of(self, src: str, dst: str, date: str, via: Optional[str] = None) -> Optional[AsOf]:
+        """date 當天有效的 1 src = ? dst；查不到時為 None。"""
+        if src == dst:
+            return date[:10], 1.0
+        day = date[:10]
+        best = self._direct(src, dst, day)
+        pivots = [via] if via is not None else self._targets.get(src, [])
+        for pivot in pivots:
+            if pivot in (src, dst):
+                continue
+            a, b = self._direct(src, pivot, day), self._direct(pivot, dst, day)
+            if a is None or b is None:
+                continue
+            cross = (min(a[0], b[0]), a[1] * b[1])
+            if best is None or cross[0] > best[0]:
+                best = cross
+        return best
+
+    def rate(self, src: str, dst: str, date: str, via: Optional[str] = None) -> Optional[float]:
+        found = self.as_of(src, dst, date, via)
+        return found[1] if found else None
+
+    def convert(self, minor: int, src: str, dst: str, date: str, via: Optional[str] = None) -> Optional[int]:
+        """單筆最小單位金額換算；查不到匯率時為 None。"""
+        factor = self._factor(src, dst, date[:10], via)
+        return None if factor is None else _half_up(minor * factor)
+
+    def convert_rows(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        dst: str,
+        via: Optional[str] = None,
+    ) -> List[Optional[int]]:
+        """
+        整批換算 rows（需有 amount / currency / date）成 dst 的最小單位金額，順序同 rows；
+        via 同 as_of()。查不到匯率的列為 None。
+        """
+        factors = self._factors.setdefault((dst, via), {})
+        out: List[Optional[int]] = []
+        append = out.append
+        for r in rows:
+            src = r["currency"]
+            if src == dst:
+                append(r["amount"])
+                continue
+            key = (src, r["date"][:10])
+            if key in factors:
+                factor = factors[key]
+            else:
+                factor = factors[key] = self._factor(src, dst, key[1], via)
+            if factor is None:
+                append(None)
+            else:
+                # _half_up 展開（熱迴圈省一次函式呼叫）
+                x = r["amount"] * factor
+                append(int(x + _HALF) if x >= 0 else -int(_HALF - x))
+        return out
+
+    def _factor(self, src: str, dst: str, day: str, via: Optional[str]) -> Optional[float]:
+        # 最小單位 → 最小單位：匯率再乘上兩幣別小數位的差
+        found = self.as_of(src, dst, day, via)
+        if found is None:
+            return None
+        return found[1] * 10.0 ** (decimals_of(dst) - decimals_of(src))
+
+
+# 0.5 加一點餘量：浮點誤差造成的 1234.4999999 仍進位成 1235
+_HALF = 0.5 + 1e-7
+
+
+def _half_up(x: float) -> int:
+    """遠離零的四捨五入，與 core.money 的 ROUND_HALF_UP 一致。"""
+    return int(x + _HALF) if x >= 0 else -int(_HALF - x)
+
+
+# ───── 寫入（呼叫端負責 transaction） ─────
+def upsert_in(conn: sqlite3.Connection, rows: Sequence[Tuple[str, str, str, float]]) -> int:
+    """rows：(date, base, target, rate)；回傳實際新增或改值的列數。"""
+    before = conn.total_changes
+    conn.executemany(_UPSERT_SQL, rows)
+    return conn.total_changes - before
+
+
+def fill_gaps_in(conn: sqlite3.Connection, base: str, target: str, lo: str, hi: str) -> int:
+    """
+    lo ~ hi（YYYY-MM-DD）之間沒有匯率的日子沿用前一筆；回傳補上的列數。
+    lo 之前已有匯率時從那一筆接著補，新載入的區間與既有資料之間也不會留空。
+    """
+    prev = conn.execute(
+        "SELECT max(date) FROM Rate WHERE base_currency = ? AND target_currency = ? AND date < ?",
+        (base, target, lo),
+    ).fetchone()[0]
+    lo = prev or lo
+    # WITH 開頭的 INSERT 在 sqlite3 模組拿不到 rowcount，改看 total_changes
+    before = conn.total_changes
+    conn.execute(_FILL_GAPS_SQL, {"lo": lo, "hi": hi, "base": base, "target": target})
+    return conn.total_changes - before
+
+
+# ───── 快取（每個 DB 檔一份） ─────
+_cache: Dict[str, RateIndex] = {}
+_generation = 0
+_lock = threading.Lock()
+
+
+def get_rates(manager: Optional[ConnectionManager] = None) -> RateIndex:
+    """目前 DB 的 RateIndex；第一次呼叫或 invalidate 之後在呼叫端（DB 執行緒）重建。"""
+    cm = manager or get_manager()
+    key = str(cm.path)
+    with _lock:
+        index, gen = _cache.get(key), _generation
+    if index is not None:
+        return index
+    with cm.reader() as conn:
+        index = RateIndex.load(conn)
+    with _lock:
+        if gen == _generation:  # 重建期間又被 invalidate 的話不放進快取
+            _cache[key] = index
+    return index
+
+
+def invalidate_rates(_payload: Any = None) -> None:
+    """EV_RATES_UPDATED 的 handler；可在任何執行緒呼叫。"""
+    global _generation
+    with _lock:
+        _cache.clear()
+        _generation += 1
+
+
+def book_currency_in(conn: sqlite3.Connection, book_id: int) -> str:
+    row = conn.execute("SELECT currency FROM AccountBook WHERE id = ?", (book_id,)).fetchone()
+    return row[0] if row else DEFAULT_CURRENCY
+
+
+def in_book_currency(
+    rows: List[Dict[str, Any]],
+    book_id: int = 1,
+    manager: Optional[ConnectionManager] = None,
+) -> Dict[str, Any]:
+    """
+    替 rows 加上 book_amount（帳本幣別的最小單位金額，查不到匯率為 None），
+    回傳 {"currency", "expense", "income", "missing"}：支出 / 收入合計與缺匯率的幣別。
+    要在 DB 執行緒上呼叫。
+    """
+    cm = manager or get_manager()
+    with cm.reader() as conn:
+        currency = book_currency_in(conn, book_id)
+    amounts = get_rates(cm).convert_rows(rows, currency)
+    expense = income = 0
+    missing = set()
+    for r, amount in zip(rows, amounts):
+        r["book_amount"] = amount
+        if amount is None:
+            missing.add(r["currency"])
+        elif r["type"] == "expense":
+            expense += amount
+        elif r["type"] == "income":
+            income += amount
+    return {"currency": currency, "expense": expense, "income": income, "missing": sorted(missing)}
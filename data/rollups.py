@@ -0,0 +1,219 @@
+# data/rollups.py
+"""
+日 / 週 / 月彙總表（RollupDay / RollupWeek / RollupMonth）。
+
+鍵：(book_id, period, account_id, category_id, currency, type)，category_id 為 NULL 時存 0。
+period 以使用者本地時區切日（[Transaction].date 是 UTC ISO，見 core.utils.now_iso）：
+  Day   → 'YYYY-MM-DD'
+  Week  → 該 ISO 週週一的日期 'YYYY-MM-DD'（顯示用 iso_week_label 轉成 'YYYY-Www'）
+  Month → 'YYYY-MM'
+total 為最小單位整數（見 core.money），同幣別加總精確。
+
+限制：觸發器在 UPDATE / DELETE 時以「現在」的時區重算 OLD 的 period；
+裝置換時區後，舊時區建立的桶會對不上，彙總表就開始漂移。
+因此把 SQLite 眼中的時區指紋記在 Settings[rollups:zone]，
+啟動時（data.db.init_db）若指紋與紀錄不同就 verify，不一致再 rebuild，見 sync_zone()。
+
+    python -m data.rollups --verify
+    python -m data.rollups --rebuild
+"""
+from __future__ import annotations
+import argparse
+import sqlite3
+from datetime import date as _date
+from typing import Dict, List
+
+# grain → 由日期欄位算出 period 的 SQL 片段
+GRAINS: Dict[str, str] = {
+    "day": "date({d}, 'localtime')",
+    "week": "date({d}, 'localtime', 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m', {d}, 'localtime')",
+}
+
+_KEY_COLS = "book_id, period, account_id, category_id, currency, type"
+
+ZONE_KEY = "rollups:zone"
+
+# 一月與七月各取一個時刻的 UTC 偏移（分鐘），夏令時間規則不同的時區也分得出來
+_ZONE_SQL = """
+SELECT CAST(ROUND((julianday('2001-01-15 12:00', 'localtime') - julianday('2001-01-15 12:00')) * 1440) AS INTEGER)
+    || ',' ||
+    CAST(ROUND((julianday('2001-07-15 12:00', 'localtime') - julianday('2001-07-15 12:00')) * 1440) AS INTEGER)
+"""
+
+
+def rollup_table(grain: str) -> str:
+    if grain not in GRAINS:
+        raise ValueError(f"unknown rollup grain: {grain!r}")
+    return "Rollup" + grain.capitalize()
+
+
+def _period(grain: str, col: str) -> str:
+    # 無法解析的日期歸到 '' 桶，避免整筆交易寫入失敗
+    return f"IFNULL({GRAINS[grain].format(d=col)}, '')"
+
+
+def _add_row(grain: str, r: str) -> str:
+    return f"""
+    INSERT INTO {rollup_table(grain)}({_KEY_COLS}, total, cnt)
+    VALUES ({r}.book_id, {_period(grain, r + '.date')}, {r}.account_id,
+            IFNULL({r}.category_id, 0), {r}.currency, {r}.type, {r}.amount, 1)
+    ON CONFLICT({_KEY_COLS}) DO UPDATE SET total = total + excluded.total, cnt = cnt + 1;"""
+
+
+def _sub_row(grain: str, r: str) -> str:
+    where = (
+        f"book_id = {r}.book_id AND period = {_period(grain, r + '.date')} "
+        f"AND account_id = {r}.account_id AND category_id = IFNULL({r}.category_id, 0) "
+        f"AND currency = {r}.currency AND type = {r}.type"
+    )
+    table = rollup_table(grain)
+    return f"""
+    UPDATE {table} SET total = total - {r}.amount, cnt = cnt - 1 WHERE {where};
+    DELETE FROM {table} WHERE {where} AND cnt <= 0;"""
+
+
+def _schema_sql() -> str:
+    parts: List[str] = []
+    for grain in GRAINS:
+        parts.append(f"""
+CREATE TABLE IF NOT EXISTS {rollup_table(grain)} (
+    book_id INTEGER NOT NULL,
+    period TEXT NOT NULL,
+    account_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    type TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    cnt INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY ({_KEY_COLS})
+) WITHOUT ROWID;
+""")
+    ins = "".join(_add_row(g, "NEW") for g in GRAINS)
+    dele = "".join(_sub_row(g, "OLD") for g in GRAINS)
+    parts.append(f"""
+CREATE TRIGGER IF NOT EXISTS trg_tx_rollup_ins AFTER INSERT ON [Transaction]
+BEGIN{ins}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_rollup_del AFTER DELETE ON [Transaction]
+BEGIN{dele}
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_rollup_upd
+AFTER UPDATE OF book_id, account_id, category_id, currency, type, amount, date ON [Transaction]
+BEGIN{dele}{ins}
+END;
+""")
+    return "".join(parts)
+
+
+ROLLUP_SCHEMA_SQL = _schema_sql()
+
+
+def _select_sql(grain: str, where: str = "") -> str:
+    return f"""
+    SELECT book_id, {_period(grain, 'date')} AS period, account_id,
+           IFNULL(category_id, 0), currency, type, SUM(amount), COUNT(*)
+    FROM [Transaction]
+    {where}
+    GROUP BY 1, 2, 3, 4, 5, 6
+    """
+
+
+def backfill_sql(grain: str) -> str:
+    """migration 回填用：以 [Transaction].id 區間 [?, ?) 分批累加到彙總表。"""
+    return f"""
+    INSERT INTO {rollup_table(grain)}({_KEY_COLS}, total, cnt)
+    {_select_sql(grain, "WHERE id >= ? AND id < ?")}
+    ON CONFLICT({_KEY_COLS}) DO UPDATE SET total = total + excluded.total, cnt = cnt + excluded.cnt
+    """
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> Dict[str, int]:
+    """清空並從 [Transaction] 全量重算三個彙總表；回傳各 grain 的列數。"""
+    out: Dict[str, int] = {}
+    with conn:
+        for grain in GRAINS:
+            table = rollup_table(grain)
+            conn.execute(f"DELETE FROM {table}")
+            cur = conn.execute(f"INSERT INTO {table}({_KEY_COLS}, total, cnt) {_select_sql(grain)}")
+            out[grain] = cur.rowcount
+    return out
+
+
+def verify_rollups(conn: sqlite3.Connection) -> Dict[str, int]:
+    """回傳每個 grain 與全量重算結果不一致的列數（全 0 表示一致）。"""
+    out: Dict[str, int] = {}
+    for grain in GRAINS:
+        table = rollup_table(grain)
+        cur = conn.execute(
+            f"""
+            WITH actual({_KEY_COLS}, total, cnt) AS ({_select_sql(grain)})
+            SELECT
+              (SELECT COUNT(*) FROM (
+                  SELECT {_KEY_COLS}, total, cnt FROM actual
+                  EXCEPT SELECT {_KEY_COLS}, total, cnt FROM {table}))
+            + (SELECT COUNT(*) FROM (
+                  SELECT {_KEY_COLS}, total, cnt FROM {table}
+                  EXCEPT SELECT {_KEY_COLS}, total, cnt FROM actual))
+            """
+        )
+        out[grain] = cur.fetchone()[0]
+    return out
+
+
+def zone_fingerprint(conn: sqlite3.Connection) -> str:
+    """SQLite 'localtime' 目前採用的時區，例如台北為 '480,480'。"""
+    return conn.execute(_ZONE_SQL).fetchone()[0]
+
+
+def sync_zone(conn: sqlite3.Connection) -> bool:
+    """
+    時區指紋與 Settings 紀錄不同（或尚未紀錄）時 verify，漂移就 rebuild，再記下新指紋。
+    指紋沒變時只讀一列 Settings。回傳是否 rebuild 過。
+    """
+    zone = zone_fingerprint(conn)
+    row = conn.execute("SELECT value FROM Settings WHERE key=?", (ZONE_KEY,)).fetchone()
+    if row is not None and row[0] == zone:
+        return False
+    rebuilt = any(verify_rollups(conn).values())
+    if rebuilt:
+        rebuild_rollups(conn)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO Settings(key, value) VALUES(?,?)", (ZONE_KEY, zone))
+    return rebuilt
+
+
+def iso_week_label(period: str) -> str:
+    """RollupWeek 的 period（週一日期）→ 'YYYY-Www'。"""
+    y, w, _ = _date.fromisoformat(period).isocalendar()
+    return f"{y}-W{w:02d}"
+
+
+def main() -> None:
+    from .db import get_conn
+
+    ap = argparse.ArgumentParser(prog="python -m data.rollups")
+    ap.add_argument("--rebuild", action="store_true", help="rebuild day/week/month rollups from [Transaction]")
+    ap.add_argument("--verify", action="store_true", help="report rollup rows that drifted")
+    args = ap.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.rebuild:
+            for grain, n in rebuild_rollups(conn).items():
+                print(f"{rollup_table(grain)}: {n} row(s)")
+        bad = verify_rollups(conn)
+        for grain, n in bad.items():
+            if n:
+                print(f"{rollup_table(grain)}: {n} mismatched row(s)")
+        ok = not any(bad.values())
+        print("OK" if ok else "MISMATCH")
+        raise SystemExit(0 if ok else 1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
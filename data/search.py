@@ -0,0 +1,107 @@
+# data/search.py
+"""
+全文檢索：TxSearch（FTS5, trigram tokenizer），rowid = [Transaction].id。
+
+欄位 merchant / note 來自 [Transaction]，ocr 為該筆所有 Attachment.ocr_text 串接；
+由觸發器同步。trigram 對中日文不需斷詞，但查詢字串至少要 3 個字元，
+所以 1–2 字元的詞（例如「拉麵」）改用 fts5vocab 找出以它開頭的 trigram，再以 OR 查詢。
+存入時尾端補兩個空白，讓每個字元位置都有一個以它開頭的 trigram，
+這樣前綴範圍查詢（term 有序，走索引）就能涵蓋所有出現位置。
+"""
+from __future__ import annotations
+import sqlite3
+from typing import List, Optional, Tuple
+
+# 短詞展開的 trigram 上限（單一字元可能對到很多 trigram）；超過時 build_match 回報 truncated
+MAX_SHORT_TERM_EXPANSION = 256
+
+_PAD = "IFNULL({v}, '') || '  '"
+_OCR = "IFNULL((SELECT group_concat(ocr_text, ' ') FROM Attachment WHERE tx_id = {tx}), '') || '  '"
+
+SEARCH_SCHEMA_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS TxSearch USING fts5(
+    merchant, note, ocr,
+    tokenize = 'trigram'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS TxSearchVocab USING fts5vocab(TxSearch, 'row');
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_search_ins AFTER INSERT ON [Transaction]
+BEGIN
+    INSERT INTO TxSearch(rowid, merchant, note, ocr)
+    VALUES (NEW.id, {_PAD.format(v='NEW.merchant')}, {_PAD.format(v='NEW.note')}, '  ');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_search_upd AFTER UPDATE OF merchant, note ON [Transaction]
+BEGIN
+    UPDATE TxSearch
+    SET merchant = {_PAD.format(v='NEW.merchant')}, note = {_PAD.format(v='NEW.note')}
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tx_search_del AFTER DELETE ON [Transaction]
+BEGIN
+    DELETE FROM TxSearch WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_att_search_ins AFTER INSERT ON Attachment
+BEGIN
+    UPDATE TxSearch SET ocr = {_OCR.format(tx='NEW.tx_id')} WHERE rowid = NEW.tx_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_att_search_upd AFTER UPDATE OF tx_id, ocr_text ON Attachment
+BEGIN
+    UPDATE TxSearch SET ocr = {_OCR.format(tx='OLD.tx_id')} WHERE rowid = OLD.tx_id;
+    UPDATE TxSearch SET ocr = {_OCR.format(tx='NEW.tx_id')} WHERE rowid = NEW.tx_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_att_search_del AFTER DELETE ON Attachment
+BEGIN
+    UPDATE TxSearch SET ocr = {_OCR.format(tx='OLD.tx_id')} WHERE rowid = OLD.tx_id;
+END;
+"""
+
+
+_FILL_SQL = f"""
+INSERT INTO TxSearch(rowid, merchant, note, ocr)
+SELECT t.id, {_PAD.format(v='t.merchant')}, {_PAD.format(v='t.note')}, {_OCR.format(tx='t.id')}
+FROM [Transaction] t
+"""
+
+# migration 回填用：以 [Transaction].id 區間 [?, ?) 分批寫入
+BACKFILL_SQL = _FILL_SQL + "WHERE t.id >= ? AND t.id < ?"
+
+
+def rebuild_search(conn: sqlite3.Connection) -> int:
+    """清空並從 [Transaction] / Attachment 重建 TxSearch；回傳列數。"""
+    with conn:
+        conn.execute("DELETE FROM TxSearch")
+        return conn.execute(_FILL_SQL).rowcount
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match(conn: sqlite3.Connection, text: str) -> Tuple[Optional[str], bool]:
+    """
+    把使用者輸入轉成 FTS5 MATCH 字串；各詞之間為 AND。回傳 (match, truncated)：
+    match 為 None 表示一定沒有結果（例如短詞在索引中不存在）；
+    truncated 表示有短詞對到的 trigram 超過 MAX_SHORT_TERM_EXPANSION 個，只取了前面這些，結果可能不完整。
+    """
+    groups: List[str] = []
+    truncated = False
+    for term in (text or "").lower().split():
+        if len(term) >= 3:
+            groups.append(_quote(term))
+            continue
+        rows = conn.execute(
+            "SELECT term FROM TxSearchVocab WHERE term >= ? AND term < ? LIMIT ?",
+            (term, term + "\U0010ffff", MAX_SHORT_TERM_EXPANSION + 1),
+        ).fetchall()
+        if not rows:
+            return None, truncated
+        if len(rows) > MAX_SHORT_TERM_EXPANSION:
+            rows, truncated = rows[:MAX_SHORT_TERM_EXPANSION], True
+        groups.append("(" + " OR ".join(_quote(r[0]) for r in rows) + ")")
+    return (" AND ".join(groups) if groups else None), truncated
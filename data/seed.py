@@ -1,12 +1,14 @@
 # data/seed.py
 from __future__ import annotations
+from pathlib import Path
+from core.settings import DB_PATH
 from core.utils import now_iso
 from .db import get_conn
 
 SEEDED_FLAG = "seed:default"
 
-def seed_if_empty() -> None:
-    conn = get_conn()
+def seed_if_empty(path: Path = DB_PATH) -> None:
+    conn = get_conn(path)
     with conn:
         cur = conn.execute("SELECT COUNT(*) AS c FROM AccountBook")
         row = cur.fetchone()
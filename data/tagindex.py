@@ -0,0 +1,374 @@
+# data/tagindex.py
+"""
+標籤索引：每個標籤一個壓縮 bitmap（交易 id 的集合），AND / OR / NOT 組合篩選不再 JOIN TransactionTag。
+
+Bitmap 為精簡版 roaring：id 依高 16 位分桶，每桶一個 container
+  - 稀疏（<= 4096 個）：排序好的 array('H')，每個 id 2 bytes
+  - 密集：65536 bit 的 Python int，交集 / 聯集就是一次整數 & / |
+運算結果會自動在兩種 container 之間轉換。
+
+TagIndex 另外留一份「有標籤的交易」的精簡事實（book_id, type, amount, currency, date），
+標籤篩選後的合計只在記憶體裡分組，再交給 data.rates.in_book_currency 換算成帳本幣別。
+
+快取以 DB 檔為單位（get_tag_index），以 ChangeLog 的 seq 驗證：
+交易的新增 / 修改 / 刪除與標籤的增刪都會前進 seq（見 data.changelog），
+所以比對一個整數就知道索引是否過期，不用訂閱事件。
+過期時只讀上次 seq 之後的 ChangeLog 列（每個 uid 只留最新一筆，改過的交易一定在裡面），
+重算這些交易的 bitmap 位元與事實（TagIndex.refreshed）；一次變動太多才全量重建。
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .conn import ConnectionManager, get_manager
+from .rates import in_book_currency
+
+# 超過這個數量的桶改用 bitset（4096 × 2 bytes = 8KB，與 bitset 一樣大）
+ARRAY_MAX = 4096
+
+Container = Union[array, int]
+
+# byte 值 → 其中為 1 的 bit 位置
+_BITS = [tuple(i for i in range(8) if b >> i & 1) for b in range(256)]
+
+
+def _card(c: Container) -> int:
+    return len(c) if isinstance(c, array) else c.bit_count()
+
+
+def _bitset(values: Iterable[int]) -> int:
+    buf = bytearray(8192)
+    for v in values:
+        buf[v >> 3] |= 1 << (v & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _members(bits: int) -> Iterator[int]:
+    for i, byte in enumerate(bits.to_bytes(8192, "little")):
+        if byte:
+            base = i << 3
+            for b in _BITS[byte]:
+                yield base + b
+
+
+def _fit(c: Container) -> Optional[Container]:
+    """依基數選 container；空的回 None。"""
+    if isinstance(c, array):
+        return c if c else None
+    n = c.bit_count()
+    if n == 0:
+        return None
+    return array("H", _members(c)) if n <= ARRAY_MAX else c
+
+
+def _has(c: Container, low: int) -> bool:
+    if isinstance(c, array):
+        i = bisect_left(c, low)
+        return i < len(c) and c[i] == low
+    return bool(c >> low & 1)
+
+
+def _and(a: Container, b: Container) -> Optional[Container]:
+    if isinstance(a, int) and isinstance(b, int):
+        return _fit(a & b)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return _fit(array("H", [v for v in a if b >> v & 1]))
+    return _fit(array("H", sorted(set(a).intersection(b))))
+
+
+def _or(a: Container, b: Container) -> Container:
+    if isinstance(a, int) or isinstance(b, int) or len(a) + len(b) > ARRAY_MAX:
+        bits = (a if isinstance(a, int) else _bitset(a)) | (b if isinstance(b, int) else _bitset(b))
+        return _fit(bits)
+    return array("H", sorted(set(a).union(b)))
+
+
+def _andnot(a: Container, b: Container) -> Optional[Container]:
+    if isinstance(a, int):
+        return _fit(a & ~(b if isinstance(b, int) else _bitset(b)))
+    if isinstance(b, int):
+        return _fit(array("H", [v for v in a if not b >> v & 1]))
+    drop = set(b)
+    return _fit(array("H", [v for v in a if v not in drop]))
+
+
+class Bitmap:
+    __slots__ = ("_c",)
+
+    def __init__(self, containers: Optional[Dict[int, Container]] = None) -> None:
+        self._c: Dict[int, Container] = containers or {}
+
+    @classmethod
+    def from_sorted(cls, ids: Sequence[int]) -> "Bitmap":
+        """ids 需遞增且不重複（例如依索引順序讀出的 tx_id）。"""
+        out: Dict[int, Container] = {}
+        i, n = 0, len(ids)
+        while i < n:
+            hi = ids[i] >> 16
+            j = bisect_left(ids, (hi + 1) << 16, i)
+            lows = array("H", [v & 0xFFFF for v in ids[i:j]])
+            out[hi] = lows if len(lows) <= ARRAY_MAX else _bitset(lows)
+            i = j
+        return cls(out)
+
+    def __len__(self) -> int:
+        return sum(_card(c) for c in self._c.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._c)
+
+    def __contains__(self, tx_id: int) -> bool:
+        c = self._c.get(tx_id >> 16)
+        return c is not None and _has(c, tx_id & 0xFFFF)
+
+    def __iter__(self) -> Iterator[int]:
+        for hi in sorted(self._c):
+            base, c = hi << 16, self._c[hi]
+            for low in (c if isinstance(c, array) else _members(c)):
+                yield base | low
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        out = {}
+        for hi in self._c.keys() & other._c.keys():
+            c = _and(self._c[hi], other._c[hi])
+            if c is not None:
+                out[hi] = c
+        return Bitmap(out)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        out = dict(self._c)
+        for hi, c in other._c.items():
+            out[hi] = _or(out[hi], c) if hi in out else c
+        return Bitmap(out)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        out = {}
+        for hi, c in self._c.items():
+            if hi in other._c:
+                c = _andnot(c, other._c[hi])
+            if c is not None:
+                out[hi] = c
+        return Bitmap(out)
+
+
+_PAIRS_SQL = "SELECT tag_id, tx_id FROM TransactionTag INDEXED BY idx_txtag_tag ORDER BY tag_id, tx_id"
+
+_FACTS_COLS = "id, uid, book_id, type, amount, currency, date"
+
+_FACTS_SQL = f"""
+SELECT {_FACTS_COLS}
+FROM [Transaction]
+WHERE id IN (SELECT tx_id FROM TransactionTag)
+"""
+
+_CHANGES_SQL = "SELECT uid FROM ChangeLog WHERE seq > ?"
+
+# ChangeLog 上次之後變動超過這麼多筆交易時直接全量重建（大量匯入 / 第一次同步）
+REFRESH_MAX = 5000
+
+# IN (...) 一次帶的參數個數
+_CHUNK = 500
+
+# (book_id, type, amount, currency, date)
+Fact = Tuple[int, str, int, str, str]
+
+
+def _chunks(values: Sequence[Any]) -> Iterator[Sequence[Any]]:
+    for i in range(0, len(values), _CHUNK):
+        yield values[i:i + _CHUNK]
+
+
+def _marks(n: int) -> str:
+    return ",".join("?" * n)
+
+
+class TagIndex:
+    """uids 為有標籤交易的 uid → id，增量更新時用來找出已刪除交易的 id。"""
+    def __init__(
+        self,
+        names: Dict[str, int],
+        bitmaps: Dict[int, Bitmap],
+        facts: Dict[int, Fact],
+        uids: Dict[str, int],
+    ) -> None:
+        self.names = names
+        self.bitmaps = bitmaps
+        self.facts = facts
+        self.uids = uids
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "TagIndex":
+        names = {r[0]: r[1] for r in conn.execute("SELECT name, id FROM Tag")}
+        bitmaps: Dict[int, Bitmap] = {}
+        tag_id, ids = None, []
+        for tid, tx_id in conn.execute(_PAIRS_SQL):
+            if tid != tag_id:
+                if ids:
+                    bitmaps[tag_id] = Bitmap.from_sorted(ids)
+                tag_id, ids = tid, []
+            ids.append(tx_id)
+        if ids:
+            bitmaps[tag_id] = Bitmap.from_sorted(ids)
+        facts: Dict[int, Fact] = {}
+        uids: Dict[str, int] = {}
+        for r in conn.execute(_FACTS_SQL):
+            facts[r[0]] = (r[2], r[3], r[4], r[5], r[6])
+            uids[r[1]] = r[0]
+        return cls(names, bitmaps, facts, uids)
+
+    def refreshed(self, conn: sqlite3.Connection, since: int) -> Optional["TagIndex"]:
+        """
+        套用 ChangeLog seq > since 的交易，回傳新的索引（self 不變，別的執行緒手上的索引照樣可用）；
+        變動超過 REFRESH_MAX 筆時回傳 None，由呼叫端全量重建。
+        """
+        changed = [r[0] for r in conn.execute(_CHANGES_SQL, (since,))]
+        if len(changed) > REFRESH_MAX:
+            return None
+        rows = []
+        for chunk in _chunks(changed):
+            rows += conn.execute(
+                f"SELECT {_FACTS_COLS} FROM [Transaction] WHERE uid IN ({_marks(len(chunk))})", chunk
+            ).fetchall()
+        alive = {r[1] for r in rows}
+        dead = {u: self.uids[u] for u in changed if u not in alive and u in self.uids}
+        ids = sorted({r[0] for r in rows} | set(dead.values()))
+
+        added: Dict[int, List[int]] = {}
+        for chunk in _chunks(ids):
+            for tag_id, tx_id in conn.execute(
+                f"SELECT tag_id, tx_id FROM TransactionTag WHERE tx_id IN ({_marks(len(chunk))})", chunk
+            ):
+                added.setdefault(tag_id, []).append(tx_id)
+
+        # 先把這些交易從所有 bitmap 拿掉，再依目前的 TransactionTag 加回去
+        gone = Bitmap.from_sorted(ids)
+        bitmaps: Dict[int, Bitmap] = {}
+        for tag_id, bm in self.bitmaps.items():
+            bm = bm - gone
+            if bm:
+                bitmaps[tag_id] = bm
+        for tag_id, tx_ids in added.items():
+            bm = Bitmap.from_sorted(sorted(tx_ids))
+            bitmaps[tag_id] = bitmaps[tag_id] | bm if tag_id in bitmaps else bm
+
+        facts, uids = dict(self.facts), dict(self.uids)
+        tagged = {tx_id for tx_ids in added.values() for tx_id in tx_ids}
+        for uid, tx_id in dead.items():
+            facts.pop(tx_id, None)
+            del uids[uid]
+        for r in rows:
+            if r[0] in tagged:
+                facts[r[0]] = (r[2], r[3], r[4], r[5], r[6])
+                uids[r[1]] = r[0]
+            else:
+                facts.pop(r[0], None)
+                uids.pop(r[1], None)
+        names = {r[0]: r[1] for r in conn.execute("SELECT name, id FROM Tag")}
+        return TagIndex(names, bitmaps, facts, uids)
+
+    def bitmap(self, name: str) -> Bitmap:
+        tag_id = self.names.get(name.strip().lstrip("#").strip())
+        return self.bitmaps.get(tag_id, Bitmap()) if tag_id is not None else Bitmap()
+
+    def match(
+        self,
+        all_of: Iterable[str] = (),
+        any_of: Iterable[str] = (),
+        none_of: Iterable[str] = (),
+    ) -> Bitmap:
+        """
+        同時有 all_of 的全部標籤、至少有 any_of 其中一個、且沒有 none_of 任何一個的交易。
+        all_of 與 any_of 都沒給時以「有任何標籤的交易」為起點。
+        """
+        result: Optional[Bitmap] = None
+        for name in all_of:
+            bm = self.bitmap(name)
+            result = bm if result is None else result & bm
+        any_list = list(any_of)
+        if any_list:
+            union = Bitmap()
+            for name in any_list:
+                union = union | self.bitmap(name)
+            result = union if result is None else result & union
+        if result is None:
+            result = Bitmap.from_sorted(sorted(self.facts))
+        for name in none_of:
+            result = result - self.bitmap(name)
+        return result
+
+    def latest(self, ids: Iterable[int], limit: int, book_id: Optional[int] = None) -> List[int]:
+        """ids 中日期最新的 limit 筆（與 TxDao.latest 同順序）。"""
+        facts = self.facts
+        picked = [i for i in ids if book_id is None or facts[i][0] == book_id]
+        picked.sort(key=lambda i: (facts[i][4], i), reverse=True)
+        return picked[:limit]
+
+    def grouped(self, ids: Iterable[int], book_id: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """依 (幣別, 收支, 日期) 加總，換算時每組只算一次匯率；回傳 (各組, 筆數)。"""
+        sums: Dict[Tuple[str, str, str], int] = {}
+        facts = self.facts
+        count = 0
+        for i in ids:
+            book, tx_type, amount, currency, date = facts[i]
+            if book_id is not None and book != book_id:
+                continue
+            key = (currency, tx_type, date[:10])
+            sums[key] = sums.get(key, 0) + amount
+            count += 1
+        groups = [
+            {"currency": cur, "type": tx_type, "date": day, "amount": amount}
+            for (cur, tx_type, day), amount in sums.items()
+        ]
+        return groups, count
+
+
+# ───── 快取（每個 DB 檔一份，以 ChangeLog seq 驗證） ─────
+_cache: Dict[str, Tuple[int, TagIndex]] = {}
+_lock = threading.Lock()
+
+
+def _seq_in(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'").fetchone()
+    return row[0] if row else 0
+
+
+def get_tag_index(manager: Optional[ConnectionManager] = None) -> TagIndex:
+    """目前 DB 的 TagIndex；資料有變動時在呼叫端（DB 執行緒）增量更新或重建。"""
+    cm = manager or get_manager()
+    key = str(cm.path)
+    with cm.reader() as conn:
+        seq = _seq_in(conn)
+        with _lock:
+            cached = _cache.get(key)
+        if cached is not None and cached[0] == seq:
+            return cached[1]
+        index = cached[1].refreshed(conn, cached[0]) if cached is not None else None
+        if index is None:
+            index = TagIndex.load(conn)
+    with _lock:
+        _cache[key] = (seq, index)
+    return index
+
+
+def tag_totals(
+    all_of: Iterable[str] = (),
+    any_of: Iterable[str] = (),
+    none_of: Iterable[str] = (),
+    book_id: int = 1,
+    manager: Optional[ConnectionManager] = None,
+) -> Dict[str, Any]:
+    """
+    標籤篩選後的帳本幣別合計：{"count", "currency", "expense", "income", "missing"}。
+    要在 DB 執行緒上呼叫。
+    """
+    cm = manager or get_manager()
+    index = get_tag_index(cm)
+    groups, count = index.grouped(index.match(all_of, any_of, none_of), book_id)
+    totals = in_book_currency(groups, book_id, cm)
+    totals["count"] = count
+    return totals
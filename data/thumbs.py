@@ -0,0 +1,131 @@
+# data/thumbs.py
+"""
+附件縮圖：在背景的 process pool 把原圖縮成長邊 THUMB_SIZE 的 JPEG，UI 執行緒永遠不解碼原圖。
+
+    thumbs = get_thumbnails()
+    path = thumbs.ensure(ref, on_ready=lambda ref, path: ...)   # 已有縮圖時直接回傳路徑
+
+- ref 為 Attachment.file_path（blob key 或舊資料的一般路徑，見 data.blobs）
+- 同一張圖同時被多處要求時只排一次工作；完成後所有回呼經 Clock 回到 UI 執行緒
+- 解碼用 Pillow（JPEG 以 draft() 直接在解碼時縮小）；未安裝 Pillow 時 ensure() 只回傳已存在的縮圖
+- 平台不支援多行程（部分行動裝置）時退回執行緒池
+"""
+from __future__ import annotations
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .blobs import BlobStore
+from .executor import clock_dispatch
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 為選用相依
+    Image = None
+
+THUMB_SIZE = 256
+
+OnReady = Callable[[str, Optional[Path]], None]
+
+
+def _render(src: str, dest: str, size: int) -> str:
+    """子行程內執行：縮圖寫到暫存檔再改名，讀到一半的縮圖不會被 UI 拿去載入。"""
+    with Image.open(src) as im:
+        im.draft("RGB", (size, size))
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        im.thumbnail((size, size))
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        im.save(tmp, "JPEG", quality=80, optimize=True)
+    os.replace(tmp, dest)
+    return dest
+
+
+class Thumbnailer:
+    def __init__(
+        self,
+        store: Optional[BlobStore] = None,
+        size: int = THUMB_SIZE,
+        workers: int = 2,
+        dispatch: Callable[[Callable[[], None]], None] = clock_dispatch,
+    ) -> None:
+        self.store = store or BlobStore()
+        self.size = size
+        self._workers = workers
+        self._dispatch = dispatch
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[OnReady]] = {}   # ref → 等待中的回呼
+
+    @staticmethod
+    def available() -> bool:
+        return Image is not None
+
+    def ensure(self, ref: str, on_ready: Optional[OnReady] = None) -> Optional[Path]:
+        """
+        縮圖已存在時回傳路徑（不呼叫 on_ready）；否則排入背景產生並回傳 None，
+        完成後以 on_ready(ref, 縮圖路徑) 通知，失敗（原檔不存在、不是圖片）時路徑為 None。
+        """
+        dest = self.store.thumb_path(ref, self.size)
+        if dest.exists():
+            return dest
+        if not self.available():
+            return None
+        with self._lock:
+            waiting = self._pending.get(ref)
+            if waiting is not None:
+                if on_ready is not None:
+                    waiting.append(on_ready)
+                return None
+            self._pending[ref] = [on_ready] if on_ready is not None else []
+            fut = self._executor().submit(_render, str(self.store.resolve(ref)), str(dest), self.size)
+        fut.add_done_callback(lambda f: self._done(ref, f))
+        return None
+
+    def prefetch(self, refs: List[str]) -> None:
+        """新增附件後先把縮圖做好，之後列表捲到時直接讀檔。"""
+        for ref in refs:
+            self.ensure(ref)
+
+    def _done(self, ref: str, fut: Future) -> None:
+        with self._lock:
+            callbacks = self._pending.pop(ref, [])
+        path = None if fut.cancelled() or fut.exception() is not None else Path(fut.result())
+        for cb in callbacks:
+            self._dispatch(lambda cb=cb: cb(ref, path))
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            try:
+                self._pool = ProcessPoolExecutor(max_workers=self._workers)
+            except (NotImplementedError, OSError, ImportError):
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="thumbs")
+        return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_thumbnailer: Optional[Thumbnailer] = None
+_lock = threading.Lock()
+
+
+def get_thumbnails() -> Thumbnailer:
+    global _thumbnailer
+    with _lock:
+        if _thumbnailer is None:
+            _thumbnailer = Thumbnailer()
+        return _thumbnailer
+
+
+def shutdown_thumbnails() -> None:
+    global _thumbnailer
+    with _lock:
+        t, _thumbnailer = _thumbnailer, None
+    if t is not None:
+        t.shutdown()
@@ -0,0 +1,5 @@
+"""帳本資料匯出：串流 CSV / JSON Lines 與欄式快照。"""
+from __future__ import annotations
+
+from .stream import EXPORT_BATCH, EXPORT_COLUMNS, export_csv, export_jsonl  # noqa: F401
+from .snapshot import Snapshot, write_snapshot  # noqa: F401
@@ -0,0 +1,215 @@
+# domain/exporters/snapshot.py
+"""
+欄式二進位快照（.pfsnap）：給外部分析工具直接 mmap，不必重新解析 CSV。
+
+檔案配置（全部 little-endian）：
+    [欄 0 資料][padding]...[欄 n 資料][footer JSON][footer 長度 u64][MAGIC 8 bytes]
+
+- 每欄是一段連續的定長陣列，起點對齊 64 bytes；footer 記錄 name / dtype / offset / nbytes。
+- 類型、幣別、類別、商店以字典編碼：欄內存整數代碼，字串表放在 footer 的 "dictionary"。
+  類別與商店的代碼 0 固定為空字串（NULL）。
+- 金額為最小單位整數（見 core.money）；date 為 UTC epoch 秒。
+
+numpy 讀法（不經本模組）：
+    np.memmap(path, dtype=col["dtype"], mode="r", offset=col["offset"], shape=(rows,))
+
+寫入時每欄先寫到各自的暫存檔，最後依序串接；記憶體只有一批資料 + 字典。
+"""
+from __future__ import annotations
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, IO, Iterator, List, Optional
+
+from core.utils import now_iso
+from data.conn import ConnectionManager, get_manager
+from data.dao import CategoryDao
+from .stream import EXPORT_BATCH, Progress, iter_batches
+
+MAGIC = b"PFSNAP01"
+VERSION = 1
+ALIGN = 64
+
+# array typecode → numpy 風格 dtype
+_DTYPES = {"q": "<i8", "i": "<i4", "I": "<u4", "H": "<u2", "B": "u1"}
+_TX_TYPES = ("expense", "income", "transfer", "adjust")
+_TRAILER = struct.Struct("<Q8s")
+
+
+class _Column:
+    def __init__(self, name: str, typecode: str, dictionary: Optional[List[str]] = None) -> None:
+        self.name = name
+        self.typecode = typecode
+        self.dictionary = dictionary
+        self.codes: Dict[Any, int] = {}
+        self.spill: IO[bytes] = tempfile.TemporaryFile()
+        if dictionary is not None:
+            self.codes = {v: i for i, v in enumerate(dictionary)}
+
+    def code(self, value: Any, label: Optional[str] = None) -> int:
+        """字典編碼；value 為分組鍵，label 為寫進字典的字串（預設即 value）。"""
+        c = self.codes.get(value)
+        if c is None:
+            c = self.codes[value] = len(self.dictionary)
+            self.dictionary.append(value if label is None else label)
+        return c
+
+    def append(self, values: List[int]) -> None:
+        arr = array(self.typecode, values)
+        if sys.byteorder == "big":
+            arr.byteswap()
+        arr.tofile(self.spill)
+
+    def meta(self, offset: int, nbytes: int) -> Dict[str, Any]:
+        m: Dict[str, Any] = {"name": self.name, "dtype": _DTYPES[self.typecode],
+                             "offset": offset, "nbytes": nbytes}
+        if self.dictionary is not None:
+            m["dictionary"] = self.dictionary
+        return m
+
+
+def _epoch(date: str) -> int:
+    return int(datetime.fromisoformat(date).replace(tzinfo=timezone.utc).timestamp())
+
+
+def write_snapshot(
+    path: Path | str,
+    book_id: Optional[int] = None,
+    manager: Optional[ConnectionManager] = None,
+    batch: int = EXPORT_BATCH,
+    on_batch: Progress = None,
+) -> int:
+    """把 [Transaction] 寫成欄式快照；回傳筆數。"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cols = {
+        "id": _Column("id", "q"),
+        "date": _Column("date", "q"),
+        "type": _Column("type", "B", list(_TX_TYPES)),
+        "amount": _Column("amount", "q"),
+        "currency": _Column("currency", "H", []),
+        "category": _Column("category", "I", [""]),
+        "account_id": _Column("account_id", "i"),
+        "merchant": _Column("merchant", "I", [""]),
+    }
+    cat_col, mer_col, cur_col = cols["category"], cols["merchant"], cols["currency"]
+    cat_col.codes = {None: 0}
+    mer_col.codes = {None: 0, "": 0}
+    tmp = path.with_name(path.name + ".part")
+    count = 0
+    try:
+        with (manager or get_manager()).reader() as conn:
+            cats = CategoryDao.names_in(conn)
+            for rows in iter_batches(conn, book_id, batch):
+                cols["id"].append([r[0] for r in rows])
+                cols["date"].append([_epoch(r[1]) for r in rows])
+                cols["type"].append([cols["type"].codes[r[2]] for r in rows])
+                cols["amount"].append([r[3] for r in rows])
+                cur_col.append([cur_col.code(r[4]) for r in rows])
+                cat_col.append([
+                    cat_col.code(r[5], "/".join(x for x in cats.get(r[5], ("?", "")) if x))
+                    for r in rows
+                ])
+                cols["account_id"].append([r[6] for r in rows])
+                mer_col.append([mer_col.code(r[7]) for r in rows])
+                count += len(rows)
+                if on_batch is not None:
+                    on_batch(count)
+
+        columns = []
+        with open(tmp, "wb") as out:
+            for col in cols.values():
+                out.write(b"\0" * (-out.tell() % ALIGN))
+                offset = out.tell()
+                col.spill.seek(0)
+                shutil.copyfileobj(col.spill, out)
+                columns.append(col.meta(offset, out.tell() - offset))
+            footer = json.dumps({
+                "version": VERSION, "rows": count, "book_id": book_id,
+                "created_at": now_iso(), "columns": columns,
+            }, ensure_ascii=False).encode("utf-8")
+            out.write(footer)
+            out.write(_TRAILER.pack(len(footer), MAGIC))
+        os.replace(tmp, path)
+    finally:
+        for col in cols.values():
+            col.spill.close()
+        if tmp.exists():
+            tmp.unlink()
+    return count
+
+
+class Snapshot:
+    """
+    唯讀開啟 .pfsnap；column() 回傳直接指向 mmap 的 memoryview（零複製）。
+
+        with Snapshot(path) as snap:
+            amounts = snap.column("amount")           # memoryview，format 'q'
+            names = snap.dictionary("category")
+    """
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._f = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空檔
+            self._f.close()
+            raise ValueError(f"not a snapshot file: {self.path}")
+        size = len(self._mm)
+        if size < _TRAILER.size:
+            self.close()
+            raise ValueError(f"not a snapshot file: {self.path}")
+        flen, magic = _TRAILER.unpack_from(self._mm, size - _TRAILER.size)
+        if magic != MAGIC or flen > size - _TRAILER.size:
+            self.close()
+            raise ValueError(f"not a snapshot file: {self.path}")
+        start = size - _TRAILER.size - flen
+        self.meta: Dict[str, Any] = json.loads(self._mm[start:start + flen].decode("utf-8"))
+        self._cols = {c["name"]: c for c in self.meta["columns"]}
+        self._views: List[memoryview] = []
+
+    def __len__(self) -> int:
+        return int(self.meta["rows"])
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._cols)
+
+    def column(self, name: str) -> memoryview:
+        c = self._cols[name]
+        typecode = next(t for t, d in _DTYPES.items() if d == c["dtype"])
+        if sys.byteorder == "big" and typecode != "B":
+            raise NotImplementedError("use numpy with the little-endian dtype on big-endian hosts")
+        view = memoryview(self._mm)[c["offset"]:c["offset"] + c["nbytes"]].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def dictionary(self, name: str) -> List[str]:
+        return self._cols[name]["dictionary"]
+
+    def decoded(self, name: str) -> Iterator[str]:
+        """字典編碼欄 → 逐列字串。"""
+        words = self.dictionary(name)
+        return (words[c] for c in self.column(name))
+
+    def close(self) -> None:
+        # 先釋放 column() 借出的 view，mmap 才能關
+        for v in getattr(self, "_views", []):
+            v.release()
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,159 @@
+# domain/exporters/stream.py
+"""
+串流匯出 CSV / JSON Lines。
+
+同一個 reader 連線（同一個 WAL 快照）以 id 順序掃 [Transaction]，
+cursor.fetchmany(EXPORT_BATCH) 一批一批寫出；記憶體只有一批資料 + 類別 / 帳戶名稱表。
+欄位與 domain.importers 的通用格式相容，匯出檔可以直接再匯入。
+"""
+from __future__ import annotations
+import csv
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.money import decimals_of
+from data.conn import ConnectionManager, get_manager
+from data.dao import CategoryDao
+
+EXPORT_BATCH = 2000
+
+# 匯出欄位；date 為 UTC ISO 字串加 Z（再匯入時不會被當成當地時間），amount 為主單位十進位字串
+EXPORT_COLUMNS = (
+    "id", "date", "type", "amount", "currency",
+    "category", "subcategory", "account", "merchant", "note",
+)
+
+# 掃描順序即 rowid 順序，不需要排序
+_SCAN_SQL = """
+    SELECT id, date, type, amount, currency, category_id, account_id, merchant, note
+    FROM [Transaction]
+    WHERE {where}
+    ORDER BY id
+"""
+
+RawRow = Tuple[int, str, str, int, str, Optional[int], int, Optional[str], Optional[str]]
+Progress = Optional[Callable[[int], None]]
+
+
+def iter_batches(
+    conn: sqlite3.Connection,
+    book_id: Optional[int] = None,
+    batch: int = EXPORT_BATCH,
+) -> Iterator[List[RawRow]]:
+    """依 id 順序逐批產出原始 tuple（不經 sqlite3.Row）。"""
+    where, args = ("book_id = ?", [book_id]) if book_id is not None else ("1", [])
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(_SCAN_SQL.format(where=where), args)
+    while True:
+        rows = cur.fetchmany(batch)
+        if not rows:
+            return
+        yield rows
+
+
+class _Amounts:
+    """最小單位整數 → 主單位字串（不經 Decimal，逐列呼叫要夠快）。"""
+    def __init__(self) -> None:
+        self._scale: Dict[str, Tuple[int, int]] = {}
+
+    def __call__(self, minor: int, currency: str) -> str:
+        sc = self._scale.get(currency)
+        if sc is None:
+            d = decimals_of(currency)
+            sc = self._scale[currency] = (d, 10 ** d)
+        d, unit = sc
+        if d == 0:
+            return str(minor)
+        q, r = divmod(abs(minor), unit)
+        return f"{'-' if minor < 0 else ''}{q}.{r:0{d}d}"
+
+
+def _records(conn: sqlite3.Connection, book_id: Optional[int], batch: int) -> Iterator[List[tuple]]:
+    """原始列 → EXPORT_COLUMNS 順序的 tuple，仍以批為單位。"""
+    cats = CategoryDao.names_in(conn)
+    accounts = {r[0]: r[1] for r in conn.execute("SELECT id, name FROM Account")}
+    amount = _Amounts()
+    none = ("", "")
+    for rows in iter_batches(conn, book_id, batch):
+        out = []
+        for tx_id, date, tx_type, minor, cur, cat_id, acc_id, merchant, note in rows:
+            cat, sub = cats.get(cat_id, none)
+            out.append((tx_id, date + "Z", tx_type, amount(minor, cur), cur,
+                        cat, sub, accounts.get(acc_id, ""), merchant or "", note or ""))
+        yield out
+
+
+def _atomic(path: Path) -> Path:
+    # 先寫暫存檔，完成後 os.replace；中途失敗不會留下半個匯出檔
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.with_name(path.name + ".part")
+
+
+def _export(
+    path: Path | str,
+    write: Callable[[object, Iterator[List[tuple]], Progress], int],
+    book_id: Optional[int],
+    manager: Optional[ConnectionManager],
+    batch: int,
+    on_batch: Progress,
+) -> int:
+    path = Path(path)
+    tmp = _atomic(path)
+    try:
+        with (manager or get_manager()).reader() as conn, \
+                open(tmp, "w", newline="", encoding="utf-8") as f:
+            count = write(f, _records(conn, book_id, batch), on_batch)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return count
+
+
+def _write_csv(f, batches: Iterator[List[tuple]], on_batch: Progress) -> int:
+    w = csv.writer(f)
+    w.writerow(EXPORT_COLUMNS)
+    count = 0
+    for rows in batches:
+        w.writerows(rows)
+        count += len(rows)
+        if on_batch is not None:
+            on_batch(count)
+    return count
+
+
+def _write_jsonl(f, batches: Iterator[List[tuple]], on_batch: Progress) -> int:
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    count = 0
+    for rows in batches:
+        f.write("".join(dumps(dict(zip(EXPORT_COLUMNS, r))) + "\n" for r in rows))
+        count += len(rows)
+        if on_batch is not None:
+            on_batch(count)
+    return count
+
+
+def export_csv(
+    path: Path | str,
+    book_id: Optional[int] = None,
+    manager: Optional[ConnectionManager] = None,
+    batch: int = EXPORT_BATCH,
+    on_batch: Progress = None,
+) -> int:
+    """匯出 CSV（UTF-8，無 BOM）；回傳筆數。on_batch 收到目前累計筆數。"""
+    return _export(path, _write_csv, book_id, manager, batch, on_batch)
+
+
+def export_jsonl(
+    path: Path | str,
+    book_id: Optional[int] = None,
+    manager: Optional[ConnectionManager] = None,
+    batch: int = EXPORT_BATCH,
+    on_batch: Progress = None,
+) -> int:
+    """匯出 JSON Lines（每列一個物件，amount 為字串以保留精度）；回傳筆數。"""
+    return _export(path, _write_jsonl, book_id, manager, batch, on_batch)
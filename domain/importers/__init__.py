@@ -0,0 +1,9 @@
+# domain/importers/__init__.py
+"""其他記帳 App 匯出檔、電子發票載具匯出檔與歷史匯率檔的匯入。"""
+from __future__ import annotations
+
+from core.workers import default_workers  # noqa: F401  (re-export)
+from .csv_import import CsvImporter, fingerprint  # noqa: F401
+from .einvoice import EInvoiceImporter, period_of  # noqa: F401
+from .formats import FORMATS, detect  # noqa: F401
+from .rate_import import RateImporter  # noqa: F401
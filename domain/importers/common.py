@@ -0,0 +1,30 @@
+# domain/importers/common.py
+"""各匯入器（CSV、電子發票）共用的類別對應。"""
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+
+from data.dao import CategoryDao
+
+
+class CategoryMap:
+    """(類別, 子類別) 名稱 → Category.id；缺的類別即時建立（各自一個小 transaction）。"""
+    def __init__(self, dao: CategoryDao) -> None:
+        self.dao = dao
+        self.created = 0
+        self._ids: Dict[Tuple[Optional[int], str], int] = {
+            (r["parent_id"], r["name"]): r["id"] for r in dao.all()
+        }
+
+    def _get(self, name: str, parent_id: Optional[int]) -> int:
+        key = (parent_id, name)
+        cid = self._ids.get(key)
+        if cid is None:
+            cid = self._ids[key] = self.dao.create(name, parent_id)
+            self.created += 1
+        return cid
+
+    def resolve(self, name: str, sub: str) -> Optional[int]:
+        if not name:
+            return None
+        cid = self._get(name, None)
+        return self._get(sub, cid) if sub else cid
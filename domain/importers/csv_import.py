@@ -0,0 +1,211 @@
+# domain/importers/csv_import.py
+"""
+串流 CSV 匯入（Zaim 匯出檔 / 通用欄位）。
+
+管線：
+  讀檔（csv.reader，逐列） → 每 chunk_size 列一批丟進 process pool 正規化
+  → 依原順序取回（同時在途的批數有上限，記憶體固定）
+  → 類別名稱對應到 Category（缺的就建；沒有類別的套自動分類規則）→ TxDao.insert_many 單一 writer 依序寫入
+
+每個來源批次 commit 時，同一個 transaction 內把進度寫進 Settings（import:<指紋>），
+中斷後以同一個檔案再跑一次會跳過已寫入的列；已完成的檔案再匯入不會重複寫。
+進度以 EV_IMPORT_PROGRESS 發布，最後發一次 EV_TX_CREATED 批次摘要。
+"""
+from __future__ import annotations
+import csv
+import hashlib
+import json
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from core.eventbus import EventBus, EV_IMPORT_PROGRESS, EV_TX_CREATED
+from core.utils import now_iso
+from core.workers import InProcessExecutor, default_workers
+from data.dao import BULK_CHUNK_SIZE, CategoryDao, SettingsDao, TxDao
+from domain.rules import get_rule_engine
+from .common import CategoryMap
+from .formats import FORMATS, NormRow, detect, normalize_batch
+
+SETTINGS_PREFIX = "import:"
+
+# 指紋取檔頭這麼多 bytes + 檔案大小
+_FINGERPRINT_BYTES = 1 << 20
+
+
+def fingerprint(path: Path, fmt: str) -> str:
+    h = hashlib.sha1()
+    h.update(f"{fmt}:{path.stat().st_size}:".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(_FINGERPRINT_BYTES))
+    return h.hexdigest()
+
+
+def _sniff_encoding(path: Path) -> str:
+    # Zaim 舊版匯出是 Shift_JIS；其餘一律當 UTF-8（可能帶 BOM）
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+    try:
+        head.decode("utf-8")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # 檔頭剛好切在多 byte 字元中間
+        if e.start >= len(head) - 3:
+            return "utf-8-sig"
+        return "cp932"
+
+
+class CsvImporter:
+    def __init__(
+        self,
+        bus: EventBus,
+        txdao: Optional[TxDao] = None,
+        workers: Optional[int] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> None:
+        self.bus = bus
+        self.txdao = txdao or TxDao()
+        self.workers = default_workers() if workers is None else int(workers)
+        self.chunk_size = chunk_size
+
+    def run(
+        self,
+        path: Path | str,
+        fmt: str = "auto",
+        book_id: int = 1,
+        account_id: int = 1,
+        currency: str = "TWD",
+        member_id: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        匯入一個 CSV；回傳 {"rows", "inserted", "skipped", "categories_created",
+        "first_id", "last_id", "resumed_from", "done"}。
+        rows / skipped 為整個檔案累計，inserted 與 id 區間只算這一次執行。
+        """
+        path = Path(path)
+        encoding = _sniff_encoding(path)
+        with open(path, newline="", encoding=encoding) as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return {"rows": 0, "inserted": 0, "skipped": 0, "done": True}
+            if fmt == "auto":
+                fmt = detect(header)
+            if fmt not in FORMATS:
+                raise ValueError(f"unknown import format: {fmt!r}")
+
+            key = SETTINGS_PREFIX + fingerprint(path, fmt)
+            settings = SettingsDao(self.txdao.cm)
+            state = json.loads(settings.get(key) or "{}")
+            if state.get("done"):
+                return dict(state, inserted=0, already_imported=True)
+
+            start = int(state.get("rows", 0))
+            progress = {
+                "path": str(path), "format": fmt,
+                "rows": start, "inserted": int(state.get("inserted", 0)),
+                "skipped": int(state.get("skipped", 0)), "done": False,
+            }
+            # 已寫入的列：只讀過去，不正規化
+            for _ in islice(reader, start):
+                pass
+
+            categories = CategoryMap(CategoryDao(self.txdao.cm))
+            rules = get_rule_engine(self.txdao.cm)
+            count, first_id, last_id = 0, None, None
+            now = now_iso()
+            device = settings.device_id()
+            pool: Executor = ProcessPoolExecutor(self.workers) if self.workers > 0 else InProcessExecutor()
+            try:
+                for end, norm, bad in self._ordered(pool, self._batches(reader, start), fmt, header, currency):
+                    txs = list(rules.apply(
+                        self._tx(r, categories, book_id, account_id, member_id, now, device) for r in norm
+                    ))
+                    nxt = dict(progress, rows=end, skipped=progress["skipped"] + bad,
+                               inserted=progress["inserted"] + len(txs))
+                    # 一個來源批次 = 一個 transaction；進度與資料一起 commit
+                    if txs:
+                        _n, f_id, last_id = self.txdao.insert_many(
+                            txs, len(txs),
+                            checkpoint=lambda conn, _n, st=nxt: SettingsDao.put(conn, key, json.dumps(st)),
+                        )
+                        first_id = first_id or f_id
+                        count += len(txs)
+                    else:
+                        settings.set(key, json.dumps(nxt))
+                    progress = nxt
+                    self.bus.publish(EV_IMPORT_PROGRESS, dict(progress))
+            finally:
+                pool.shutdown(cancel_futures=True)
+
+        progress.update(done=True, finished_at=now_iso())
+        settings.set(key, json.dumps(progress))
+        self.bus.publish(EV_IMPORT_PROGRESS, dict(progress))
+        if count:
+            self.bus.publish(EV_TX_CREATED, {
+                "batch": True, "count": count,
+                "first_id": first_id, "last_id": last_id,
+            })
+        return dict(
+            progress, inserted=count, first_id=first_id, last_id=last_id,
+            categories_created=categories.created, resumed_from=start,
+        )
+
+    # ───── 管線各段（皆為 generator，一次只持有有限批數） ─────
+    def _batches(self, reader: Iterator[List[str]], start: int) -> Iterator[Tuple[int, List[List[str]]]]:
+        """(批次結束時的來源列數, 原始列)。"""
+        pos = start
+        while True:
+            batch = list(islice(reader, self.chunk_size))
+            if not batch:
+                return
+            pos += len(batch)
+            yield pos, batch
+
+    def _ordered(
+        self,
+        pool: Executor,
+        batches: Iterator[Tuple[int, List[List[str]]]],
+        fmt: str,
+        header: List[str],
+        currency: str,
+    ) -> Iterator[Tuple[int, List[NormRow], int]]:
+        """平行正規化、依原順序產出；在途批數上限 workers * 2。"""
+        window: Deque[Tuple[int, Future]] = deque()
+        limit = max(1, self.workers) * 2
+        for end, raw in batches:
+            window.append((end, pool.submit(normalize_batch, fmt, header, raw, currency)))
+            if len(window) >= limit:
+                end0, fut = window.popleft()
+                yield (end0, *fut.result())
+        while window:
+            end0, fut = window.popleft()
+            yield (end0, *fut.result())
+
+    @staticmethod
+    def _tx(
+        row: NormRow,
+        categories: CategoryMap,
+        book_id: int,
+        account_id: int,
+        member_id: int,
+        now: str,
+        device: str,
+    ) -> Dict[str, Any]:
+        tx_type, minor, cur, cat, sub, merchant, note, date = row
+        return {
+            "book_id": book_id,
+            "account_id": account_id,
+            "tx_type": tx_type,
+            "amount": minor,
+            "currency": cur,
+            "category_id": categories.resolve(cat, sub),
+            "member_id": member_id,
+            "merchant": merchant,
+            "note": note,
+            "date": date,
+            "updated_at": now,
+            "device_id": device,
+        }
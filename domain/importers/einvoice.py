@@ -0,0 +1,362 @@
+# domain/importers/einvoice.py
+"""
+財政部電子發票整合服務平台的載具發票匯出檔（CSV）匯入。
+
+支援兩種匯出格式（自動判斷）：
+  管線分隔（「載具歸戶發票明細」下載）：
+      表頭=M|載具名稱|載具號碼|發票日期|商店統編|商店店名|發票號碼|總金額|發票狀態|
+      明細=D|發票號碼|小計|品項名稱|
+      M|手機條碼|/ABC1234|20240102|22555003|全聯實業股份有限公司|AB12345678|350|開立|
+      D|AB12345678|89|鮮奶|
+  逗號分隔、一列一個品項（發票欄位在每列重複）：
+      發票日期,發票號碼,發票金額,發票狀態,賣方統一編號,賣方名稱,消費明細_數量,消費明細_單價,消費明細_金額,消費明細_品名,...
+D 列不一定緊接在 M 列之後，檔案逐行讀入後依發票號碼歸併（一年份約數千張，記憶體很小）。
+
+每張發票記成一筆支出（TWD、商店名稱為 merchant、發票號碼為 note），表頭與品項分別寫進 Invoice / InvoiceItem。
+以 (invoice_no, period) 去重（m0013 的唯一索引）：已匯入的發票跳過，作廢的發票不匯入。
+品名經 data.items 收進品項字典，品項列同時記下 merchant / date 供價格歷史查詢。
+交易、表頭與品項在同一個 transaction 內寫入（TxDao.insert_many 的 checkpoint），中途失敗不會留下半套資料。
+
+類別自動指定，依序：
+  0. 使用者的自動分類規則（domain.rules）
+  1. 同一賣方統編先前匯入的發票最常被歸到的類別（使用者改過類別會被學起來）
+  2. 同名 merchant 的既有交易最常用的類別
+  3. MERCHANT_RULES 關鍵字（缺的類別即時建立）
+"""
+from __future__ import annotations
+import csv
+import re
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.eventbus import EventBus, EV_IMPORT_PROGRESS, EV_TX_CREATED
+from core.money import to_minor
+from core.utils import now_iso
+from data.dao import CategoryDao, SettingsDao, TxDao
+from data.items import intern_in
+from domain.rules import get_rule_engine
+from .common import CategoryMap
+
+# 一個 transaction 最多寫這麼多張發票（一年份一次寫完）
+EINVOICE_CHUNK = 50_000
+
+VOID_STATUS = ("作廢", "註銷", "void")
+
+# (商店名稱關鍵字, (類別, 子類別))；先符合的優先
+MERCHANT_RULES: List[Tuple[str, Tuple[str, str]]] = [
+    (r"中油|台塑石化|加油|高鐵|台灣鐵路|臺灣鐵路|捷運|悠遊卡|一卡通|客運|計程車|停車|uber", ("交通", "")),
+    (r"統一超商|7-ELEVEN|全家便利|萊爾富|來來超商|OK便利", ("餐飲", "便利商店")),
+    (r"麥當勞|肯德基|摩斯|星巴克|路易莎|85度C|咖啡|餐廳|餐飲|小吃|早餐|飲料|茶|便當|拉麵|壽司|火鍋|食品", ("餐飲", "")),
+    (r"全聯|家樂福|好市多|大潤發|愛買|美廉社|超市|量販", ("日用品", "超市")),
+    (r"屈臣氏|康是美|寶雅|藥局|藥妝", ("日用品", "藥妝")),
+    (r"中華電信|台灣大哥大|遠傳|亞太電信|台灣之星", ("通訊", "")),
+    (r"電力|自來水|瓦斯|天然氣", ("居家", "水電瓦斯")),
+    (r"書店|誠品|博客來|金石堂", ("教育", "書籍")),
+    (r"影城|威秀|KTV|遊樂", ("娛樂", "")),
+]
+_RULES = [(re.compile(p, re.IGNORECASE), cat) for p, cat in MERCHANT_RULES]
+
+_COMPANY_SUFFIX = re.compile(r"(股份)?有限公司.*$")
+
+# 逗號格式的欄名別名
+_COLUMNS = {
+    "no": ("發票號碼",),
+    "date": ("發票日期", "消費日期"),
+    "total": ("發票金額", "總金額", "消費金額"),
+    "status": ("發票狀態",),
+    "seller_id": ("賣方統一編號", "賣方統編", "商店統編"),
+    "seller": ("賣方名稱", "商店店名", "店家名稱"),
+    "carrier": ("載具名稱", "載具自訂名稱"),
+    "qty": ("消費明細_數量", "數量"),
+    "price": ("消費明細_單價", "單價"),
+    "amount": ("消費明細_金額", "小計", "金額"),
+    "name": ("消費明細_品名", "品項名稱", "品名"),
+}
+
+Invoice = Dict[str, Any]
+# (品名, 數量, 單價, 金額)
+Item = Tuple[str, Optional[float], Optional[int], int]
+
+
+def _money(s: str) -> Optional[int]:
+    try:
+        d = Decimal(s.strip().replace(",", ""))
+    except (InvalidOperation, AttributeError):
+        return None
+    return to_minor(d, "TWD") if d.is_finite() else None
+
+
+def _unit_price(qty: Optional[float], price: Optional[int], amount: int) -> int:
+    # 管線格式只有小計：數量不明當 1（價格歷史看的是單價）
+    if price is not None:
+        return price
+    return round(amount / qty) if qty else amount
+
+
+def _date(s: str) -> Optional[str]:
+    """20240102 / 2024/01/02 / 2024-01-02 / 民國 1130102 / 113/01/02 → YYYY-MM-DD。"""
+    digits = re.findall(r"\d+", s or "")
+    if len(digits) == 1 and len(digits[0]) in (7, 8):
+        d = digits[0]
+        digits = [d[:-4], d[-4:-2], d[-2:]]
+    if len(digits) != 3:
+        return None
+    y, m, d = (int(x) for x in digits)
+    if y < 1911:
+        y += 1911
+    if not (1 <= m <= 12 and 1 <= d <= 31):
+        return None
+    return f"{y:04d}-{m:02d}-{d:02d}"
+
+
+def period_of(date: str) -> str:
+    """發票期別（兩個月一期）以單數月表示：2024-06-15 → "2024-05"。"""
+    y, m = int(date[:4]), int(date[5:7])
+    return f"{y:04d}-{m - (m + 1) % 2:02d}"
+
+
+def _sniff_encoding(path: Path) -> str:
+    # 平台現行匯出為 UTF-8（可能帶 BOM）；舊檔是 Big5
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+    try:
+        head.decode("utf-8")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        return "utf-8-sig" if e.start >= len(head) - 3 else "cp950"
+
+
+class _MerchantCategories:
+    """賣方 → Category.id：先看歷史（統編 / 商店名稱），再看關鍵字規則。"""
+    def __init__(self, txdao: TxDao) -> None:
+        self.categories = CategoryMap(CategoryDao(txdao.cm))
+        self.by_seller: Dict[str, int] = {}
+        self.by_merchant: Dict[str, int] = {}
+        with txdao.cm.reader() as conn:
+            # 依次數由少到多讀，dict 後寫覆蓋前寫：留下最常用的類別
+            for seller_id, cat, _n in conn.execute(
+                """
+                SELECT i.seller_id, t.category_id, COUNT(*) AS n
+                FROM Invoice i JOIN [Transaction] t ON t.id = i.tx_id
+                WHERE i.seller_id IS NOT NULL AND t.category_id IS NOT NULL
+                GROUP BY i.seller_id, t.category_id ORDER BY n
+                """
+            ):
+                self.by_seller[seller_id] = cat
+            for merchant, cat, _n in conn.execute(
+                """
+                SELECT merchant, category_id, COUNT(*) AS n FROM [Transaction]
+                WHERE merchant IS NOT NULL AND category_id IS NOT NULL
+                GROUP BY merchant, category_id ORDER BY n
+                """
+            ):
+                self.by_merchant[merchant] = cat
+        self._rule_ids: Dict[Tuple[str, str], Optional[int]] = {}
+
+    def resolve(self, seller_id: Optional[str], seller: str, merchant: str) -> Optional[int]:
+        if seller_id and seller_id in self.by_seller:
+            return self.by_seller[seller_id]
+        if merchant in self.by_merchant:
+            return self.by_merchant[merchant]
+        for rx, cat in _RULES:
+            if rx.search(seller):
+                if cat not in self._rule_ids:
+                    self._rule_ids[cat] = self.categories.resolve(*cat)
+                return self._rule_ids[cat]
+        return None
+
+
+class EInvoiceImporter:
+    def __init__(
+        self,
+        bus: EventBus,
+        txdao: Optional[TxDao] = None,
+        chunk_size: int = EINVOICE_CHUNK,
+    ) -> None:
+        self.bus = bus
+        self.txdao = txdao or TxDao()
+        self.chunk_size = chunk_size
+
+    def run(
+        self,
+        path: Path | str,
+        book_id: int = 1,
+        account_id: int = 1,
+        member_id: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        匯入一個載具匯出檔；回傳 {"invoices", "items", "inserted", "duplicates", "voided",
+        "skipped", "categorized", "first_id", "last_id"}（invoices / items 為新寫入的數量）。
+        """
+        path = Path(path)
+        invoices, skipped = self._read(path)
+        stats = {"invoices": 0, "items": 0, "inserted": 0, "duplicates": 0, "voided": 0,
+                 "skipped": skipped, "categorized": 0, "first_id": None, "last_id": None}
+
+        with self.txdao.cm.reader() as conn:
+            seen = {(r[0], r[1]) for r in conn.execute("SELECT invoice_no, period FROM Invoice")}
+        fresh: List[Invoice] = []
+        for inv in invoices:
+            key = (inv["no"], inv["period"])
+            if inv["status"] in VOID_STATUS:
+                stats["voided"] += 1
+            elif key in seen:
+                stats["duplicates"] += 1
+            else:
+                seen.add(key)
+                fresh.append(inv)
+        if not fresh:
+            self.bus.publish(EV_IMPORT_PROGRESS, dict(stats, path=str(path), done=True))
+            return stats
+
+        rules = get_rule_engine(self.txdao.cm)
+        merchants = _MerchantCategories(self.txdao)
+        now = now_iso()
+        device = SettingsDao(self.txdao.cm).device_id()
+        txs = []
+        for inv in fresh:
+            category_id = rules.categorize(inv["seller"], inv["no"], inv["total"], "TWD", account_id, "expense")
+            if category_id is None:
+                category_id = merchants.resolve(inv["seller_id"], inv["seller"], inv["merchant"])
+            stats["categorized"] += category_id is not None
+            txs.append({
+                "book_id": book_id, "account_id": account_id, "tx_type": "expense",
+                "amount": inv["total"], "currency": "TWD", "category_id": category_id,
+                "member_id": member_id, "merchant": inv["merchant"], "note": inv["no"],
+                "date": f"{inv['date']}T12:00:00", "updated_at": now, "device_id": device,
+            })
+
+        written = [0]
+
+        def checkpoint(conn, total: int) -> None:
+            # insert_many 的 chunk transaction 內：這批交易的 id 是連號，接著寫表頭與品項
+            batch = fresh[written[0]:total]
+            last = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='Transaction'").fetchone()[0]
+            item_ids = intern_in(conn, (it[0] for inv in batch for it in inv["items"]))
+            items = []
+            for tx_id, inv in enumerate(batch, start=last - len(batch) + 1):
+                invoice_id = conn.execute(
+                    """
+                    INSERT INTO Invoice(tx_id, invoice_no, period, date, seller_id, seller_name, carrier, amount)
+                    VALUES (?,?,?,?,?,?,?,?)
+                    """,
+                    (tx_id, inv["no"], inv["period"], inv["date"], inv["seller_id"], inv["seller"],
+                     inv["carrier"], inv["total"]),
+                ).lastrowid
+                items.extend(
+                    (invoice_id, tx_id, seq, name, qty, _unit_price(qty, price, amount), amount,
+                     item_ids.get(name), inv["merchant"], inv["date"])
+                    for seq, (name, qty, price, amount) in enumerate(inv["items"], start=1)
+                )
+            conn.executemany(
+                """
+                INSERT INTO InvoiceItem(invoice_id, tx_id, seq, name, qty, unit_price, amount, item_id, merchant, date)
+                VALUES (?,?,?,?,?,?,?,?,?,?)
+                """,
+                items,
+            )
+            stats["items"] += len(items)
+            written[0] = total
+
+        count, first_id, last_id = self.txdao.insert_many(txs, self.chunk_size, checkpoint=checkpoint)
+        stats.update(invoices=count, inserted=count, first_id=first_id, last_id=last_id)
+        self.bus.publish(EV_IMPORT_PROGRESS, dict(stats, path=str(path), done=True))
+        self.bus.publish(EV_TX_CREATED, {"batch": True, "count": count, "first_id": first_id, "last_id": last_id})
+        return stats
+
+    # ───── 讀檔 ─────
+    def _read(self, path: Path) -> Tuple[List[Invoice], int]:
+        """回傳 (依檔案順序的發票, 無法解析的列數)。"""
+        with open(path, newline="", encoding=_sniff_encoding(path)) as f:
+            first = ""
+            for first in f:
+                if first.strip():
+                    break
+            f.seek(0)
+            if first.startswith(("表頭", "明細", "M|", "D|")):
+                return self._pipe(f)
+            return self._flat(csv.reader(f))
+
+    @staticmethod
+    def _new(no: str, date: Optional[str], seller_id: str, seller: str, carrier: str,
+             total: Optional[int], status: str) -> Optional[Invoice]:
+        if not re.fullmatch(r"[A-Z]{2}\d{8}", no) or date is None:
+            return None
+        name = seller.strip()
+        merchant = _COMPANY_SUFFIX.sub("", name).strip() or name
+        return {"no": no, "date": date, "period": period_of(date), "seller_id": seller_id.strip() or None,
+                "seller": name, "merchant": merchant or None, "carrier": carrier.strip() or None,
+                "total": total, "status": status.strip(), "items": []}
+
+    @staticmethod
+    def _finish(invoices: Dict[str, Invoice]) -> List[Invoice]:
+        out = []
+        for inv in invoices.values():
+            if inv["total"] is None:
+                inv["total"] = sum(it[3] for it in inv["items"])
+            out.append(inv)
+        return out
+
+    def _pipe(self, lines: Iterator[str]) -> Tuple[List[Invoice], int]:
+        invoices: Dict[str, Invoice] = {}
+        orphans: Dict[str, List[Item]] = {}
+        skipped = 0
+        for line in lines:
+            f = [x.strip() for x in line.rstrip("\r\n").split("|")]
+            if f[0] == "M" and len(f) >= 9:
+                no = f[6].replace("-", "").upper()
+                inv = self._new(no, _date(f[3]), f[4], f[5], f[1] or f[2], _money(f[7]), f[8])
+                if inv is None:
+                    skipped += 1
+                    continue
+                inv["items"] = orphans.pop(no, [])
+                invoices[no] = inv
+            elif f[0] == "D" and len(f) >= 4:
+                no, amount = f[1].replace("-", "").upper(), _money(f[2])
+                if amount is None:
+                    skipped += 1
+                    continue
+                item: Item = (f[3], None, None, amount)
+                (invoices[no]["items"] if no in invoices else orphans.setdefault(no, [])).append(item)
+            elif line.strip() and not f[0].startswith(("表頭", "明細")):
+                skipped += 1
+        skipped += sum(len(v) for v in orphans.values())   # 找不到表頭的明細
+        return self._finish(invoices), skipped
+
+    def _flat(self, reader: Iterator[Sequence[str]]) -> Tuple[List[Invoice], int]:
+        header = next(reader, None)
+        if header is None:
+            return [], 0
+        names = [h.strip().lstrip("﻿") for h in header]
+        col = {k: next((names.index(a) for a in aliases if a in names), None) for k, aliases in _COLUMNS.items()}
+        if col["no"] is None or col["date"] is None:
+            raise ValueError("not an e-invoice carrier export: no 發票號碼 / 發票日期 column")
+
+        def get(rec: Sequence[str], key: str) -> str:
+            i = col[key]
+            return rec[i] if i is not None and i < len(rec) else ""
+
+        invoices: Dict[str, Invoice] = {}
+        skipped = 0
+        for rec in reader:
+            if not any(rec):
+                continue
+            no = get(rec, "no").replace("-", "").strip().upper()
+            inv = invoices.get(no)
+            if inv is None:
+                inv = self._new(no, _date(get(rec, "date")), get(rec, "seller_id"), get(rec, "seller"),
+                                get(rec, "carrier"), _money(get(rec, "total")), get(rec, "status"))
+                if inv is None:
+                    skipped += 1
+                    continue
+                invoices[no] = inv
+            name, amount = get(rec, "name").strip(), _money(get(rec, "amount"))
+            if name and amount is not None:
+                qty = get(rec, "qty").strip()
+                try:
+                    q = float(qty) if qty else None
+                except ValueError:
+                    q = None
+                inv["items"].append((name, q, _money(get(rec, "price")), amount))
+        return self._finish(invoices), skipped
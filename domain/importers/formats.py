@@ -0,0 +1,180 @@
+# domain/importers/formats.py
+"""
+CSV 匯出格式 → 內部交易列的正規化。
+
+這裡的函式會在 process pool 的子行程執行：只用標準函式庫與 core.money，
+輸入輸出都是可 pickle 的 list / tuple，不碰資料庫。
+"""
+from __future__ import annotations
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.money import to_minor
+
+# 正規化後的一列：(type, amount_minor, currency, category, subcategory, merchant, note, date)
+# amount_minor：支出 / 收入為絕對值，adjust / transfer 帶正負號（與 data.balances 相同）
+NormRow = Tuple[str, int, str, str, str, Optional[str], Optional[str], str]
+
+# ───── Zaim ─────
+# 日付,方法,カテゴリ,カテゴリの内訳,支払元,入金先,品目,メモ,お店,通貨,収入,支出,振替,残高調整,通貨変換前の金額,集計の設定
+ZAIM_HEADER = ("日付", "方法", "カテゴリ", "カテゴリの内訳", "お店", "通貨", "収入", "支出", "振替", "残高調整")
+_ZAIM_COLUMNS = ZAIM_HEADER + ("品目", "メモ")
+
+# 方法 → (type, 金額欄)
+_ZAIM_METHODS: Dict[str, Tuple[str, str]] = {
+    "payment": ("expense", "支出"),
+    "income": ("income", "収入"),
+    "transfer": ("transfer", "振替"),
+    "balance": ("adjust", "残高調整"),
+}
+
+# ───── 通用格式：欄名不分大小寫，以下任一別名即可 ─────
+GENERIC_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "date": ("date", "日期", "日付", "time", "datetime"),
+    "type": ("type", "類型", "種類", "kind"),
+    "amount": ("amount", "金額", "金额", "value"),
+    "currency": ("currency", "幣別", "通貨", "币种"),
+    "category": ("category", "類別", "カテゴリ", "分类"),
+    "subcategory": ("subcategory", "子類別", "カテゴリの内訳"),
+    "merchant": ("merchant", "payee", "商店", "お店", "shop", "store"),
+    "note": ("note", "memo", "備註", "メモ", "description"),
+}
+
+_TYPE_WORDS: Dict[str, str] = {
+    "expense": "expense", "支出": "expense", "payment": "expense",
+    "income": "income", "收入": "income", "収入": "income",
+    "transfer": "transfer", "轉帳": "transfer", "振替": "transfer",
+    "adjust": "adjust", "balance": "adjust", "調整": "adjust",
+}
+
+# 只有支出 / 收入存絕對值（正負由 type 決定）；adjust / transfer 的正負本身有意義，照原樣保留
+_UNSIGNED_TYPES = ("expense", "income")
+
+_AMOUNT_JUNK = re.compile(r"[,\s¥$€₩]|NT\$|HK\$")
+_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y%m%d")
+
+
+def detect(header: Sequence[str]) -> str:
+    cols = {h.strip() for h in header}
+    if all(c in cols for c in ZAIM_HEADER[:4]) and "支出" in cols:
+        return "zaim"
+    return "generic"
+
+
+def _amount(s: str) -> Optional[Decimal]:
+    s = _AMOUNT_JUNK.sub("", s or "")
+    if not s:
+        return None
+    try:
+        d = Decimal(s)
+    except InvalidOperation:
+        return None
+    return d if d.is_finite() else None
+
+
+def _minor(tx_type: str, amt: Decimal, currency: str) -> int:
+    return to_minor(abs(amt) if tx_type in _UNSIGNED_TYPES else amt, currency)
+
+
+@lru_cache(maxsize=8192)
+def _date(s: str) -> Optional[str]:
+    """
+    本地日期 / 時間 → UTC ISO（與 core.utils.now_iso 同格式）；只有日期時取當地正午。
+    結尾帶 Z 的 ISO 字串（本 App 的匯出檔）已是 UTC，原樣保留。
+    """
+    s = (s or "").strip()
+    if s.endswith("Z"):
+        try:
+            return datetime.fromisoformat(s[:-1]).replace(microsecond=0).isoformat()
+        except ValueError:
+            return None
+    for fmt in _DATE_FORMATS:
+        try:
+            dt = datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+        if "%H" not in fmt:
+            dt = dt.replace(hour=12)
+        return dt.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+    return None
+
+
+def _columns(header: Sequence[str], names: Dict[str, Sequence[str]]) -> Tuple[Dict[str, int], int]:
+    """欄位 → 索引（找不到的欄指到最後補上的空字串）；回傳 (索引, 補齊後的列寬)。"""
+    lower = {h.strip().lower(): i for i, h in enumerate(header)}
+    width = len(header)
+    idx: Dict[str, int] = {}
+    for field, aliases in names.items():
+        idx[field] = next((lower[a.lower()] for a in aliases if a.lower() in lower), width)
+    return idx, width + 1
+
+
+def _padded(rows: List[List[str]], width: int) -> Iterator[List[str]]:
+    # 欄數不足的列補空字串，之後一律直接用索引取值
+    for row in rows:
+        yield row if len(row) >= width else row + [""] * (width - len(row))
+
+
+def _zaim(header: Sequence[str], rows: List[List[str]], currency: str) -> Tuple[List[NormRow], int]:
+    idx, width = _columns(header, {c: (c,) for c in _ZAIM_COLUMNS})
+    i_date, i_method, i_cat, i_sub = idx["日付"], idx["方法"], idx["カテゴリ"], idx["カテゴリの内訳"]
+    i_item, i_memo, i_shop, i_cur = idx["品目"], idx["メモ"], idx["お店"], idx["通貨"]
+    amount_col = {m: idx[col] for m, (_t, col) in _ZAIM_METHODS.items()}
+    out: List[NormRow] = []
+    bad = 0
+    for row in _padded(rows, width):
+        method = row[i_method].strip().lower()
+        tx_type = _ZAIM_METHODS.get(method, ("", ""))[0]
+        date = _date(row[i_date])
+        amt = _amount(row[amount_col[method]]) if tx_type else None
+        if not tx_type or date is None or amt is None:
+            bad += 1
+            continue
+        cur = row[i_cur].strip().upper() or currency
+        cat, sub = row[i_cat].strip(), row[i_sub].strip()
+        note = " ".join(x for x in (row[i_item].strip(), row[i_memo].strip()) if x) or None
+        out.append((tx_type, _minor(tx_type, amt, cur), cur,
+                    "" if cat == "-" else cat, "" if sub == "-" else sub,
+                    row[i_shop].strip() or None, note, date))
+    return out, bad
+
+
+def _generic(header: Sequence[str], rows: List[List[str]], currency: str) -> Tuple[List[NormRow], int]:
+    idx, width = _columns(header, GENERIC_ALIASES)
+    i_date, i_type, i_amt, i_cur = idx["date"], idx["type"], idx["amount"], idx["currency"]
+    i_cat, i_sub, i_shop, i_note = idx["category"], idx["subcategory"], idx["merchant"], idx["note"]
+    out: List[NormRow] = []
+    bad = 0
+    for row in _padded(rows, width):
+        date = _date(row[i_date])
+        amt = _amount(row[i_amt])
+        if date is None or amt is None:
+            bad += 1
+            continue
+        word = row[i_type].strip().lower()
+        if word:
+            tx_type = _TYPE_WORDS.get(word)
+            if tx_type is None:
+                bad += 1
+                continue
+        else:
+            # 沒有類型欄：負數為支出、正數為收入
+            tx_type = "expense" if amt < 0 else "income"
+        cur = row[i_cur].strip().upper() or currency
+        out.append((tx_type, _minor(tx_type, amt, cur), cur, row[i_cat].strip(), row[i_sub].strip(),
+                    row[i_shop].strip() or None, row[i_note].strip() or None, date))
+    return out, bad
+
+
+FORMATS = {
+    "zaim": _zaim,
+    "generic": _generic,
+}
+
+
+def normalize_batch(fmt: str, header: List[str], rows: List[List[str]], currency: str) -> Tuple[List[NormRow], int]:
+    """process pool 的工作單位；回傳 (正規化後的列, 無法解析的列數)。"""
+    return FORMATS[fmt](header, rows, currency)
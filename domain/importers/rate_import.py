@@ -0,0 +1,201 @@
+# domain/importers/rate_import.py
+"""
+歷史匯率批次載入（本機 CSV / JSON 檔）。
+
+支援的格式（依副檔名）：
+  .csv           長表：date, base, target, rate（欄名可用別名，見 _ALIASES）
+                 寬表：date, USD, JPY, ...（一欄一個幣別，base 由參數指定）
+  .jsonl/.ndjson 每行一筆 {"date", "base", "target", "rate"}，或一天一筆 {"date", "base", "rates": {幣別: 匯率}}
+  .json          上述物件的陣列，或常見匯率 API 的時間序列 {"base": ..., "rates": {日期: {幣別: 匯率}}}
+CSV / JSONL 逐列讀取，記憶體固定；.json 整檔載入（匯率檔通常不大）。
+
+每 chunk_size 筆一個 transaction 寫進 Rate（以 (base, target, date) upsert，重複載入不會多出列），
+最後對這次載入涵蓋的每個幣別對，以前一筆匯率補齊缺漏的日期（假日、休市），
+全部完成後發一次 EV_RATES_UPDATED。
+"""
+from __future__ import annotations
+import csv
+import json
+from datetime import date as _date
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.eventbus import EventBus, EV_RATES_UPDATED
+from data.conn import ConnectionManager, get_manager
+from data.rates import fill_gaps_in, upsert_in
+
+RATE_CHUNK = 5000
+
+RateRow = Tuple[str, str, str, float]
+
+_ALIASES = {
+    "date": ("date", "day", "time", "日期"),
+    "base": ("base", "base_currency", "from", "source"),
+    "target": ("target", "target_currency", "quote", "to", "currency", "symbol"),
+    "rate": ("rate", "value", "close", "mid", "匯率"),
+}
+
+
+def _norm(day: Any, base: Any, target: Any, rate: Any) -> Optional[RateRow]:
+    """正規化成 (YYYY-MM-DD, 大寫幣別, 大寫幣別, 正的匯率)；格式不對時為 None。"""
+    try:
+        d = str(day).strip()[:10].replace("/", "-")
+        _date.fromisoformat(d)
+        b, t = str(base).strip().upper(), str(target).strip().upper()
+        r = float(rate)
+    except (TypeError, ValueError):
+        return None
+    if len(b) != 3 or len(t) != 3 or b == t or not r > 0:
+        return None
+    return d, b, t, r
+
+
+def _column(header: Sequence[str], field: str) -> Optional[int]:
+    lower = [h.strip().lower() for h in header]
+    return next((lower.index(a) for a in _ALIASES[field] if a in lower), None)
+
+
+class RateImporter:
+    def __init__(
+        self,
+        bus: EventBus,
+        manager: Optional[ConnectionManager] = None,
+        chunk_size: int = RATE_CHUNK,
+    ) -> None:
+        self.bus = bus
+        self.cm = manager or get_manager()
+        self.chunk_size = chunk_size
+
+    def run(
+        self,
+        paths: Iterable[Path | str],
+        base: Optional[str] = None,
+        fill_gaps: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        載入一或多個檔案；base 為寬表 / 物件沒有寫 base 時的基準幣別。
+        回傳 {"files", "rows", "written", "skipped", "filled", "pairs"}：
+        rows 為讀到的有效筆數，written 為實際新增或改值的列數（重複載入為 0）。
+        """
+        stats = {"files": 0, "rows": 0, "written": 0, "skipped": 0, "filled": 0, "pairs": 0}
+        spans: Dict[Tuple[str, str], List[str]] = {}
+        conn = self.cm.writer()
+        for path in paths:
+            rows = self._read(Path(path), base, stats)
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                with conn:
+                    conn.execute("BEGIN")
+                    stats["written"] += upsert_in(conn, chunk)
+                stats["rows"] += len(chunk)
+                for d, b, t, _r in chunk:
+                    span = spans.get((b, t))
+                    if span is None:
+                        spans[(b, t)] = [d, d]
+                    elif d < span[0]:
+                        span[0] = d
+                    elif d > span[1]:
+                        span[1] = d
+            stats["files"] += 1
+
+        if fill_gaps and spans:
+            with conn:
+                conn.execute("BEGIN")
+                for (b, t), (lo, hi) in spans.items():
+                    stats["filled"] += fill_gaps_in(conn, b, t, lo, hi)
+        stats["pairs"] = len(spans)
+        self.bus.publish(EV_RATES_UPDATED, dict(stats))
+        return stats
+
+    # ───── 讀檔（皆為 generator） ─────
+    def _read(self, path: Path, base: Optional[str], stats: Dict[str, int]) -> Iterator[RateRow]:
+        suffix = path.suffix.lower()
+        if suffix == ".csv":
+            raw = self._csv(path, base)
+        elif suffix in (".jsonl", ".ndjson"):
+            raw = self._jsonl(path, base)
+        elif suffix == ".json":
+            raw = self._json(path, base)
+        else:
+            raise ValueError(f"unsupported rate file: {path.name}")
+        for row in raw:
+            norm = _norm(*row)
+            if norm is None:
+                stats["skipped"] += 1
+            else:
+                yield norm
+
+    @staticmethod
+    def _csv(path: Path, base: Optional[str]) -> Iterator[Tuple[Any, ...]]:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            cols = {k: _column(header, k) for k in _ALIASES}
+            if cols["date"] is None:
+                raise ValueError(f"{path.name}: no date column")
+            di = cols["date"]
+            if cols["target"] is not None and cols["rate"] is not None:
+                ti, ri, bi = cols["target"], cols["rate"], cols["base"]
+                if bi is None and base is None:
+                    raise ValueError(f"{path.name}: no base column; pass base=")
+                for rec in reader:
+                    if len(rec) > max(di, ti, ri):
+                        yield rec[di], rec[bi] if bi is not None else base, rec[ti], rec[ri]
+                    elif rec:
+                        yield None, None, None, None  # 欄數不足：算 skipped
+                return
+            # 寬表：date 以外的欄位名稱就是幣別
+            if base is None:
+                raise ValueError(f"{path.name}: wide rate table needs base=")
+            targets = [(i, h) for i, h in enumerate(header) if i != di and h.strip()]
+            for rec in reader:
+                if len(rec) <= di:
+                    continue
+                for i, code in targets:
+                    if i < len(rec) and rec[i].strip():
+                        yield rec[di], base, code, rec[i]
+
+    def _jsonl(self, path: Path, base: Optional[str]) -> Iterator[Tuple[Any, ...]]:
+        with open(path, encoding="utf-8-sig") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    yield None, None, None, None
+                    continue
+                yield from self._records([obj], base)
+
+    def _json(self, path: Path, base: Optional[str]) -> Iterator[Tuple[Any, ...]]:
+        with open(path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get("rates"), dict) and "date" not in data:
+            # 時間序列：{"base": "USD", "rates": {"2024-01-02": {"TWD": 31.2, ...}, ...}}
+            b = data.get("base") or base
+            for day, rates in data["rates"].items():
+                if isinstance(rates, dict):
+                    for code, rate in rates.items():
+                        yield day, b, code, rate
+            return
+        yield from self._records(data if isinstance(data, list) else [data], base)
+
+    @staticmethod
+    def _records(objs: Iterable[Any], base: Optional[str]) -> Iterator[Tuple[Any, ...]]:
+        for obj in objs:
+            if not isinstance(obj, dict):
+                yield None, None, None, None
+                continue
+            get = lambda field: next((obj[a] for a in _ALIASES[field] if a in obj), None)  # noqa: E731
+            b = get("base") or base
+            if isinstance(obj.get("rates"), dict):
+                for code, rate in obj["rates"].items():
+                    yield get("date"), b, code, rate
+            else:
+                yield get("date"), b, get("target"), get("rate")
@@ -0,0 +1,165 @@
+# domain/lottery.py
+"""
+統一發票對獎。
+
+中獎號碼從本機檔案讀入（財政部公告的文字 / 網頁複製內容，或 JSON），一個檔案可含多期：
+    113年01-02月
+    特別獎 12345678
+    特獎 87654321
+    頭獎 11122233 44455566 77788899
+    增開六獎 765 432
+JSON 為 {"period": "2024-01", "special": "...", "grand": "...", "first": [...], "extra": [...]}（或其 list）。
+
+獎別只看發票號碼的 8 位數字：特別獎 / 特獎 8 碼全中；頭獎 8 碼，二～六獎為頭獎末 7～3 碼；增開六獎末 3 碼。
+SuffixIndex 把一期的中獎號碼展開成「末 n 碼 → 最高獎別」（n = 3..8），每張發票只做幾次 dict 查詢，
+末 3 碼不在索引裡的（絕大多數）一次查詢就排除。結果以 EV_INVOICE_WINNERS 發布。
+"""
+from __future__ import annotations
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.eventbus import EventBus, EV_INVOICE_WINNERS
+from core.money import to_minor
+from data.conn import ConnectionManager
+from data.dao import InvoiceDao
+
+# (獎別, 比對末幾碼, 獎金元)
+PRIZES: List[Tuple[str, int, int]] = [
+    ("special", 8, 10_000_000),
+    ("grand", 8, 2_000_000),
+    ("first", 8, 200_000),
+    ("second", 7, 40_000),
+    ("third", 6, 10_000),
+    ("fourth", 5, 4_000),
+    ("fifth", 4, 1_000),
+    ("sixth", 3, 200),
+]
+PRIZE_AMOUNT = {tier: amount for tier, _n, amount in PRIZES}
+_FIRST_TIERS = [(tier, n) for tier, n, _a in PRIZES[2:]]
+
+_PERIOD_ROC = re.compile(r"(\d{2,3})\s*年\s*(\d{1,2})\s*[-~～至]\s*\d{1,2}\s*月")
+_PERIOD_AD = re.compile(r"(20\d{2})\s*[-/]\s*(\d{1,2})(?!\d)")
+_NOTE = re.compile(r"同期|獎金|各得|元")
+_LABELS = [("增開六獎", "extra"), ("特別獎", "special"), ("特獎", "grand"), ("頭獎", "first")]
+
+Winning = Dict[str, Any]
+Hit = Tuple[str, str]  # (獎別, 中獎號碼)
+
+
+def _period(y: int, m: int) -> Optional[str]:
+    if y < 1911:
+        y += 1911
+    if not 1 <= m <= 12:
+        return None
+    return f"{y:04d}-{m - (m + 1) % 2:02d}"
+
+
+def parse_winning_text(text: str) -> List[Winning]:
+    out: List[Winning] = []
+    cur: Optional[Winning] = None
+    for line in text.splitlines():
+        label, rest = next(((key, line.split(word, 1)[1]) for word, key in _LABELS if word in line), (None, ""))
+        m = _PERIOD_ROC.search(line) or _PERIOD_AD.search(line)
+        if m and label is None:
+            period = _period(int(m[1]), int(m[2]))
+            if period:
+                cur = {"period": period, "special": None, "grand": None, "first": [], "extra": []}
+                out.append(cur)
+            continue
+        if cur is None or label is None:
+            continue
+        # 號碼後面常接獎金說明（「同期統一發票收執聯…各得獎金 200 元」），不能當號碼
+        digits = re.findall(r"(?<![\d,])(\d{8}|\d{3})(?![\d,])", _NOTE.split(rest, 1)[0])
+        if label in ("special", "grand"):
+            cur[label] = next((d for d in digits if len(d) == 8), cur[label])
+        elif label == "first":
+            cur["first"].extend(d for d in digits if len(d) == 8)
+        else:
+            cur["extra"].extend(d for d in digits if len(d) == 3)
+    return [w for w in out if w["special"] or w["grand"] or w["first"]]
+
+
+def load_winning_numbers(path: Path | str) -> Dict[str, Winning]:
+    """期別 → 中獎號碼。"""
+    text = Path(path).read_text(encoding="utf-8-sig")
+    if text.lstrip().startswith(("{", "[")):
+        data = json.loads(text)
+        rows = data if isinstance(data, list) else [data]
+        found = [{"period": r["period"], "special": r.get("special"), "grand": r.get("grand"),
+                  "first": list(r.get("first", [])), "extra": list(r.get("extra", []))} for r in rows]
+    else:
+        found = parse_winning_text(text)
+    return {w["period"]: w for w in found}
+
+
+class SuffixIndex:
+    """一期中獎號碼的末碼索引：by_len[n][末 n 碼] = (獎別, 中獎號碼)，同一末碼留較高的獎。"""
+    def __init__(self, winning: Winning) -> None:
+        self.period = winning["period"]
+        self.by_len: Dict[int, Dict[str, Hit]] = {n: {} for n in range(3, 9)}
+        for tier in ("special", "grand"):
+            if winning.get(tier):
+                self.by_len[8].setdefault(winning[tier], (tier, winning[tier]))
+        for number in winning.get("first", []):
+            for tier, n in _FIRST_TIERS:
+                self.by_len[n].setdefault(number[-n:], (tier, number))
+        for tail in winning.get("extra", []):
+            self.by_len[3].setdefault(tail, ("sixth", tail))
+        # 由長到短比對；任何一個中獎號碼都不共用末 3 碼的發票一次查詢就排除
+        self._order = [(n, self.by_len[n]) for n in range(8, 2, -1) if self.by_len[n]]
+        self._tails = {key[-3:] for table in self.by_len.values() for key in table}
+
+    def match(self, digits: str) -> Optional[Hit]:
+        if digits[-3:] not in self._tails:
+            return None
+        for n, table in self._order:
+            hit = table.get(digits[-n:])
+            if hit is not None:
+                return hit
+        return None
+
+    def match_all(self, numbers: Iterable[Tuple[int, str, int]]) -> List[Tuple[int, str, str]]:
+        """[(Invoice.id, 發票號碼, tx_id)] → [(Invoice.id, 獎別, 中獎號碼)]。"""
+        tails, match = self._tails, self.match
+        return [
+            (invoice_id, *hit)
+            for invoice_id, no, _tx in numbers
+            if no[-3:] in tails and (hit := match(no[-8:])) is not None
+        ]
+
+
+class LotteryChecker:
+    def __init__(self, bus: EventBus, manager: Optional[ConnectionManager] = None) -> None:
+        self.bus = bus
+        self.dao = InvoiceDao(manager)
+
+    def check(self, winning: Winning) -> Dict[str, Any]:
+        """
+        對一期：回傳並發布 {"period", "checked", "winners", "total_prize"}；
+        winners 為 [{"invoice_id", "tx_id", "invoice_no", "date", "merchant", "amount",
+        "tier", "number", "prize"}]，獎金高的在前，prize 為 TWD 最小單位。
+        """
+        index = SuffixIndex(winning)
+        numbers = self.dao.numbers(index.period)
+        hits = {invoice_id: (tier, number) for invoice_id, tier, number in index.match_all(numbers)}
+        winners = []
+        for inv in self.dao.by_ids(list(hits)):
+            tier, number = hits[inv["id"]]
+            winners.append({
+                "invoice_id": inv["id"], "tx_id": inv["tx_id"], "invoice_no": inv["invoice_no"],
+                "date": inv["date"], "merchant": inv["merchant"], "amount": inv["amount"],
+                "tier": tier, "number": number, "prize": to_minor(PRIZE_AMOUNT[tier], "TWD"),
+            })
+        winners.sort(key=lambda w: (-w["prize"], w["invoice_no"]))
+        result = {"period": index.period, "checked": len(numbers), "winners": winners,
+                  "total_prize": sum(w["prize"] for w in winners)}
+        self.bus.publish(EV_INVOICE_WINNERS, result)
+        return result
+
+    def check_file(self, path: Path | str, periods: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """對檔案裡的每一期（或只對 periods）；期別新的在前。"""
+        winning = load_winning_numbers(path)
+        wanted = set(periods) if periods is not None else set(winning)
+        return [self.check(winning[p]) for p in sorted(wanted & set(winning), reverse=True)]
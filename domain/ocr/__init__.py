@@ -0,0 +1,6 @@
+"""收據 OCR：可抽換的本機辨識後端、process pool 管線與欄位解析。"""
+from __future__ import annotations
+
+from .backends import BACKENDS, FakeBackend, OcrBackend, TesseractBackend, resolve  # noqa: F401
+from .fields import parse_batch, parse_receipt  # noqa: F401
+from .pipeline import IMAGE_SUFFIXES, OcrPipeline  # noqa: F401
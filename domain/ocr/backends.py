@@ -0,0 +1,104 @@
+# domain/ocr/backends.py
+"""
+OCR 後端：本機的辨識引擎，介面只有 recognize(圖片路徑) → 文字。
+
+後端以字串規格指定（可在子行程內重建，不用 pickle 物件）：
+  "fake"            測試 / 壓測用：讀圖片旁的同名 .txt（receipt.jpg → receipt.txt），沒有就回空字串
+  "fake:0.05"       同上，每張多睡 0.05 秒模擬辨識時間
+  "tesseract"       本機安裝的 Tesseract（有 pytesseract 就用，否則呼叫 tesseract 指令）
+  "tesseract:jpn+eng"  指定語言，預設 chi_tra+jpn+eng
+resolve("auto") 取第一個可用的正式引擎；都沒有時為 None（UI 顯示未安裝）。
+新增引擎：實作 OcrBackend 並登記到 BACKENDS。
+"""
+from __future__ import annotations
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Optional, Protocol, Type
+
+
+class OcrBackend(Protocol):
+    name: str
+
+    @classmethod
+    def available(cls) -> bool: ...
+
+    def recognize(self, path: str) -> str: ...
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(self, arg: str = "") -> None:
+        self.delay = float(arg) if arg else 0.0
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def recognize(self, path: str) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        side = Path(path).with_suffix(".txt")
+        return side.read_text(encoding="utf-8") if side.exists() else ""
+
+
+class TesseractBackend:
+    name = "tesseract"
+    LANGS = "chi_tra+jpn+eng"
+
+    def __init__(self, arg: str = "") -> None:
+        self.langs = arg or self.LANGS
+
+    @classmethod
+    def available(cls) -> bool:
+        return shutil.which("tesseract") is not None
+
+    def recognize(self, path: str) -> str:
+        try:
+            import pytesseract
+            from PIL import Image
+        except ImportError:
+            out = subprocess.run(
+                ["tesseract", path, "-", "-l", self.langs],
+                capture_output=True, check=True, timeout=120,
+            )
+            return out.stdout.decode("utf-8", "replace")
+        with Image.open(path) as im:
+            return pytesseract.image_to_string(im, lang=self.langs)
+
+
+BACKENDS: Dict[str, Type] = {
+    FakeBackend.name: FakeBackend,
+    TesseractBackend.name: TesseractBackend,
+}
+
+# "auto" 依序嘗試的正式引擎（不含 fake）
+AUTO_ORDER = ("tesseract",)
+
+
+def resolve(spec: Optional[str]) -> Optional[str]:
+    """把 "auto" / None 換成實際可用的後端規格；指定的後端不存在時丟 ValueError。"""
+    if spec in (None, "", "auto"):
+        return next((name for name in AUTO_ORDER if BACKENDS[name].available()), None)
+    if spec.partition(":")[0] not in BACKENDS:
+        raise ValueError(f"unknown OCR backend: {spec!r}")
+    return spec
+
+
+_instances: Dict[str, OcrBackend] = {}
+
+
+def make_backend(spec: str) -> OcrBackend:
+    """依規格建立後端；同一行程內重複使用。"""
+    backend = _instances.get(spec)
+    if backend is None:
+        name, _sep, arg = spec.partition(":")
+        backend = _instances[spec] = BACKENDS[name](arg)
+    return backend
+
+
+def recognize(spec: str, path: str) -> str:
+    """process pool 的工作函式（模組層級，可 pickle）。"""
+    return make_backend(spec).recognize(path)
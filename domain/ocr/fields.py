@@ -0,0 +1,111 @@
+# domain/ocr/fields.py
+"""
+從收據 OCR 文字抽出欄位：total（Decimal）、date（YYYY-MM-DD）、merchant、invoice_no、currency。
+
+規則以台灣電子發票證明聯、日本レシート與一般英文收據為主：
+  - 發票號碼：兩個大寫字母 + 8 位數字（"AB-12345678" 正規化成 "AB12345678"）
+  - 日期：西元 2024-05-02 / 2024/5/2 / 2024年5月2日、民國 113/05/02、美式 05/02/2024；
+    「113年05-06月」這種發票期別不算日期
+  - 總額：總計 / 合計 / 總額 / TOTAL / お会計 等關鍵字後的金額（小計不算）；
+    沒有關鍵字時取帶幣別符號的最大金額
+  - 商店：第一行像名稱的文字（略過「電子發票證明聯」、日期、號碼等行）
+抽不到的欄位為 None。正規表示式只編譯一次，parse_batch() 整批套用。
+"""
+from __future__ import annotations
+import re
+from datetime import date as _date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional
+
+_INVOICE = re.compile(r"(?<![A-Z])([A-Z]{2})\s*-?\s*(\d{8})(?!\d)")
+
+_DATE_AD = re.compile(r"(?<!\d)(20\d{2})\s*[./\-年]\s*(\d{1,2})\s*[./\-月]\s*(\d{1,2})(?!\d)(?!\s*月)")
+_DATE_ROC = re.compile(r"(?:民國\s*)?(?<!\d)(1[0-4]\d)\s*[./\-年]\s*(\d{1,2})\s*[./\-月]\s*(\d{1,2})(?!\d)(?!\s*月)")
+_DATE_US = re.compile(r"(?<!\d)(\d{1,2})/(\d{1,2})/(20\d{2})(?!\d)")
+
+_AMOUNT = r"([0-9][0-9,]*(?:\.\d{1,2})?)"
+_CUR = r"(NT\$|US\$|\$|¥|￥|€|TWD|JPY|USD|EUR)?"
+_TOTAL = re.compile(
+    r"(?:總\s*計|合\s*計|總\s*額|總金額|應付金額|實付|お会計|ご請求額|(?<![A-Za-z])(?:GRAND\s+)?TOTAL|(?<![A-Za-z])Total|AMOUNT\s+DUE)"
+    r"\s*[:：]?\s*" + _CUR + r"\s*" + _AMOUNT + r"\s*(元|円)?",
+)
+_MONEY = re.compile(r"(NT\$|US\$|\$|¥|￥|€)\s*" + _AMOUNT + r"|" + _AMOUNT + r"\s*(元|円)")
+
+_CURRENCY = {
+    "NT$": "TWD", "TWD": "TWD", "元": "TWD",
+    "¥": "JPY", "￥": "JPY", "JPY": "JPY", "円": "JPY",
+    "US$": "USD", "USD": "USD", "€": "EUR", "EUR": "EUR",
+}
+
+_NOT_MERCHANT = re.compile(
+    r"電子發票|證明聯|收據|發票|領収|レシート|receipt|invoice|隨機碼|賣方|買方|總計|合計|TOTAL|\d{4}|^\W*$",
+    re.IGNORECASE,
+)
+
+
+def _amount(s: str) -> Optional[Decimal]:
+    try:
+        return Decimal(s.replace(",", ""))
+    except InvalidOperation:
+        return None
+
+
+def _iso(y: int, m: int, d: int) -> Optional[str]:
+    try:
+        return _date(y, m, d).isoformat()
+    except ValueError:
+        return None
+
+
+def _find_date(text: str) -> Optional[str]:
+    for m in _DATE_AD.finditer(text):
+        found = _iso(int(m[1]), int(m[2]), int(m[3]))
+        if found:
+            return found
+    for m in _DATE_ROC.finditer(text):
+        found = _iso(int(m[1]) + 1911, int(m[2]), int(m[3]))
+        if found:
+            return found
+    for m in _DATE_US.finditer(text):
+        found = _iso(int(m[3]), int(m[1]), int(m[2]))
+        if found:
+            return found
+    return None
+
+
+def _find_total(text: str) -> tuple[Optional[Decimal], Optional[str]]:
+    # 同一張收據可能印好幾次「合計」（例如稅前 / 稅後），取最後一個
+    hits = list(_TOTAL.finditer(text))
+    if hits:
+        m = hits[-1]
+        return _amount(m[2]), _CURRENCY.get(m[1] or m[3] or "")
+    best: tuple[Optional[Decimal], Optional[str]] = (None, None)
+    for m in _MONEY.finditer(text):
+        value = _amount(m[2] or m[3])
+        if value is not None and (best[0] is None or value > best[0]):
+            best = (value, _CURRENCY.get(m[1] or m[4] or ""))
+    return best
+
+
+def _find_merchant(lines: List[str]) -> Optional[str]:
+    for line in lines[:8]:
+        s = line.strip()
+        if len(s) >= 2 and not _NOT_MERCHANT.search(s):
+            return s
+    return None
+
+
+def parse_receipt(text: str) -> Dict[str, Any]:
+    total, currency = _find_total(text)
+    inv = _INVOICE.search(text)
+    return {
+        "total": total,
+        "currency": currency,
+        "date": _find_date(text),
+        "merchant": _find_merchant(text.splitlines()),
+        "invoice_no": f"{inv[1]}{inv[2]}" if inv else None,
+    }
+
+
+def parse_batch(texts: Iterable[str]) -> List[Dict[str, Any]]:
+    return [parse_receipt(t or "") for t in texts]
@@ -0,0 +1,228 @@
+# domain/ocr/pipeline.py
+"""
+收據 OCR 管線：
+
+  圖片（或資料夾）→ 收進 blob store（sha256 即快取鍵）→ 查 OcrResult 快取
+  → 沒命中的丟進 process pool 辨識（在途數有上限，記憶體固定）
+  → 每 batch_size 張：整批解析欄位（fields.parse_batch）、寫回快取並補上同一張圖的 Attachment.ocr_text
+
+scan() 在呼叫端執行緒上跑完並回傳結果（工具 / 測試，呼叫端即 DB 連線擁有者）；
+start() 在背景執行緒跑同一套流程，DB 存取排進 data.executor，進度與完成回呼經 Clock 回到 UI，
+掃描數百張收據時 UI 與其他查詢都不會被卡住。進度同時以 EV_OCR_PROGRESS 發布。
+
+每張圖的結果：{"path", "key", "text", "cached", "error", "total", "currency", "date", "merchant", "invoice_no"}。
+"""
+from __future__ import annotations
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.eventbus import EventBus, EV_OCR_PROGRESS
+from core.utils import now_iso
+from core.workers import InProcessExecutor, default_workers
+from data.blobs import BlobStore
+from data.conn import ConnectionManager, get_manager
+from data.dao import AttachmentDao
+from data.executor import clock_dispatch, get_executor
+from .backends import recognize, resolve
+from .fields import parse_batch
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+OCR_BATCH = 16
+
+Result = Dict[str, Any]
+DbCall = Callable[..., Any]
+
+
+def _inline(fn: Callable[..., Any], *args: Any) -> Any:
+    return fn(*args)
+
+
+def _images(paths: Iterable[Path | str]) -> Iterator[Path]:
+    """展開資料夾（含子資料夾，依路徑排序）；單檔不看副檔名。"""
+    for p in map(Path, paths):
+        if p.is_dir():
+            yield from sorted(f for f in p.rglob("*") if f.suffix.lower() in IMAGE_SUFFIXES and f.is_file())
+        else:
+            yield p
+
+
+class OcrPipeline:
+    def __init__(
+        self,
+        bus: EventBus,
+        manager: Optional[ConnectionManager] = None,
+        store: Optional[BlobStore] = None,
+        backend: Optional[str] = "auto",
+        workers: Optional[int] = None,
+        batch_size: int = OCR_BATCH,
+    ) -> None:
+        self.bus = bus
+        self._manager = manager
+        self.store = store or BlobStore()
+        self.backend = resolve(backend)
+        self.workers = default_workers() if workers is None else int(workers)
+        self.batch_size = batch_size
+
+    @property
+    def cm(self) -> ConnectionManager:
+        # 未指定時在執行當下取：start() 的 DB 工作在 DB 執行緒上，取到的是該執行緒擁有的 manager
+        return self._manager or get_manager()
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+
+    # ───── 對外 API ─────
+    def scan(
+        self,
+        paths: Iterable[Path | str],
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        db: DbCall = _inline,
+    ) -> List[Result]:
+        """辨識 paths（檔案或資料夾）中的所有圖片；結果順序同輸入。db 決定 DB 工作在哪個執行緒上跑。"""
+        if self.backend is None:
+            raise RuntimeError("no OCR backend available")
+        images = list(_images(paths))
+        progress = {"total": len(images), "done": 0, "cached": 0, "failed": 0}
+        results: List[Result] = []
+        pool: Executor = ProcessPoolExecutor(self.workers) if self.workers > 0 else InProcessExecutor()
+        try:
+            pending: List[Result] = []
+            for item in self._ordered(pool, images, cancel, db):
+                pending.append(item)
+                if len(pending) >= self.batch_size:
+                    self._flush(pending, progress, on_progress, db)
+                    results.extend(pending)
+                    pending = []
+            if pending:
+                self._flush(pending, progress, on_progress, db)
+                results.extend(pending)
+        finally:
+            pool.shutdown(cancel_futures=True)
+        return results
+
+    def start(
+        self,
+        paths: Iterable[Path | str],
+        on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+        on_done: Optional[Callable[[List[Result]], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+    ) -> threading.Event:
+        """背景掃描；回傳的 Event set() 即取消（已辨識完的仍會寫進快取）。回呼在 UI 執行緒執行。"""
+        cancel = threading.Event()
+        paths = list(paths)
+
+        def db(fn: Callable[..., Any], *args: Any) -> Any:
+            return get_executor().submit(fn, *args).result()
+
+        def progress(p: Dict[str, int]) -> None:
+            if on_progress is not None:
+                clock_dispatch(lambda p=dict(p): on_progress(p))
+
+        def run() -> None:
+            try:
+                results = self.scan(paths, progress, cancel, db)
+            except BaseException as e:
+                if on_error is not None:
+                    clock_dispatch(lambda: on_error(e))
+                return
+            if on_done is not None:
+                clock_dispatch(lambda: on_done(results))
+
+        threading.Thread(target=run, name="ocr-scan", daemon=True).start()
+        return cancel
+
+    # ───── 管線各段 ─────
+    def _ordered(
+        self,
+        pool: Executor,
+        images: List[Path],
+        cancel: Optional[threading.Event],
+        db: DbCall,
+    ) -> Iterator[Result]:
+        """依輸入順序產出辨識完的項目；快取命中的不進 pool，同一次掃描內重複的圖只辨識一次。"""
+        window: Deque[Tuple[Result, Optional[Future]]] = deque()
+        limit = max(1, self.workers) * 2
+        inflight: Dict[str, Future] = {}
+        for start in range(0, len(images), self.batch_size):
+            if cancel is not None and cancel.is_set():
+                break
+            chunk = images[start:start + self.batch_size]
+            items = [self._stash(p) for p in chunk]
+            cached = db(self._lookup, [it["key"][:64] for it in items if it["key"]])
+            for it in items:
+                fut = None
+                if it["key"] and it["key"][:64] in cached:
+                    it.update(text=cached[it["key"][:64]], cached=True)
+                elif it["key"]:
+                    fut = inflight.get(it["key"])
+                    if fut is None:
+                        fut = inflight[it["key"]] = pool.submit(recognize, self.backend, it["path"])
+                window.append((it, fut))
+                while len(window) > limit or (window and window[0][1] is None):
+                    yield self._finish(*window.popleft())
+        while window:
+            yield self._finish(*window.popleft())
+
+    def _stash(self, path: Path) -> Result:
+        item: Result = {"path": str(path), "key": None, "text": "", "cached": False, "error": None}
+        try:
+            item["key"] = self.store.put_file(path)
+        except OSError as e:
+            item["error"] = str(e)
+        return item
+
+    @staticmethod
+    def _finish(item: Result, fut: Optional[Future]) -> Result:
+        if fut is not None:
+            try:
+                item["text"] = fut.result()
+            except Exception as e:  # 引擎對個別圖片失敗：記下來，繼續下一張
+                item["error"] = f"{type(e).__name__}: {e}"
+        return item
+
+    def _flush(
+        self,
+        items: List[Result],
+        progress: Dict[str, int],
+        on_progress: Optional[Callable[[Dict[str, int]], None]],
+        db: DbCall,
+    ) -> None:
+        for item, fields in zip(items, parse_batch(it["text"] for it in items)):
+            item.update(fields)
+        fresh = [(it["key"], it["text"]) for it in items if it["key"] and not it["cached"] and not it["error"]]
+        if fresh:
+            db(self._save, fresh)
+        progress["done"] += len(items)
+        progress["cached"] += sum(1 for it in items if it["cached"])
+        progress["failed"] += sum(1 for it in items if it["error"])
+        self.bus.publish(EV_OCR_PROGRESS, dict(progress))
+        if on_progress is not None:
+            on_progress(progress)
+
+    # ───── DB（在 db() 指定的執行緒上執行） ─────
+    def _lookup(self, hashes: List[str]) -> Dict[str, str]:
+        if not hashes:
+            return {}
+        with self.cm.reader() as conn:
+            cur = conn.execute(
+                f"SELECT hash, text FROM OcrResult WHERE backend = ? AND hash IN ({','.join('?' * len(hashes))})",
+                [self.backend, *hashes],
+            )
+            return {r[0]: r[1] for r in cur.fetchall()}
+
+    def _save(self, rows: List[Tuple[str, str]]) -> None:
+        now = now_iso()
+        conn = self.cm.writer()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO OcrResult(hash, backend, text, created_at) VALUES(?,?,?,?)",
+                [(key[:64], self.backend, text, now) for key, text in rows],
+            )
+            for key, text in rows:
+                if text.strip():
+                    AttachmentDao.set_ocr_in(conn, key, text)
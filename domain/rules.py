@@ -0,0 +1,238 @@
+# domain/rules.py
+"""
+自動分類規則引擎。
+
+使用者的規則（CategoryRule，見 m0016）編譯成 RuleEngine：
+  - 所有關鍵字建成兩個 Aho-Corasick 自動機（merchant 用、note 用；field='any' 的兩邊都放），
+    一筆交易的文字只掃一次就得到「關鍵字成立的規則」集合，不隨規則數變慢
+  - 再依優先序檢查金額區間 / 幣別 / 帳戶 / 類型，第一條成立的規則決定類別
+  - 同樣的店名 / 備註只掃一次：merchant 與 note 各有一個有上限的 memo（組合數遠多於各自的種類）
+比對前文字做 NFKC + casefold（全形 / 半形、大小寫不分）。
+
+get_rule_engine() 以 Settings 的 category_rules:version（規則增刪改時由觸發器加一）驗證快取，
+規則沒變就一直用同一個引擎。reapply() 把規則重新套到歷史交易上。
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+import unicodedata
+from collections import deque
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from data.conn import ConnectionManager, get_manager
+from data.dao import BULK_CHUNK_SIZE, RuleDao, TxDao
+
+# memo 超過這麼多種文字就清掉重來（匯入時店名 / 備註的種類通常遠少於此）
+MEMO_SIZE = 200_000
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+def _fold(text: Optional[str]) -> str:
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick：patterns 為 (關鍵字, 代號)，find(text) 回傳出現過的關鍵字的代號集合。"""
+    def __init__(self, patterns: Iterable[Tuple[str, int]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        out: List[set] = [set()]
+        for word, tag in patterns:
+            s = 0
+            for ch in word:
+                nxt = self._goto[s].get(ch)
+                if nxt is None:
+                    nxt = self._goto[s][ch] = len(self._goto)
+                    self._goto.append({})
+                    out.append(set())
+                s = nxt
+            out[s].add(tag)
+        # BFS 建 fail 連結；輸出集合併上 fail 狀態的（短的關鍵字是長的後綴時也要算）
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, nxt in self._goto[s].items():
+                f = self._fail[s]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                out[nxt] |= out[self._fail[nxt]]
+                queue.append(nxt)
+        self._out: List[FrozenSet[int]] = [frozenset(o) for o in out]
+        self.empty = len(self._goto) == 1
+
+    def find(self, text: str) -> FrozenSet[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        s = 0
+        found: Optional[set] = None
+        for ch in text:
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            if out[s]:
+                if found is None:
+                    found = set(out[s])
+                else:
+                    found |= out[s]
+        return frozenset(found) if found else _EMPTY
+
+
+# 編譯後的一條規則：(category_id, min_amount, max_amount, currency, account_id, tx_type, 有關鍵字)
+_Rule = Tuple[int, Optional[int], Optional[int], Optional[str], Optional[int], Optional[str], bool]
+
+
+class RuleEngine:
+    def __init__(self, rules: Iterable[Dict[str, Any]]) -> None:
+        """rules 為 RuleDao.all() 的列；停用的略過，依 (priority DESC, id) 排序。"""
+        rows = sorted((r for r in rules if r.get("enabled", 1)), key=lambda r: (-(r.get("priority") or 0), r["id"]))
+        self.rules: List[_Rule] = []
+        merchant: List[Tuple[str, int]] = []
+        note: List[Tuple[str, int]] = []
+        for i, r in enumerate(rows):
+            words = [w for w in (_fold(k).strip() for k in (r.get("keywords") or "").split("|")) if w]
+            field = r.get("field") or "any"
+            if field in ("merchant", "any"):
+                merchant += [(w, i) for w in words]
+            if field in ("note", "any"):
+                note += [(w, i) for w in words]
+            self.rules.append((r["category_id"], r.get("min_amount"), r.get("max_amount"), r.get("currency"),
+                               r.get("account_id"), r.get("tx_type"), bool(words)))
+        self._merchant = KeywordAutomaton(merchant)
+        self._note = KeywordAutomaton(note)
+        self._plain = frozenset(i for i, rule in enumerate(self.rules) if not rule[6])
+        self._memo_merchant: Dict[str, FrozenSet[int]] = {}
+        self._memo_note: Dict[str, FrozenSet[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @staticmethod
+    def _scan(automaton: KeywordAutomaton, memo: Dict[str, FrozenSet[int]], text: Optional[str]) -> FrozenSet[int]:
+        if not text or automaton.empty:
+            return _EMPTY
+        hit = memo.get(text)
+        if hit is None:
+            if len(memo) >= MEMO_SIZE:
+                memo.clear()
+            hit = memo[text] = automaton.find(_fold(text))
+        return hit
+
+    def _candidates(self, merchant: Optional[str], note: Optional[str]) -> Iterable[int]:
+        found = self._scan(self._merchant, self._memo_merchant, merchant)
+        other = self._scan(self._note, self._memo_note, note)
+        if other:
+            found = found | other
+        if self._plain:
+            found = found | self._plain
+        # 大多數交易沒有任何關鍵字成立，不必排序
+        return sorted(found) if len(found) > 1 else found
+
+    def categorize(
+        self,
+        merchant: Optional[str] = None,
+        note: Optional[str] = None,
+        amount: Optional[int] = None,
+        currency: Optional[str] = None,
+        account_id: Optional[int] = None,
+        tx_type: Optional[str] = None,
+    ) -> Optional[int]:
+        """第一條成立的規則的 category_id；都不成立為 None。amount 為最小單位。"""
+        rules = self.rules
+        for i in self._candidates(merchant, note):
+            cat, lo, hi, cur, acc, typ, _kw = rules[i]
+            if ((cur is None or cur == currency)
+                    and (lo is None or (amount is not None and amount >= lo))
+                    and (hi is None or (amount is not None and amount <= hi))
+                    and (acc is None or acc == account_id)
+                    and (typ is None or typ == tx_type)):
+                return cat
+        return None
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        匯入用：category_id 為 None 的列就地補上類別（key 同 TxDao.insert_many 的列）。
+        逐列串流，可直接接在 insert_many 前面。
+        """
+        if not self.rules:
+            yield from rows
+            return
+        categorize = self.categorize
+        for r in rows:
+            if r.get("category_id") is None:
+                r["category_id"] = categorize(r.get("merchant"), r.get("note"), r.get("amount"),
+                                              r.get("currency"), r.get("account_id"), r.get("tx_type"))
+            yield r
+
+
+_cache: Dict[str, Tuple[int, RuleEngine]] = {}
+_lock = threading.Lock()
+
+
+def get_rule_engine(manager: Optional[ConnectionManager] = None) -> RuleEngine:
+    """目前 DB 的規則引擎；規則有變動時在呼叫端（DB 執行緒）重新編譯。"""
+    cm = manager or get_manager()
+    key = str(cm.path)
+    with cm.reader() as conn:
+        version = RuleDao.version_in(conn)
+        with _lock:
+            cached = _cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        engine = RuleEngine(RuleDao.all_in(conn, enabled_only=True))
+    with _lock:
+        _cache[key] = (version, engine)
+    return engine
+
+
+def _chunk_in(conn: sqlite3.Connection, after: int, only_uncategorized: bool, book_id: Optional[int],
+              size: int) -> List[sqlite3.Row]:
+    where = ["id > ?"]
+    if only_uncategorized:
+        where.append("category_id IS NULL")
+    if book_id is not None:
+        where.append(f"book_id = {int(book_id)}")
+    return conn.execute(
+        f"""
+        SELECT id, merchant, note, amount, currency, account_id, type, category_id FROM [Transaction]
+        WHERE {" AND ".join(where)} ORDER BY id LIMIT {int(size)}
+        """,
+        (after,),
+    ).fetchall()
+
+
+def reapply(
+    txdao: TxDao,
+    only_uncategorized: bool = True,
+    book_id: Optional[int] = None,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    on_chunk: Optional[Callable[[Dict[str, int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    把目前的規則套到歷史交易：only_uncategorized 時只補沒有類別的，否則規則成立的一律改成規則的類別
+    （規則都不成立的交易保持原樣）。每 chunk_size 筆讀一次、寫一次（TxDao.set_categories）。
+    回傳 {"scanned", "matched", "updated"}。
+    """
+    engine = get_rule_engine(txdao.cm)
+    stats = {"scanned": 0, "matched": 0, "updated": 0}
+    if not len(engine):
+        return stats
+    categorize = engine.categorize
+    after = 0
+    while True:
+        with txdao.cm.reader() as conn:
+            rows = _chunk_in(conn, after, only_uncategorized, book_id, chunk_size)
+        if not rows:
+            return stats
+        after = rows[-1][0]
+        pairs = []
+        for tx_id, merchant, note, amount, currency, account_id, tx_type, old in rows:
+            cat = categorize(merchant, note, amount, currency, account_id, tx_type)
+            if cat is not None:
+                stats["matched"] += 1
+                if cat != old:
+                    pairs.append((tx_id, cat))
+        stats["scanned"] += len(rows)
+        stats["updated"] += txdao.set_categories(pairs)
+        if on_chunk is not None:
+            on_chunk(dict(stats))
@@ -0,0 +1,215 @@
+# domain/suggest.py
+"""
+類別建議：從歷史交易學「特徵 → 類別」的次數，新交易時以 naive Bayes 排出最可能的類別。
+
+特徵（features()）：
+  t:<收支>          expense / income / transfer
+  m:<店家>          data.items.item_key 正規化（全形 / 大小寫 / 空白不分）
+  a:<幣別>:<級距>   主單位金額取 log2 的半級距（100 與 140 同級，100 與 200 差兩級）
+  w:<星期> h:<時>   本地時間；只有日期沒有時間的交易不記 h
+計數存在 CategoryStat（m0017），啟動後載入記憶體；預測只在記憶體裡算（類別數 × 特徵數次 dict 查詢）。
+
+學習是增量的：Settings 的 category_model:last_id 記已學到的交易 id，learn() 只讀 id 更大的交易
+（EV_TX_CREATED 之後一般只有一筆），CategoryStat 與進度在同一個 transaction 寫入，commit 後才動記憶體。
+只學新增當下的類別；之後改類別或刪除不回頭修正（舊的次數會被新資料稀釋）。
+"""
+from __future__ import annotations
+import math
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.money import decimals_of
+from core.utils import now_iso
+from data.conn import ConnectionManager, get_manager
+from data.dao import BULK_CHUNK_SIZE, SettingsDao
+from data.items import item_key
+
+LAST_ID_KEY = "category_model:last_id"
+
+# Laplace 平滑
+ALPHA = 1.0
+
+_ROWS_SQL = """
+SELECT id, type, merchant, amount, currency, date, category_id FROM [Transaction]
+WHERE id > ? ORDER BY id LIMIT ?
+"""
+
+_UPSERT_SQL = """
+INSERT INTO CategoryStat(feature, category_id, cnt) VALUES(?, ?, ?)
+ON CONFLICT(feature, category_id) DO UPDATE SET cnt = cnt + excluded.cnt
+"""
+
+
+def amount_bucket(amount: int, currency: str) -> int:
+    """最小單位金額 → 級距；不到 1 個主單位的都是 -1。"""
+    major = abs(amount) / 10 ** decimals_of(currency)
+    return int(math.log2(major) * 2) if major >= 1 else -1
+
+
+def _weekday_hour(date: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """[Transaction].date → 本地 (星期, 時)；只有日期時「時」為 None，無法解析時都是 None。"""
+    if not date:
+        return None, None
+    try:
+        dt = datetime.fromisoformat(date)
+    except ValueError:
+        return None, None
+    if len(date) <= 10:
+        return dt.weekday(), None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # now_iso() 存的是 UTC
+    dt = dt.astimezone()
+    return dt.weekday(), dt.hour
+
+
+# 補學歷史時同一家店 / 金額 / 時間大量重複，各部分的特徵分開快取
+@lru_cache(maxsize=65536)
+def _merchant_features(merchant: Optional[str]) -> Tuple[str, ...]:
+    key = item_key(merchant)
+    return (f"m:{key}",) if key else ()
+
+
+@lru_cache(maxsize=65536)
+def _amount_features(amount: Optional[int], currency: Optional[str]) -> Tuple[str, ...]:
+    return (f"a:{currency}:{amount_bucket(amount, currency)}",) if amount and currency else ()
+
+
+@lru_cache(maxsize=65536)
+def _time_features(date: Optional[str]) -> Tuple[str, ...]:
+    weekday, hour = _weekday_hour(date)
+    if weekday is None:
+        return ()
+    return (f"w:{weekday}",) if hour is None else (f"w:{weekday}", f"h:{hour}")
+
+
+def features(
+    tx_type: Optional[str],
+    merchant: Optional[str] = None,
+    amount: Optional[int] = None,
+    currency: Optional[str] = None,
+    date: Optional[str] = None,
+) -> Tuple[str, ...]:
+    # 沒帶時區的 'YYYY-MM-DDTHH:MM:SS' 只取到分鐘當快取鍵（時區位移都是整分鐘，秒數不影響本地的星期 / 時）
+    if date and len(date) <= 19:
+        date = date[:16]
+    return ((f"t:{tx_type}",) if tx_type else ()) + _merchant_features(merchant) \
+        + _amount_features(amount, currency) + _time_features(date)
+
+
+class CategoryModel:
+    """
+    counts[特徵][類別] 與 totals[類別]（特徵 '' 的次數）；kinds[特徵種類] 為該種類出現過幾種值，
+    當平滑的分母（店家有上千種、星期只有 7 種）。
+    """
+    def __init__(self) -> None:
+        self.counts: Dict[str, Dict[int, int]] = {}
+        self.totals: Dict[int, int] = {}
+        self.kinds: Dict[str, int] = {}
+        self.last_id = 0
+
+    def add(self, feature: str, category_id: int, n: int = 1) -> None:
+        if not feature:
+            self.totals[category_id] = self.totals.get(category_id, 0) + n
+            return
+        row = self.counts.get(feature)
+        if row is None:
+            row = self.counts[feature] = {}
+            kind = feature.split(":", 1)[0]
+            self.kinds[kind] = self.kinds.get(kind, 0) + 1
+        row[category_id] = row.get(category_id, 0) + n
+
+    def predict(self, feats: Iterable[str], limit: int = 3) -> List[Tuple[int, float]]:
+        """[(類別, 機率)]，機率高的在前；沒看過的特徵值不影響排序。"""
+        if not self.totals:
+            return []
+        seen = [(self.counts[f], self.kinds[f.split(":", 1)[0]]) for f in feats if f in self.counts]
+        log, total = math.log, sum(self.totals.values())
+        scored = []
+        for cat, n in self.totals.items():
+            score = log(n / total)
+            for row, values in seen:
+                score += log((row.get(cat, 0) + ALPHA) / (n + ALPHA * values))
+            scored.append((score, cat))
+        scored.sort(reverse=True)
+        top = scored[0][0]
+        weights = [math.exp(s - top) for s, _c in scored]
+        z = sum(weights)
+        return [(cat, w / z) for (_s, cat), w in zip(scored[:limit], weights)]
+
+
+def _load_in(conn: sqlite3.Connection) -> CategoryModel:
+    model = CategoryModel()
+    for feature, cat, cnt in conn.execute("SELECT feature, category_id, cnt FROM CategoryStat"):
+        model.add(feature, cat, cnt)
+    model.last_id = _last_id_in(conn)
+    return model
+
+
+def _last_id_in(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT value FROM Settings WHERE key = ?", (LAST_ID_KEY,)).fetchone()
+    return int(row[0]) if row else 0
+
+
+class CategorySuggester:
+    def __init__(self, manager: Optional[ConnectionManager] = None) -> None:
+        self.cm = manager or get_manager()
+        self.model = CategoryModel()
+        self._ready = False
+
+    def learn(self, chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """把 last_id 之後的交易學進模型（第一次呼叫時補學整個歷史）；回傳學了幾筆有類別的交易。"""
+        learned = 0
+        conn = self.cm.writer()
+        while True:
+            with conn:
+                # 進度與記憶體不同：第一次載入，或其他程序也在學 → 以 DB 為準重新載入
+                if _last_id_in(conn) != self.model.last_id or not self._ready:
+                    self.model = _load_in(conn)
+                    self._ready = True
+                rows = conn.execute(_ROWS_SQL, (self.model.last_id, chunk_size)).fetchall()
+                if not rows:
+                    return learned
+                delta: Dict[Tuple[str, int], int] = {}
+                for _id, tx_type, merchant, amount, currency, date, cat in rows:
+                    if cat is None:
+                        continue
+                    learned += 1
+                    for f in ("", *features(tx_type, merchant, amount, currency, date)):
+                        delta[(f, cat)] = delta.get((f, cat), 0) + 1
+                conn.executemany(_UPSERT_SQL, [(f, cat, n) for (f, cat), n in delta.items()])
+                SettingsDao.put(conn, LAST_ID_KEY, str(rows[-1][0]))
+            for (f, cat), n in delta.items():
+                self.model.add(f, cat, n)
+            self.model.last_id = rows[-1][0]
+
+    def suggest(
+        self,
+        tx_type: Optional[str] = "expense",
+        merchant: Optional[str] = None,
+        amount: Optional[int] = None,
+        currency: Optional[str] = None,
+        date: Optional[str] = None,
+        limit: int = 3,
+    ) -> List[Tuple[int, float]]:
+        """新交易的 [(類別, 機率)]；date 預設為現在。amount 為最小單位。"""
+        if not self._ready:
+            self.learn()
+        return self.model.predict(features(tx_type, merchant, amount, currency, date or now_iso()), limit)
+
+
+_cache: Dict[str, CategorySuggester] = {}
+_lock = threading.Lock()
+
+
+def get_suggester(manager: Optional[ConnectionManager] = None) -> CategorySuggester:
+    """目前 DB 的 CategorySuggester（每個 DB 檔一份，要在 DB 執行緒上用）。"""
+    cm = manager or get_manager()
+    key = str(cm.path)
+    with _lock:
+        suggester = _cache.get(key)
+        if suggester is None:
+            suggester = _cache[key] = CategorySuggester(cm)
+    return suggester
@@ -0,0 +1,8 @@
+"""多裝置差異同步（ChangeLog + 每個 peer 的 high-water mark，HLC 逐欄合併）。"""
+from __future__ import annotations
+
+from .codec import PROTOCOL_VERSION, SYNC_BATCH, SyncError, decode, encode  # noqa: F401
+from .engine import SyncEngine, Transport  # noqa: F401
+from .merge import merge  # noqa: F401
+from .server import LocalTransport, SyncHub  # noqa: F401
+from .transport import HttpTransport  # noqa: F401
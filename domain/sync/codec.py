@@ -0,0 +1,51 @@
+# domain/sync/codec.py
+"""
+同步協定的訊息格式：JSON → zlib。
+
+一筆 change：
+    {"uid": ..., "op": "U" | "D", "at": HLC, "device": 裝置, "row": {...}, "clocks": {...}}
+row 只在 op = 'U' 時出現，欄位見 ROW_FIELDS；category 以 [類別, 子類別] 名稱傳遞
+（各裝置的 Category.id 不同），帳本 / 帳戶 / 成員沿用 id（同一套 seed）；
+tags 為標籤名稱，attachments 為 [檔名, OCR 文字]（檔案本身不在同步訊息內）。
+(at, device) 為整列最新的版本；clocks 為逐欄版本，格式同 [Transaction].clocks
+（見 data.changelog），所有欄位同版本時省略。合併規則見 merge.py。
+"""
+from __future__ import annotations
+import json
+import zlib
+from typing import Any, Dict, Tuple
+
+from data.merkle import CONTENT_FIELDS
+
+PROTOCOL_VERSION = 2
+
+# 每個 push / pull 請求最多帶幾筆 change
+SYNC_BATCH = 500
+
+# 與 Merkle 列雜湊的內容欄位相同，兩邊才算得出同一棵樹
+ROW_FIELDS = CONTENT_FIELDS
+
+Change = Dict[str, Any]
+
+
+class SyncError(RuntimeError):
+    """對方回應格式錯誤或協定版本不符。"""
+
+
+def encode(msg: Dict[str, Any]) -> bytes:
+    raw = json.dumps(dict(msg, v=PROTOCOL_VERSION), ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(raw.encode("utf-8"), 6)
+
+
+def decode(data: bytes) -> Dict[str, Any]:
+    try:
+        msg = json.loads(zlib.decompress(data).decode("utf-8"))
+    except (zlib.error, ValueError) as e:
+        raise SyncError(f"malformed sync message: {e}") from e
+    if not isinstance(msg, dict) or msg.get("v") != PROTOCOL_VERSION:
+        raise SyncError(f"unsupported sync protocol: {msg.get('v') if isinstance(msg, dict) else msg!r}")
+    return msg
+
+
+def version(change: Change) -> Tuple[int, str]:
+    return change["at"], change["device"]
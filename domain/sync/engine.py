@@ -0,0 +1,330 @@
+# domain/sync/engine.py
+"""
+差異同步：只傳 ChangeLog 裡 seq 超過對方 high-water mark 的列。
+
+    engine = SyncEngine(transport, peer="server")
+    stats = engine.sync()        # 先 push 本機變更，再 pull 其他裝置的變更
+
+- push：本機裝置產生的 change（ChangeLog.device_id = 本機），每 SYNC_BATCH 筆一個請求；
+  對方確認後才把 Settings 的 sync:<peer>:pushed 推進。
+- pull：以 sync:<peer>:pulled 為游標分批取回；每批在同一個 transaction 內套用並記下新游標，
+  中斷後重跑不會漏也不會重套。
+- 衝突：逐欄以 HLC 版本合併（merge.py），兩台同時改不同欄位時兩邊的修改都會留下；
+  刪除留 tombstone 且為終局，之後收到的修改不會讓它復活。
+- reconcile()：以 Merkle tree（data.merkle）找出與 peer 內容不同的月份，只重傳那些月份，
+  用來修補游標以外的分歧（例如還原了舊備份、或對方遺失資料）。
+
+要在 DB 執行緒上呼叫（會用 writer 連線）。
+"""
+from __future__ import annotations
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from core.eventbus import EventBus, EV_SYNC_APPLIED
+from data.conn import ConnectionManager, get_manager
+from data.dao import CategoryDao, SettingsDao, TxDao
+from data.hlc import observe, to_iso
+from data.merkle import add_children, content_rows, diff_months, load_tree, month_range, refresh_leaves
+from .codec import ROW_FIELDS, SYNC_BATCH, Change, decode, encode
+from .merge import merge, normalize
+
+_ROW_COLS = """
+       t.id, t.uid, t.book_id, t.account_id, t.type, t.amount, t.currency, t.category_id,
+       t.member_id, t.merchant, t.note, t.date, t.hlc, t.device_id, t.clocks"""
+
+_OUTGOING_SQL = f"""
+SELECT l.seq, l.uid AS log_uid, l.op, l.device_id AS log_device, l.at,{_ROW_COLS}
+FROM ChangeLog l
+LEFT JOIN [Transaction] t ON t.uid = l.uid
+WHERE l.device_id = ? AND l.seq > ?
+ORDER BY l.seq
+LIMIT ?
+"""
+
+_MONTH_SQL = f"""
+SELECT{_ROW_COLS}
+FROM [Transaction] t
+WHERE t.book_id = ? AND t.date >= ? AND t.date < ?
+"""
+
+_INSERT_SQL = """
+INSERT INTO [Transaction](
+    book_id, account_id, type, amount, currency, category_id, member_id,
+    merchant, note, date, updated_at, device_id, hlc, clocks, uid
+)
+VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+_UPDATE_SQL = """
+UPDATE [Transaction]
+SET book_id = ?, account_id = ?, type = ?, amount = ?, currency = ?, category_id = ?, member_id = ?,
+    merchant = ?, note = ?, date = ?, updated_at = ?, device_id = ?, hlc = ?, clocks = ?
+WHERE id = ?
+"""
+
+_VERSION_SQL = "UPDATE [Transaction] SET updated_at = ?, device_id = ?, hlc = ?, clocks = ? WHERE id = ?"
+
+
+# ROW_FIELDS 中直接對應 [Transaction] 欄位的部分（tags / attachments 另存）
+_TX_FIELDS = ROW_FIELDS[:ROW_FIELDS.index("tags")]
+
+
+class Transport(Protocol):
+    def request(self, kind: str, body: bytes) -> bytes: ...
+
+
+class _PeerTree:
+    """把 peer 的 Merkle 節點查詢包成 data.merkle.Replica。"""
+    def __init__(self, engine: "SyncEngine") -> None:
+        self.engine = engine
+
+    def node_hashes(self, book_id: int, level: int, indexes: Sequence[int]) -> List[Optional[str]]:
+        resp = self.engine._request("tree", {"book": book_id, "level": level, "index": list(indexes)})
+        return resp["hashes"]
+
+
+class _Categories:
+    """[類別, 子類別] 名稱 ↔ 本機 Category.id；缺的在目前的 transaction 內建立。"""
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+        self._ids = {(r[1], r[2]): r[0] for r in conn.execute("SELECT id, parent_id, name FROM Category")}
+
+    def _get(self, name: str, parent_id: Optional[int]) -> int:
+        cid = self._ids.get((parent_id, name))
+        if cid is None:
+            cur = self.conn.execute("INSERT INTO Category(parent_id, name) VALUES(?,?)", (parent_id, name))
+            cid = self._ids[(parent_id, name)] = cur.lastrowid
+        return cid
+
+    def resolve(self, names: Optional[List[str]]) -> Optional[int]:
+        if not names or not names[0]:
+            return None
+        cid = self._get(names[0], None)
+        return self._get(names[1], cid) if len(names) > 1 and names[1] else cid
+
+
+class SyncEngine:
+    def __init__(
+        self,
+        transport: Transport,
+        peer: str = "server",
+        manager: Optional[ConnectionManager] = None,
+        batch: int = SYNC_BATCH,
+        bus: Optional[EventBus] = None,
+    ) -> None:
+        self.transport = transport
+        self.peer = peer
+        self.batch = batch
+        self.bus = bus
+        self._manager = manager
+        self.settings = SettingsDao(manager)
+        self.device = self.settings.device_id()
+
+    @property
+    def cm(self) -> ConnectionManager:
+        return self._manager or get_manager()
+
+    def _key(self, what: str) -> str:
+        return f"sync:{self.peer}:{what}"
+
+    def _request(self, kind: str, msg: Dict[str, Any]) -> Dict[str, Any]:
+        return decode(self.transport.request(kind, encode(dict(msg, device=self.device))))
+
+    def sync(self) -> Dict[str, int]:
+        pushed = self.push()
+        pulled, applied = self.pull()
+        stats = {"pushed": pushed, "pulled": pulled, "applied": applied}
+        if applied and self.bus is not None:
+            self.bus.publish(EV_SYNC_APPLIED, dict(stats, peer=self.peer))
+        return stats
+
+    # ───── push ─────
+    def push(self) -> int:
+        total = 0
+        after = int(self.settings.get(self._key("pushed")) or 0)
+        while True:
+            with self.cm.reader() as conn:
+                changes, last = self._outgoing(conn, after)
+            if last == after:
+                return total
+            if changes:
+                self._request("push", {"changes": changes})
+            self.settings.set(self._key("pushed"), str(last))
+            total += len(changes)
+            after = last
+
+    def _outgoing(self, conn: sqlite3.Connection, after: int) -> Tuple[List[Change], int]:
+        rows = conn.execute(_OUTGOING_SQL, (self.device, after, self.batch)).fetchall()
+        if not rows:
+            return [], after
+        current = _row_changes(conn, [r for r in rows if r["id"] is not None])
+        out: List[Change] = []
+        for r in rows:
+            if r["op"] == "D":
+                out.append({"uid": r["log_uid"], "op": "D", "at": r["at"], "device": r["log_device"]})
+            elif r["id"] is not None:
+                out.append(current[r["log_uid"]])
+            # 'U' 但列已不在：不應發生（刪除會把紀錄換成 'D'）
+        return out, rows[-1]["seq"]
+
+    # ───── pull ─────
+    def pull(self) -> Tuple[int, int]:
+        pulled = applied = 0
+        # 游標由伺服器決定格式（SyncHub 為 seq，多帳本伺服器為組合字串），原樣存回
+        since = self.settings.get(self._key("pulled")) or 0
+        while True:
+            resp = self._request("pull", {"since": since, "limit": self.batch})
+            changes, nxt = resp["changes"], resp["next"]
+            conn = self.cm.writer()
+            with conn:
+                conn.execute("BEGIN")
+                applied += self._apply(conn, changes)
+                SettingsDao.put(conn, self._key("pulled"), str(nxt))
+            pulled += len(changes)
+            since = nxt
+            if not resp.get("more"):
+                return pulled, applied
+
+    def _apply(self, conn: sqlite3.Connection, changes: List[Change], prefer_remote: bool = False) -> int:
+        """
+        套用一批遠端 change（呼叫端負責 transaction）；回傳實際改動的筆數。
+        逐欄合併（見 merge.py），批次內的順序不影響結果；本機時鐘推進到看過的最大版本。
+        """
+        if not changes:
+            return 0
+        cats = _Categories(conn)
+        local = self._local(conn, [ch["uid"] for ch in changes])
+        applied = 0
+        seen = 0
+        for ch in changes:
+            remote = normalize(ch)
+            seen = max(seen, remote["at"])
+            tx_id, mine = local.get(remote["uid"], (None, None))
+            merged = merge(mine, remote, prefer_remote)
+            if merged == mine:
+                continue
+            tx_id = self._write(conn, cats, tx_id, merged)
+            local[remote["uid"]] = (tx_id, merged)
+            if merged["op"] == "U":
+                # 合併結果若含有對方沒有的本機欄位，留給下次 push；否則記成來自 peer，不再推回去
+                conn.execute(
+                    "UPDATE ChangeLog SET device_id = ? WHERE uid = ?",
+                    (f"@{self.peer}" if merged == remote else self.device, remote["uid"]),
+                )
+            applied += 1
+        observe(conn, seen)
+        return applied
+
+    def _local(self, conn: sqlite3.Connection, uids: List[str]) -> Dict[str, Tuple[Optional[int], Change]]:
+        """uid → (本機 id, 目前版本)；已刪除的是 (None, tombstone)，本機沒有的不在結果內。"""
+        out: Dict[str, Tuple[Optional[int], Change]] = {}
+        for i in range(0, len(uids), 500):
+            chunk = uids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for uid, at, device in conn.execute(
+                f"SELECT uid, at, device_id FROM ChangeLog WHERE op = 'D' AND uid IN ({marks})", chunk
+            ):
+                out[uid] = (None, {"uid": uid, "op": "D", "at": at, "device": device})
+            rows = conn.execute(f"SELECT{_ROW_COLS} FROM [Transaction] t WHERE t.uid IN ({marks})", chunk).fetchall()
+            ids = {r["uid"]: r["id"] for r in rows}
+            out.update((uid, (ids[uid], ch)) for uid, ch in _row_changes(conn, rows).items())
+        return out
+
+    def _write(self, conn: sqlite3.Connection, cats: "_Categories", tx_id: Optional[int], merged: Change) -> Optional[int]:
+        """把合併結果寫回本機；回傳本機 id（刪除時為 None）。"""
+        uid = merged["uid"]
+        if merged["op"] == "D":
+            if tx_id is not None:
+                TxDao.delete_in(conn, tx_id)
+            # 刪除觸發器記的是本機、現在；改回 tombstone 原本的版本，避免被當成本機變更再推出去
+            conn.execute(
+                "INSERT OR REPLACE INTO ChangeLog(uid, op, device_id, at) VALUES(?, 'D', ?, ?)",
+                (uid, merged["device"], merged["at"]),
+            )
+            return None
+        row = merged["row"]
+        clocks = merged.get("clocks")
+        meta = [to_iso(merged["at"]), merged["device"], merged["at"], json.dumps(clocks, separators=(",", ":")) if clocks else None]
+        values = [cats.resolve(row[f]) if f == "category" else row[f] for f in _TX_FIELDS] + meta
+        if tx_id is not None:
+            conn.execute(_UPDATE_SQL, values + [tx_id])
+        else:
+            tx_id = conn.execute(_INSERT_SQL, values + [uid]).lastrowid
+        if self._set_children(conn, tx_id, row):
+            # 標籤 / 附件的觸發器會把版本蓋成本機、現在；改回合併後的版本
+            conn.execute(_VERSION_SQL, meta + [tx_id])
+        return tx_id
+
+    @staticmethod
+    def _set_children(conn: sqlite3.Connection, tx_id: int, row: Dict[str, Any]) -> bool:
+        """讓本機的標籤 / 附件與 row 相同；回傳是否有改動。"""
+        current: Dict[int, Dict[str, Any]] = {tx_id: {}}
+        add_children(conn, current)
+        tags, atts = sorted(row.get("tags") or []), sorted(row.get("attachments") or [])
+        changed = False
+        if current[tx_id]["tags"] != tags:
+            conn.execute("DELETE FROM TransactionTag WHERE tx_id = ?", (tx_id,))
+            for name in tags:
+                conn.execute("INSERT OR IGNORE INTO Tag(name) VALUES(?)", (name,))
+                conn.execute(
+                    "INSERT INTO TransactionTag(tx_id, tag_id) SELECT ?, id FROM Tag WHERE name = ?", (tx_id, name)
+                )
+            changed = True
+        if current[tx_id]["attachments"] != atts:
+            conn.execute("DELETE FROM Attachment WHERE tx_id = ?", (tx_id,))
+            conn.executemany(
+                "INSERT INTO Attachment(tx_id, file_path, ocr_text) VALUES(?,?,?)",
+                [(tx_id, name, ocr or None) for name, ocr in atts],
+            )
+            changed = True
+        return changed
+
+    # ───── Merkle 比對 ─────
+    def reconcile(self, book_id: int = 1) -> Dict[str, Any]:
+        """
+        先做一次一般同步，再比對 Merkle tree；只對內容不同的月份取回對方整月的 change 合併
+        （版本相同、內容不同時以對方為準），再把對方缺少或較舊的本機版本推回去。
+        """
+        stats: Dict[str, Any] = dict(self.sync())
+        conn = self.cm.writer()
+        refresh_leaves(conn)
+        months, trips = diff_months(load_tree(conn, book_id), _PeerTree(self), book_id)
+        applied = repushed = 0
+        for month in months:
+            resp = self._request("month", {"book": book_id, "month": month})
+            remote = {ch["uid"]: normalize(ch) for ch in resp["changes"]}
+            with conn:
+                conn.execute("BEGIN")
+                applied += self._apply(conn, list(remote.values()), prefer_remote=True)
+            mine = self._month_changes(conn, book_id, month)
+            # 對方這個月有、本機已刪除或移到別的月份的也要算進來
+            mine.update((uid, ch) for uid, (_id, ch) in self._local(conn, [u for u in remote if u not in mine]).items())
+            changes = [ch for uid, ch in mine.items() if merge(remote.get(uid), ch) != remote.get(uid)]
+            for i in range(0, len(changes), self.batch):
+                self._request("push", {"changes": changes[i:i + self.batch]})
+            repushed += len(changes)
+        refresh_leaves(conn)
+        remaining, _ = diff_months(load_tree(conn, book_id), _PeerTree(self), book_id) if months else ([], 0)
+        stats.update(months=months, round_trips=trips, repaired=applied, repushed=repushed, remaining=remaining)
+        if applied and self.bus is not None:
+            self.bus.publish(EV_SYNC_APPLIED, dict(stats, peer=self.peer))
+        return stats
+
+    def _month_changes(self, conn: sqlite3.Connection, book_id: int, month: str) -> Dict[str, Change]:
+        return _row_changes(conn, conn.execute(_MONTH_SQL, (book_id, *month_range(month))).fetchall())
+
+
+def _row_changes(conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> Dict[str, Change]:
+    """[Transaction] 列（_ROW_COLS）→ {uid: 'U' change}。"""
+    if not rows:
+        return {}
+    content = content_rows(conn, rows, CategoryDao.names_in(conn))
+    out: Dict[str, Change] = {}
+    for r in rows:
+        uid, row = content[r["id"]]
+        out[uid] = normalize({
+            "uid": uid, "op": "U", "at": r["hlc"], "device": r["device_id"], "row": row,
+            "clocks": json.loads(r["clocks"]) if r["clocks"] else None,
+        })
+    return out
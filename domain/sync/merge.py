@@ -0,0 +1,80 @@
+# domain/sync/merge.py
+"""
+逐欄 last-writer-wins 合併；裝置端（SyncEngine）與 SyncHub 共用同一套規則。
+
+每個欄位的版本是 (HLC, 裝置)（見 data.hlc），合併時逐欄取版本較大者；
+版本相同但值不同（只會出現在資料被繞過觸發器改過時）比較值的 JSON。
+因此合併滿足交換律、結合律且冪等：change 以任何順序、重複收到，結果都一樣，
+一批 change 掃一次就能套完，不需要歷史紀錄。
+刪除是終局：任一邊為 'D' 結果就是 'D'（兩邊都是 'D' 時取版本較大的 tombstone）。
+"""
+from __future__ import annotations
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .codec import ROW_FIELDS, Change, version
+
+Clock = Tuple[int, str]
+
+
+def field_clocks(change: Change) -> Dict[str, Clock]:
+    """'U' change → {欄位: (hlc, 裝置)}；clocks 缺的欄位取 "*"，沒有 clocks 時全為 (at, device)。"""
+    clocks = change.get("clocks") or {}
+    star = clocks.get("*") or (change["at"], change["device"])
+    return {f: tuple(clocks.get(f) or star) for f in ROW_FIELDS}
+
+
+def compact_clocks(clocks: Dict[str, Clock]) -> Tuple[Clock, Optional[Dict[str, List[Any]]]]:
+    """
+    逐欄時鐘 → (整列版本, clocks)。整列版本為最大的欄位時鐘；
+    clocks 以最多欄位共用的時鐘當 "*"，只列出其他的，全部相同時為 None。
+    """
+    top = max(clocks.values())
+    counts = Counter(clocks.values())
+    base = max(counts, key=lambda c: (counts[c], c))
+    if counts[base] == len(clocks):
+        return top, None
+    out: Dict[str, List[Any]] = {"*": list(base)}
+    out.update((f, list(c)) for f, c in clocks.items() if c != base)
+    return top, out
+
+
+def make_change(uid: str, row: Dict[str, Any], clocks: Dict[str, Clock]) -> Change:
+    (at, device), compact = compact_clocks(clocks)
+    ch: Change = {"uid": uid, "op": "U", "at": at, "device": device, "row": row}
+    if compact is not None:
+        ch["clocks"] = compact
+    return ch
+
+
+def normalize(change: Change) -> Change:
+    """整理成 merge() 輸出的形式，才能直接以 == 比較。"""
+    if change["op"] == "D":
+        return {"uid": change["uid"], "op": "D", "at": change["at"], "device": change["device"]}
+    return make_change(change["uid"], change["row"], field_clocks(change))
+
+
+def _value_key(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def merge(local: Optional[Change], remote: Optional[Change], prefer_remote: bool = False) -> Optional[Change]:
+    """
+    合併同一個 uid 的兩個版本（皆為 normalize 過的形式或 None）。
+    prefer_remote=True 時版本相同、值不同以 remote 為準（Merkle 修補時信任對方）。
+    """
+    if local is None or remote is None:
+        return remote if local is None else local
+    if local["op"] == "D" or remote["op"] == "D":
+        return max((c for c in (local, remote) if c["op"] == "D"), key=version)
+    mine, theirs = field_clocks(local), field_clocks(remote)
+    row: Dict[str, Any] = {}
+    clocks: Dict[str, Clock] = {}
+    for f in ROW_FIELDS:
+        a, b = local["row"].get(f), remote["row"].get(f)
+        take = theirs[f] > mine[f] or (
+            theirs[f] == mine[f] and a != b and (prefer_remote or _value_key(b) > _value_key(a))
+        )
+        row[f], clocks[f] = (b, theirs[f]) if take else (a, mine[f])
+    return make_change(local["uid"], row, clocks)
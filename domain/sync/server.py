@@ -0,0 +1,177 @@
+# domain/sync/server.py
+"""
+同步伺服器的行程內替身：SyncHub 保存各裝置推上來的 change，供其他裝置拉取。
+
+每個 uid 只留與已存版本逐欄合併（merge.py）後的結果，有變才換新 seq；
+pull 以 seq 為游標，並略過請求者自己推上來、且原樣保存的 change（合併出新內容的要發給所有人）。
+另外依 (帳本, 月份) 維護與裝置端相同算法的 Merkle 葉（data.merkle），
+供 tree / month 請求做內容比對與整月補傳。
+測試 / 工具腳本用 LocalTransport 直接呼叫，不經網路。
+"""
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from data.merkle import MerkleTree, leaf_digest, tree_of
+from .codec import SYNC_BATCH, Change, SyncError, decode, encode
+from .merge import merge, normalize
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS Change (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    uid TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    op TEXT NOT NULL,
+    book_id INTEGER,
+    month TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_change_month ON Change(book_id, month);
+
+CREATE TABLE IF NOT EXISTS Leaf (
+    book_id INTEGER NOT NULL,
+    month TEXT NOT NULL,
+    digest TEXT,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (book_id, month)
+) WITHOUT ROWID;
+"""
+
+
+class SyncHub:
+    def __init__(self, path: str = ":memory:") -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA_SQL)
+        self._lock = threading.Lock()
+        self._trees: Dict[int, MerkleTree] = {}
+
+    def handle(self, kind: str, body: bytes) -> bytes:
+        """單一入口：kind 為 push / pull / tree / month，body 與回應都是 codec 編碼的訊息。"""
+        with self._lock:
+            return encode(self.dispatch(kind, decode(body)))
+
+    def dispatch(self, kind: str, req: Dict[str, Any]) -> Dict[str, Any]:
+        """已解碼的請求 → 回應（不加鎖；多執行緒呼叫請走 handle）。"""
+        handler = {"push": self.push, "pull": self.pull, "tree": self.tree, "month": self.month}.get(kind)
+        if handler is None:
+            raise SyncError(f"unknown sync request: {kind!r}")
+        return handler(req)
+
+    def push(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        accepted = 0
+        with self._conn:
+            for ch in map(normalize, req["changes"]):
+                stored = self.get(ch["uid"])
+                merged = merge(stored, ch)
+                if merged == stored:
+                    continue
+                self.put(merged, req["device"] if merged == ch else "")
+                accepted += 1
+        return {"accepted": accepted}
+
+    # ───── 單筆存取（呼叫端負責 transaction，見 transaction()） ─────
+    def transaction(self) -> sqlite3.Connection:
+        """with hub.transaction(): ... —— 離開時 commit，例外時 rollback。"""
+        return self._conn
+
+    def get(self, uid: str) -> Optional[Change]:
+        row = self._conn.execute("SELECT body FROM Change WHERE uid = ?", (uid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, change: Change, source: str) -> None:
+        """
+        存入合併後的版本並換新 seq；source 為原樣推上來的裝置（pull 時略過它），
+        合併出新內容時給空字串。
+        """
+        prev = self._conn.execute("SELECT book_id, month FROM Change WHERE uid = ?", (change["uid"],)).fetchone()
+        row = change.get("row")
+        # 刪除沒有 row：沿用前一版的帳本 / 月份，整月比對時才找得到這個 tombstone
+        book_id, month = (row["book_id"], row["date"][:7]) if row else (tuple(prev) if prev else (None, None))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO Change(uid, source, op, book_id, month, body) VALUES(?,?,?,?,?,?)",
+            (change["uid"], source, change["op"], book_id, month, json.dumps(change, ensure_ascii=False)),
+        )
+        for key in {(book_id, month), tuple(prev) if prev else (None, None)}:
+            if key[0] is not None:
+                self._mark(*key)
+
+    def drop(self, uid: str) -> None:
+        """移除一個 uid（交易換帳本時由伺服器搬到另一個 hub）。"""
+        prev = self._conn.execute("SELECT book_id, month FROM Change WHERE uid = ?", (uid,)).fetchone()
+        if prev is None:
+            return
+        self._conn.execute("DELETE FROM Change WHERE uid = ?", (uid,))
+        if prev[0] is not None:
+            self._mark(*prev)
+
+    def pull(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        since = int(req.get("since", 0))
+        limit = max(1, min(int(req.get("limit", SYNC_BATCH)), SYNC_BATCH))
+        rows = self._conn.execute(
+            "SELECT seq, source, body FROM Change WHERE seq > ? ORDER BY seq LIMIT ?", (since, limit)
+        ).fetchall()
+        changes: List[Dict[str, Any]] = [json.loads(b) for _s, d, b in rows if d != req["device"]]
+        return {
+            "changes": changes,
+            "next": rows[-1][0] if rows else since,
+            "more": len(rows) == limit,
+        }
+
+    # ───── Merkle ─────
+    def tree(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        return {"hashes": self._tree(int(req["book"])).node_hashes(int(req["level"]), req["index"])}
+
+    def month(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        rows = self._conn.execute(
+            "SELECT body FROM Change WHERE book_id = ? AND month = ? ORDER BY seq", (int(req["book"]), req["month"])
+        ).fetchall()
+        return {"changes": [json.loads(b) for (b,) in rows]}
+
+    def _mark(self, book_id: int, month: str) -> None:
+        self._conn.execute(
+            "INSERT INTO Leaf(book_id, month, dirty) VALUES(?,?,1) ON CONFLICT(book_id, month) DO UPDATE SET dirty = 1",
+            (book_id, month),
+        )
+        self._trees.pop(book_id, None)
+
+    def _tree(self, book_id: int) -> MerkleTree:
+        tree = self._trees.get(book_id)
+        if tree is not None:
+            return tree
+        with self._conn:
+            for (month,) in self._conn.execute(
+                "SELECT month FROM Leaf WHERE book_id = ? AND dirty = 1", (book_id,)
+            ).fetchall():
+                bodies = self._conn.execute(
+                    "SELECT uid, body FROM Change WHERE book_id = ? AND month = ? AND op = 'U'", (book_id, month)
+                ).fetchall()
+                digest, _n = leaf_digest((uid, json.loads(b)["row"]) for uid, b in bodies)
+                self._conn.execute(
+                    "UPDATE Leaf SET digest = ?, dirty = 0 WHERE book_id = ? AND month = ?", (digest, book_id, month)
+                )
+        tree = self._trees[book_id] = tree_of(self._conn.execute(
+            "SELECT month, digest FROM Leaf WHERE book_id = ? AND digest IS NOT NULL", (book_id,)
+        ).fetchall())
+        return tree
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class LocalTransport:
+    """直接呼叫 SyncHub 的 transport；順便累計上下行 bytes。"""
+    def __init__(self, hub: SyncHub) -> None:
+        self.hub = hub
+        self.bytes_up = 0
+        self.bytes_down = 0
+
+    def request(self, kind: str, body: bytes) -> bytes:
+        self.bytes_up += len(body)
+        resp = self.hub.handle(kind, body)
+        self.bytes_down += len(resp)
+        return resp
@@ -0,0 +1,60 @@
+# domain/sync/transport.py
+"""
+HttpTransport：連到 server（python -m server）的 transport，POST /sync/<kind>。
+
+同一條 keep-alive 連線重複使用；連線被對方關掉時重連一次再送。
+非 200 的回應轉成 SyncError，SyncEngine 那邊照一般同步失敗處理（游標不會前進）。
+"""
+from __future__ import annotations
+import http.client
+from urllib.parse import urlsplit
+
+from .codec import SyncError
+
+
+class HttpTransport:
+    def __init__(self, url: str, timeout: float = 30.0) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported sync url: {url!r}")
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._conn = None
+        self.bytes_up = 0
+        self.bytes_down = 0
+
+    def request(self, kind: str, body: bytes) -> bytes:
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request(
+                    "POST", f"{self._prefix}/sync/{kind}", body,
+                    {"Content-Type": "application/octet-stream"},
+                )
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # keep-alive 連線閒置太久被關掉；只重試一次
+                self.close()
+                if attempt:
+                    raise
+        if resp.status != 200:
+            raise SyncError(f"sync server returned {resp.status}: {data[:200].decode('utf-8', 'replace')}")
+        self.bytes_up += len(body)
+        self.bytes_down += len(data)
+        return data
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            self._conn = cls(self._host, self._port, timeout=self._timeout)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,30 +1,88 @@
 # domain/usecases.py
 from __future__ import annotations
-from core.eventbus import EventBus, EV_TX_CREATED
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator
+from core.eventbus import EventBus, EV_RATES_UPDATED, EV_RULES_APPLIED, EV_SYNC_APPLIED, EV_TX_CREATED
+from core.money import Money, Number, to_minor
 from core.utils import now_iso
-from data.dao import TxDao
+from data.dao import AttachmentDao, InvoiceDao, SettingsDao, TxDao, BULK_CHUNK_SIZE
+from data.blobs import referenced_in
+from data.rates import invalidate_rates
+from data.thumbs import Thumbnailer, get_thumbnails
+from domain.exporters import export_csv, export_jsonl, write_snapshot
+from domain.importers import CsvImporter, EInvoiceImporter, RateImporter, period_of
+from domain.lottery import LotteryChecker
+from domain.ocr import OcrPipeline
+from domain.rules import get_rule_engine, reapply
+from domain.suggest import get_suggester
+from domain.sync import SyncEngine, Transport
 
 class UseCases:
-    def __init__(self, bus: EventBus) -> None:
+    """App 內由 DB 執行緒呼叫（data.executor），EV_TX_CREATED 也在該執行緒發布。"""
+    def __init__(self, bus: EventBus, txdao: TxDao | None = None, thumbs: Thumbnailer | None = None) -> None:
         self.bus = bus
-        self.txdao = TxDao()
+        self.txdao = txdao or TxDao()
+        self._device: str | None = None
+        # 附件收進 thumbs 的 blob store，縮圖與原檔在同一個目錄樹
+        self.thumbs = thumbs or get_thumbnails()
+        self.blobs = self.thumbs.store
+        self.ocr = OcrPipeline(bus, store=self.blobs)
+        # 匯率有更新時丟掉記憶體內的 RateIndex，下次換算重建
+        bus.subscribe(EV_RATES_UPDATED, invalidate_rates)
+        # 新交易（含匯入 / 同步進來的）增量學進類別建議模型
+        bus.subscribe(EV_TX_CREATED, self._learn_categories)
+        bus.subscribe(EV_SYNC_APPLIED, self._learn_categories)
+
+    @property
+    def device_id(self) -> str:
+        """本機裝置 id（Settings.device_id），寫入 [Transaction].device_id 供同步辨識來源。"""
+        if self._device is None:
+            self._device = SettingsDao(self.txdao.cm).device_id()
+        return self._device
+
+    def _learn_categories(self, _payload: Any = None) -> None:
+        get_suggester(self.txdao.cm).learn()
+
+    def suggest_categories(
+        self,
+        tx_type: str = "expense",
+        amount: Number | None = None,
+        currency: str = "TWD",
+        merchant: str | None = None,
+        limit: int = 3,
+    ) -> list[int]:
+        """新交易最可能的類別 id，可能性高的在前（見 domain.suggest）；amount 為主單位，0 / None 表示還不知道。"""
+        minor = to_minor(amount, currency) if amount else None
+        return [cat for cat, _p in get_suggester(self.txdao.cm).suggest(tx_type, merchant, minor, currency, limit=limit)]
 
     def quick_add_tx(
         self,
-        amount: float,
+        amount: Number,
         category_id: int | None = None,
         account_id: int = 1,
         book_id: int = 1,
         tx_type: str = "expense",
         currency: str = "TWD",
         note: str | None = None,
+        tags: Iterable[str] | None = None,
+        photos: Iterable[Path | str] | None = None,
     ) -> int:
+        """
+        amount 為主單位金額（Decimal / str / int 皆可），依 currency 換成最小單位存檔；tags 為標籤名稱。
+        photos 為原始圖檔路徑：先收進 blob store（重複的檔案只存一份），縮圖在背景產生。
+        沒指定 category_id 時以自動分類規則決定（見 domain.rules），都不成立就不分類。
+        """
+        money = Money.of(amount, currency)
+        if category_id is None:
+            category_id = get_rule_engine(self.txdao.cm).categorize(
+                None, note, money.minor, currency, account_id, tx_type)
         now = now_iso()
+        keys = [self.blobs.put_file(p) for p in photos or ()]
         tx_id = self.txdao.insert_tx(
             book_id=book_id,
             account_id=account_id,
             tx_type=tx_type,
-            amount=amount,
+            amount=money.minor,
             currency=currency,
             category_id=category_id,
             member_id=1,
@@ -32,7 +90,162 @@ class UseCases:
             note=note,
             date=now,
             updated_at=now,
-            device_id="dev_local",
+            device_id=self.device_id,
+            tags=tags,
+            attachments=keys,
         )
-        self.bus.publish(EV_TX_CREATED, {"tx_id": tx_id, "amount": amount})
+        if keys:
+            self.thumbs.prefetch(keys)
+        self.bus.publish(EV_TX_CREATED, {"tx_id": tx_id, "amount": money.minor, "currency": currency})
         return tx_id
+
+    def attach(self, tx_id: int, photos: Iterable[Path | str]) -> list[str]:
+        """替既有交易加附件；回傳 blob key。"""
+        keys = [self.blobs.put_file(p) for p in photos]
+        AttachmentDao(self.txdao.cm).add(tx_id, keys)
+        self.thumbs.prefetch(keys)
+        return keys
+
+    def add_receipts(
+        self,
+        results: Iterable[Dict[str, Any]],
+        category_id: int | None = None,
+        currency: str = "TWD",
+        account_id: int = 1,
+        book_id: int = 1,
+    ) -> int:
+        """
+        OCR 結果（OcrPipeline.scan / start）逐張記成支出，收據本身成為附件（ocr_text 由快取帶入）。
+        沒抽到總額的、以及已經是某筆交易附件的收據（重掃同一個資料夾）略過；
+        收據上有幣別時以收據為準。台灣發票（有號碼與日期、TWD）同時記進 Invoice，之後可對獎。
+        回傳新增筆數，最後發一次 EV_TX_CREATED 摘要。
+        """
+        results = [r for r in results if r.get("total") is not None and r.get("key")]
+        rules = get_rule_engine(self.txdao.cm)
+        seen = AttachmentDao(self.txdao.cm).attached([r["key"] for r in results])
+        invoices = InvoiceDao(self.txdao.cm)
+        now = now_iso()
+        ids = []
+        for r in results:
+            if r["key"] in seen:
+                continue
+            seen.add(r["key"])
+            cur = r.get("currency") or currency
+            minor = to_minor(r["total"], cur)
+            ids.append(self.txdao.insert_tx(
+                book_id=book_id, account_id=account_id, tx_type="expense",
+                amount=minor, currency=cur,
+                category_id=category_id if category_id is not None else rules.categorize(
+                    r.get("merchant"), r.get("invoice_no"), minor, cur, account_id, "expense"),
+                member_id=1,
+                merchant=r.get("merchant"), note=r.get("invoice_no"),
+                date=f"{r['date']}T12:00:00" if r.get("date") else now,
+                updated_at=now, device_id=self.device_id,
+                attachments=[r["key"]],
+            ))
+            if r.get("invoice_no") and r.get("date") and cur == "TWD":
+                invoices.add(ids[-1], r["invoice_no"], period_of(r["date"]), r["date"], minor, r.get("merchant"))
+        if ids:
+            self.thumbs.prefetch([r["key"] for r in results if r.get("key")])
+            self.bus.publish(EV_TX_CREATED, {
+                "batch": True, "count": len(ids), "first_id": ids[0], "last_id": ids[-1],
+            })
+        return len(ids)
+
+    def sweep_blobs(self) -> int:
+        """刪掉已沒有 Attachment 引用的 blob（交易刪除後留下的收據）；回傳刪除數。"""
+        with self.txdao.cm.reader() as conn:
+            keep = referenced_in(conn)
+        return self.blobs.sweep(keep)
+
+    def add_many(
+        self,
+        txs: Iterable[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> int:
+        """
+        批次新增（匯入歷史資料用）。每筆 dict 至少要有 amount（主單位）或
+        amount_minor（已換算的最小單位整數），其餘欄位與 quick_add_tx 相同預設；
+        沒有 category_id 的由自動分類規則補上。全部寫完只發一次 EV_TX_CREATED 摘要。
+        """
+        rows = get_rule_engine(self.txdao.cm).apply(self._fill_defaults(txs))
+        count, first_id, last_id = self.txdao.insert_many(rows, chunk_size)
+        if count:
+            self.bus.publish(EV_TX_CREATED, {
+                "batch": True, "count": count,
+                "first_id": first_id, "last_id": last_id,
+            })
+        return count
+
+    def import_csv(self, path: str, fmt: str = "auto", **kwargs: Any) -> Dict[str, Any]:
+        """
+        匯入 Zaim / 通用 CSV（見 domain.importers）；可中斷後重跑續傳。
+        會佔住 DB 執行緒直到完成，進度看 EV_IMPORT_PROGRESS。
+        """
+        return CsvImporter(self.bus, self.txdao).run(path, fmt, **kwargs)
+
+    def import_einvoice(self, path: Path | str, **kwargs: Any) -> Dict[str, Any]:
+        """
+        匯入財政部電子發票平台的載具匯出檔（見 domain.importers.einvoice）：
+        每張發票一筆支出，表頭與品項寫進 Invoice / InvoiceItem；已匯入與作廢的發票跳過。
+        """
+        return EInvoiceImporter(self.bus, self.txdao).run(path, **kwargs)
+
+    def reapply_rules(self, only_uncategorized: bool = True, book_id: int | None = None) -> Dict[str, int]:
+        """
+        把自動分類規則重新套到歷史交易（見 domain.rules.reapply）；預設只補沒有類別的。
+        完成後發 EV_RULES_APPLIED（{"scanned", "matched", "updated"}）。
+        """
+        stats = reapply(self.txdao, only_uncategorized=only_uncategorized, book_id=book_id)
+        self.bus.publish(EV_RULES_APPLIED, stats)
+        return stats
+
+    def check_lottery(self, path: Path | str, periods: Iterable[str] | None = None) -> list[Dict[str, Any]]:
+        """以本機的中獎號碼檔對所有已存的發票（見 domain.lottery）；每期一份結果，中獎發 EV_INVOICE_WINNERS。"""
+        return LotteryChecker(self.bus, self.txdao.cm).check_file(path, periods)
+
+    def load_rates(self, paths: Iterable[Path | str], base: str | None = None, fill_gaps: bool = True) -> Dict[str, Any]:
+        """
+        載入歷史匯率檔（CSV / JSON，見 domain.importers.rate_import）；重複載入不會多出列。
+        完成後發一次 EV_RATES_UPDATED，記憶體內的匯率索引隨之重建。
+        """
+        return RateImporter(self.bus, self.txdao.cm).run(paths, base=base, fill_gaps=fill_gaps)
+
+    def export(self, path: str, fmt: str = "csv", book_id: int | None = None) -> int:
+        """
+        匯出整個帳本（見 domain.exporters）；fmt 為 csv / jsonl / snapshot。
+        逐批讀寫、記憶體固定；回傳筆數。
+        """
+        writers = {"csv": export_csv, "jsonl": export_jsonl, "snapshot": write_snapshot}
+        if fmt not in writers:
+            raise ValueError(f"unknown export format: {fmt!r}")
+        return writers[fmt](path, book_id=book_id, manager=self.txdao.cm)
+
+    def sync(self, transport: Transport, peer: str = "server") -> Dict[str, int]:
+        """與 peer 差異同步（見 domain.sync）；有套用遠端變更時發 EV_SYNC_APPLIED。"""
+        return SyncEngine(transport, peer, manager=self.txdao.cm, bus=self.bus).sync()
+
+    def reconcile(self, transport: Transport, peer: str = "server", book_id: int = 1) -> Dict[str, Any]:
+        """同步後以 Merkle tree 比對整本帳，只重傳內容不同的月份。"""
+        return SyncEngine(transport, peer, manager=self.txdao.cm, bus=self.bus).reconcile(book_id)
+
+    def _fill_defaults(self, txs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        now = now_iso()
+        device = self.device_id
+        for tx in txs:
+            currency = tx.get("currency", "TWD")
+            minor = tx.get("amount_minor")
+            yield {
+                "book_id": tx.get("book_id", 1),
+                "account_id": tx.get("account_id", 1),
+                "tx_type": tx.get("tx_type", "expense"),
+                "amount": int(minor) if minor is not None else to_minor(tx["amount"], currency),
+                "currency": currency,
+                "category_id": tx.get("category_id"),
+                "member_id": tx.get("member_id", 1),
+                "merchant": tx.get("merchant"),
+                "note": tx.get("note"),
+                "date": tx.get("date") or now,
+                "updated_at": tx.get("updated_at") or now,
+                "device_id": tx.get("device_id") or device,
+            }
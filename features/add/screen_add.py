@@ -12,8 +12,10 @@ from kivy.graphics import Color, Rectangle
 from kivy.properties import NumericProperty
 
 from core.i18n import t
+from core.money import Number
 from domain.usecases import UseCases
 from data.dao import TxDao
+from data.executor import get_executor
 
 # 分頁元件（已分檔）
 from features.add.tabs import InvoiceTab, ManualTab, CommonTab, QuickTab
@@ -82,8 +84,8 @@ class AddScreen(MDScreen):
         root.add_widget(self.tabs)
 
         # 內容分頁（使用外部檔案）
-        self.tabs.add_widget(InvoiceTab(record_expense=self._record_expense))
-        self.tabs.add_widget(ManualTab(record_expense=self._record_expense))
+        self.tabs.add_widget(InvoiceTab(record_expense=self._record_expense, usecases=self.usecases))
+        self.tabs.add_widget(ManualTab(record_expense=self._record_expense, usecases=self.usecases))
         self.tabs.add_widget(CommonTab(dao=self.txdao, record_expense=self._record_expense))
         self.tabs.add_widget(QuickTab(record_expense=self._record_expense))
 
@@ -157,7 +159,13 @@ class AddScreen(MDScreen):
         self._set_active(idx)
 
     # ===== Domain helper =====
-    def _record_expense(self, amount: float, category_id: int | None = 1, note: str | None = None):
-        tx_id = self.usecases.quick_add_tx(amount=amount, category_id=category_id, note=note)
+    def _record_expense(self, amount: Number, category_id: int | None = None, note: str | None = None,
+                        currency: str = "TWD", tx_type: str = "expense", tags: list[str] | None = None,
+                        photos: list[str] | None = None):
+        # 寫入排進 DB 執行緒；首頁的查詢排在它後面，回到首頁時一定看得到這筆
+        # category_id 為 None 時由自動分類規則決定（UseCases.quick_add_tx）
+        fut = get_executor().submit(self.usecases.quick_add_tx, amount=amount, category_id=category_id,
+                                    note=note, currency=currency, tx_type=tx_type, tags=tags,
+                                    photos=photos)
         self.switch_tab(t("TAB_HOME"))  # 完成後回首頁
-        return tx_id
+        return fut
@@ -67,12 +67,16 @@ class CategorySelectScreen(Screen):
         on_pick: Callable[[Dict], None],
         categories: List[Dict],
         recents: List[int] | None = None,
+        suggested: List[int] | None = None,
+        selected: int | None = None,
         **kwargs
     ):
         super().__init__(name=name, **kwargs)
         self.on_pick = on_pick
         self.all_categories = categories[:] if categories else []
         self.recents = recents or []
+        self.suggested = suggested or []
+        self.selected = selected
 
         root = MDBoxLayout(orientation="vertical", padding=(0, 0, 0, 0), spacing=0)
         self.add_widget(root)
@@ -189,10 +193,10 @@ class CategorySelectScreen(Screen):
     def _add_item(self, cat: Dict):
         name, sub = self._display_text(cat)
         item = TwoLineAvatarIconListItem(text=name, secondary_text=sub)
-        icon = IconLeftWidget(icon=cat.get("icon", "shape"))
+        icon = IconLeftWidget(icon=cat.get("icon") or "shape")
         icon.theme_text_color = "Custom"
         icon.text_color = cat.get("color", (0.5, 0.5, 0.5, 1))
-        chev = Chevron(icon="chevron-right")
+        chev = Chevron(icon="check" if cat.get("id") == self.selected else "chevron-right")
         item.add_widget(icon)
         item.add_widget(chev)
         item.bind(on_release=lambda *_: self._pick(cat))
@@ -224,12 +228,13 @@ class CategorySelectScreen(Screen):
                 return q in " ".join(fields).lower()
             cats = [c for c in cats if matches(c)]
 
-        # Recently Used
-        if not q and self.recents:
-            recent_objs = [c for c in self.all_categories if c.get("id") in self.recents]
-            if recent_objs:
-                self._add_section_header(_t("RECENTLY_USED"))
-                for c in recent_objs:
+        # Suggested / Recently Used (in the order given)
+        by_id = {c.get("id"): c for c in self.all_categories}
+        for title, ids in (("SUGGESTED", self.suggested), ("RECENTLY_USED", self.recents)):
+            objs = [by_id[i] for i in ids if i in by_id]
+            if not q and objs:
+                self._add_section_header(_t(title))
+                for c in objs:
                     self._add_item(c)
                 self.list_box.add_widget(Divider())
 
@@ -1,5 +1,6 @@
 # features/add/tabs/manual/controller.py
 from __future__ import annotations
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 class ManualController:
     def __init__(self, *, decimals: int = 0,
@@ -142,7 +143,7 @@ class ManualController:
         self.op = op_switch
         self.buffer = "0"
 
-    def _calc(self, a: float, b: float, op: str) -> float:
+    def _calc(self, a: Decimal, b: Decimal, op: str) -> Decimal:
         try:
             if op == "+": return a + b
             if op == "-": return a - b
@@ -152,11 +153,11 @@ class ManualController:
             pass
         return b
 
-    def _parse(self, s: str) -> float:
+    def _parse(self, s: str) -> Decimal:
         try:
-            return float(s)
-        except Exception:
-            return 0.0
+            return Decimal(s)
+        except (InvalidOperation, TypeError, ValueError):
+            return Decimal(0)
 
     def _normalize(self, s: str, *, for_backspace: bool = False) -> str:
         s = (s or "").strip()
@@ -186,9 +187,9 @@ class ManualController:
             neg = False                   # -0 → 0
         return ("-" if neg else "") + body
 
-    def _format(self, v: float) -> str:
+    def _format(self, v: Decimal) -> str:
         d = int(self.decimals or 0)
-        s = f"{v:.{d}f}"
+        s = f"{v.quantize(Decimal(1).scaleb(-d), rounding=ROUND_HALF_UP):f}"
         s = s.rstrip("0").rstrip(".")
         if s in ("", "-0", "-0.0"):
             s = "0"
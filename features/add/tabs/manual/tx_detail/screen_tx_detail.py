@@ -1,6 +1,8 @@
 # features/add/tabs/manual/tx_detail/screen_tx_detail.py
 from __future__ import annotations
 
+from decimal import Decimal
+from pathlib import Path
 from typing import Callable, Dict, Any, Optional
 
 from kivy.metrics import dp, sp
@@ -26,6 +28,10 @@ except Exception:
     from kivymd.uix.toolbar import MDToolbar as MDTopAppBar
 
 from core.i18n import t as _t
+from core.money import to_decimal
+from data.dao import TagDao
+from data.executor import get_executor
+from ui.widgets.sparkline import PriceTrend
 
 # 與 Manual 共用的元件 / 邏輯
 from ..logic import ManualCalc
@@ -63,7 +69,7 @@ class TxDetailScreen(Screen):
         self._currency = cur
         self.calc = ManualCalc(decimals=cur.get("decimals", 0))
 
-        start_amt = float(self._ctx.get("amount", 0) or 0)
+        start_amt = to_decimal(self._ctx.get("amount", 0) or 0)
         self.calc.buffer = self._fmt_amount(start_amt)
 
         # Root
@@ -203,7 +209,7 @@ class TxDetailScreen(Screen):
         self.currency_chip.set_currency(code, symbol)
         self.calc.decimals = cur.get("decimals", 0)
         # 以新位數重排顯示
-        self.calc.buffer = self._fmt_amount(self.calc._to_float(self.calc.buffer))
+        self.calc.buffer = self._fmt_amount(self.calc._to_decimal(self.calc.buffer))
         self._sync_amount_from_calc()
         if hasattr(self, "currency_menu"):
             self.currency_menu.dismiss()
@@ -233,12 +239,21 @@ class TxDetailScreen(Screen):
         self.memo = MDTextField(hint_text=_t("WRITE_A_NOTE") if _t else "Write a note...",
                                 size_hint_x=1, mode="rectangle")
         pad.add_widget(self.memo)
-        # tags（用輕量按鈕示意）
-        tag_row = MDBoxLayout(orientation="horizontal", spacing=dp(8), padding=(0, dp(8), 0, 0), size_hint_y=None, height=dp(40))
-        for txt in ["# good buy", "# deal", "# treat"]:
-            b = MDFlatButton(text=txt, disabled=True, size_hint=(None, None), height=dp(32))
-            tag_row.add_widget(b)
-        pad.add_widget(tag_row)
+        # 備註像發票上買過的品項時，顯示該品項的價格走勢（停止輸入 0.4 秒後才查）
+        self.price_trend = PriceTrend()
+        pad.add_widget(self.price_trend)
+        self._trend_trigger = Clock.create_trigger(lambda *_: self.price_trend.show(self.memo.text), 0.4)
+        self.memo.bind(text=lambda *_: self._trend_trigger())
+        # tags：常用標籤可點選切換，輸入框 Enter 新增
+        self._tags: Dict[str, bool] = {}
+        self._tag_buttons: Dict[str, MDFlatButton] = {}
+        self.tag_row = MDBoxLayout(orientation="horizontal", spacing=dp(8), padding=(0, dp(8), 0, 0),
+                                   size_hint_y=None, height=dp(40))
+        pad.add_widget(self.tag_row)
+        self.tag_input = MDTextField(hint_text=_t("ADD_TAG") if _t else "Add tag", size_hint_x=1)
+        self.tag_input.bind(on_text_validate=lambda inst: self._add_tag(inst.text))
+        pad.add_widget(self.tag_input)
+        get_executor().call(TagDao().all, limit=6, key="tx_detail.tags", on_result=self._fill_tags)
 
         # Include in reports
         reports_row = MDBoxLayout(orientation="horizontal", padding=(0, dp(8), 0, 0), size_hint_y=None, height=dp(40))
@@ -248,15 +263,67 @@ class TxDetailScreen(Screen):
         pad.add_widget(reports_row)
         Clock.schedule_once(lambda *_: setattr(self.include_switch, "active", True), 0)
 
-        # Add photo 區（示意）
+        # Add photo：選的是原始檔路徑，送出時才收進 blob store（在 DB 執行緒上）
+        self._photos: list[str] = []
         photo_row = MDBoxLayout(orientation="horizontal", spacing=dp(12), padding=(0, dp(8), 0, 0),
                                 size_hint_y=None, height=dp(56))
-        photo_row.add_widget(MDIconButton(icon="image-plus"))
-        photo_row.add_widget(MDLabel(text=_t("ADD_PHOTO") if _t else "Add photo", valign="center"))
+        photo_row.add_widget(MDIconButton(icon="image-plus", on_release=lambda *_: self._open_photo_picker()))
+        self.lbl_photos = MDLabel(text=_t("ADD_PHOTO") if _t else "Add photo", valign="center")
+        photo_row.add_widget(self.lbl_photos)
         pad.add_widget(photo_row)
 
         self.root.add_widget(pad)
 
+    def _fill_tags(self, rows):
+        for r in rows:
+            self._tag_chip(r["name"], selected=False)
+
+    def _tag_chip(self, name: str, selected: bool):
+        if name in self._tag_buttons:
+            self._tags[name] = selected or self._tags[name]
+        else:
+            self._tags[name] = selected
+            b = MDFlatButton(text=f"# {name}", size_hint=(None, None), height=dp(32))
+            b.bind(on_release=lambda *_: self._toggle_tag(name))
+            self._tag_buttons[name] = b
+            self.tag_row.add_widget(b)
+        self._paint_tag(name)
+
+    def _toggle_tag(self, name: str):
+        self._tags[name] = not self._tags[name]
+        self._paint_tag(name)
+
+    def _paint_tag(self, name: str):
+        self._tag_buttons[name].md_bg_color = (0.12, 0.65, 0.25, 0.18) if self._tags[name] else (0, 0, 0, 0)
+
+    def _add_tag(self, text: str):
+        name = text.strip().lstrip("#").strip()
+        if name:
+            self._tag_chip(name, selected=True)
+        self.tag_input.text = ""
+
+    def _open_photo_picker(self):
+        from kivy.uix.filechooser import FileChooserIconView
+        mv = ModalView(size_hint=(0.95, 0.9))
+        box = MDBoxLayout(orientation="vertical", md_bg_color=(1, 1, 1, 1))
+        chooser = FileChooserIconView(path=str(Path.home()), multiselect=True,
+                                      filters=["*.jpg", "*.jpeg", "*.png", "*.webp"])
+        box.add_widget(chooser)
+        actions = MDBoxLayout(orientation="horizontal", size_hint_y=None, height=dp(48), padding=(dp(8), 0))
+        actions.add_widget(MDFlatButton(text="Cancel", on_release=lambda *_: mv.dismiss()))
+        actions.add_widget(MDRaisedButton(text="OK", on_release=lambda *_: (self._add_photos(chooser.selection),
+                                                                               mv.dismiss())))
+        box.add_widget(actions)
+        mv.add_widget(box)
+        mv.open()
+
+    def _add_photos(self, paths):
+        for p in paths:
+            if p not in self._photos:
+                self._photos.append(p)
+        if self._photos:
+            self.lbl_photos.text = _t("PHOTOS", count=len(self._photos))
+
     def _build_line(self, icon: str, text: str) -> MDBoxLayout:
         row = MDBoxLayout(orientation="horizontal", size_hint_y=None, height=dp(52),
                           padding=(dp(16), 0))
@@ -295,10 +362,12 @@ class TxDetailScreen(Screen):
         payload = {
             "type": self._ctx.get("type", "expense"),
             "currency": self._currency["code"],
-            "amount": float(self.calc._to_float(self.calc.buffer)),
+            "amount": self.calc._to_decimal(self.calc.buffer),
             "category_path": self._ctx.get("category_path"),
             "memo": self.memo.text or "",
             "include": bool(self.include_switch.active),
+            "tags": [name for name, on in self._tags.items() if on],
+            "photos": list(self._photos),
         }
         try:
             if callable(self._on_submit_cb):
@@ -382,8 +451,5 @@ class TxDetailScreen(Screen):
         rect.size = widget.size
         rect.pos = widget.pos
 
-    def _fmt_amount(self, v: float) -> str:
-        s = f"{v:.{self.calc.decimals}f}"
-        if float(s) == 0.0:
-            s = f"{0:.{self.calc.decimals}f}"
-        return s
+    def _fmt_amount(self, v: Decimal) -> str:
+        return self.calc._fmt_amount(v)
@@ -1,7 +1,8 @@
 # features/add/tabs/manual/view.py
 from __future__ import annotations
 
-from typing import Any, Dict, Callable
+from decimal import Decimal
+from typing import Any, Dict, Callable, List
 
 from kivy.core.window import Window
 from kivy.metrics import dp, sp
@@ -18,6 +19,9 @@ from kivymd.uix.menu import MDDropdownMenu
 
 from ..tab_base import AddTabBase
 from core.i18n import t as _t
+from core.money import to_decimal
+from data.dao import CategoryDao
+from data.executor import get_executor
 
 # 若你仍把 ManualCalc 放在本資料夾的 logic.py，這行可維持；若已搬到 core，可改成 from core.calc.manual_calc import ManualCalc
 from .logic import ManualCalc
@@ -31,19 +35,26 @@ from .tx_detail.screen_tx_detail import TxDetailScreen
 
 class ManualTab(AddTabBase):
     """
-    手動輸入：4x4 鍵盤 + 覆蓋 NEXT/=，左下 Category 固定依模式顯示圖示與文字（不被選擇結果覆蓋）
+    手動輸入：4x4 鍵盤 + 覆蓋 NEXT/=；左下 Category 顯示目前的類別——
+    使用者沒選時為建議模型的第一名（依金額 / 幣別 / 模式 / 時間，見 domain.suggest），選過就以選的為準
     """
 
     # ─────────────────────────────── init ───────────────────────────────
-    def __init__(self, record_expense: Callable[[float, int], None] | None, **kwargs):
+    def __init__(self, record_expense: Callable[..., Any] | None, usecases=None, **kwargs):
         super().__init__(title=_t("ADD_TAB_MANUAL"), **kwargs)
         self._record_expense_cb = record_expense
+        self.usecases = usecases
 
         # 狀態
         self._mode = "expense"                  # expense | income | transfer
         self._currency = dict(CURRENCIES[0])    # e.g. {"code":"JPY","symbol":"¥","decimals":0}
         self.calc = ManualCalc(decimals=self._currency.get("decimals", 0))
-        self._selected_category: Dict[str, Any] | None = None  # 僅記錄，不改左下 chip
+        self._selected_category: Dict[str, Any] | None = None  # 選定或建議的類別
+        self._picked = False                     # 使用者自己選過類別（不再被建議覆蓋）
+        self._categories: List[Dict[str, Any]] = []
+        self._suggested: List[int] = []
+        # 金額輸入停下來才重算建議
+        self._suggest_trigger = Clock.create_trigger(self._suggest, 0.3)
 
         # Root
         self._root = MDBoxLayout(orientation="vertical", padding=dp(12), spacing=dp(8))
@@ -150,10 +161,11 @@ class ManualTab(AddTabBase):
         self.currency_chip.set_currency(code, symbol)
         self.calc.decimals = cur.get("decimals", 0)
         # 以新位數重排 buffer
-        self.calc.buffer = self._fmt_amount(self.calc._to_float(self.calc.buffer))
+        self.calc.buffer = self._fmt_amount(self.calc._to_decimal(self.calc.buffer))
         self._render()
         if hasattr(self, "currency_menu"):
             self.currency_menu.dismiss()
+        self._suggest_trigger()
 
     # ─────────────────────────── layout helpers ─────────────────────────
     def _relayout(self, *_):
@@ -180,6 +192,7 @@ class ManualTab(AddTabBase):
     # ────────────────────────── mode & visuals ─────────────────────────
     def _set_mode(self, m: str):
         self._mode = m
+        self._suggest_trigger()
 
         ACTIVE_BG  = self.theme_cls.primary_color
         ACTIVE_TXT = (1, 1, 1, 1)
@@ -227,6 +240,7 @@ class ManualTab(AddTabBase):
 
     def _refresh_amount_label(self):
         self.lbl_amount.text = self.calc.buffer
+        self._suggest_trigger()
 
     def _on_next_pressed(self, *_):
         # 在等號模式：先完成計算，但維持鍵上的字是 "="；不進下一步
@@ -263,7 +277,7 @@ class ManualTab(AddTabBase):
         ctx = {
             "type": self._mode,  # expense | income | transfer
             "currency": self._currency["code"],
-            "amount": abs(self.calc._to_float(self.calc.buffer)),
+            "amount": abs(self.calc._to_decimal(self.calc.buffer)),
             "category_path": (self._selected_category or {}).get("name", "Expense > Category"),
         }
 
@@ -275,15 +289,23 @@ class ManualTab(AddTabBase):
         def _on_submit(payload: dict):
             # 你的提交邏輯
             if callable(self._record_expense_cb):
-                sign = -1 if payload.get("type") == "expense" else 1
-                final = sign * float(payload.get("amount", 0) or 0)
-                self._record_expense_cb(final, category_id=(self._selected_category or {}).get("id", 1))
+                # 金額一律正值，收支方向由 tx_type 決定（餘額 / 彙總觸發器依 type 計算正負）
+                self._record_expense_cb(
+                    abs(to_decimal(payload.get("amount", 0) or 0)),
+                    category_id=(self._selected_category or {}).get("id"),
+                    currency=payload.get("currency") or self._currency["code"],
+                    tx_type=payload.get("type") or self._mode,
+                    note=payload.get("memo") or None,
+                    tags=payload.get("tags") or None,
+                    photos=payload.get("photos") or None,
+                )
 
             # 回到 Manual 並重置
             self.calc.reset()
             self.keypad.highlight_op(None)
             self.keypad.set_equals_mode(False)
             self._render()
+            self._reset_category()
 
             mv.dismiss()
 
@@ -292,33 +314,65 @@ class ManualTab(AddTabBase):
         mv.add_widget(screen)
         mv.open()
 
-    # ─────────────────────── category picker (不改左下文字/圖示) ──────────
+    # ─────────────────────── category suggestion ───────────────────────
+    def _suggest(self, *_):
+        """在 DB 執行緒上依目前的模式 / 金額 / 幣別算建議類別；使用者選過就不再覆蓋。"""
+        if self.usecases is None or self._picked:
+            return
+        amount = abs(self.calc._to_decimal(self.calc.buffer))
+        get_executor().call(self._load_suggestion, self._mode, amount, self._currency["code"],
+                            key=f"manual.suggest.{id(self)}", on_result=self._apply_suggestion)
+
+    def _load_suggestion(self, mode: str, amount: Decimal, currency: str) -> Dict[str, Any]:
+        # DB 執行緒
+        return {"categories": CategoryDao().all(),
+                "suggested": self.usecases.suggest_categories(mode, amount, currency)}
+
+    def _apply_suggestion(self, res: Dict[str, Any]):
+        self._categories = res["categories"]
+        self._suggested = res["suggested"]
+        if self._picked:
+            return
+        by_id = {c["id"]: c for c in self._categories}
+        top = next((by_id[i] for i in self._suggested if i in by_id), None)
+        self._selected_category = top
+        self.keypad.set_category(top["name"] if top else _t("CATEGORY"), (top or {}).get("icon"))
+
+    def _reset_category(self):
+        self._picked = False
+        self._selected_category = None
+        self.keypad.set_category(_t("CATEGORY"))
+        self._suggest_trigger()
+
+    # ─────────────────────── category picker ──────────────────────────
     def _open_category_picker(self, *_):
-        # demo data
-        cats = [
-            {"id": 1, "name": "Groceries", "icon": "silverware-fork-knife",
-             "color": (0.28, 0.68, 0.38, 1), "subtitle": "Food, drink, snacks, etc."},
-            {"id": 2, "name": "Transport", "icon": "cart",
-             "color": (0.20, 0.52, 0.92, 1), "subtitle": "Bus, taxi, flights, etc."},
-            {"id": 3, "name": "Hobby", "icon": "music",
-             "color": (1, 0.6, 0.2, 1), "subtitle": "Games, comics, books, music"},
-        ]
-        recents = [1, 2, 3]
+        if not self._categories:
+            # 還沒載入過類別：先在 DB 執行緒讀，回來再開
+            def _loaded(cats):
+                self._categories = cats
+                self._show_category_picker()
+            get_executor().call(CategoryDao().all, key=f"manual.categories.{id(self)}", on_result=_loaded)
+            return
+        self._show_category_picker()
 
+    def _show_category_picker(self):
         from kivy.uix.modalview import ModalView
         mv = ModalView(size_hint=(1, 1), auto_dismiss=False,
                     background="", background_color=(0, 0, 0, 0.45))
 
         def _on_pick(cat):
-            # 只記錄選到的分類，不改左下 chip 的文字/圖示
+            # 使用者選的類別優先於建議，直到這筆送出
             self._selected_category = cat
+            self._picked = True
+            self.keypad.set_category(cat.get("name") or _t("CATEGORY"), cat.get("icon"))
             mv.dismiss()
 
         screen = CategorySelectScreen(
             name="category_select",
             on_pick=_on_pick,
-            categories=cats,
-            recents=recents,
+            categories=self._categories,
+            suggested=self._suggested,
+            selected=(self._selected_category or {}).get("id"),
         )
 
         # 讓左上返回箭頭能關閉 ModalView（不用 ScreenManager）
@@ -337,23 +391,24 @@ class ManualTab(AddTabBase):
         if self.calc.op is not None and self.calc.left is not None:
             self.calc.equals()
 
-        amount = abs(self.calc._to_float(self.calc.buffer))
-        sign = -1 if self._mode == "expense" else 1
-        final = amount * sign
+        amount = abs(self.calc._to_decimal(self.calc.buffer))
 
         if callable(self._record_expense_cb):
-            # 若你的 usecase/DAO 支援幣別／類別，可把 self._currency["code"] 與 self._selected_category 一起傳下去
-            self._record_expense_cb(final, category_id=(self._selected_category or {}).get("id", 1))
+            # 金額一律正值，收支方向由 tx_type 決定
+            self._record_expense_cb(
+                amount,
+                category_id=(self._selected_category or {}).get("id"),
+                currency=self._currency["code"],
+                tx_type=self._mode,
+            )
 
         # 重置狀態 / 視覺
         self.calc.reset()
         self.keypad.highlight_op(None)
         self.keypad.set_equals_mode(False)
         self._render()
+        self._reset_category()
 
     # ──────────────────────────── utils ────────────────────────────────
-    def _fmt_amount(self, v: float) -> str:
-        s = f"{v:.{self.calc.decimals}f}"
-        if float(s) == 0.0:
-            s = f"{0:.{self.calc.decimals}f}"
-        return s
+    def _fmt_amount(self, v: Decimal) -> str:
+        return self.calc._fmt_amount(v)
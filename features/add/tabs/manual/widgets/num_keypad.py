@@ -217,6 +217,13 @@ class NumKeypad(FloatLayout):
         # 等下一幀再依新的 overlay 尺寸重算一次
         self._size_next_button()
 
+    def set_category(self, text: str, icon: str | None = None):
+        """左下類別格顯示目前選定（或建議）的類別；沒有類別格時不做事。"""
+        if hasattr(self, "cat_chip"):
+            self.cat_chip.set_text(text)
+            if icon:
+                self.cat_chip.set_icon(icon)
+
     def highlight_op(self, symbol: str | None):
         """圓形高亮運算子；symbol=None 取消全部。"""
         for sym, widget in self.op_widgets.items():
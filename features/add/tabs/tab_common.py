@@ -1,4 +1,5 @@
 from __future__ import annotations
+from decimal import Decimal, InvalidOperation
 from kivy.uix.scrollview import ScrollView
 from kivymd.uix.list import MDList, OneLineListItem
 from kivymd.uix.button import MDRaisedButton, MDFlatButton
@@ -6,7 +7,9 @@ from kivymd.uix.textfield import MDTextField
 from kivymd.uix.label import MDLabel
 from kivymd.uix.boxlayout import MDBoxLayout
 from data.dao import TxDao
+from data.executor import get_executor
 from core.i18n import t
+from core.money import format_minor, from_minor
 from .tab_base import AddTabBase
 
 class CommonTab(AddTabBase):
@@ -39,9 +42,17 @@ class CommonTab(AddTabBase):
         btn_recent.on_release = lambda *_: self._load_recent()
         self._load_freq()
 
+    def _loading(self):
+        self.list.clear_widgets()
+        self.list.add_widget(OneLineListItem(text=t("LOADING")))
+
     def _load_freq(self):
+        self._loading()
+        # Frequent / Recent 共用 key：快速切換時只有最後一個會填進清單
+        get_executor().call(self.dao.top_categories, limit=12, key="add.common", on_result=self._fill_freq)
+
+    def _fill_freq(self, rows):
         self.list.clear_widgets()
-        rows = self.dao.top_categories(limit=12)
         if not rows:
             self.list.add_widget(OneLineListItem(text=t("NO_DATA"))); return
         for r in rows:
@@ -49,12 +60,15 @@ class CommonTab(AddTabBase):
             self.list.add_widget(OneLineListItem(text=text, on_release=lambda _w, r=r: self._choose(r)))
 
     def _load_recent(self):
+        self._loading()
+        get_executor().call(self.dao.latest, limit=15, key="add.common", on_result=self._fill_recent)
+
+    def _fill_recent(self, rows):
         self.list.clear_widgets()
-        rows = self.dao.latest(limit=15)
         if not rows:
             self.list.add_widget(OneLineListItem(text=t("NO_DATA"))); return
         for r in rows:
-            text = f"{r['date']}  {r['category']}  {r['amount']} {r['currency']}"
+            text = f"{r['date']}  {r['category']}  {format_minor(r['amount'], r['currency'])} {r['currency']}"
             self.list.add_widget(OneLineListItem(text=text, on_release=lambda _w, r=r: self._duplicate(r)))
 
     def _choose(self, row: dict):
@@ -63,14 +77,16 @@ class CommonTab(AddTabBase):
 
     def _on_add(self):
         try:
-            amt = float(self.amount.text)
-        except Exception:
+            amt = Decimal(self.amount.text)
+        except (InvalidOperation, TypeError, ValueError):
+            return
+        if not amt.is_finite():  # "NaN" / "Infinity" 也解析得過
             return
-        cat_id = self._sel.get("id") or 1
-        self.record_expense(amt, cat_id)
+        self.record_expense(amt, self._sel.get("id"))
         self.amount.text = ""
         self._sel = {"id": None, "name": "-"}
         self.selected.text = t("SELECTED_CATEGORY", name="-")
 
     def _duplicate(self, row: dict):
-        self.record_expense(float(row["amount"]), row.get("category_id") or 1)
+        self.record_expense(from_minor(row["amount"], row["currency"]), row.get("category_id"),
+                            currency=row["currency"])
@@ -1,32 +1,187 @@
 # features/add/tabs/tab_invoice.py
 from __future__ import annotations
+from pathlib import Path
 
+from kivy.uix.filechooser import FileChooserIconView
+from kivy.uix.modalview import ModalView
+from kivy.uix.scrollview import ScrollView
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDRaisedButton, MDFlatButton
+from kivymd.uix.list import MDList, OneLineAvatarListItem, OneLineListItem
+from kivymd.uix.textfield import MDTextField
 
 from core.i18n import t
+from core.money import format_minor
+from data.executor import get_executor
+from domain.ocr import IMAGE_SUFFIXES
+from ui.widgets.sparkline import PriceTrend
+from ui.widgets.thumb import ThumbLeftWidget
 from .tab_base import AddTabBase
 
 
 class InvoiceTab(AddTabBase):
-    def __init__(self, record_expense, **kwargs):
+    """
+    收據 OCR：選圖片或整個資料夾 → 背景辨識（usecases.ocr.start）→ 列出抽到的欄位。
+    點一筆以該收據記一筆支出；「全部新增」整批寫入（usecases.add_receipts，在 DB 執行緒上）。
+    「匯入載具發票」讀財政部電子發票平台的匯出 CSV（usecases.import_einvoice），不需要 OCR。
+    上方的品名欄位查匯入過的品項價格走勢（PriceTrend）。
+    「對獎」選本機的中獎號碼檔，對所有已存的發票（usecases.check_lottery），列出中獎的發票。
+    """
+    def __init__(self, record_expense, usecases=None, **kwargs):
         # title 會顯示在 MDTabs 的 tab 標籤
-        super().__init__(title=t("ADD_TAB_INVOICE") or "Invoice", **kwargs)
+        super().__init__(title=t("ADD_TAB_INVOICE") or "Invoice", record_expense=record_expense, **kwargs)
+        self.usecases = usecases
         self.spacing = 12
         self.padding = [0, 0, 0, 0]
+        self._results: list = []
+        self._cancel = None   # 進行中掃描的取消 Event
 
-        # 內容
-        self.add_widget(
-            MDLabel(
-                text="Camera / OCR pipeline will be added later.",
-                halign="center",
-            )
+        ocr = getattr(usecases, "ocr", None)
+        self.status = MDLabel(
+            text=t("OCR_HINT") if ocr is not None and ocr.available else t("OCR_UNAVAILABLE"),
+            halign="center", size_hint_y=None, height=48,
         )
+        self.add_widget(self.status)
+
+        self.item_input = MDTextField(hint_text=t("ITEM_PRICE"), size_hint_y=None, height=48)
+        self.item_input.bind(on_text_validate=lambda inst: self.trend.show(inst.text))
+        self.add_widget(self.item_input)
+        self.trend = PriceTrend(padding=[12, 0, 12, 0])
+        self.add_widget(self.trend)
+
+        sv = ScrollView()
+        self.list = MDList()
+        sv.add_widget(self.list)
+        self.add_widget(sv)
 
         btn_row = MDBoxLayout(size_hint_y=None, height=48, spacing=12, padding=[12, 0, 12, 0])
-        btn_row.add_widget(MDRaisedButton(text=t("SELECT_IMAGE") or "Select Image (stub)",
-                                          on_release=lambda *_: None))
-        btn_row.add_widget(MDFlatButton(text=t("SCAN_OCR") or "Scan (OCR - later)",
-                                        on_release=lambda *_: None))
+        btn_row.add_widget(MDRaisedButton(text=t("SELECT_IMAGE"), on_release=lambda *_: self._pick(folder=False)))
+        btn_row.add_widget(MDFlatButton(text=t("SCAN_OCR"), on_release=lambda *_: self._pick(folder=True)))
+        self.btn_add_all = MDFlatButton(text=t("ADD_ALL"), disabled=True, on_release=lambda *_: self._add_all())
+        btn_row.add_widget(self.btn_add_all)
+        btn_row.add_widget(MDFlatButton(text=t("IMPORT_EINVOICE"), on_release=lambda *_: self._pick_einvoice()))
+        btn_row.add_widget(MDFlatButton(text=t("CHECK_LOTTERY"), on_release=lambda *_: self._pick_lottery()))
         self.add_widget(btn_row)
+
+    # ───── 選檔 ─────
+    def _pick(self, folder: bool):
+        ocr = getattr(self.usecases, "ocr", None)
+        if ocr is None or not ocr.available:
+            self.status.text = t("OCR_UNAVAILABLE")
+            return
+        self._choose([f"*{s}" for s in sorted(IMAGE_SUFFIXES)], folder, self._scan)
+
+    def _pick_einvoice(self):
+        if self.usecases is None:
+            return
+        self._choose(["*.csv", "*.CSV", "*.txt"], False, lambda paths: self._import_einvoice(paths[0]))
+
+    def _pick_lottery(self):
+        if self.usecases is None:
+            return
+        self._choose(["*.txt", "*.json", "*.csv"], False, lambda paths: self._check_lottery(paths[0]))
+
+    def _choose(self, filters, folder: bool, on_paths):
+        mv = ModalView(size_hint=(0.95, 0.9))
+        box = MDBoxLayout(orientation="vertical", md_bg_color=(1, 1, 1, 1))
+        chooser = FileChooserIconView(path=str(Path.home()), multiselect=not folder, dirselect=folder,
+                                      filters=filters)
+        box.add_widget(chooser)
+        actions = MDBoxLayout(size_hint_y=None, height=48, padding=[8, 0, 8, 0], spacing=8)
+        actions.add_widget(MDFlatButton(text="Cancel", on_release=lambda *_: mv.dismiss()))
+
+        def ok(*_):
+            # 資料夾模式沒選東西時掃目前所在的資料夾
+            paths = chooser.selection or ([chooser.path] if folder else [])
+            mv.dismiss()
+            if paths:
+                on_paths(paths)
+
+        actions.add_widget(MDRaisedButton(text="OK", on_release=ok))
+        box.add_widget(actions)
+        mv.add_widget(box)
+        mv.open()
+
+    # ───── 掃描 ─────
+    def _scan(self, paths):
+        if self._cancel is not None:
+            self._cancel.set()
+        self._results = []
+        self.list.clear_widgets()
+        self.btn_add_all.disabled = True
+        self.status.text = t("LOADING")
+        self._cancel = self.usecases.ocr.start(
+            paths, on_progress=self._on_progress, on_done=self._on_done,
+            on_error=lambda e: setattr(self.status, "text", str(e)),
+        )
+
+    def _on_progress(self, p):
+        self.status.text = t("OCR_PROGRESS", done=p["done"], total=p["total"])
+
+    def _on_done(self, results):
+        self._cancel = None
+        self._results = results
+        self.list.clear_widgets()
+        for r in results:
+            item = OneLineAvatarListItem(text=self._describe(r), on_release=lambda _w, r=r: self._record_one(r))
+            if r["key"]:
+                item.add_widget(ThumbLeftWidget(ref=r["key"]))
+            self.list.add_widget(item)
+        self.btn_add_all.disabled = not any(r["total"] is not None for r in results)
+
+    @staticmethod
+    def _describe(r) -> str:
+        if r["error"]:
+            return f"{Path(r['path']).name}  ⚠ {r['error']}"
+        parts = [r["date"] or "----------", r["merchant"] or Path(r["path"]).name]
+        if r["total"] is not None:
+            parts.append(f"{r['total']} {r['currency'] or ''}".strip())
+        if r["invoice_no"]:
+            parts.append(r["invoice_no"])
+        return "  ".join(parts)
+
+    # ───── 記帳 ─────
+    def _record_one(self, r):
+        if r["total"] is None or not callable(self.record_expense):
+            return
+        kwargs = {"note": r["merchant"] or r["invoice_no"], "photos": [r["path"]]}
+        if r["currency"]:
+            kwargs["currency"] = r["currency"]
+        self.record_expense(r["total"], None, **kwargs)
+
+    def _add_all(self):
+        self.btn_add_all.disabled = True
+        get_executor().call(self.usecases.add_receipts, self._results, key="add.invoice",
+                            on_result=lambda n: setattr(self.status, "text", t("RECEIPTS_ADDED", count=n)))
+
+    def _import_einvoice(self, path):
+        self.status.text = t("LOADING")
+
+        def done(stats):
+            self.status.text = t("EINVOICE_IMPORTED", count=stats["inserted"], duplicates=stats["duplicates"])
+
+        get_executor().call(self.usecases.import_einvoice, path, key="add.einvoice", on_result=done,
+                            on_error=lambda e: setattr(self.status, "text", str(e)))
+
+    def _check_lottery(self, path):
+        self.status.text = t("LOADING")
+        get_executor().call(self.usecases.check_lottery, path, key="add.lottery", on_result=self._on_lottery,
+                            on_error=lambda e: setattr(self.status, "text", str(e)))
+
+    def _on_lottery(self, results):
+        if not results:
+            self.status.text = t("LOTTERY_NO_PERIOD")
+            return
+        self.status.text = "\n".join(
+            t("LOTTERY_RESULT", period=r["period"], winners=len(r["winners"]), checked=r["checked"],
+              total=format_minor(r["total_prize"], "TWD"))
+            for r in results
+        )
+        self._results = []
+        self.btn_add_all.disabled = True
+        self.list.clear_widgets()
+        for r in results:
+            for w in r["winners"]:
+                text = f"{w['invoice_no']}  {t('PRIZE_' + w['tier'].upper())}  {format_minor(w['prize'], 'TWD')}"
+                self.list.add_widget(OneLineListItem(text=f"{text}  {w['merchant'] or ''}".rstrip()))
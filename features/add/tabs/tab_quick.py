@@ -1,4 +1,5 @@
 from __future__ import annotations
+from decimal import Decimal, InvalidOperation
 from kivymd.uix.button import MDRaisedButton
 from kivymd.uix.textfield import MDTextField
 from kivymd.uix.boxlayout import MDBoxLayout
@@ -15,7 +16,7 @@ class QuickTab(AddTabBase):
         for amt in (50, 100, 150, 200, 300):
             chips.add_widget(
                 MDRaisedButton(text=str(amt),
-                               on_release=lambda _w, a=amt: self.record_expense(float(a), 1))
+                               on_release=lambda _w, a=amt: self.record_expense(Decimal(a), None))
             )
         self.add_widget(chips)
 
@@ -27,8 +28,10 @@ class QuickTab(AddTabBase):
 
     def _on_add(self):
         try:
-            amt = float(self.amount.text)
-        except Exception:
+            amt = Decimal(self.amount.text)
+        except (InvalidOperation, TypeError, ValueError):
             return
-        self.record_expense(amt, 1)
+        if not amt.is_finite():  # "NaN" / "Infinity" 也解析得過
+            return
+        self.record_expense(amt, None)
         self.amount.text = ""
@@ -1,14 +1,41 @@
 # features/analysis/screen_analysis.py
 from __future__ import annotations
+from datetime import date
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.label import MDLabel
+from kivy.uix.scrollview import ScrollView
+from kivymd.uix.list import MDList, OneLineListItem
+from core.i18n import t
+from core.money import format_minor
+from data.dao import RollupDao
+from data.executor import get_executor
 
 class AnalysisScreen(MDScreen):
+    """近 12 個月各類別支出；只讀 RollupMonth，不掃整本帳。"""
     name = "analysis"
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         box = MDBoxLayout(orientation="vertical")
-        box.add_widget(MDLabel(text="分析 (V1 佔位)", halign="center"))
+        sv = ScrollView()
+        self.lst = MDList()
+        sv.add_widget(self.lst)
+        box.add_widget(sv)
         self.add_widget(box)
+
+    def on_pre_enter(self, *args):
+        self.lst.clear_widgets()
+        self.lst.add_widget(OneLineListItem(text=t("LOADING")))
+        today = date.today()
+        y, m = divmod(today.year * 12 + today.month - 1 - 11, 12)
+        start = f"{y:04d}-{m + 1:02d}"
+        get_executor().call(RollupDao().totals, grain="month", start=start, end=today.strftime("%Y-%m"),
+                            key="analysis", on_result=self._fill)
+
+    def _fill(self, rows):
+        self.lst.clear_widgets()
+        if not rows:
+            self.lst.add_widget(OneLineListItem(text=t("NO_DATA"))); return
+        for r in rows:
+            text = f"{r['period']}  {r['category'] or '-'}  {format_minor(r['total'], r['currency'])} {r['currency']}  (x{r['cnt']})"
+            self.lst.add_widget(OneLineListItem(text=text))
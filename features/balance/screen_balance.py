@@ -2,7 +2,10 @@ from __future__ import annotations
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.datatables import MDDataTable
 from kivy.metrics import dp
+from core.money import format_minor
+from core.i18n import t
 from data.dao import BalanceDao
+from data.executor import get_executor
 
 class BalanceScreen(MDScreen):
     name = "balance"
@@ -17,5 +20,12 @@ class BalanceScreen(MDScreen):
         self.add_widget(self.tbl)
 
     def on_pre_enter(self, *args):
-        rows = [(str(r['id']), r['name'], f"{r['balance']:.2f}") for r in BalanceDao().balances()]
+        self.tbl.update_row_data(None, [("", t("LOADING"), "")])
+        get_executor().call(BalanceDao().balances, key="balance", on_result=self._fill)
+
+    def _fill(self, balances):
+        rows = [
+            (str(r['id']), r['name'], f"{format_minor(r['balance'], r['currency'])} {r['currency']}")
+            for r in balances
+        ]
         self.tbl.update_row_data(None, rows)
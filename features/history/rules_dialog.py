@@ -0,0 +1,142 @@
+# features/history/rules_dialog.py
+from __future__ import annotations
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from kivy.uix.modalview import ModalView
+from kivy.uix.scrollview import ScrollView
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.button import MDFlatButton, MDRaisedButton
+from kivymd.uix.label import MDLabel
+from kivymd.uix.list import MDList, OneLineListItem
+from kivymd.uix.menu import MDDropdownMenu
+from kivymd.uix.textfield import MDTextField
+
+from core.i18n import t
+from core.money import format_minor, to_minor
+from data.dao import CategoryDao, RuleDao
+from data.executor import get_executor
+
+FIELDS = ("any", "merchant", "note")
+
+
+class RulesDialog(ModalView):
+    """
+    自動分類規則的列表與新增：關鍵字（| 分隔）、比對欄位、金額區間 → 類別。
+    點一條規則刪除；「套用到歷史」把規則補到沒有類別的交易（usecases.reapply_rules，在 DB 執行緒上）。
+    """
+    def __init__(self, usecases=None, currency: str = "TWD", **kwargs):
+        super().__init__(size_hint=(0.95, 0.9), **kwargs)
+        self.usecases = usecases
+        self.currency = currency
+        self.dao = RuleDao()
+        self._category: Optional[Dict[str, Any]] = None
+        self._field = 0
+
+        box = MDBoxLayout(orientation="vertical", md_bg_color=(1, 1, 1, 1), padding=[12, 12, 12, 12], spacing=8)
+        self.status = MDLabel(text=t("RULES"), size_hint_y=None, height=32)
+        box.add_widget(self.status)
+
+        sv = ScrollView()
+        self.list = MDList()
+        sv.add_widget(self.list)
+        box.add_widget(sv)
+
+        self.keywords = MDTextField(hint_text=t("RULE_KEYWORDS"), size_hint_y=None, height=48)
+        box.add_widget(self.keywords)
+        amounts = MDBoxLayout(size_hint_y=None, height=48, spacing=8)
+        self.min_amount = MDTextField(hint_text=t("RULE_MIN_AMOUNT"), input_filter="float")
+        self.max_amount = MDTextField(hint_text=t("RULE_MAX_AMOUNT"), input_filter="float")
+        amounts.add_widget(self.min_amount)
+        amounts.add_widget(self.max_amount)
+        box.add_widget(amounts)
+
+        row = MDBoxLayout(size_hint_y=None, height=48, spacing=8)
+        self.btn_field = MDFlatButton(text=t("RULE_FIELD_" + FIELDS[0].upper()), on_release=lambda *_: self._next_field())
+        self.btn_category = MDFlatButton(text=t("RULE_CATEGORY"), on_release=lambda *_: self._open_categories())
+        row.add_widget(self.btn_field)
+        row.add_widget(self.btn_category)
+        row.add_widget(MDRaisedButton(text=t("ADD"), on_release=lambda *_: self._add()))
+        box.add_widget(row)
+
+        actions = MDBoxLayout(size_hint_y=None, height=48, spacing=8)
+        actions.add_widget(MDFlatButton(text=t("RULES_REAPPLY"), on_release=lambda *_: self._reapply()))
+        actions.add_widget(MDFlatButton(text="Close", on_release=lambda *_: self.dismiss()))
+        box.add_widget(actions)
+        self.add_widget(box)
+
+        self._menu: Optional[MDDropdownMenu] = None
+        get_executor().call(CategoryDao().all, key="rules.categories", on_result=self._build_menu)
+        self._reload()
+
+    # ───── 列表 ─────
+    def _reload(self):
+        get_executor().call(self.dao.all, key="rules.list", on_result=self._fill)
+
+    def _fill(self, rules):
+        self.list.clear_widgets()
+        if not rules:
+            self.list.add_widget(OneLineListItem(text=t("NO_DATA")))
+        for r in rules:
+            self.list.add_widget(OneLineListItem(text=self._describe(r),
+                                                 on_release=lambda _w, r=r: self._delete(r["id"])))
+
+    @staticmethod
+    def _describe(r) -> str:
+        parts = [r["keywords"] or "*"]
+        if r["field"] != "any":
+            parts.append(f"({t('RULE_FIELD_' + r['field'].upper())})")
+        cur = r["currency"] or ""
+        if r["min_amount"] is not None or r["max_amount"] is not None:
+            lo = format_minor(r["min_amount"], cur or "TWD") if r["min_amount"] is not None else ""
+            hi = format_minor(r["max_amount"], cur or "TWD") if r["max_amount"] is not None else ""
+            parts.append(f"{lo}–{hi} {cur}".strip())
+        return f"{' '.join(parts)}  →  {r['category'] or r['category_id']}"
+
+    # ───── 新增 / 刪除 ─────
+    def _build_menu(self, categories):
+        items = [{"text": c["name"], "on_release": lambda c=c: self._pick_category(c)} for c in categories]
+        self._menu = MDDropdownMenu(caller=self.btn_category, items=items, width_mult=4)
+
+    def _open_categories(self):
+        if self._menu is not None:
+            self._menu.open()
+
+    def _pick_category(self, c):
+        self._category = c
+        self.btn_category.text = c["name"]
+        if self._menu is not None:
+            self._menu.dismiss()
+
+    def _next_field(self):
+        self._field = (self._field + 1) % len(FIELDS)
+        self.btn_field.text = t("RULE_FIELD_" + FIELDS[self._field].upper())
+
+    def _amount(self, field: MDTextField) -> Optional[int]:
+        try:
+            d = Decimal(field.text) if field.text.strip() else None
+        except InvalidOperation:
+            return None
+        return to_minor(d, self.currency) if d is not None and d.is_finite() else None
+
+    def _add(self):
+        if self._category is None:
+            self.status.text = t("RULE_CATEGORY")
+            return
+        lo, hi = self._amount(self.min_amount), self._amount(self.max_amount)
+        fields: Dict[str, Any] = {"field": FIELDS[self._field]}
+        if lo is not None or hi is not None:
+            fields.update(min_amount=lo, max_amount=hi, currency=self.currency)
+        get_executor().call(self.dao.add, self._category["id"], self.keywords.text, key="rules.add",
+                            on_result=lambda _id: self._reload(), **fields)
+        self.keywords.text = self.min_amount.text = self.max_amount.text = ""
+
+    def _delete(self, rule_id: int):
+        get_executor().call(self.dao.delete, rule_id, key="rules.delete", on_result=lambda _ok: self._reload())
+
+    def _reapply(self):
+        if self.usecases is None:
+            return
+        self.status.text = t("LOADING")
+        get_executor().call(self.usecases.reapply_rules, key="rules.reapply",
+                            on_result=lambda s: setattr(self.status, "text", t("RULES_APPLIED", **s)))
@@ -1,22 +1,120 @@
 from __future__ import annotations
+from kivy.clock import Clock
 from kivymd.uix.screen import MDScreen
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.textfield import MDTextField
 from kivy.uix.scrollview import ScrollView
-from kivymd.uix.list import MDList, OneLineListItem
-from data.dao import TxDao
+from kivymd.uix.button import MDIconButton
+from kivymd.uix.list import MDList, OneLineListItem, OneLineAvatarListItem
+from core.i18n import t
+from core.money import format_minor
+from data.dao import AttachmentDao, TxDao, SearchDao
+from data.executor import get_executor
+from data.rates import in_book_currency
+from data.tagindex import get_tag_index, tag_totals
+from ui.widgets.thumb import ThumbLeftWidget
+from .rules_dialog import RulesDialog
+
+# 輸入停頓這麼久（秒）才真的查詢
+SEARCH_DEBOUNCE = 0.25
 
 class HistoryScreen(MDScreen):
     name = "history"
 
-    def __init__(self, **kwargs):
+    def __init__(self, usecases=None, **kwargs):
         super().__init__(**kwargs)
+        self.usecases = usecases
+        root = MDBoxLayout(orientation="vertical")
+        top = MDBoxLayout(size_hint_y=None, height=48)
+        self.search = MDTextField(hint_text=t("SEARCH_TX"), mode="round", icon_left="magnify")
+        self.search.bind(text=self._on_search_text)
+        top.add_widget(self.search)
+        # 自動分類規則
+        top.add_widget(MDIconButton(icon="auto-fix", on_release=lambda *_: RulesDialog(usecases=self.usecases).open()))
+        root.add_widget(top)
         sv = ScrollView()
         self.lst = MDList()
         sv.add_widget(self.lst)
-        self.add_widget(sv)
+        root.add_widget(sv)
+        self.add_widget(root)
+
+        self._search_ev = None   # 尚未觸發的 debounce 排程
+        self._search_gen = 0     # 每次輸入 +1；舊查詢的結果一律丟棄
 
     def on_pre_enter(self, *args):
         self.lst.clear_widgets()
-        for row in TxDao().latest(100):
-            self.lst.add_widget(
-                OneLineListItem(text=f"{row['date']} {row['type']} {row['amount']} {row['currency']}")
-            )
+        self.lst.add_widget(OneLineListItem(text=t("LOADING")))
+        self._run_search(self._search_gen)
+
+    # ───── as-you-type 檢索 ─────
+    def _on_search_text(self, _inst, text: str):
+        self._search_gen += 1
+        if self._search_ev is not None:
+            self._search_ev.cancel()
+        gen = self._search_gen
+        self._search_ev = Clock.schedule_once(lambda _dt: self._run_search(gen), SEARCH_DEBOUNCE)
+
+    def _run_search(self, gen: int):
+        if gen != self._search_gen:
+            return  # 已被更新的輸入取代
+        text = (self.search.text or "").strip()
+        # 同一個 key：新的查詢會取代還沒回來的舊查詢
+        get_executor().call(self._query, text, key="history",
+                            on_result=lambda result: self._show(result) if gen == self._search_gen else None)
+
+    @staticmethod
+    def _query(text: str):
+        rows, totals = HistoryScreen._rows(text)
+        # 列表縮圖只要每筆的第一個附件；縮圖本身等捲到時才載入
+        first = AttachmentDao().first_of([r["id"] for r in rows])
+        for r in rows:
+            r["attachment"] = first.get(r["id"])
+        return rows, totals
+
+    @staticmethod
+    def _rows(text: str):
+        # 在 DB 執行緒上跑；整批結果一次換算成帳本幣別
+        words = text.split()
+        if words and all(w.startswith("#") and len(w) > 1 for w in words):
+            # 只輸入 "#標籤" 時：以標籤 bitmap 取交集，合計涵蓋所有符合的交易而不只列出的 100 筆
+            index = get_tag_index()
+            ids = index.latest(index.match(all_of=words), 100, book_id=1)
+            rows = TxDao().by_ids(ids)
+            in_book_currency(rows)
+            return rows, tag_totals(all_of=words)
+        if not text:
+            rows = TxDao().latest(100)
+        else:
+            page = SearchDao().search_page(text, limit=100)
+            rows = TxDao().by_ids(page["ids"])
+            totals = in_book_currency(rows)
+            totals["truncated"] = page["truncated"]
+            return rows, totals
+        return rows, in_book_currency(rows)
+
+    def _show(self, result):
+        rows, totals = result
+        cur = totals["currency"]
+        self.lst.clear_widgets()
+        if not rows:
+            self.lst.add_widget(OneLineListItem(text=t("NO_DATA"))); return
+        self.lst.add_widget(OneLineListItem(text=t(
+            "BOOK_TOTALS", currency=cur,
+            expense=format_minor(totals["expense"], cur), income=format_minor(totals["income"], cur),
+        )))
+        if "count" in totals:
+            self.lst.add_widget(OneLineListItem(text=t("TAG_TOTALS", count=totals["count"])))
+        if totals.get("truncated"):
+            self.lst.add_widget(OneLineListItem(text=t("SEARCH_TRUNCATED")))
+        if totals["missing"]:
+            self.lst.add_widget(OneLineListItem(text=t("NO_RATE", codes=", ".join(totals["missing"]))))
+        for row in rows:
+            text = f"{row['date']} {row['type']} {format_minor(row['amount'], row['currency'])} {row['currency']}"
+            if row["currency"] != cur and row["book_amount"] is not None:
+                text += f"  ≈ {format_minor(row['book_amount'], cur)} {cur}"
+            if row["attachment"]:
+                item = OneLineAvatarListItem(text=text)
+                item.add_widget(ThumbLeftWidget(ref=row["attachment"]))
+                self.lst.add_widget(item)
+            else:
+                self.lst.add_widget(OneLineListItem(text=text))
@@ -3,7 +3,11 @@ from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivymd.uix.list import MDList, OneLineListItem
+from core.i18n import t
+from core.money import format_minor
 from data.dao import TxDao
+from data.executor import get_executor
+from data.rates import in_book_currency
 
 class HomeScreen(MDScreen):
     name = "home"
@@ -18,7 +22,29 @@ class HomeScreen(MDScreen):
         self.add_widget(root)
 
     def on_pre_enter(self, *args):
+        # 先畫骨架，查詢丟給 DB 執行緒，結果回來再填
         self.tx_list.clear_widgets()
-        for row in TxDao().latest():
-            text = f"#{row['id']} {row['date']}  {row['type']}  {row['amount']} {row['currency']}  {row['category']}"
+        self.tx_list.add_widget(OneLineListItem(text=t("LOADING")))
+        get_executor().call(self._query, key="home", on_result=self._fill)
+
+    @staticmethod
+    def _query():
+        # 在 DB 執行緒上跑；外幣一併換算成帳本幣別（記憶體內的 RateIndex，不逐筆查 Rate）
+        rows = TxDao().latest()
+        return rows, in_book_currency(rows)
+
+    def _fill(self, result):
+        rows, totals = result
+        cur = totals["currency"]
+        self.tx_list.clear_widgets()
+        self.tx_list.add_widget(OneLineListItem(text=t(
+            "BOOK_TOTALS", currency=cur,
+            expense=format_minor(totals["expense"], cur), income=format_minor(totals["income"], cur),
+        )))
+        if totals["missing"]:
+            self.tx_list.add_widget(OneLineListItem(text=t("NO_RATE", codes=", ".join(totals["missing"]))))
+        for row in rows:
+            text = f"#{row['id']} {row['date']}  {row['type']}  {format_minor(row['amount'], row['currency'])} {row['currency']}  {row['category']}"
+            if row["currency"] != cur and row["book_amount"] is not None:
+                text += f"  ≈ {format_minor(row['book_amount'], cur)} {cur}"
             self.tx_list.add_widget(OneLineListItem(text=text))
@@ -7,6 +7,8 @@ from kivymd.uix.bottomnavigation import MDBottomNavigation, MDBottomNavigationIt
 from core.eventbus import EventBus
 from core.i18n import t   # ← 新增
 from data.db import init_db
+from data.executor import shutdown_executor
+from data.thumbs import shutdown_thumbnails
 from data.seed import seed_if_empty
 from domain.usecases import UseCases
 
@@ -43,7 +45,7 @@ class App(MDApp):
         home = HomeScreen()
         bal = BalanceScreen()
         add = AddScreen(usecases=self.uc, switch_tab=switch_tab)
-        his = HistoryScreen()
+        his = HistoryScreen(usecases=self.uc)
         ana = AnalysisScreen()
 
         # 英文分頁（用 i18n）
@@ -54,6 +56,11 @@ class App(MDApp):
         self._add_tab(tabs, t("TAB_ANALYSIS"), "chart-line", ana)
         return root
 
+    def on_stop(self):
+        # 等 DB 執行緒做完已排入的工作，並在該執行緒上關閉 writer / reader 連線
+        shutdown_executor()
+        shutdown_thumbnails()
+
     def _add_tab(self, tabs: MDBottomNavigation, text: str, icon: str, screen):
         item = MDBottomNavigationItem(name=text, text=text, icon=icon)
         item.add_widget(screen)
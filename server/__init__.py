@@ -0,0 +1,5 @@
+"""同步協定的參考伺服器：每個帳本一個 SQLite 檔，asyncio HTTP 介面。"""
+from __future__ import annotations
+
+from .app import SyncServer  # noqa: F401
+from .store import BookStore  # noqa: F401
@@ -0,0 +1,38 @@
+# server/__main__.py
+"""
+    python -m server [--root sync-data] [--host 127.0.0.1] [--port 8765]
+
+裝置端以 domain.sync.HttpTransport("http://host:port") 連線。
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+from pathlib import Path
+
+from .app import SyncServer
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="LedgerLite sync reference server")
+    ap.add_argument("--root", type=Path, default=Path("sync-data"), help="各帳本 SQLite 檔的目錄")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    async def run() -> None:
+        server = SyncServer(args.root, args.host, args.port)
+        await server.start()
+        print(f"sync server on http://{server.host}:{server.port}  root={args.root}  books={server.store.books()}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
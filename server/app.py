@@ -0,0 +1,135 @@
+# server/app.py
+"""
+同步協定的 asyncio 參考伺服器（HTTP/1.1，只用標準函式庫）。
+
+    POST /sync/<kind>   kind = push / pull / tree / month；body 與回應皆為 codec 編碼的訊息
+    GET  /health        {"books": [...]}（純 JSON，方便監控）
+
+連線預設 keep-alive；協定錯誤回 400、不認得的路徑回 404、body 超過 MAX_BODY 回 413。
+SQLite 的工作全部丟到單一 DB 執行緒（與 app 端的 data.executor 同一個做法），
+事件迴圈只負責收送與壓縮解壓，數百條連線同時推送也不會互搶 writer。
+"""
+from __future__ import annotations
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from domain.sync.codec import SyncError, decode, encode
+from .store import BookStore
+
+MAX_BODY = 16 * 1024 * 1024
+_MAX_HEADERS = 100
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class SyncServer:
+    def __init__(self, root: Path, host: str = "127.0.0.1", port: int = 8765) -> None:
+        self.host = host
+        self.port = port
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync-db")
+        # BookStore 的連線建在 DB 執行緒上，之後也只在那裡用
+        self.store: BookStore = self._executor.submit(BookStore, Path(root)).result()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # port=0 時取實際配到的
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.store.close)
+        self._executor.shutdown(wait=True)
+
+    # ───── HTTP ─────
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload, ctype = await self._route(method, path, body)
+                keep = headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, payload, ctype, keep))
+                await writer.drain()
+                if not keep:
+                    break
+        except _HttpError as e:
+            writer.write(_response(e.status, str(e).encode("utf-8"), "text/plain; charset=utf-8", False))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, str]:
+        loop = asyncio.get_running_loop()
+        if path == "/health":
+            books = await loop.run_in_executor(self._executor, self.store.books)
+            return 200, json.dumps({"books": books}).encode("utf-8"), "application/json"
+        if not path.startswith("/sync/"):
+            return 404, b"not found", "text/plain; charset=utf-8"
+        if method != "POST":
+            return 405, b"POST only", "text/plain; charset=utf-8"
+        kind = path[len("/sync/"):]
+        try:
+            req = decode(body)
+            resp = await loop.run_in_executor(self._executor, self.store.dispatch, kind, req)
+        except (SyncError, KeyError, TypeError, ValueError) as e:
+            return 400, str(e).encode("utf-8"), "text/plain; charset=utf-8"
+        return 200, encode(resp), "application/octet-stream"
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """讀一個請求；對方在請求之間關閉連線時回傳 None。"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _version = line.decode("latin-1").split()
+    except ValueError:
+        raise _HttpError(400, "malformed request line")
+    headers: Dict[str, str] = {}
+    for _ in range(_MAX_HEADERS):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _sep, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise _HttpError(400, "too many headers")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise _HttpError(400, "bad content-length")
+    if length > MAX_BODY:
+        raise _HttpError(413, "body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def _response(status: int, body: bytes, ctype: str, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: {ctype}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
@@ -0,0 +1,150 @@
+# server/store.py
+"""
+BookStore：每個帳本一個 SQLite 檔（root/book-<id>.db，內容同 SyncHub），
+外加 root/index.db 記錄 uid → 帳本，交易換帳本或只帶 uid 的刪除才找得到它在哪。
+
+對外是與 SyncHub 相同的四種請求（push / pull / tree / month），裝置端不必知道分檔：
+- push   依合併後 row 的 book_id 分到各帳本；換帳本時從舊檔移除、寫進新檔
+- pull   游標為各帳本 seq 的組合字串（"1:120,2:5"），依帳本編號依序取完
+- tree / month  請求本來就帶 book，直接轉給該帳本
+
+不是執行緒安全的：由 server.app 固定在單一 DB 執行緒上呼叫。
+"""
+from __future__ import annotations
+import re
+import sqlite3
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from domain.sync.codec import SYNC_BATCH, SyncError
+from domain.sync.merge import merge, normalize
+from domain.sync.server import SyncHub
+
+# 找不到所屬帳本的刪除（伺服器沒看過這個 uid）先放在預設帳本，tombstone 仍會發給其他裝置
+DEFAULT_BOOK = 1
+
+_BOOK_FILE = re.compile(r"^book-(\d+)\.db$")
+
+_INDEX_SQL = """
+CREATE TABLE IF NOT EXISTS Uid (
+    uid TEXT PRIMARY KEY,
+    book_id INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def parse_cursor(cursor: Any) -> Dict[int, int]:
+    """'1:120,2:5' → {1: 120, 2: 5}；0 / 空字串 = 從頭開始。"""
+    if not cursor:
+        return {}
+    try:
+        return {int(b): int(s) for b, s in (part.split(":") for part in str(cursor).split(","))}
+    except ValueError as e:
+        raise SyncError(f"malformed pull cursor: {cursor!r}") from e
+
+
+def format_cursor(seqs: Dict[int, int]) -> str:
+    return ",".join(f"{b}:{s}" for b, s in sorted(seqs.items()))
+
+
+class BookStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.executescript(_INDEX_SQL)
+        self._hubs: Dict[int, SyncHub] = {}
+        self._empty = SyncHub()  # 沒有資料的帳本：讀取請求不必為它建檔
+        for path in sorted(self.root.iterdir()):
+            m = _BOOK_FILE.match(path.name)
+            if m:
+                self.hub(int(m.group(1)))
+
+    def hub(self, book_id: int) -> SyncHub:
+        hub = self._hubs.get(book_id)
+        if hub is None:
+            hub = self._hubs[book_id] = SyncHub(str(self.root / f"book-{book_id}.db"))
+        return hub
+
+    def books(self) -> List[int]:
+        return sorted(self._hubs)
+
+    def dispatch(self, kind: str, req: Dict[str, Any]) -> Dict[str, Any]:
+        handler = {"push": self.push, "pull": self.pull, "tree": self.tree, "month": self.month}.get(kind)
+        if handler is None:
+            raise SyncError(f"unknown sync request: {kind!r}")
+        return handler(req)
+
+    # ───── push ─────
+    def push(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        accepted = 0
+        # 一個請求內每個帳本檔只開一個 transaction（連同 index），全部成功才 commit
+        with ExitStack() as stack:
+            stack.enter_context(self._index)
+            opened: Dict[int, SyncHub] = {}
+
+            def tx(book_id: int) -> SyncHub:
+                if book_id not in opened:
+                    opened[book_id] = self.hub(book_id)
+                    stack.enter_context(opened[book_id].transaction())
+                return opened[book_id]
+
+            for ch in map(normalize, req["changes"]):
+                book = self._book_of(ch["uid"])
+                stored = tx(book).get(ch["uid"]) if book is not None else None
+                merged = merge(stored, ch)
+                if merged == stored:
+                    continue
+                row = merged.get("row")
+                dest = int(row["book_id"]) if row else (book if book is not None else DEFAULT_BOOK)
+                if book is not None and dest != book:
+                    tx(book).drop(ch["uid"])
+                tx(dest).put(merged, req["device"] if merged == ch else "")
+                if dest != book:
+                    self._index.execute(
+                        "INSERT OR REPLACE INTO Uid(uid, book_id) VALUES(?, ?)", (ch["uid"], dest)
+                    )
+                accepted += 1
+        return {"accepted": accepted}
+
+    def _book_of(self, uid: str) -> Optional[int]:
+        row = self._index.execute("SELECT book_id FROM Uid WHERE uid = ?", (uid,)).fetchone()
+        return row[0] if row else None
+
+    # ───── pull ─────
+    def pull(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        seqs = parse_cursor(req.get("since"))
+        limit = max(1, min(int(req.get("limit", SYNC_BATCH)), SYNC_BATCH))
+        changes: List[Dict[str, Any]] = []
+        more = False
+        for book_id in self.books():
+            want = limit - len(changes)
+            if want <= 0:
+                more = True
+                break
+            resp = self._hubs[book_id].pull(
+                {"since": seqs.get(book_id, 0), "limit": want, "device": req["device"]}
+            )
+            changes += resp["changes"]
+            seqs[book_id] = int(resp["next"])
+            if resp["more"]:
+                # 這個帳本還沒取完（被自己推的 change 略過時 changes 可能不足 want）
+                more = True
+                break
+        return {"changes": changes, "next": format_cursor(seqs), "more": more}
+
+    # ───── Merkle ─────
+    def tree(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        return self._hubs.get(int(req["book"]), self._empty).tree(req)
+
+    def month(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        return self._hubs.get(int(req["book"]), self._empty).month(req)
+
+    def close(self) -> None:
+        for hub in self._hubs.values():
+            hub.close()
+        self._empty.close()
+        self._index.close()
@@ -0,0 +1,68 @@
+# tools/bench_bulk_insert.py
+"""
+批次寫入吞吐量：逐筆 insert_tx（每筆一次 commit） vs. UseCases.add_many。
+
+    python -m tools.bench_bulk_insert [--rows 1000000] [--chunk 5000] [--single 5000]
+
+逐筆路徑只跑 --single 筆再換算 rows/s（跑滿 1M 筆要好幾分鐘）。
+"""
+from __future__ import annotations
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from core.eventbus import EventBus, EV_TX_CREATED
+from data.db import init_db
+from data.seed import seed_if_empty
+from data.conn import ConnectionManager
+from data.dao import TxDao
+from domain.usecases import UseCases
+
+
+def _rows(n: int):
+    for i in range(n):
+        yield {
+            "amount": i % 997,  # TWD：主單位 = 最小單位
+            "category_id": 1 + i % 2,
+            "merchant": f"shop-{i % 300}",
+            "date": f"20{15 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00",
+        }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--chunk", type=int, default=5000)
+    ap.add_argument("--single", type=int, default=5000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        dao = TxDao(cm)
+
+        t0 = time.perf_counter()
+        for r in _rows(args.single):
+            dao.insert_tx(1, 1, "expense", r["amount"], "TWD", r["category_id"], 1,
+                          r["merchant"], None, r["date"], r["date"], "bench")
+        single = time.perf_counter() - t0
+
+        events = []
+        bus = EventBus()
+        bus.subscribe(EV_TX_CREATED, events.append)
+        uc = UseCases(bus, txdao=dao)
+        t0 = time.perf_counter()
+        n = uc.add_many(_rows(args.rows), chunk_size=args.chunk)
+        bulk = time.perf_counter() - t0
+        cm.close()
+
+        print(f"insert_tx x{args.single:<9} : {args.single / single:12,.0f} rows/s")
+        print(f"add_many  x{n:<9} : {n / bulk:12,.0f} rows/s  ({bulk:.1f} s, chunk={args.chunk})")
+        print(f"events published   : {len(events)}  {events[-1] if events else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# tools/bench_conn.py
+"""
+Microbenchmark：每次呼叫都重開連線 vs. ConnectionManager 長駐連線。
+
+    python -m tools.bench_conn [--calls 10000] [--rows 1000]
+
+在暫存資料夾建一個 DB，灌 rows 筆交易後，各跑 calls 次 TxDao.latest(20)。
+"""
+from __future__ import annotations
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from data.changelog import NEW_UID_SQL
+from data.db import init_db
+from data.seed import seed_if_empty
+from data.conn import ConnectionManager
+from data.dao import TxDao
+
+
+def _fill(path: Path, rows: int) -> None:
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            f"""
+            INSERT INTO [Transaction](book_id, account_id, type, amount, currency,
+                                      category_id, member_id, date, updated_at, device_id, uid)
+            VALUES (1, 1, 'expense', ?, 'TWD', 1, 1, ?, ?, 'bench', {NEW_UID_SQL})
+            """,
+            ((i % 500, f"2025-01-01T00:{i % 60:02d}:{i % 60:02d}",
+              "2025-01-01T00:00:00") for i in range(rows)),
+        )
+    conn.close()
+
+
+def _per_call(path: Path, calls: int) -> float:
+    """舊版 get_conn() 行為：每次 mkdir + connect，且不關閉。"""
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        cur = conn.execute(
+            """
+            SELECT t.id, t.type, t.amount, t.currency, t.date,
+                   t.category_id, IFNULL(c.name,'') AS category
+            FROM [Transaction] t
+            LEFT JOIN Category c ON c.id = t.category_id
+            ORDER BY t.date DESC, t.id DESC
+            LIMIT 20
+            """
+        )
+        [dict(r) for r in cur.fetchall()]
+    return time.perf_counter() - t0
+
+
+def _pooled(path: Path, calls: int) -> float:
+    cm = ConnectionManager(path)
+    dao = TxDao(cm)
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        dao.latest(20)
+    elapsed = time.perf_counter() - t0
+    cm.close()
+    return elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=10_000)
+    ap.add_argument("--rows", type=int, default=1_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        _fill(path, args.rows)
+
+        a = _per_call(path, args.calls)
+        b = _pooled(path, args.calls)
+        print(f"calls={args.calls} rows={args.rows}")
+        print(f"per-call connect : {a * 1000:9.1f} ms  ({a / args.calls * 1e6:7.1f} us/call)")
+        print(f"pooled manager   : {b * 1000:9.1f} ms  ({b / args.calls * 1e6:7.1f} us/call)")
+        print(f"speedup          : {a / b:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
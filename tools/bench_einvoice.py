@@ -0,0 +1,93 @@
+# tools/bench_einvoice.py
+"""
+電子發票載具匯入：產生約一年份的載具匯出檔（--invoices 張、每張約 --items 個品項，
+管線格式或逗號格式），量匯入時間，再匯入一次確認全部被去重（寫入 0 筆）。
+
+    python -m tools.bench_einvoice [--invoices 3000] [--items 10] [--format pipe|flat]
+"""
+from __future__ import annotations
+import argparse
+import csv
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from core.eventbus import EventBus
+from data.conn import ConnectionManager
+from data.dao import TxDao
+from data.db import init_db
+from data.seed import seed_if_empty
+from domain.importers import EInvoiceImporter
+
+SELLERS = [
+    ("22555003", "全聯實業股份有限公司"), ("22099131", "統一超商股份有限公司"),
+    ("23060248", "全家便利商店股份有限公司"), ("03077208", "台灣中油股份有限公司"),
+    ("96972798", "好市多股份有限公司"), ("27935073", "路易莎職人咖啡股份有限公司"),
+    ("96979933", "中華電信股份有限公司"), ("12345678", "巷口小吃店"),
+]
+GOODS = ["鮮奶", "吐司", "雞蛋", "咖啡", "便當", "衛生紙", "洗衣精", "礦泉水", "香蕉", "92無鉛汽油"]
+
+
+def _make(path: Path, n: int, items: int, fmt: str, rnd: random.Random, goods=GOODS) -> int:
+    start = date(2024, 1, 1)
+    invoices = []
+    for i in range(n):
+        seller_id, seller = rnd.choice(SELLERS)
+        day = start + timedelta(days=i * 366 // n)
+        lines = [(rnd.choice(goods), rnd.randint(1, 3), rnd.randint(15, 300)) for _ in range(rnd.randint(1, items * 2 - 1))]
+        no = f"{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{rnd.randint(0, 99_999_999):08d}"
+        status = "作廢" if rnd.random() < 0.01 else "開立"
+        invoices.append((no, day.strftime("%Y%m%d"), seller_id, seller, status, lines))
+    count = sum(len(inv[5]) for inv in invoices)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "pipe":
+            f.write("表頭=M|載具名稱|載具號碼|發票日期|商店統編|商店店名|發票號碼|總金額|發票狀態|\n")
+            f.write("明細=D|發票號碼|小計|品項名稱|\n")
+            for no, day, seller_id, seller, status, lines in invoices:
+                total = sum(q * p for _, q, p in lines)
+                f.write(f"M|手機條碼|/ABC1234|{day}|{seller_id}|{seller}|{no}|{total}|{status}|\n")
+                for name, q, p in lines:
+                    f.write(f"D|{no}|{q * p}|{name}|\n")
+        else:
+            w = csv.writer(f)
+            w.writerow(["發票日期", "發票號碼", "發票金額", "發票狀態", "賣方統一編號", "賣方名稱",
+                        "消費明細_數量", "消費明細_單價", "消費明細_金額", "消費明細_品名"])
+            for no, day, seller_id, seller, status, lines in invoices:
+                total = sum(q * p for _, q, p in lines)
+                for name, q, p in lines:
+                    w.writerow([day, no, total, status, seller_id, seller, q, p, q * p, name])
+    return count
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--invoices", type=int, default=3000)
+    ap.add_argument("--items", type=int, default=10)
+    ap.add_argument("--format", choices=("pipe", "flat"), default="pipe")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        src = root / "einvoice.csv"
+        lines = _make(src, args.invoices, args.items, args.format, random.Random(7))
+        print(f"{args.invoices} invoices, {lines} items, {src.stat().st_size / 1e6:.1f} MB ({args.format})")
+
+        init_db(root / "bench.db")
+        seed_if_empty(root / "bench.db")
+        cm = ConnectionManager(root / "bench.db")
+        importer = EInvoiceImporter(EventBus(), TxDao(cm))
+        t0 = time.perf_counter()
+        stats = importer.run(src)
+        cold = time.perf_counter() - t0
+        print(f"import   {cold:7.3f} s  ({stats['invoices'] / cold:8.0f} invoices/s)  items {stats['items']}  "
+              f"voided {stats['voided']}  categorized {stats['categorized']}")
+        t0 = time.perf_counter()
+        again = importer.run(src)
+        print(f"re-import {time.perf_counter() - t0:6.3f} s  inserted {again['inserted']}  duplicates {again['duplicates']}")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# tools/bench_export.py
+"""
+匯出吞吐量：在 --rows 筆交易上跑 CSV / JSON Lines / 欄式快照，回報 rows/s 與檔案大小，
+並以快照做一次 mmap 加總驗證。
+
+    python -m tools.bench_export [--rows 1000000] [--batch 2000]
+
+最大 RSS 在匯出前後各印一次；串流匯出不應讓它隨筆數成長。
+"""
+from __future__ import annotations
+import argparse
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from core.eventbus import EventBus
+from data.db import init_db
+from data.seed import seed_if_empty
+from data.conn import ConnectionManager
+from data.dao import TxDao
+from domain.exporters import Snapshot, export_csv, export_jsonl, write_snapshot
+from domain.usecases import UseCases
+
+
+def _rows(n: int):
+    for i in range(n):
+        yield {
+            "amount": i % 997,
+            "currency": "TWD" if i % 5 else "JPY",
+            "category_id": 1 + i % 2,
+            "merchant": f"shop-{i % 300}",
+            "note": f"note {i % 50}",
+            "date": f"20{15 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00",
+        }
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=2000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        UseCases(EventBus(), txdao=TxDao(cm)).add_many(_rows(args.rows))
+        print(f"loaded {args.rows:,} rows   max RSS: {_rss_mb():.0f} MB")
+
+        for name, fn, out in (
+            ("csv", export_csv, "tx.csv"),
+            ("jsonl", export_jsonl, "tx.jsonl"),
+            ("snapshot", write_snapshot, "tx.pfsnap"),
+        ):
+            dest = Path(d) / out
+            t0 = time.perf_counter()
+            n = fn(dest, manager=cm, batch=args.batch)
+            elapsed = time.perf_counter() - t0
+            print(f"{name:9} {n / elapsed:12,.0f} rows/s  ({elapsed:.1f} s, "
+                  f"{dest.stat().st_size / 1e6:.0f} MB)   max RSS: {_rss_mb():.0f} MB")
+
+        t0 = time.perf_counter()
+        with Snapshot(Path(d) / "tx.pfsnap") as snap:
+            total = sum(snap.column("amount"))
+            currencies = snap.dictionary("currency")
+        print(f"snapshot sum(amount) = {total:,} over {currencies} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
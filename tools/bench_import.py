@@ -0,0 +1,79 @@
+# tools/bench_import.py
+"""
+CSV 匯入吞吐量：產生一個 Zaim 格式的假匯出檔，再用 CsvImporter 匯入。
+
+    python -m tools.bench_import [--rows 1000000] [--workers N] [--chunk 5000]
+
+印出 rows/s 與行程最大 RSS（記憶體應與檔案大小無關）。
+"""
+from __future__ import annotations
+import argparse
+import csv
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from core.eventbus import EventBus, EV_IMPORT_PROGRESS
+from data.db import init_db
+from data.seed import seed_if_empty
+from data.conn import ConnectionManager
+from data.dao import TxDao
+from domain.importers import CsvImporter, default_workers
+
+_HEADER = ["日付", "方法", "カテゴリ", "カテゴリの内訳", "支払元", "入金先", "品目", "メモ", "お店",
+           "通貨", "収入", "支出", "振替", "残高調整", "通貨変換前の金額", "集計の設定"]
+_CATS = [("食費", "食料品"), ("食費", "外食"), ("交通", "電車"), ("日用雑貨", "-"), ("趣味・娯楽", "本")]
+
+
+def _write_zaim(path: Path, n: int) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(_HEADER)
+        for i in range(n):
+            y, rest = divmod(i, 365 * 300)
+            day = rest // 300
+            date = f"{2000 + y % 30}-{1 + day // 31 % 12:02d}-{1 + day % 28:02d}"
+            cat, sub = _CATS[i % len(_CATS)]
+            if i % 10 == 0:
+                w.writerow([date, "income", "給与", "-", "", "財布", "", "", "", "JPY", 200000, 0, 0, 0, "", "常に含める"])
+            else:
+                w.writerow([date, "payment", cat, sub, "財布", "", f"品目{i % 50}", "", f"店{i % 400}",
+                            "JPY", 0, 100 + i % 3000, 0, 0, "", "常に含める"])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--workers", type=int, default=default_workers())
+    ap.add_argument("--chunk", type=int, default=5000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        src = Path(d) / "zaim.csv"
+        t0 = time.perf_counter()
+        _write_zaim(src, args.rows)
+        print(f"generated {args.rows:,} rows ({src.stat().st_size / 1e6:.0f} MB) in {time.perf_counter() - t0:.1f} s")
+
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        bus = EventBus()
+        events = []
+        bus.subscribe(EV_IMPORT_PROGRESS, events.append)
+
+        t0 = time.perf_counter()
+        res = CsvImporter(bus, TxDao(cm), workers=args.workers, chunk_size=args.chunk).run(src)
+        elapsed = time.perf_counter() - t0
+        cm.close()
+
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"imported {res['inserted']:,} rows, skipped {res['skipped']}, "
+              f"{res['categories_created']} categories created")
+        print(f"{res['inserted'] / elapsed:12,.0f} rows/s  ({elapsed:.1f} s, workers={args.workers}, chunk={args.chunk})")
+        print(f"progress events: {len(events)}   max RSS: {rss_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
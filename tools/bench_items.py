@@ -0,0 +1,76 @@
+# tools/bench_items.py
+"""
+品項價格歷史：以電子發票匯入產生 --items 個品項列（約 10 年份的發票），
+量品名搜尋、單一品項 × 店家的價格序列、各店比價的查詢延遲（目標 < 10 ms）。
+
+    python -m tools.bench_items [--items 300000] [--queries 200]
+"""
+from __future__ import annotations
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from core.eventbus import EventBus
+from data.conn import ConnectionManager
+from data.dao import ItemDao, TxDao
+from data.db import init_db
+from data.seed import seed_if_empty
+from domain.importers import EInvoiceImporter
+from .bench_einvoice import GOODS, _make
+
+BRANDS = ["", "統一", "光泉", "味全", "義美", "桂格", "好市多", "台糖"]
+
+
+def _timed(fn, args_list):
+    ms = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        ms.append((time.perf_counter() - t0) * 1000)
+    ms.sort()
+    return statistics.median(ms), ms[int(len(ms) * 0.99) - 1]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=300_000)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+    rnd = random.Random(11)
+    # 品名加上品牌，字典約有 GOODS × BRANDS 個品項
+    goods = [f"{b}{g}" for g in GOODS for b in BRANDS]
+
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        src = root / "einvoice.csv"
+        lines = _make(src, args.items // 10, 10, "pipe", rnd, goods)
+        init_db(root / "bench.db")
+        seed_if_empty(root / "bench.db")
+        cm = ConnectionManager(root / "bench.db")
+        t0 = time.perf_counter()
+        stats = EInvoiceImporter(EventBus(), TxDao(cm)).run(src)
+        print(f"{lines} line items generated, {stats['items']} imported in {time.perf_counter() - t0:.2f} s")
+
+        dao = ItemDao(cm)
+        with cm.reader() as conn:
+            items = [r[0] for r in conn.execute("SELECT id FROM Item")]
+            pairs = conn.execute("SELECT DISTINCT item_id, merchant FROM InvoiceItem").fetchall()
+        print(f"{len(items)} distinct items, {len(pairs)} item × merchant pairs")
+        names = [(rnd.choice(goods)[-2:],) for _ in range(args.queries)]
+        picks = [tuple(rnd.choice(pairs)) for _ in range(args.queries)]
+        for label, fn, arg_list in (
+            ("find", dao.find, names),
+            ("history item×shop", lambda i, m: dao.history(i, m), picks),
+            ("history item", lambda i, _m: dao.history(i, limit=60), picks),
+            ("merchants", lambda i, _m: dao.merchants(i), picks),
+        ):
+            p50, p99 = _timed(fn, arg_list)
+            print(f"{label:<18} p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# tools/bench_lottery.py
+"""
+統一發票對獎：同一期存 --invoices 張發票（其中一部分刻意中獎），量整期對獎的時間，
+並與逐張逐獎別比對字串的寫法核對結果一致。
+
+    python -m tools.bench_lottery [--invoices 50000]
+"""
+from __future__ import annotations
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from core.eventbus import EventBus
+from data.conn import ConnectionManager
+from data.dao import InvoiceDao, TxDao
+from data.db import init_db
+from data.seed import seed_if_empty
+from domain.lottery import LotteryChecker, SuffixIndex, _FIRST_TIERS
+
+PERIOD = "2024-05"
+
+
+def _naive(winning, numbers):
+    """對照組：每張發票對每個獎別做字串比對。"""
+    out = []
+    for invoice_id, no, _tx in numbers:
+        d = no[-8:]
+        hit = None
+        for tier in ("special", "grand"):
+            if winning[tier] == d:
+                hit = (tier, d)
+        for tier, n in _FIRST_TIERS:
+            for w in winning["first"]:
+                if hit is None and d[-n:] == w[-n:]:
+                    hit = (tier, w)
+        for tail in winning["extra"]:
+            if hit is None and d[-3:] == tail:
+                hit = ("sixth", tail)
+        if hit:
+            out.append((invoice_id, *hit))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--invoices", type=int, default=50_000)
+    args = ap.parse_args()
+    rnd = random.Random(3)
+    num = lambda: f"{rnd.randint(0, 99_999_999):08d}"
+    winning = {"period": PERIOD, "special": num(), "grand": num(), "first": [num() for _ in range(3)],
+               "extra": [f"{rnd.randint(0, 999):03d}"]}
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        txs = [{
+            "book_id": 1, "account_id": 1, "tx_type": "expense", "amount": 100, "currency": "TWD",
+            "category_id": None, "member_id": 1, "merchant": "bench", "note": None,
+            "date": "2024-05-10T12:00:00", "updated_at": "2024-05-10T12:00:00", "device_id": "bench",
+        } for _ in range(args.invoices)]
+        _n, first_id, _last = TxDao(cm).insert_many(txs, len(txs))
+        conn = cm.writer()
+        with conn:
+            for i in range(args.invoices):
+                # 約 2% 刻意落在頭獎的某個末碼上
+                no = num()
+                if rnd.random() < 0.02:
+                    w = rnd.choice(winning["first"])
+                    k = rnd.randint(3, 8)
+                    no = no[:8 - k] + w[-k:]
+                InvoiceDao.add_in(conn, first_id + i, f"AB{no}", PERIOD, "2024-05-10", 100)
+
+        checker = LotteryChecker(EventBus(), cm)
+        t0 = time.perf_counter()
+        result = checker.check(winning)
+        total = time.perf_counter() - t0
+        numbers = checker.dao.numbers(PERIOD)
+        t0 = time.perf_counter()
+        fast = SuffixIndex(winning).match_all(numbers)
+        match = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        slow = _naive(winning, numbers)
+        naive = time.perf_counter() - t0
+        assert sorted(fast) == sorted(slow), "suffix index disagrees with naive matching"
+        print(f"{result['checked']} invoices, {len(result['winners'])} winners, total {result['total_prize']}")
+        print(f"check (load + match + details) {total * 1000:7.1f} ms")
+        print(f"suffix index match             {match * 1000:7.1f} ms")
+        print(f"naive per-invoice loops        {naive * 1000:7.1f} ms")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# tools/bench_ocr.py
+"""
+收據 OCR 管線：--receipts 張假收據（fake 後端讀旁邊的 .txt，每張睡 --delay 秒模擬引擎），
+比較單行程與 process pool 的掃描時間，以及全部命中快取的重掃。
+
+    python -m tools.bench_ocr [--receipts 300] [--delay 0.05] [--workers N] [--backend fake]
+
+--backend tesseract 時圖片為空白 PNG（需 Pillow），只量引擎與管線的額外成本。
+"""
+from __future__ import annotations
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from core.eventbus import EventBus
+from data.blobs import BlobStore
+from data.conn import ConnectionManager
+from data.db import init_db
+from core.workers import default_workers
+from domain.ocr import OcrPipeline
+
+SHOPS = ["全聯福利中心", "7-ELEVEN", "家樂福", "セブン-イレブン 渋谷店", "Starbucks"]
+
+
+def _make(folder: Path, n: int, rnd: random.Random, png: bool) -> None:
+    for i in range(n):
+        text = (
+            f"{rnd.choice(SHOPS)}\n電子發票證明聯\n113年05-06月\n"
+            f"AB-{rnd.randint(0, 99_999_999):08d}\n2024-05-{rnd.randint(1, 28):02d} 12:00:00\n"
+            f"總計:{rnd.randint(30, 3000)}\n"
+        )
+        (folder / f"r{i:04d}.txt").write_text(text, encoding="utf-8")
+        if png:
+            from PIL import Image
+            Image.new("RGB", (600, 900), (255, 255, 255)).save(folder / f"r{i:04d}.png")
+        else:
+            (folder / f"r{i:04d}.jpg").write_bytes(f"receipt {i}".encode() + rnd.randbytes(64 * 1024))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--receipts", type=int, default=300)
+    ap.add_argument("--delay", type=float, default=0.05)
+    ap.add_argument("--workers", type=int, default=default_workers())
+    ap.add_argument("--backend", default="fake")
+    args = ap.parse_args()
+    spec = f"fake:{args.delay}" if args.backend == "fake" else args.backend
+
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        folder = root / "receipts"
+        folder.mkdir()
+        _make(folder, args.receipts, random.Random(7), png=args.backend != "fake")
+        print(f"{args.receipts} receipts, backend={spec}, workers={args.workers}")
+
+        for workers in (0, args.workers):
+            path = root / f"bench-{workers}.db"
+            init_db(path)
+            cm = ConnectionManager(path)
+            ocr = OcrPipeline(EventBus(), manager=cm, store=BlobStore(root / f"blobs-{workers}"),
+                              backend=spec, workers=workers)
+            t0 = time.perf_counter()
+            results = ocr.scan([folder])
+            cold = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            again = ocr.scan([folder])
+            warm = time.perf_counter() - t0
+            parsed = sum(1 for r in results if r["total"] is not None and r["invoice_no"])
+            label = "in-process" if workers == 0 else f"pool x{workers}"
+            print(f"{label:<12} scan {cold:7.2f} s ({args.receipts / cold:7.1f}/s)  "
+                  f"rescan {warm * 1000:7.1f} ms (cached {sum(r['cached'] for r in again)})  parsed {parsed}")
+            cm.close()
+
+
+if __name__ == "__main__":
+    main()
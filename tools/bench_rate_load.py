@@ -0,0 +1,95 @@
+# tools/bench_rate_load.py
+"""
+歷史匯率載入：--years 年、core.currency 所有幣別的每日匯率（只有平日，假日靠補齊）。
+
+    python -m tools.bench_rate_load [--years 10]
+
+產生兩個檔：USD 為基準的寬表 CSV、EUR 為基準的時間序列 JSON；
+載入兩次（第二次應全部是重複、不寫入），最後確認 Rate 沒有重複的 (base, target, date)。
+"""
+from __future__ import annotations
+import argparse
+import csv
+import json
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from core.currency import CURRENCIES
+from core.eventbus import EV_RATES_UPDATED, EventBus
+from data.conn import ConnectionManager
+from data.dao import TxDao
+from data.db import init_db
+from data.rates import get_rates
+from data.seed import seed_if_empty
+from domain.usecases import UseCases
+
+# 1 USD = ? 各幣別（起始值，之後隨機漫步）
+START = {"TWD": 31.0, "JPY": 110.0, "EUR": 0.9, "CNY": 6.8, "HKD": 7.8, "KRW": 1150.0, "USD": 1.0}
+
+
+def _series(years: int, rnd: random.Random):
+    """(日期, {幣別: 1 USD 的匯率})，只有平日。"""
+    level = {c["code"]: START.get(c["code"], 1.0) for c in CURRENCIES}
+    day = date(2025, 1, 1) - timedelta(days=365 * years)
+    end = date(2025, 1, 1)
+    while day < end:
+        if day.weekday() < 5:
+            for code in level:
+                if code != "USD":
+                    level[code] *= 1 + rnd.gauss(0, 0.003)
+            yield day.isoformat(), dict(level)
+        day += timedelta(days=1)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=int, default=10)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        root = Path(d)
+        series = list(_series(args.years, random.Random(7)))
+        codes = [c["code"] for c in CURRENCIES if c["code"] != "USD"]
+        wide = root / "usd.csv"
+        with open(wide, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["date"] + codes)
+            for day, level in series:
+                w.writerow([day] + [f"{level[c]:.6f}" for c in codes])
+        eur = root / "eur.json"
+        eur.write_text(json.dumps({"base": "EUR", "rates": {
+            day: {c: round(level[c] / level["EUR"], 6) for c in codes if c != "EUR"} for day, level in series
+        }}), encoding="utf-8")
+        print(f"{len(series):,} weekdays × {len(codes)} currencies, base USD (CSV) + EUR (JSON)")
+
+        path = root / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        bus = EventBus()
+        events = []
+        bus.subscribe(EV_RATES_UPDATED, events.append)
+        uc = UseCases(bus, TxDao(cm))
+        for label in ("load", "reload"):
+            t0 = time.perf_counter()
+            stats = uc.load_rates([wide, eur], base="USD")
+            elapsed = time.perf_counter() - t0
+            print(f"{label:7} {elapsed:6.2f} s  rows={stats['rows']:,} ({stats['rows'] / elapsed:,.0f}/s)  "
+                  f"written={stats['written']:,}  filled={stats['filled']:,}  skipped={stats['skipped']}")
+
+        conn = cm.writer()
+        total = conn.execute("SELECT count(*) FROM Rate").fetchone()[0]
+        dup = conn.execute(
+            "SELECT count(*) FROM (SELECT 1 FROM Rate GROUP BY base_currency, target_currency, date HAVING count(*) > 1)"
+        ).fetchone()[0]
+        sat = (date(2024, 6, 1)).isoformat()
+        print(f"Rate rows={total:,}  duplicates={dup}  events={len(events)}  "
+              f"JPY→TWD on {sat} (Sat, carried) = {get_rates(cm).rate('JPY', 'TWD', sat):.5f}")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# tools/bench_rates.py
+"""
+匯率換算：--rows 筆多幣別交易換成帳本幣別，比較 RateIndex 整批換算與逐筆 SQL as-of 查詢。
+
+    python -m tools.bench_rates [--rows 100000] [--years 10]
+
+Rate 以 USD 報價（USD→TWD / JPY / EUR 每日一筆），JPY / EUR → TWD 需經 USD 三角換算。
+cold 為第一次換算（含計算各日期的係數），warm 為係數已留在索引裡的重複換算；
+逐筆 SQL 只量前 --sql-rows 筆再換算成每筆成本。
+"""
+from __future__ import annotations
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from core.money import decimals_of
+from data.conn import ConnectionManager
+from data.db import init_db
+from data.rates import get_rates, in_book_currency, invalidate_rates
+from data.seed import seed_if_empty
+
+QUOTES = {"TWD": 31.0, "JPY": 145.0, "EUR": 0.92}
+
+# 逐筆查詢的對照組：每筆交易各下兩次 as-of（src→USD、USD→TWD）
+_ASOF_SQL = """
+SELECT rate FROM Rate
+WHERE base_currency = ? AND target_currency = ? AND date <= ?
+ORDER BY date DESC, id DESC LIMIT 1
+"""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--years", type=int, default=10)
+    ap.add_argument("--sql-rows", type=int, default=5_000)
+    args = ap.parse_args()
+    rnd = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        start = date(2025, 1, 1) - timedelta(days=365 * args.years)
+        days = [(start + timedelta(days=i)).isoformat() for i in range(365 * args.years)]
+        conn = cm.writer()
+        with conn:
+            conn.executemany(
+                "INSERT INTO Rate(date, base_currency, target_currency, rate) VALUES(?,?,?,?)",
+                ((day, "USD", ccy, q * (1 + rnd.uniform(-0.05, 0.05))) for day in days for ccy, q in QUOTES.items()),
+            )
+        rows = [
+            {"type": "expense", "amount": rnd.randint(100, 500_000), "currency": rnd.choice(["TWD", "USD", "JPY", "EUR"]),
+             "date": f"{rnd.choice(days)}T12:00:00"}
+            for _ in range(args.rows)
+        ]
+        print(f"{len(days) * len(QUOTES):,} rates, {args.rows:,} transactions")
+
+        invalidate_rates()
+        t0 = time.perf_counter()
+        index = get_rates(cm)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        amounts = index.convert_rows(rows, "TWD")
+        cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.convert_rows(rows, "TWD")
+        warm = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        totals = in_book_currency(rows, manager=cm)
+        annotate = time.perf_counter() - t0
+        print(f"RateIndex build       {build * 1000:8.1f} ms  ({len(index.pairs())} pairs)")
+        print(f"convert_rows (cold)   {cold * 1000:8.1f} ms  ({cold / args.rows * 1e9:,.0f} ns/row)")
+        print(f"convert_rows (warm)   {warm * 1000:8.1f} ms  ({warm / args.rows * 1e9:,.0f} ns/row)")
+        print(f"in_book_currency      {annotate * 1000:8.1f} ms  expense={totals['expense']:,} TWD  missing={totals['missing']}")
+
+        sample = rows[: args.sql_rows]
+        t0 = time.perf_counter()
+        mismatched = 0
+        with cm.reader() as rc:
+            for r, amount in zip(sample, amounts):
+                if r["currency"] == "TWD":
+                    continue
+                day = r["date"][:10]
+                usd_twd = rc.execute(_ASOF_SQL, ("USD", "TWD", day)).fetchone()[0]
+                if r["currency"] == "USD":
+                    rate = usd_twd
+                else:
+                    rate = usd_twd / rc.execute(_ASOF_SQL, ("USD", r["currency"], day)).fetchone()[0]
+                expect = r["amount"] * rate * 10 ** (decimals_of("TWD") - decimals_of(r["currency"]))
+                mismatched += abs(expect - amount) > 1
+        per_row = (time.perf_counter() - t0) / len(sample)
+        print(f"per-row SQL as-of     {per_row * args.rows * 1000:8.1f} ms  (extrapolated, {per_row * 1e6:.1f} µs/row)"
+              f"  mismatched={mismatched}")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
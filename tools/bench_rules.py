@@ -0,0 +1,123 @@
+# tools/bench_rules.py
+"""
+自動分類規則：--rules 條規則（每條數個關鍵字），
+  1) 記憶體內 --rows 筆交易一次分類（Aho-Corasick + memo），與逐規則 `in` 比對核對結果一致
+  2) DB 內 --tx 筆未分類交易 reapply 的時間
+  3) 規則沒變時 get_rule_engine() 直接用快取；改一條規則後才重新編譯
+
+    python -m tools.bench_rules [--rules 500] [--rows 1000000] [--tx 100000]
+"""
+from __future__ import annotations
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from data.conn import ConnectionManager
+from data.dao import CategoryDao, RuleDao, TxDao
+from data.db import init_db
+from data.seed import seed_if_empty
+from domain.rules import RuleEngine, _fold, get_rule_engine, reapply
+
+SYLLABLES = "全聯 家樂福 星巴克 麥當勞 統一 超商 加油 停車 電信 捷運 高鐵 書局 藥局 咖啡 早餐 便當 牛肉麵 健身 影城 醫院".split()
+
+
+def _word(rnd: random.Random) -> str:
+    return "".join(rnd.sample(SYLLABLES, 2)) + str(rnd.randint(0, 99))
+
+
+def _naive(rules, merchant, note, amount, currency):
+    """對照組：依優先序逐條規則、逐個關鍵字做子字串比對。"""
+    m, n = _fold(merchant), _fold(note)
+    for r in rules:
+        words = [_fold(w) for w in r["keywords"].split("|") if w]
+        field = r["field"]
+        if words and not any((field in ("merchant", "any") and w in m) or (field in ("note", "any") and w in n)
+                             for w in words):
+            continue
+        if r["min_amount"] is not None and amount < r["min_amount"]:
+            continue
+        if r["currency"] is not None and r["currency"] != currency:
+            continue
+        return r["category_id"]
+    return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rules", type=int, default=500)
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--tx", type=int, default=100_000)
+    args = ap.parse_args()
+    rnd = random.Random(5)
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        cats = [c["id"] for c in CategoryDao(cm).all()]
+        rules = RuleDao(cm)
+        for i in range(args.rules):
+            fields = {"field": rnd.choice(("any", "merchant", "note")), "priority": rnd.randint(0, 3)}
+            if i % 10 == 0:
+                fields.update(min_amount=rnd.randint(1, 50) * 1000, currency="TWD")
+            rules.add(rnd.choice(cats), [_word(rnd) for _ in range(rnd.randint(1, 4))], **fields)
+
+        t0 = time.perf_counter()
+        engine = get_rule_engine(cm)
+        compile_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        cached = get_rule_engine(cm)
+        cached_ms = (time.perf_counter() - t0) * 1000
+        assert cached is engine, "engine rebuilt although rules did not change"
+
+        # 店名種類有限（像真實帳本）；備註多數空白
+        merchants = [f"{_word(rnd)} {rnd.choice(SYLLABLES)}店" for _ in range(5_000)]
+        notes = [None] * 8 + [_word(rnd) for _ in range(2_000)]
+        rows = [{"merchant": rnd.choice(merchants), "note": rnd.choice(notes), "amount": rnd.randint(1, 100) * 1000,
+                 "currency": "TWD", "account_id": 1, "tx_type": "expense", "category_id": None}
+                for _ in range(args.rows)]
+        t0 = time.perf_counter()
+        matched = sum(r["category_id"] is not None for r in engine.apply(rows))
+        apply_s = time.perf_counter() - t0
+
+        ordered = RuleDao(cm).all(enabled_only=True)
+        sample = rnd.sample(rows, 2_000)
+        t0 = time.perf_counter()
+        slow = [_naive(ordered, r["merchant"], r["note"], r["amount"], r["currency"]) for r in sample]
+        naive_s = (time.perf_counter() - t0) / len(sample) * len(rows)
+        assert [r["category_id"] for r in sample] == slow, "rule engine disagrees with naive matching"
+
+        txs = [{
+            "book_id": 1, "account_id": 1, "tx_type": "expense", "amount": r["amount"], "currency": "TWD",
+            "category_id": None, "member_id": 1, "merchant": r["merchant"], "note": r["note"],
+            "date": "2024-05-10T12:00:00", "updated_at": "2024-05-10T12:00:00", "device_id": "bench",
+        } for r in rows[:args.tx]]
+        txdao = TxDao(cm)
+        txdao.insert_many(txs)
+        t0 = time.perf_counter()
+        stats = reapply(txdao)
+        reapply_s = time.perf_counter() - t0
+        again = reapply(txdao)
+
+        rules.update(1, {"priority": 9})
+        t0 = time.perf_counter()
+        rebuilt = get_rule_engine(cm)
+        rebuild_ms = (time.perf_counter() - t0) * 1000
+        assert rebuilt is not engine, "engine not rebuilt after a rule changed"
+
+        print(f"{args.rules} rules, {len(rows)} rows, {matched} matched")
+        print(f"compile engine                 {compile_ms:9.1f} ms")
+        print(f"cached engine lookup           {cached_ms:9.2f} ms")
+        print(f"rebuild after rule change      {rebuild_ms:9.1f} ms")
+        print(f"categorize {len(rows)} rows         {apply_s * 1000:9.1f} ms")
+        print(f"naive loops (extrapolated)     {naive_s * 1000:9.1f} ms")
+        print(f"reapply {stats['scanned']} tx ({stats['updated']} updated) {reapply_s * 1000:9.1f} ms")
+        print(f"second reapply                 scanned {again['scanned']}, updated {again['updated']}")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
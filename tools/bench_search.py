@@ -0,0 +1,73 @@
+# tools/bench_search.py
+"""
+全文檢索延遲：在 --rows 筆交易上跑一組查詢，回報每個查詢第一頁的 p50 / max，
+以及用 cursor 一路翻到最後一頁的頁數與每頁平均時間（排名涵蓋全部命中）。
+
+    python -m tools.bench_search [--rows 500000] [--repeat 20]
+"""
+from __future__ import annotations
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from core.eventbus import EventBus
+from data.db import init_db
+from data.seed import seed_if_empty
+from data.conn import ConnectionManager
+from data.dao import TxDao, SearchDao
+from domain.usecases import UseCases
+
+SHOPS = ["一蘭拉麵", "全聯福利中心", "7-ELEVEN", "Starbucks", "鼎泰豐", "家樂福", "誠品書店",
+         "麥當勞", "頂呱呱", "屈臣氏", "ラーメン二郎", "FamilyMart", "IKEA", "星巴克", "路易莎"]
+WORDS = ["午餐", "晚餐", "早餐", "咖啡", "雞蛋", "牛奶", "衛生紙", "coffee", "latte", "taxi",
+         "電影", "書", "拉麵", "便當", "停車", "加油", "gift", "rent", "snack", "水果"]
+QUERIES = ["拉麵", "一蘭", "全聯福利", "coffee", "latte", "衛生紙", "star", "ラーメン", "便當 午餐", "zzz"]
+
+
+def _rows(n: int, rnd: random.Random):
+    for i in range(n):
+        shop = rnd.choice(SHOPS) + f" {rnd.randint(1, 400)}號店"
+        note = " ".join(rnd.sample(WORDS, 2))
+        yield {"amount": float(rnd.randint(10, 3000)), "merchant": shop, "note": note,
+               "date": f"20{15 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00"}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=500_000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        t0 = time.perf_counter()
+        UseCases(EventBus(), txdao=TxDao(cm)).add_many(_rows(args.rows, random.Random(7)))
+        print(f"loaded {args.rows} rows in {time.perf_counter() - t0:.1f} s")
+
+        dao = SearchDao(cm)
+        for q in QUERIES:
+            times = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                page = dao.search_page(q, limit=50)
+                times.append((time.perf_counter() - t0) * 1000)
+            pages, hits = 1, len(page["ids"])
+            t0 = time.perf_counter()
+            while page["cursor"] is not None:
+                page = dao.search_page(q, limit=50, after=page["cursor"])
+                pages, hits = pages + 1, hits + len(page["ids"])
+            per_page = (time.perf_counter() - t0) * 1000 / max(pages - 1, 1)
+            print(f"{q!r:14} p50={statistics.median(times):7.2f} ms  max={max(times):7.2f} ms  "
+                  f"hits={hits} pages={pages} next-page={per_page:7.2f} ms"
+                  + ("  (truncated)" if page["truncated"] else ""))
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# tools/bench_tags.py
+"""
+標籤篩選合計：比較 SQL（INTERSECT / EXISTS 再 GROUP BY）與 data.tagindex 的 bitmap 交集 + 記憶體分組。
+
+    python -m tools.bench_tags [--rows 200000] [--tags 30] [--repeat 20]
+
+每筆交易隨機帶 0~3 個標籤，前幾個標籤特別常用（數萬筆），其餘稀疏；
+查詢組合：單一大標籤、兩個大標籤 AND、大標籤 OR 小標籤、AND NOT。
+build 為 TagIndex 從 idx_txtag_tag 載入的時間，其後的查詢都不再碰 SQLite。
+"""
+from __future__ import annotations
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from data.conn import ConnectionManager
+from data.dao import TxDao
+from data.db import init_db
+from data.seed import seed_if_empty
+from data.tagindex import get_tag_index, tag_totals
+
+# 各組合的 SQL 對照組：符合的 tx_id 子查詢
+QUERIES: List[Tuple[str, dict, str]] = [
+    ("t0", {"all_of": ["t0"]}, "SELECT tx_id FROM TransactionTag WHERE tag_id = {t0}"),
+    ("t0 AND t1", {"all_of": ["t0", "t1"]},
+     "SELECT tx_id FROM TransactionTag WHERE tag_id = {t0} INTERSECT SELECT tx_id FROM TransactionTag WHERE tag_id = {t1}"),
+    ("t0 OR t9", {"any_of": ["t0", "t9"]},
+     "SELECT tx_id FROM TransactionTag WHERE tag_id = {t0} UNION SELECT tx_id FROM TransactionTag WHERE tag_id = {t9}"),
+    ("t1 NOT t2", {"all_of": ["t1"], "none_of": ["t2"]},
+     "SELECT tx_id FROM TransactionTag WHERE tag_id = {t1} EXCEPT SELECT tx_id FROM TransactionTag WHERE tag_id = {t2}"),
+]
+
+_SQL_TOTALS = """
+SELECT currency, type, substr(date, 1, 10) AS day, SUM(amount)
+FROM [Transaction]
+WHERE book_id = 1 AND id IN ({ids})
+GROUP BY currency, type, day
+"""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--tags", type=int, default=30)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    rnd = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "bench.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        dao = TxDao(cm)
+        n, first, _last = dao.insert_many(
+            {
+                "book_id": 1, "account_id": 1, "tx_type": "expense" if i % 7 else "income",
+                "amount": rnd.randint(10, 5000), "currency": "TWD", "category_id": 1, "member_id": None,
+                "merchant": f"shop-{i % 300}", "note": "",
+                "date": f"20{15 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00",
+                "updated_at": "2025-01-01T00:00:00", "device_id": "bench",
+            }
+            for i in range(args.rows)
+        )
+        # 標籤 i 的權重 ~ 1/(i+1)：前幾個很大、後面稀疏
+        weights = [1 / (i + 1) for i in range(args.tags)]
+        pairs = set()
+        for tx_id in range(first, first + n):
+            for tag in rnd.choices(range(args.tags), weights, k=rnd.randint(0, 3)):
+                pairs.add((tx_id, tag))
+        conn = cm.writer()
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO Tag(name) VALUES(?)", [(f"t{i}",) for i in range(args.tags)])
+            ids = {r[0]: r[1] for r in conn.execute("SELECT name, id FROM Tag")}
+            conn.executemany(
+                "INSERT INTO TransactionTag(tx_id, tag_id) VALUES(?, ?)",
+                sorted((tx_id, ids[f"t{tag}"]) for tx_id, tag in pairs),
+            )
+        print(f"{n:,} transactions, {len(pairs):,} tag links, {args.tags} tags")
+
+        t0 = time.perf_counter()
+        index = get_tag_index(cm)
+        print(f"TagIndex build   {(time.perf_counter() - t0) * 1000:8.1f} ms")
+
+        with cm.reader() as rc:
+            for label, kw, sub in QUERIES:
+                sql = _SQL_TOTALS.format(ids=sub.format(**{k: v for k, v in ids.items()}))
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    groups = rc.execute(sql).fetchall()
+                sql_ms = (time.perf_counter() - t0) / args.repeat * 1000
+                t0 = time.perf_counter()
+                for _ in range(args.repeat):
+                    totals = tag_totals(manager=cm, **kw)
+                bm_ms = (time.perf_counter() - t0) / args.repeat * 1000
+                expense = sum(g[3] for g in groups if g[1] == "expense")
+                ok = "ok" if expense == totals["expense"] else f"MISMATCH {expense} != {totals['expense']}"
+                print(f"{label:<10} count={totals['count']:>7,}  SQL {sql_ms:8.2f} ms  bitmap {bm_ms:8.2f} ms  {ok}")
+        cm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# tools/check_amount_signs.py
+"""
+舊資料的支出正負號：以 baseline schema（amount REAL、手動記帳把支出存成負數）建 DB 再跑 migration，
+升到 m0006 與升到最新各檢查一次；以及已升級到 v18、表裡仍有負數支出的 DB 再跑 m0019。每次都要：
+  1) 支出 / 收入的 amount 都是正的最小單位整數
+  2) 帳戶餘額 = 期初 + 收入 - 支出 + 調整（BalanceDao）
+  3) AccountBalance 與彙總表和全量重算一致
+任何一項不符就以 exit code 1 結束。
+
+    python -m tools.check_amount_signs
+"""
+from __future__ import annotations
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from data.balances import verify_balances
+from data.conn import ConnectionManager
+from data.dao import BalanceDao, TxDao
+from data.db import SCHEMA_SQL, get_conn, init_db
+from data.migrations import m0006_minor_units, migrate
+from data.rollups import verify_rollups
+from data.seed import seed_if_empty
+
+# (帳戶, type, 舊版存的金額, 幣別)；支出為 sign * amount
+LEGACY_ROWS = [
+    (1, "expense", -120.0, "TWD"),
+    (1, "expense", -35.0, "TWD"),
+    (1, "income", 500.0, "TWD"),
+    (2, "expense", -12.34, "USD"),
+    (2, "income", 100.5, "USD"),
+    (2, "adjust", -50.0, "TWD"),
+    (1, "transfer", -80.0, "TWD"),
+]
+# 帳戶 → 幣別 → 預期餘額（最小單位；TWD 含期初 2000 / 10000）
+EXPECTED: Dict[Tuple[int, str], int] = {
+    (1, "TWD"): 2000 - 120 - 35 + 500,
+    (2, "TWD"): 10000 - 50,
+    (2, "USD"): -1234 + 10050,
+}
+
+
+def _check(path: Path, label: str) -> List[str]:
+    problems: List[str] = []
+    cm = ConnectionManager(path)
+    with cm.reader() as conn:
+        negative = conn.execute(
+            "SELECT COUNT(*) FROM [Transaction] WHERE type IN ('expense','income') AND amount < 0"
+        ).fetchone()[0]
+        if negative:
+            problems.append(f"{label}: {negative} expense/income row(s) still negative")
+        if verify_balances(conn):
+            problems.append(f"{label}: AccountBalance differs from a full rebuild")
+        if any(verify_rollups(conn).values()):
+            problems.append(f"{label}: rollups differ from a full rebuild")
+    got = {(r["id"], r["currency"]): r["balance"] for r in BalanceDao(cm).balances()}
+    if got != EXPECTED:
+        problems.append(f"{label}: balances {got} != {EXPECTED}")
+    cm.close()
+    return problems
+
+
+def legacy_db(path: Path) -> None:
+    """baseline 版本的 DB：只有 SCHEMA_SQL、沒有 migration 紀錄，金額為 REAL。"""
+    conn = get_conn(path)
+    conn.executescript(SCHEMA_SQL)
+    conn.close()
+    seed_if_empty(path)
+    conn = get_conn(path)
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO [Transaction](book_id, account_id, type, amount, currency, category_id,
+                                      date, updated_at, device_id)
+            VALUES(1, ?, ?, ?, ?, 1, '2024-05-10T12:00:00', '2024-05-10T12:00:00', 'legacy')
+            """,
+            LEGACY_ROWS,
+        )
+    conn.close()
+
+
+def _migrated_db(path: Path) -> None:
+    """已升級到 v18、但負數支出被舊版 m0006 原樣搬過來的 DB。"""
+    init_db(path)
+    seed_if_empty(path)
+    TxDao(ConnectionManager(path)).insert_many([{
+        "book_id": 1, "account_id": acc, "tx_type": tx_type, "amount": round(amount * (100 if cur == "USD" else 1)),
+        "currency": cur, "category_id": 1, "member_id": 1, "merchant": None, "note": None,
+        "date": "2024-05-10T12:00:00", "updated_at": "2024-05-10T12:00:00", "device_id": "legacy",
+    } for acc, tx_type, amount, cur in LEGACY_ROWS])
+    conn = get_conn(path)
+    with conn:
+        conn.execute("DELETE FROM Migration WHERE version LIKE '0019%'")
+        conn.execute("PRAGMA user_version = 18")
+    migrate(conn)
+    conn.close()
+
+
+def main() -> None:
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory() as d:
+        legacy = Path(d) / "legacy.db"
+        legacy_db(legacy)
+        conn = get_conn(legacy)
+        migrate(conn, target=m0006_minor_units.VERSION)
+        conn.close()
+        problems += _check(legacy, "baseline -> v6")
+        init_db(legacy)
+        problems += _check(legacy, "baseline -> latest")
+
+        migrated = Path(d) / "migrated.db"
+        _migrated_db(migrated)
+        problems += _check(migrated, "v18 -> latest")
+
+    for p in problems:
+        print(p)
+    print(f"3 migration(s) checked, {len(problems)} problem(s)")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
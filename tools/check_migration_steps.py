@@ -0,0 +1,65 @@
+# tools/check_migration_steps.py
+"""
+各版本的 migration 都要能單獨停下來用：baseline DB（見 tools.check_amount_signs）升到每個版本 v 後，
+在 v 的 schema 上做一輪標籤 / 附件增刪與金額、日期修改（觸發器只能用到 v 已有的欄位），
+再升到最新版，AccountBalance 與彙總表要和全量重算一致。
+任何一項不符就以 exit code 1 結束。
+
+    python -m tools.check_migration_steps
+"""
+from __future__ import annotations
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import List
+
+from data.balances import verify_balances
+from data.db import get_conn
+from data.migrations import LATEST, migrate
+from data.rollups import verify_rollups
+from tools.check_amount_signs import legacy_db
+
+# 只用 baseline 就有的欄位
+_WRITES = [
+    "INSERT INTO Tag(name) VALUES('step')",
+    "INSERT INTO TransactionTag(tx_id, tag_id) VALUES(1, (SELECT id FROM Tag WHERE name = 'step'))",
+    "INSERT INTO Attachment(tx_id, file_path) VALUES(1, 'step.jpg')",
+    "UPDATE Attachment SET ocr_text = 'step' WHERE tx_id = 1",
+    "UPDATE [Transaction] SET amount = amount * 2 WHERE id = 2",
+    "UPDATE [Transaction] SET date = '2024-06-01T01:00:00' WHERE id = 3",
+    "DELETE FROM TransactionTag WHERE tx_id = 1",
+    "DELETE FROM Attachment WHERE tx_id = 1",
+    "DELETE FROM [Transaction] WHERE id = 4",
+]
+
+
+def main() -> None:
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory() as d:
+        for version in range(1, LATEST + 1):
+            path = Path(d) / f"v{version}.db"
+            legacy_db(path)
+            conn = get_conn(path)
+            try:
+                migrate(conn, target=version)
+                with conn:
+                    for sql in _WRITES:
+                        conn.execute(sql)
+                migrate(conn)
+                if verify_balances(conn):
+                    problems.append(f"v{version}: AccountBalance differs from a full rebuild")
+                if any(verify_rollups(conn).values()):
+                    problems.append(f"v{version}: rollups differ from a full rebuild")
+            except sqlite3.Error as e:
+                problems.append(f"v{version}: {e}")
+            finally:
+                conn.close()
+
+    for p in problems:
+        print(p)
+    print(f"{LATEST} version(s) checked, {len(problems)} problem(s)")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
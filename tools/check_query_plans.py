@@ -0,0 +1,91 @@
+# tools/check_query_plans.py
+"""
+EXPLAIN QUERY PLAN 迴歸檢查：列舉 TxQuery 各種條件組合，
+只要有任何一種對 [Transaction] 出現沒有限縮條件的 SCAN（含 SCAN t USING INDEX）就以 exit code 1 結束。
+
+KNOWN_SCANS 裡的條件（以及完全沒有條件）允許沿 idx_tx_date 走：這幾欄只有少數幾種值，
+索引幾乎不能縮小範圍，依日期序走到湊滿 LIMIT 筆為止反而最快。只要再加上其他條件就必須是 SEARCH。
+
+    python -m tools.check_query_plans [-v]
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import tempfile
+from pathlib import Path
+
+from data.db import init_db, get_conn
+from data.query import TxQuery, explain, full_scans
+
+# 每個 builder 條件一個套用函式
+FILTERS = {
+    "book": lambda q: q.book(1),
+    "account": lambda q: q.account(1),
+    "accounts": lambda q: q.account(1, 2),
+    "category": lambda q: q.category(1, subtree=False),
+    "subtree": lambda q: q.category(1),
+    "tag": lambda q: q.tag(1),
+    "tags_all": lambda q: q.tag(1, 2, match_all=True),
+    "member": lambda q: q.member(1),
+    "type": lambda q: q.type("expense"),
+    "currency": lambda q: q.currency("TWD", "JPY"),
+    "amount": lambda q: q.amount(10, 500),
+    "dates": lambda q: q.dates("2025-01-01", "2025-02-01"),
+}
+# 只由這些條件組成的查詢允許 SCAN（見上方說明）
+KNOWN_SCANS = {"member", "type", "currency"}
+
+MODIFIERS = {
+    "cursor": lambda q: q.after(("2025-01-15T00:00:00", 100)),
+    "asc": lambda q: q.ascending(),
+}
+
+
+def shapes():
+    names = list(FILTERS)
+    mods = list(MODIFIERS)
+    for r in range(len(names) + 1):
+        for combo in itertools.combinations(names, r):
+            for m in range(len(mods) + 1):
+                for mod_combo in itertools.combinations(mods, m):
+                    q = TxQuery()
+                    for n in combo:
+                        FILTERS[n](q)
+                    for n in mod_combo:
+                        MODIFIERS[n](q)
+                    yield "+".join(combo + mod_combo) or "(none)", set(combo) <= KNOWN_SCANS, q
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "plans.db"
+        init_db(path)
+        conn = get_conn(path)
+        bad = 0
+        known = 0
+        total = 0
+        for label, allowed, q in shapes():
+            total += 1
+            plan = explain(conn, q)
+            scans = full_scans(plan)
+            if scans and allowed:
+                known += 1
+                if args.verbose:
+                    print(f"known scan {label}: {scans}")
+            elif scans:
+                bad += 1
+                print(f"FULL SCAN  {label}: {scans}")
+            elif args.verbose:
+                print(f"ok         {label}: {plan}")
+        conn.close()
+
+    print(f"{total} shape(s) checked, {bad} full scan(s), {known} known scan(s)")
+    raise SystemExit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# tools/check_rate_asof.py
+"""
+RateIndex as-of 邊界：早於第一筆匯率的日期一律查不到（直接、反向、經 USD 三角），
+第一筆當天與之後取 <= 該日的最後一筆；convert_rows 查不到的列為 None。
+任何一項不符就以 exit code 1 結束。
+
+    python -m tools.check_rate_asof
+"""
+from __future__ import annotations
+from typing import Any, List, Optional, Tuple
+
+from data.rates import RateIndex
+
+# USD→TWD 從 2024-01-10 開始、USD→JPY 從 2024-02-01 開始
+RATES = [
+    ("2024-01-10", "USD", "TWD", 31.0),
+    ("2024-01-20", "USD", "TWD", 32.0),
+    ("2024-02-01", "USD", "JPY", 150.0),
+]
+
+# (src, dst, 日期, 預期 as-of)
+CASES: List[Tuple[str, str, str, Optional[Tuple[str, float]]]] = [
+    ("USD", "TWD", "2024-01-09", None),
+    ("TWD", "USD", "2024-01-09T23:59:59", None),
+    ("USD", "TWD", "2024-01-10", ("2024-01-10", 31.0)),
+    ("USD", "TWD", "2024-01-19", ("2024-01-10", 31.0)),
+    ("USD", "TWD", "2024-03-01", ("2024-01-20", 32.0)),
+    ("TWD", "USD", "2024-01-25", ("2024-01-20", 1 / 32.0)),
+    ("JPY", "TWD", "2024-01-25", None),  # JPY 腿還沒有匯率
+    ("JPY", "TWD", "2024-02-01", ("2024-01-20", 32.0 / 150.0)),
+]
+
+
+def main() -> None:
+    index = RateIndex(RATES)
+    problems: List[str] = []
+    for src, dst, date, expected in CASES:
+        got = index.as_of(src, dst, date)
+        ok = (got is None) if expected is None else (
+            got is not None and got[0] == expected[0] and abs(got[1] - expected[1]) < 1e-12)
+        if not ok:
+            problems.append(f"as_of({src}->{dst}, {date}) = {got}, expected {expected}")
+
+    rows: List[Any] = [
+        {"amount": 100, "currency": "USD", "date": "2024-01-01T12:00:00"},
+        {"amount": 100, "currency": "USD", "date": "2024-01-15T12:00:00"},
+    ]
+    converted = index.convert_rows(rows, "TWD")
+    if converted != [None, 31]:  # 1.00 USD → 31 TWD
+        problems.append(f"convert_rows = {converted}, expected [None, 31]")
+
+    for p in problems:
+        print(p)
+    print(f"{len(CASES) + 1} case(s) checked, {len(problems)} problem(s)")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
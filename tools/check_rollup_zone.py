@@ -0,0 +1,99 @@
+# tools/check_rollup_zone.py
+"""
+彙總表以本地時區切日；換時區後 init_db 要把彙總表校正回來（data.rollups.sync_zone）。
+在台北時區建帳並寫入跨 UTC 午夜的交易，換成紐約時區後：
+  - 不經 init_db 直接改 / 刪交易，彙總表應該會漂移（確認情境真的重現得出來）；
+  - 經過 init_db 再改 / 刪，彙總表要和全量重算一致，且 Settings 記下新的時區指紋。
+任何一項不符就以 exit code 1 結束。
+
+    python -m tools.check_rollup_zone
+"""
+from __future__ import annotations
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from data.conn import ConnectionManager
+from data.dao import TxDao
+from data.db import get_conn, init_db
+from data.rollups import ZONE_KEY, verify_rollups, zone_fingerprint
+from data.seed import seed_if_empty
+
+# 台北 00:30 / 07:59、紐約前一天 11:30 / 18:59；兩邊落在不同的日（月初那筆還跨月）
+_DATES = ["2024-02-29T16:30:00", "2024-03-01T23:59:00", "2024-05-31T16:30:00", "2024-06-15T02:00:00"]
+
+_WRITES = [
+    "UPDATE [Transaction] SET amount = amount + 1 WHERE id = (SELECT MIN(id) FROM [Transaction])",
+    "UPDATE [Transaction] SET date = '2024-07-01T00:00:00' WHERE id = (SELECT MIN(id) + 1 FROM [Transaction])",
+    "DELETE FROM [Transaction] WHERE id = (SELECT MAX(id) FROM [Transaction])",
+]
+
+
+def _set_tz(name: str) -> None:
+    os.environ["TZ"] = name
+    time.tzset()
+
+
+def _drifted(path: Path) -> bool:
+    conn = get_conn(path)
+    try:
+        with conn:
+            for sql in _WRITES:
+                conn.execute(sql)
+        return any(verify_rollups(conn).values())
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    problems: List[str] = []
+    saved_tz = os.environ.get("TZ")
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "zone.db"
+        control = Path(d) / "control.db"
+        try:
+            _set_tz("Asia/Taipei")
+            init_db(path)
+            seed_if_empty(path)
+            TxDao(ConnectionManager(path)).insert_many([{
+                "book_id": 1, "account_id": 1, "tx_type": "expense", "amount": 100 + i,
+                "currency": "TWD", "category_id": 1, "member_id": 1, "merchant": None, "note": None,
+                "date": date, "updated_at": date, "device_id": "zone",
+            } for i, date in enumerate(_DATES)])
+            init_db(path)  # 記下台北的指紋
+            src, dst = get_conn(path), get_conn(control)
+            src.backup(dst)  # WAL 模式下直接複製檔案會漏掉 -wal 裡的資料
+            src.close()
+            dst.close()
+
+            _set_tz("America/New_York")
+            if not _drifted(control):
+                problems.append("control: no drift without init_db; the check would not catch a regression")
+
+            init_db(path)
+            if _drifted(path):
+                problems.append("after init_db: rollups differ from a full rebuild")
+            conn = get_conn(path)
+            try:
+                row = conn.execute("SELECT value FROM Settings WHERE key=?", (ZONE_KEY,)).fetchone()
+                if row is None or row[0] != zone_fingerprint(conn):
+                    problems.append(f"Settings[{ZONE_KEY}] = {row and row[0]!r}, expected {zone_fingerprint(conn)!r}")
+            finally:
+                conn.close()
+        finally:
+            if saved_tz is None:
+                os.environ.pop("TZ", None)
+            else:
+                os.environ["TZ"] = saved_tz
+            time.tzset()
+
+    for p in problems:
+        print(p)
+    print(f"{len(problems)} problem(s)")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# tools/check_tag_index.py
+"""
+TagIndex 增量更新：在 --rows 筆有標籤的交易上逐一做單筆編輯
+（改金額、加標籤、新標籤名、拿掉全部標籤、刪除、新增），每次之後：
+  1) get_tag_index() 不得呼叫 TagIndex.load（只套用 ChangeLog 上次之後的列）
+  2) 結果與全量重建的索引相同（標籤名、各標籤 bitmap、事實、uid）
+任何一項不符就以 exit code 1 結束；另外印出全量重建與增量更新的時間。
+
+    python -m tools.check_tag_index [--rows 100000]
+"""
+from __future__ import annotations
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+from data.conn import ConnectionManager
+from data.dao import TagDao, TxDao
+from data.db import init_db
+from data.seed import seed_if_empty
+from data.tagindex import TagIndex, get_tag_index
+
+
+def _tx(i: int) -> dict:
+    return {
+        "book_id": 1, "account_id": 1, "tx_type": "expense" if i % 7 else "income",
+        "amount": 10 + i % 5000, "currency": "TWD", "category_id": 1, "member_id": None,
+        "merchant": f"shop-{i % 300}", "note": "",
+        "date": f"20{15 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00",
+        "updated_at": "2025-01-01T00:00:00", "device_id": "check",
+    }
+
+
+def _snapshot(index: TagIndex) -> Tuple[Any, ...]:
+    bitmaps = {tag_id: list(bm) for tag_id, bm in index.bitmaps.items()}
+    return index.names, bitmaps, index.facts, index.uids
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+    rnd = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as d:
+        path = Path(d) / "tags.db"
+        init_db(path)
+        seed_if_empty(path)
+        cm = ConnectionManager(path)
+        txdao, tagdao = TxDao(cm), TagDao(cm)
+        n, first, _last = txdao.insert_many(_tx(i) for i in range(args.rows))
+        conn = cm.writer()
+        with conn:
+            conn.executemany("INSERT INTO Tag(name) VALUES(?)", [(f"t{i}",) for i in range(20)])
+            tag_ids = [r[0] for r in conn.execute("SELECT id FROM Tag")]
+            conn.executemany(
+                "INSERT OR IGNORE INTO TransactionTag(tx_id, tag_id) VALUES(?, ?)",
+                sorted((tx_id, rnd.choice(tag_ids)) for tx_id in range(first, first + n) for _ in range(2)),
+            )
+
+        t0 = time.perf_counter()
+        get_tag_index(cm)
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        tagged = rnd.sample(range(first, first + n), 6)
+        edits: List[Tuple[str, Callable[[], Any]]] = [
+            ("update amount", lambda: txdao.update(tagged[0], {"amount": 123456})),
+            ("add tag", lambda: tagdao.set_tags(tagged[1], tagdao.of(tagged[1]) + ["t19"])),
+            ("new tag name", lambda: tagdao.set_tags(tagged[2], ["brand-new"])),
+            ("remove all tags", lambda: tagdao.set_tags(tagged[3], [])),
+            ("delete", lambda: txdao.delete(tagged[4])),
+            ("insert tagged", lambda: tagdao.set_tags(txdao.insert_many([_tx(7)])[1], ["t0", "brand-new"])),
+        ]
+
+        loads = []
+        original = TagIndex.load
+        TagIndex.load = classmethod(lambda cls, c: loads.append(1) or original(c))
+        problems = 0
+        try:
+            for label, edit in edits:
+                edit()
+                before = len(loads)
+                t0 = time.perf_counter()
+                index = get_tag_index(cm)
+                ms = (time.perf_counter() - t0) * 1000
+                full = len(loads) > before
+                with cm.reader() as rc:
+                    same = _snapshot(index) == _snapshot(original(rc))
+                ok = same and not full
+                problems += not ok
+                print(f"{label:16} {ms:8.2f} ms  {'FULL RELOAD' if full else 'incremental'}"
+                      f"  {'ok' if same else 'MISMATCH'}")
+        finally:
+            TagIndex.load = original
+        cm.close()
+
+    print(f"full load of {n:,} tagged transactions {load_ms:.1f} ms")
+    print(f"{len(edits)} edit(s) checked, {problems} problem(s)")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# tools/load_sync.py
+"""
+同步伺服器壓力測試：數百台模擬裝置同時對 server 推送 / 拉取。
+
+    python -m tools.load_sync [--devices 200] [--batches 5] [--batch 100] [--books 20]
+                              [--edit 0.1] [--pull-pages 2] [--url http://host:port] [--json runs.jsonl]
+
+每台裝置一條 keep-alive 連線，推 --batches 個請求、每個 --batch 筆與 TxDao 寫入同形的 change
+（約 --edit 比例是改自己先前推過的交易），推完再從頭拉 --pull-pages 頁。
+沒給 --url 時在暫存目錄起一個行程內 SyncServer（與裝置共用事件迴圈，數字偏保守）。
+回報 push / pull 的 p50 / p99 延遲、每秒筆數與上下行 bytes；--json 會把結果附加成一行 JSON，
+方便追蹤同步擴充性的變化。
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from core.money import to_minor
+from domain.sync.codec import ROW_FIELDS, SyncError, decode, encode
+from domain.sync.merge import make_change
+from server import SyncServer
+
+SHOPS = ["全聯福利中心", "7-ELEVEN", "Starbucks", "家樂福", "麥當勞", "屈臣氏", "FamilyMart", "IKEA"]
+CATEGORIES = [["餐飲", "早餐"], ["餐飲", "午餐"], ["交通", ""], ["購物", ""], ["居家", ""]]
+
+
+class _Client:
+    """單一裝置的 HTTP/1.1 keep-alive 連線。"""
+    def __init__(self, host: str, port: int) -> None:
+        self.host, self.port = host, port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.bytes_up = 0
+        self.bytes_down = 0
+
+    async def request(self, kind: str, msg: Dict[str, Any]) -> Dict[str, Any]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = encode(msg)
+        self.writer.write(
+            f"POST /sync/{kind} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/octet-stream\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _sep, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length)
+        self.bytes_up += len(body)
+        self.bytes_down += len(data)
+        if status != 200:
+            raise SyncError(f"{kind}: HTTP {status} {data[:200]!r}")
+        return decode(data)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+
+def _row(rnd: random.Random, book_id: int) -> Dict[str, Any]:
+    month = rnd.randint(0, 23)
+    return {
+        "book_id": book_id, "account_id": 1, "type": "expense",
+        "amount": to_minor(rnd.randint(10, 3000), "TWD"), "currency": "TWD",
+        "category": rnd.choice(CATEGORIES), "member_id": None,
+        "merchant": f"{rnd.choice(SHOPS)} {rnd.randint(1, 400)}號店", "note": "",
+        "date": f"{2024 + month // 12}-{month % 12 + 1:02d}-{rnd.randint(1, 28):02d}T12:00:00",
+        "tags": [], "attachments": [],
+    }
+
+
+class _Device:
+    def __init__(self, n: int, books: int, seed: int) -> None:
+        self.name = f"load-{n:04d}"
+        self.book_id = n % books + 1
+        self.rnd = random.Random(seed + n)
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self._ms = int(time.time() * 1000)
+        self._counter = 0
+
+    def _tick(self) -> int:
+        self._counter += 1
+        return (self._ms << 16) | self._counter
+
+    def changes(self, n: int, edit: float) -> List[Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        for _ in range(n):
+            clock = (self._tick(), self.name)
+            if self.rows and self.rnd.random() < edit:
+                uid = self.rnd.choice(list(self.rows))
+                self.rows[uid]["note"] = f"edited {self._counter}"
+            else:
+                uid = f"{self._ms:012x}{self.rnd.getrandbits(80):020x}"
+                self.rows[uid] = _row(self.rnd, self.book_id)
+            out[uid] = make_change(uid, dict(self.rows[uid]), {f: clock for f in ROW_FIELDS})
+        return list(out.values())
+
+
+def _pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+
+
+async def _run_device(
+    dev: _Device, host: str, port: int, args: argparse.Namespace, start: asyncio.Event,
+    push_ms: List[float], pull_ms: List[float], counts: Dict[str, int],
+) -> Tuple[int, int]:
+    client = _Client(host, port)
+    await start.wait()
+    try:
+        for _ in range(args.batches):
+            changes = dev.changes(args.batch, args.edit)
+            t0 = time.perf_counter()
+            resp = await client.request("push", {"device": dev.name, "changes": changes})
+            push_ms.append((time.perf_counter() - t0) * 1000)
+            counts["pushed"] += len(changes)
+            counts["accepted"] += int(resp["accepted"])
+        since: Any = 0
+        for _ in range(args.pull_pages):
+            t0 = time.perf_counter()
+            resp = await client.request("pull", {"device": dev.name, "since": since, "limit": args.batch})
+            pull_ms.append((time.perf_counter() - t0) * 1000)
+            counts["pulled"] += len(resp["changes"])
+            since = resp["next"]
+            if not resp.get("more"):
+                break
+    finally:
+        await client.close()
+    return client.bytes_up, client.bytes_down
+
+
+async def _load(args: argparse.Namespace, host: str, port: int) -> Dict[str, Any]:
+    devices = [_Device(i, args.books, args.seed) for i in range(args.devices)]
+    push_ms: List[float] = []
+    pull_ms: List[float] = []
+    counts = {"pushed": 0, "accepted": 0, "pulled": 0}
+    start = asyncio.Event()
+    tasks = [
+        asyncio.create_task(_run_device(d, host, port, args, start, push_ms, pull_ms, counts))
+        for d in devices
+    ]
+    await asyncio.sleep(0)
+    t0 = time.perf_counter()
+    start.set()
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    return {
+        "devices": args.devices, "books": args.books, "batches": args.batches, "batch": args.batch,
+        "edit": args.edit, "elapsed_s": round(elapsed, 3),
+        "pushed": counts["pushed"], "accepted": counts["accepted"], "pulled": counts["pulled"],
+        "push_p50_ms": round(_pct(push_ms, 50), 2), "push_p99_ms": round(_pct(push_ms, 99), 2),
+        "pull_p50_ms": round(_pct(pull_ms, 50), 2), "pull_p99_ms": round(_pct(pull_ms, 99), 2),
+        "rows_per_s": round((counts["pushed"] + counts["pulled"]) / elapsed, 1),
+        "push_rows_per_s": round(counts["pushed"] / elapsed, 1),
+        "bytes_up": sum(u for u, _d in results), "bytes_down": sum(d for _u, d in results),
+    }
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.url:
+        parts = urlsplit(args.url)
+        return await _load(args, parts.hostname or "127.0.0.1", parts.port or 80)
+    with tempfile.TemporaryDirectory() as d:
+        server = SyncServer(Path(d), port=0)
+        await server.start()
+        try:
+            return await _load(args, server.host, server.port)
+        finally:
+            await server.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--devices", type=int, default=200)
+    ap.add_argument("--batches", type=int, default=5)
+    ap.add_argument("--batch", type=int, default=100)
+    ap.add_argument("--books", type=int, default=20)
+    ap.add_argument("--edit", type=float, default=0.1, help="改既有交易（而非新增）的比例")
+    ap.add_argument("--pull-pages", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--url", help="已在跑的伺服器（python -m server）；省略則起行程內伺服器")
+    ap.add_argument("--json", type=Path, help="把結果附加成一行 JSON")
+    args = ap.parse_args()
+
+    result = asyncio.run(_main(args))
+    print(f"{result['devices']} devices × {result['batches']} × {result['batch']} rows, "
+          f"{result['books']} books  in {result['elapsed_s']:.2f} s")
+    print(f"push  p50={result['push_p50_ms']:8.2f} ms  p99={result['push_p99_ms']:8.2f} ms  "
+          f"rows={result['pushed']:,} (accepted {result['accepted']:,})")
+    print(f"pull  p50={result['pull_p50_ms']:8.2f} ms  p99={result['pull_p99_ms']:8.2f} ms  rows={result['pulled']:,}")
+    print(f"throughput {result['rows_per_s']:,.0f} rows/s (push {result['push_rows_per_s']:,.0f})  up={result['bytes_up']:,} B  down={result['bytes_down']:,} B")
+    if args.json:
+        with args.json.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(result, ts=time.strftime("%Y-%m-%dT%H:%M:%S")), ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# ui/widgets/sparkline.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+
+from kivy.graphics import Color, Ellipse, Line
+from kivy.metrics import dp
+from kivy.properties import ListProperty
+from kivy.uix.widget import Widget
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.label import MDLabel
+
+from core.i18n import t
+from core.money import format_minor
+from data.dao import ItemDao
+from data.executor import get_executor
+
+# 迷你走勢圖最多畫幾個點（最近的）
+SPARK_POINTS = 60
+
+
+def spark_points(values: Sequence[float], x: float, y: float, w: float, h: float) -> List[float]:
+    """值 → Line 的 [x0, y0, x1, y1, ...]；全部相同時畫在中線。"""
+    if not values:
+        return []
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1
+    step = w / max(1, len(values) - 1)
+    pts: List[float] = []
+    for i, v in enumerate(values):
+        pts += [x + i * step, y + (h / 2 if hi == lo else (v - lo) / span * h)]
+    return pts
+
+
+class Sparkline(Widget):
+    """沒有座標軸的小折線圖；最後一點加一個圓點。"""
+    values = ListProperty([])
+    color = ListProperty([0.12, 0.65, 0.25, 1])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bind(values=self._redraw, size=self._redraw, pos=self._redraw, color=self._redraw)
+
+    def _redraw(self, *_):
+        self.canvas.clear()
+        pad = dp(3)
+        pts = spark_points(self.values, self.x + pad, self.y + pad, self.width - 2 * pad, self.height - 2 * pad)
+        if not pts:
+            return
+        with self.canvas:
+            Color(*self.color)
+            if len(pts) >= 4:
+                Line(points=pts, width=dp(1.2))
+            r = dp(2.5)
+            Ellipse(pos=(pts[-2] - r, pts[-1] - r), size=(2 * r, 2 * r))
+
+
+class PriceTrend(MDBoxLayout):
+    """
+    品項價格走勢：show(品名[, 店家]) 在 DB 執行緒查 ItemDao，回來後畫 Sparkline 並列出最近 / 最低 / 最高價。
+    找不到品項時收起來（高度 0）。
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault("orientation", "horizontal")
+        kwargs.setdefault("spacing", dp(8))
+        super().__init__(size_hint_y=None, height=0, opacity=0, **kwargs)
+        self.spark = Sparkline(size_hint_x=None, width=dp(96))
+        self.label = MDLabel(theme_text_color="Secondary", font_style="Caption")
+        self.add_widget(self.spark)
+        self.add_widget(self.label)
+        self._key = f"price_trend.{id(self)}"
+
+    def show(self, name: str, merchant: Optional[str] = None) -> None:
+        if not name.strip():
+            self._render(None)
+            return
+        get_executor().call(self.load, name, merchant, key=self._key, on_result=self._render)
+
+    @staticmethod
+    def load(name: str, merchant: Optional[str] = None, dao: Optional[ItemDao] = None) -> Optional[Dict[str, Any]]:
+        """{"name", "merchant", "prices", "last", "low", "high", "count"}；找不到品項時 None（在 DB 執行緒上跑）。"""
+        dao = dao or ItemDao()
+        item = dao.by_name(name) or next(iter(dao.find(name, limit=1)), None)
+        if item is None:
+            return None
+        points = dao.history(item["id"], merchant, limit=SPARK_POINTS) if merchant else []
+        if not points:
+            merchant = None
+            points = dao.history(item["id"], limit=SPARK_POINTS)
+        if not points:
+            return None
+        prices = [p["price"] for p in points]
+        return {"name": item["name"], "merchant": merchant, "prices": prices,
+                "last": prices[-1], "low": min(prices), "high": max(prices), "count": len(prices)}
+
+    def _render(self, trend: Optional[Dict[str, Any]]) -> None:
+        if trend is None:
+            self.height, self.opacity = 0, 0
+            self.spark.values = []
+            return
+        self.spark.values = trend["prices"]
+        self.label.text = t(
+            "PRICE_TREND", name=trend["name"],
+            last=format_minor(trend["last"], "TWD"), low=format_minor(trend["low"], "TWD"),
+            high=format_minor(trend["high"], "TWD"), count=trend["count"],
+        )
+        self.height, self.opacity = dp(40), 1
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Optional
+
+from kivy.core.image import Image as CoreImage
+from kivy.graphics.texture import Texture
+from kivy.properties import StringProperty
+from kivy.uix.image import Image
+from kivy.uix.scrollview import ScrollView
+from kivymd.uix.list import ILeftBody
+
+from data.thumbs import get_thumbnails
+
+# 同時留在 GPU 的縮圖數；256px JPEG 一張約 256KB 貼圖
+TEXTURE_CACHE_SIZE = 96
+
+
+class TextureCache:
+    """縮圖貼圖的 LRU：列表來回捲動時不重複讀檔 / 上傳貼圖，超過上限丟最久沒用的。"""
+    def __init__(self, capacity: int = TEXTURE_CACHE_SIZE):
+        self.capacity = capacity
+        self._items: "OrderedDict[str, Texture]" = OrderedDict()
+
+    def get(self, ref: str) -> Optional[Texture]:
+        tex = self._items.get(ref)
+        if tex is not None:
+            self._items.move_to_end(ref)
+        return tex
+
+    def load(self, ref: str, path) -> Optional[Texture]:
+        try:
+            tex = CoreImage(str(path)).texture
+        except Exception:
+            return None
+        self._items[ref] = tex
+        self._items.move_to_end(ref)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+        return tex
+
+
+textures = TextureCache()
+
+
+class Thumb(Image):
+    """
+    附件縮圖（ref = Attachment.file_path）。
+    在 ScrollView 裡時捲進可視範圍才要縮圖；縮圖還沒做好就先空白，做好後經 Clock 補上。
+    """
+    ref = StringProperty("")
+
+    def __init__(self, **kwargs):
+        self._requested = ""
+        self._scroll: Optional[ScrollView] = None
+        super().__init__(**kwargs)
+        self.fit_mode = "cover"
+        self.bind(parent=self._find_scroll, pos=self._maybe_load)
+
+    def on_ref(self, *_):
+        self._requested = ""
+        self.texture = textures.get(self.ref) if self.ref else None
+        self._maybe_load()
+
+    def _find_scroll(self, *_):
+        if self._scroll is not None:
+            self._scroll.unbind(scroll_y=self._maybe_load, scroll_x=self._maybe_load)
+        w = self.parent
+        while w is not None and not isinstance(w, ScrollView):
+            w = w.parent
+        self._scroll = w
+        if w is not None:
+            w.bind(scroll_y=self._maybe_load, scroll_x=self._maybe_load)
+        self._maybe_load()
+
+    def _visible(self) -> bool:
+        if self.parent is None:
+            return False
+        if self._scroll is None:
+            return True
+        x, y = self.to_window(*self.pos)
+        sx, sy = self._scroll.to_window(*self._scroll.pos)
+        return (y + self.height > sy and y < sy + self._scroll.height
+                and x + self.width > sx and x < sx + self._scroll.width)
+
+    def _maybe_load(self, *_):
+        ref = self.ref
+        if not ref or self._requested == ref or self.texture is not None or not self._visible():
+            return
+        self._requested = ref
+        path = get_thumbnails().ensure(ref, on_ready=self._on_ready)
+        if path is not None:
+            self._on_ready(ref, path)
+
+    def _on_ready(self, ref: str, path):
+        if path is None or ref != self.ref:
+            return  # 失敗，或此 widget 已被重複利用在別筆資料上
+        self.texture = textures.get(ref) or textures.load(ref, path)
+
+
+class ThumbLeftWidget(ILeftBody, Thumb):
+    """MDList 項目左側的縮圖。"""